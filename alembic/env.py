@@ -24,6 +24,8 @@ from drug_search.infrastructure.database.models.drug import *  # noqa
 from drug_search.infrastructure.database.models.user import *  # noqa
 from drug_search.infrastructure.database.models.types import *  # noqa
 from drug_search.infrastructure.database.models.payment import *  # noqa
+from drug_search.infrastructure.database.models.llm import *  # noqa
+from drug_search.infrastructure.database.models.pubmed import *  # noqa
 from drug_search.infrastructure.database import *  # noqa
 
 target_metadata = IDMixin.metadata
@@ -0,0 +1,39 @@
+"""llm response cache
+
+Revision ID: a8d3f6c1b92e
+Revises: f5c2a8e1d7b3
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3f6c1b92e'
+down_revision = 'f5c2a8e1d7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('llm_response_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False, comment='sha256 запроса'),
+    sa.Column('prompt_name', sa.String(length=100), nullable=False, comment='название промпта'),
+    sa.Column('prompt_hash', sa.String(length=64), nullable=False, comment='sha256 текста промпта'),
+    sa.Column('response', sa.Text(), nullable=False, comment='сырой ответ нейронки'),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True, comment='срок жизни, NULL — бессрочно'),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_llm_response_cache_prompt_name'), 'llm_response_cache', ['prompt_name'], unique=False)
+    op.create_index(op.f('ix_llm_response_cache_expires_at'), 'llm_response_cache', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_llm_response_cache_expires_at'), table_name='llm_response_cache')
+    op.drop_index(op.f('ix_llm_response_cache_prompt_name'), table_name='llm_response_cache')
+    op.drop_table('llm_response_cache')
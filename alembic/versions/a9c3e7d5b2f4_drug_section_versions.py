@@ -0,0 +1,32 @@
+"""drug section versions
+
+Revision ID: a9c3e7d5b2f4
+Revises: d2f8b5a3c6e1
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c3e7d5b2f4'
+down_revision = 'd2f8b5a3c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'drugs',
+        sa.Column(
+            'section_versions',
+            sa.JSON(),
+            nullable=True,
+            comment='версии разделов (DrugSectionVersionSchema) для инвалидации документа / кэша по разделам'
+        )
+    )
+
+
+def downgrade():
+    op.drop_column('drugs', 'section_versions')
@@ -0,0 +1,37 @@
+"""trgm index on lower(synonym)
+
+Revision ID: b1f3c2a9d4e7
+Revises: 6342f1a2d7d7
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f3c2a9d4e7'
+down_revision = '6342f1a2d7d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # старый GIN индекс построен на сыром synonym и не используется запросом по lower(synonym)
+    op.drop_index('trgm_drug_synonyms', table_name='drug_synonyms', postgresql_using='gin',
+                  postgresql_ops={'synonym': 'gin_trgm_ops'})
+    op.create_index(
+        'trgm_drug_synonyms_lower',
+        'drug_synonyms',
+        [sa.literal_column('lower(synonym) gist_trgm_ops')],
+        unique=False,
+        postgresql_using='gist'
+    )
+
+
+def downgrade():
+    op.drop_index('trgm_drug_synonyms_lower', table_name='drug_synonyms', postgresql_using='gist')
+    op.create_index('trgm_drug_synonyms', 'drug_synonyms', ['synonym'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'synonym': 'gin_trgm_ops'})
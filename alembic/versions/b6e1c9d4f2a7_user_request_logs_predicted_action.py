@@ -0,0 +1,33 @@
+"""user_request_logs predicted_action
+
+Revision ID: b6e1c9d4f2a7
+Revises: a8d3f6c1b92e
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1c9d4f2a7'
+down_revision = 'a8d3f6c1b92e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # колонка партиционированной таблицы — сразу во всех партициях
+    op.add_column(
+        'user_request_logs',
+        sa.Column(
+            'predicted_action',
+            sa.String(length=32),
+            nullable=True,
+            comment='действие от нейронки (predict_user_action), разметка для IntentClassifier'
+        )
+    )
+
+
+def downgrade():
+    op.drop_column('user_request_logs', 'predicted_action')
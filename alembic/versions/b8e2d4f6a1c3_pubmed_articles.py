@@ -0,0 +1,46 @@
+"""pubmed articles
+
+Revision ID: b8e2d4f6a1c3
+Revises: f1d6b3a8c2e9
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2d4f6a1c3'
+down_revision = 'f1d6b3a8c2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'pubmed_articles',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('pubmed_id', sa.String(length=16), nullable=False, comment='PMID'),
+        sa.Column('doi', sa.String(length=255), nullable=False),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('abstract', sa.Text(), nullable=True),
+        sa.Column('authors', sa.ARRAY(sa.Text()), nullable=False),
+        sa.Column('journal', sa.Text(), nullable=False),
+        sa.Column('publication_date', sa.Date(), nullable=False),
+        sa.Column('results', sa.Text(), nullable=True),
+        sa.Column('conclusion', sa.Text(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False,
+                  comment='время скачивания из PubMed'),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False,
+                  comment='последнее попадание в поиск (срок хранения)'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('pubmed_id')
+    )
+    op.create_index(op.f('ix_pubmed_articles_doi'), 'pubmed_articles', ['doi'], unique=False)
+    op.create_index(op.f('ix_pubmed_articles_last_used_at'), 'pubmed_articles', ['last_used_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pubmed_articles_last_used_at'), table_name='pubmed_articles')
+    op.drop_index(op.f('ix_pubmed_articles_doi'), table_name='pubmed_articles')
+    op.drop_table('pubmed_articles')
@@ -0,0 +1,32 @@
+"""drug researches watermark
+
+Revision ID: c3f7a9e5d1b6
+Revises: b8e2d4f6a1c3
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a9e5d1b6'
+down_revision = 'b8e2d4f6a1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'drugs',
+        sa.Column(
+            'researches_searched_at',
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment='последний поиск исследований в PubMed'
+        )
+    )
+
+
+def downgrade():
+    op.drop_column('drugs', 'researches_searched_at')
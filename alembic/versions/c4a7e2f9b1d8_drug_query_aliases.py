@@ -0,0 +1,48 @@
+"""drug query aliases
+
+Revision ID: c4a7e2f9b1d8
+Revises: b6e1c9d4f2a7
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e2f9b1d8'
+down_revision = 'b6e1c9d4f2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_table('drug_query_aliases',
+    sa.Column('query', sa.String(length=255), nullable=False, comment='нормализованный запрос юзера'),
+    sa.Column('status', sa.String(length=16), nullable=False, comment='вердикт нейронки: exist / not exist'),
+    sa.Column('drug_id', sa.UUID(), nullable=True, comment='препарат в базе на момент проверки'),
+    sa.Column('drug_name', sa.String(length=100), nullable=False, comment='ДВ на англ от нейронки'),
+    sa.Column('drug_name_ru', sa.String(length=100), nullable=False, comment='ДВ на русском от нейронки'),
+    sa.Column('danger_classification',
+              postgresql.ENUM('SAFE', 'PREMIUM_NEED', 'DANGER', name='danger_classification', create_type=False),
+              nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True,
+              comment='срок жизни отрицательного вердикта, NULL — бессрочно'),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['drug_id'], ['drugs.id'], name='fk_drug_query_aliases_drug_id', ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('query')
+    )
+    op.create_index(op.f('ix_drug_query_aliases_expires_at'), 'drug_query_aliases', ['expires_at'], unique=False)
+    op.create_index('trgm_drug_query_aliases', 'drug_query_aliases', ['query'], unique=False,
+                    postgresql_using='gist', postgresql_ops={'query': 'gist_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('trgm_drug_query_aliases', table_name='drug_query_aliases', postgresql_using='gist')
+    op.drop_index(op.f('ix_drug_query_aliases_expires_at'), table_name='drug_query_aliases')
+    op.drop_table('drug_query_aliases')
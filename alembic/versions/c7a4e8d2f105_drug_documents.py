@@ -0,0 +1,35 @@
+"""drug documents
+
+Revision ID: c7a4e8d2f105
+Revises: b1f3c2a9d4e7
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a4e8d2f105'
+down_revision = 'b1f3c2a9d4e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('drug_documents',
+    sa.Column('drug_id', sa.UUID(), nullable=False),
+    sa.Column('document', sa.LargeBinary(), nullable=False, comment='сериализованный DrugSchema (JSON)'),
+    sa.Column('etag', sa.String(length=64), nullable=False, comment='хэш документа'),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False, comment='номер пересборки'),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['drug_id'], ['drugs.id'], name='fk_drug_documents_drug_id', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('drug_id')
+    )
+
+
+def downgrade():
+    op.drop_table('drug_documents')
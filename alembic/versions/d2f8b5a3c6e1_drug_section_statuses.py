@@ -0,0 +1,35 @@
+"""drug section statuses
+
+Revision ID: d2f8b5a3c6e1
+Revises: c4a7e2f9b1d8
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f8b5a3c6e1'
+down_revision = 'c4a7e2f9b1d8'
+branch_labels = None
+depends_on = None
+
+SECTION_STATUS_COLUMNS = (
+    'dosages_status',
+    'analogs_status',
+    'metabolism_status',
+    'pathways_status',
+    'combinations_status',
+)
+
+
+def upgrade():
+    # существующие препараты созданы целиком — все разделы готовы
+    for column in SECTION_STATUS_COLUMNS:
+        op.add_column('drugs', sa.Column(column, sa.String(length=16), server_default='ready', nullable=False))
+
+
+def downgrade():
+    for column in SECTION_STATUS_COLUMNS:
+        op.drop_column('drugs', column)
@@ -0,0 +1,33 @@
+"""token ledger cursors
+
+Revision ID: e3b9d1f4a6c2
+Revises: c7a4e8d2f105
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d1f4a6c2'
+down_revision = 'c7a4e8d2f105'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_ledger_cursors',
+    sa.Column('name', sa.String(length=50), nullable=False, comment='название ledger'),
+    sa.Column('last_entry_id', sa.String(length=64), server_default='0-0', nullable=False, comment='id записи Redis stream'),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute("INSERT INTO token_ledger_cursors (id, name) VALUES (gen_random_uuid(), 'token_ledger')")
+
+
+def downgrade():
+    op.drop_table('token_ledger_cursors')
@@ -0,0 +1,40 @@
+"""llm usage
+
+Revision ID: f1d6b3a8c2e9
+Revises: a9c3e7d5b2f4
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1d6b3a8c2e9'
+down_revision = 'a9c3e7d5b2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'llm_usage',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('feature', sa.String(length=32), nullable=False, comment='функция приложения (LLM_FEATURES)'),
+        sa.Column('prompt_name', sa.String(length=100), nullable=False, comment='название промпта'),
+        sa.Column('prompt_hash', sa.String(length=64), nullable=False, comment='sha256 текста промпта'),
+        sa.Column('model', sa.String(length=32), nullable=False, comment='модель нейронки'),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False, comment='токены запроса'),
+        sa.Column('cached_tokens', sa.Integer(), nullable=False, comment='токены запроса из кэша промптов DeepSeek'),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False, comment='токены ответа'),
+        sa.Column('latency_ms', sa.Integer(), nullable=False, comment='время запроса к нейронке'),
+        sa.Column('outcome', sa.String(length=16), nullable=False, comment='исход запроса'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_created_at'), 'llm_usage', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_llm_usage_created_at'), table_name='llm_usage')
+    op.drop_table('llm_usage')
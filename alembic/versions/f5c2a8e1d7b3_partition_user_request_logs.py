@@ -0,0 +1,80 @@
+"""partition user_request_logs by month
+
+Revision ID: f5c2a8e1d7b3
+Revises: e3b9d1f4a6c2
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c2a8e1d7b3'
+down_revision = 'e3b9d1f4a6c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE user_request_logs RENAME TO user_request_logs_old")
+    op.execute("ALTER INDEX user_request_logs_pkey RENAME TO user_request_logs_old_pkey")
+
+    op.execute("""
+        CREATE TABLE user_request_logs (
+            id UUID NOT NULL,
+            user_id UUID NOT NULL REFERENCES users (id),
+            user_query VARCHAR NOT NULL,
+            used_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, used_at)
+        ) PARTITION BY RANGE (used_at)
+    """)
+    op.execute("COMMENT ON COLUMN user_request_logs.user_query IS 'запрос пользователя'")
+    op.execute("CREATE INDEX ix_user_request_logs_user_id_used_at ON user_request_logs (user_id, used_at DESC)")
+    op.execute("CREATE TABLE user_request_logs_default PARTITION OF user_request_logs DEFAULT")
+
+    # месячные партиции: от самого старого лога до 2 месяцев вперед
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start DATE := COALESCE(
+                (SELECT date_trunc('month', MIN(used_at))::date FROM user_request_logs_old),
+                date_trunc('month', now())::date
+            );
+        BEGIN
+            WHILE month_start <= (date_trunc('month', now()) + INTERVAL '2 months')::date LOOP
+                EXECUTE format(
+                    'CREATE TABLE user_request_logs_p%s PARTITION OF user_request_logs FOR VALUES FROM (%L) TO (%L)',
+                    to_char(month_start, 'YYYYMM'),
+                    month_start,
+                    (month_start + INTERVAL '1 month')::date
+                );
+                month_start := (month_start + INTERVAL '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute("""
+        INSERT INTO user_request_logs (id, user_id, user_query, used_at)
+        SELECT id, user_id, user_query, used_at FROM user_request_logs_old
+    """)
+    op.execute("DROP TABLE user_request_logs_old")
+
+
+def downgrade():
+    op.execute("ALTER TABLE user_request_logs RENAME TO user_request_logs_partitioned")
+    op.execute("""
+        CREATE TABLE user_request_logs (
+            user_id UUID NOT NULL REFERENCES users (id),
+            user_query VARCHAR NOT NULL,
+            used_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            id UUID NOT NULL,
+            CONSTRAINT user_request_logs_pkey_plain PRIMARY KEY (id)
+        )
+    """)
+    op.execute("COMMENT ON COLUMN user_request_logs.user_query IS 'запрос пользователя'")
+    op.execute("""
+        INSERT INTO user_request_logs (id, user_id, user_query, used_at)
+        SELECT id, user_id, user_query, used_at FROM user_request_logs_partitioned
+    """)
+    op.execute("DROP TABLE user_request_logs_partitioned CASCADE")
+    op.execute("ALTER INDEX user_request_logs_pkey_plain RENAME TO user_request_logs_pkey")
@@ -0,0 +1,125 @@
+"""
+Бенчмарк триграммного поиска по синонимам.
+
+Сравнивает старый запрос (similarity(lower(synonym), ...) > 0.62 — seq scan)
+с новым (lower(synonym) % ... + ORDER BY <-> по GiST индексу) на 10k / 100k / 1M синонимов.
+
+Данные генерируются во временной таблице bench_drug_synonyms, рабочие таблицы не трогаются.
+
+Запуск:
+    python -m benchmarks.trigram_search [--sizes 10000 100000 1000000] [--runs 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from drug_search.infrastructure.database.engine import engine
+from drug_search.infrastructure.database.repository.drug_repo import TRIGRAM_SIMILARITY_THRESHOLD
+
+QUERIES: tuple[str, ...] = ("парацетамол", "ибупрофн", "тестостерон", "omeprazol", "кленбутерол")
+
+OLD_QUERY = text(f"""
+    SELECT s.drug_id
+    FROM bench_drug_synonyms s
+    WHERE similarity(lower(s.synonym), lower(:query)) > {TRIGRAM_SIMILARITY_THRESHOLD}
+    ORDER BY similarity(lower(s.synonym), lower(:query)) DESC
+    LIMIT 1
+""")
+
+NEW_QUERY = text("""
+    SELECT s.drug_id
+    FROM bench_drug_synonyms s
+    WHERE lower(s.synonym) % :query
+    ORDER BY lower(s.synonym) <-> :query
+    LIMIT 1
+""")
+
+
+async def _prepare_table(conn: AsyncConnection, size: int) -> None:
+    """Создает временную таблицу с синонимами и тем же индексом, что и в drug_synonyms"""
+    await conn.execute(text("DROP TABLE IF EXISTS bench_drug_synonyms"))
+    await conn.execute(text("""
+        CREATE TEMP TABLE bench_drug_synonyms (
+            id bigserial PRIMARY KEY,
+            drug_id uuid NOT NULL,
+            synonym varchar(100) NOT NULL
+        )
+    """))
+    # синонимы: реальные запросы + шум из md5, чтобы распределение триграмм было похоже на настоящее
+    await conn.execute(text("""
+        INSERT INTO bench_drug_synonyms (drug_id, synonym)
+        SELECT gen_random_uuid(),
+               CASE WHEN g % 1000 = 0
+                    THEN (ARRAY['парацетамол', 'ибупрофен', 'тестостерон', 'омепразол', 'кленбутерол'])[1 + g % 5]
+                    ELSE substr(md5(g::text), 1, 6 + g % 10)
+               END
+        FROM generate_series(1, :size) AS g
+    """), {"size": size})
+    await conn.execute(text(
+        "CREATE INDEX bench_trgm_synonyms_lower ON bench_drug_synonyms USING gist (lower(synonym) gist_trgm_ops)"
+    ))
+    await conn.execute(text("ANALYZE bench_drug_synonyms"))
+
+
+async def _explain(conn: AsyncConnection, query, params: dict) -> str:
+    result = await conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) {query.text}"),
+        params
+    )
+    return "\n".join(row[0] for row in result.fetchall())
+
+
+async def _measure(conn: AsyncConnection, query, runs: int) -> list[float]:
+    timings: list[float] = []
+    for i in range(runs):
+        params = {"query": QUERIES[i % len(QUERIES)]}
+        start = time.perf_counter()
+        await conn.execute(query, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _format_timings(name: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"  {name}: median {statistics.median(timings):.2f} ms | p95 {p95:.2f} ms | max {timings[-1]:.2f} ms"
+
+
+async def run(sizes: list[int], runs: int) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, false)"),
+            {"threshold": str(TRIGRAM_SIMILARITY_THRESHOLD)}
+        )
+
+        for size in sizes:
+            print(f"\n===== {size} synonyms =====")
+            await _prepare_table(conn, size)
+
+            params = {"query": QUERIES[0]}
+            print("[ old: similarity() > threshold ]")
+            print(await _explain(conn, OLD_QUERY, params))
+            print("[ new: % + <-> ]")
+            print(await _explain(conn, NEW_QUERY, params))
+
+            print(_format_timings("old", await _measure(conn, OLD_QUERY, runs)))
+            print(_format_timings("new", await _measure(conn, NEW_QUERY, runs)))
+
+        await conn.execute(text("DROP TABLE IF EXISTS bench_drug_synonyms"))
+        await conn.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.sizes, args.runs))
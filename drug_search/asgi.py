@@ -5,6 +5,11 @@ from fastapi import FastAPI
 
 from drug_search.config import config
 from drug_search.core.app.main import fastapi_app
+from drug_search.core.dependencies.deepseek_balance_dep import deepseek_balance_guard
+from drug_search.core.dependencies.intent_classifier_dep import intent_pre_classifier
+from drug_search.core.dependencies.llm_usage_dep import llm_usage_sink
+from drug_search.core.dependencies.pubmed_client_dep import pubmed_client
+from drug_search.core.dependencies.user_log_sink_dep import user_log_sink
 from drug_search.infrastructure.database.engine import clear_metadata_cache
 from drug_search.infrastructure.loggerConfig import configure_logging
 
@@ -15,9 +20,17 @@ async def lifespan(app: FastAPI):
     await clear_metadata_cache()
     print("✓ Metadata cache cleared")
 
+    user_log_sink.start()
+    llm_usage_sink.start()
+    intent_pre_classifier.load()
+
     yield  # Здесь приложение работает
 
-    # Shutdown (опционально)
+    # Shutdown: дописываем буферы логов юзеров и учета запросов к нейронке
+    await user_log_sink.stop()
+    await llm_usage_sink.stop()
+    await deepseek_balance_guard.stop()
+    await pubmed_client.close()
     print("Application shutting down")
 
 
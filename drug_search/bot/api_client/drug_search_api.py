@@ -2,12 +2,13 @@ import uuid
 from uuid import UUID
 
 from drug_search.bot.api_client.base_http_client import BaseHttpClient, HTTPMethod
-from drug_search.core.lexicon import DANGER_CLASSIFICATION, ARROW_TYPES
+from drug_search.core.lexicon import DANGER_CLASSIFICATION, ARROW_TYPES, DrugMenu
 from drug_search.core.schemas import (UserTelegramDataSchema, UserSchema, DrugExistingResponse, QuestionRequest,
                                       DrugSchema, QuestionDrugsAssistantResponse, SelectActionResponse,
                                       QuestionDrugsRequest, AddTokensRequest,
                                       BuyDrugRequest, BuyDrugResponse, UpdateDrugResponse, MailingRequest,
-                                      AllowedDrugsInfoSchema, NewReferralsRequest, PaymentRequest)
+                                      AllowedDrugsInfoSchema, NewReferralsRequest, PaymentRequest, SearchExpand,
+                                      DrugSectionSchema, ReduceTokensResponse)
 from drug_search.core.schemas.quiz_schemas import QuizAnswerRequest, QuizAnswerResponse, QuizQuestionResponse
 
 
@@ -97,11 +98,12 @@ class DrugSearchAPIClient(BaseHttpClient):
             self,
             access_token: str,
             amount_tokens: int = 0,
-    ):
-        """Отнимает токены"""
-        await self._request(
+    ) -> ReduceTokensResponse:
+        """Отнимает токены (is_charged=False — токенов не хватило, ничего не списано)"""
+        return await self._request(
             HTTPMethod.POST,
             endpoint="/v1/user/tokens/reduce",
+            response_model=ReduceTokensResponse,
             access_token=access_token,
             request_body=AddTokensRequest(
                 tokens_amount=amount_tokens,
@@ -122,54 +124,68 @@ class DrugSearchAPIClient(BaseHttpClient):
     async def update_drug(
             self,
             drug_id: uuid.UUID,
-            access_token: str
+            access_token: str,
+            sections: list[DrugMenu] | None = None
     ):
+        """:param sections: обновляемые разделы, None — все"""
         return await self._request(
             endpoint=f"/v1/drugs/update/{drug_id}",
             method=HTTPMethod.POST,
             access_token=access_token,
             response_model=UpdateDrugResponse,
+            params=[("sections", section.value) for section in sections] if sections else None
         )
 
     async def search_drug(
             self,
             user_query: str,
-            access_token: str
+            access_token: str,
+            expand: SearchExpand | None = None
     ) -> DrugExistingResponse:
         """Поиск препарата"""
         return await self._request(
             HTTPMethod.GET,
             f"/v1/drugs/search/{user_query}",
             response_model=DrugExistingResponse,
-            access_token=access_token
+            access_token=access_token,
+            params=self._search_params(expand)
         )
 
     async def search_drug_trigrams(
             self,
             drug_name_query: str,
-            access_token: str
+            access_token: str,
+            expand: SearchExpand | None = None
     ) -> DrugExistingResponse:
         """Поиск препарата триграммами"""
         return await self._request(
             HTTPMethod.GET,
             endpoint=f"/v1/drugs/search/trigrams/{drug_name_query}",
             response_model=DrugExistingResponse,
-            access_token=access_token
+            access_token=access_token,
+            params=self._search_params(expand)
         )
 
     async def search_drug_without_trigrams(
             self,
             drug_name_query: str,
-            access_token: str
+            access_token: str,
+            expand: SearchExpand | None = None
     ):
         """Поиск препарата без триграмм"""
         return await self._request(
             HTTPMethod.GET,
             endpoint=f"/v1/drugs/search/without_trigrams/{drug_name_query}",
             response_model=DrugExistingResponse,
-            access_token=access_token
+            access_token=access_token,
+            params=self._search_params(expand)
         )
 
+    @staticmethod
+    def _search_params(expand: SearchExpand | None) -> dict | None:
+        """По умолчанию поиск возвращает только DrugHit"""
+        return {"expand": expand.value} if expand else None
+
     async def get_drug(
             self,
             drug_id: UUID,
@@ -183,6 +199,20 @@ class DrugSearchAPIClient(BaseHttpClient):
             access_token=access_token
         )
 
+    async def get_drug_section(
+            self,
+            drug_id: UUID,
+            section: DrugMenu,
+            access_token: str
+    ) -> DrugSectionSchema:
+        """Получить один раздел препарата (только связанная таблица этого раздела)"""
+        return await self._request(
+            HTTPMethod.GET,
+            endpoint=f"/v1/drugs/{drug_id}/sections/{section.value}",
+            response_model=DrugSectionSchema,
+            access_token=access_token
+        )
+
     async def buy_drug(
             self,
             drug_name: str,
@@ -22,6 +22,7 @@ from drug_search.bot.handlers.pdf_export import router as pdf_export_router
 from drug_search.bot.middlewares.depends_injectors import DependencyInjectionMiddleware
 from drug_search.bot.middlewares.limits import MessageLimitsMiddleware
 from drug_search.bot.middlewares.check_subscription import CheckSubscriptionMiddleware
+from drug_search.core.dependencies.bot.cache_service_dep import cache_service
 from drug_search.core.dependencies.redis_service_dep import redis_client
 from drug_search.infrastructure.loggerConfig import configure_logging
 
@@ -52,7 +53,12 @@ def setup_auth(dp: Dispatcher):
 
 
 async def start_polling(dp: Dispatcher):
-    await dp.start_polling(bot)
+    # [ инвалидация локального кэша по pub/sub ]
+    invalidation_listener = asyncio.create_task(cache_service.listen_invalidations())
+    try:
+        await dp.start_polling(bot)
+    finally:
+        invalidation_listener.cancel()
 
 
 class UUIDEncoder(json.JSONEncoder):
@@ -23,7 +23,7 @@ from drug_search.core.lexicon import ARROW_TYPES, JobStatuses, DANGER_CLASSIFICA
 from drug_search.core.lexicon.enums import DrugMenu
 from drug_search.core.schemas import (
     BuyDrugResponse, BuyDrugStatuses, UpdateDrugResponse, UpdateDrugStatuses, UserSchema, DrugExistingResponse,
-    DrugSchema
+    DrugSectionSchema
 )
 
 router = Router(name=__name__)
@@ -168,9 +168,10 @@ async def drug_buy(
 
     # [ если препарат уже был в базе ]
     if drug_id:
-        drug: DrugSchema = await api_client.get_drug(
+        drug: DrugSectionSchema = await cache_service.get_drug_section(
+            access_token=access_token,
             drug_id=drug_id,
-            access_token=access_token
+            section=drug_menu or DrugMenu.BRIEFLY
         )
 
         logger.info(f"Открывается меню препарата {drug.name}: {drug_menu}")
@@ -205,11 +206,16 @@ async def wrong_drug_founded(
 
     if drug_response.is_exist:
         if drug_response.is_allowed:
-            message_text: str = DrugMessageFormatter.format_drug_briefly(drug_response.drug)
+            drug: DrugSectionSchema = await cache_service.get_drug_section(
+                access_token=access_token,
+                drug_id=drug_response.drug_hit.id,
+                section=DrugMenu.BRIEFLY
+            )
+            message_text: str = DrugMessageFormatter.format_drug_briefly(drug)
             await callback_query.message.edit_text(
                 message_text,
                 reply_markup=drug_keyboard(
-                    drug=drug_response.drug,
+                    drug=drug,
                     drug_menu=DrugMenu.BRIEFLY,
                     user_subscribe_type=user.subscription_type,
                     mode=ModeTypes.WRONG_DRUG,
@@ -220,7 +226,7 @@ async def wrong_drug_founded(
             # [ предложить купить препарат ]
             await state.update_data(
                 purchase_drug_name=drug_response.drug_name,
-                purchase_drug_id=drug_response.drug.id if drug_response.drug else None,
+                purchase_drug_id=drug_response.drug_hit.id if drug_response.drug_hit else None,
                 purchase_danger_classification=drug_response.danger_classification
             )
 
@@ -7,7 +7,8 @@ from aiogram.types import Message
 
 from drug_search.bot.api_client.drug_search_api import DrugSearchAPIClient
 from drug_search.bot.lexicon.message_text import MessageText
-from drug_search.core.lexicon import MailingStatuses
+from drug_search.core.lexicon import MailingStatuses, ADMINS_TG_ID
+from drug_search.core.services.cache_logic.cache_service import CacheService
 
 router = Router(name=__name__)
 logger = logging.getLogger(name=__name__)
@@ -36,3 +37,26 @@ async def mailing(
             await message.answer(
                 MessageText.SUCCESS_MAILING
             )
+
+
+@router.message(Command("cache_stats"))
+async def cache_stats(
+        message: Message,
+        cache_service: CacheService,
+):
+    """hit/miss локального кэша бота и схлопнутые запросы (только для админов)"""
+    if str(message.from_user.id) not in ADMINS_TG_ID:
+        await message.answer(MessageText.ONLY_FOR_ADMINS)
+        return
+
+    lines: list[str] = [
+        f"<b>{stats['name']}</b>: {stats['size']}/{stats['max_size']} | "
+        f"hits {stats['hits']} | misses {stats['misses']} | hit rate {stats['hit_rate']}"
+        for stats in cache_service.local_cache_stats()
+    ]
+    single_flight: dict = cache_service.single_flight_stats()
+    lines.append(
+        f"<b>single-flight</b>: calls {single_flight['calls']} | collapsed {single_flight['collapsed']} | "
+        f"collapsed remote {single_flight['collapsed_remote']}"
+    )
+    await message.answer("\n".join(lines))
@@ -14,7 +14,7 @@ from drug_search.bot.lexicon.keyboard_words import ButtonText
 from drug_search.bot.lexicon.message_text import MessageText
 from drug_search.bot.utils.format_message_text import DrugMessageFormatter
 from drug_search.core.lexicon.enums import DrugMenu, SUBSCRIPTION_TYPES
-from drug_search.core.schemas import DrugSchema, UserSchema, AllowedDrugsInfoSchema
+from drug_search.core.schemas import DrugSectionSchema, UserSchema, AllowedDrugsInfoSchema
 from drug_search.core.services.cache_logic.cache_service import CacheService
 
 router = Router(name=__name__)
@@ -104,9 +104,10 @@ async def drug_describe_researches_handler(
             LinkPreviewOptions=LinkPreviewOptions(is_disabled=True)
         )
     else:
-        drug: DrugSchema = await cache_service.get_drug(
+        drug: DrugSectionSchema = await cache_service.get_drug_section(
             access_token=access_token,
-            drug_id=drug_id
+            drug_id=drug_id,
+            section=DrugMenu.RESEARCHES
         )
 
         await callback.message.edit_text(
@@ -145,9 +146,10 @@ async def drug_describe_handler(
     describe_type: DrugMenu = callback_data.drug_menu
     page: int = callback_data.page
 
-    drug: DrugSchema = await cache_service.get_drug(
+    drug: DrugSectionSchema = await cache_service.get_drug_section(
         access_token=access_token,
-        drug_id=drug_id
+        drug_id=drug_id,
+        section=describe_type
     )
 
     await callback.message.edit_text(
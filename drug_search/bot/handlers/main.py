@@ -19,7 +19,8 @@ from drug_search.core.lexicon import (
     MAX_MESSAGE_LENGTH_LITE, MAX_MESSAGE_LENGTH_PREMIUM
 )
 from drug_search.core.lexicon.enums import DrugMenu
-from drug_search.core.schemas import SelectActionResponse, DrugExistingResponse, UserSchema
+from drug_search.core.schemas import SelectActionResponse, DrugExistingResponse, UserSchema, DrugSectionSchema, \
+    ReduceTokensResponse
 from drug_search.core.utils.writing_imitation import bot_typing_imitation
 
 router = Router(name=__name__)
@@ -66,11 +67,16 @@ async def main_action(
 
     if drug_response.is_exist:
         if drug_response.is_allowed:
-            message_text = DrugMessageFormatter.format_drug_briefly(drug_response.drug)
+            drug: DrugSectionSchema = await cache_service.get_drug_section(
+                access_token=access_token,
+                drug_id=drug_response.drug_hit.id,
+                section=DrugMenu.BRIEFLY
+            )
+            message_text = DrugMessageFormatter.format_drug_briefly(drug)
             await message.answer(
                 message_text,
                 reply_markup=drug_keyboard(
-                    drug=drug_response.drug,
+                    drug=drug,
                     mode=ModeTypes.SEARCH,
                     drug_menu=DrugMenu.BRIEFLY,
                     user_subscribe_type=user.subscription_type,
@@ -87,7 +93,7 @@ async def main_action(
                 api_client=api_client,
                 access_token=access_token,
                 drug_name=drug_response.drug_name,
-                drug_id=drug_response.drug.id if drug_response.drug else None,
+                drug_id=drug_response.drug_hit.id if drug_response.drug_hit else None,
                 danger_classification=drug_response.danger_classification,
                 user=user
             )
@@ -115,8 +121,16 @@ async def main_action(
             case ACTIONS_FROM_ASSISTANT.QUESTION_DRUGS:
                 # [ ответ на вопрос юзера с препаратами ]
                 if user.allowed_tokens + user.additional_tokens >= QUESTION_COST:
+                    reduce_response: ReduceTokensResponse = await api_client.reduce_tokens(
+                        access_token, amount_tokens=QUESTION_COST
+                    )
+                    if not reduce_response.is_charged:
+                        await message_request.edit_text(
+                            text=MessageText.NOT_ENOUGH_CREATE_TOKENS,
+                            reply_markup=get_tokens_packages_to_buy_keyboard()
+                        )
+                        return
                     await message_request.edit_text(MessageText.ASSISTANT_WAITING_DRUGS)
-                    await api_client.reduce_tokens(access_token, amount_tokens=QUESTION_COST)
 
                     await api_client.question_drugs_answer(  # via TaskService
                         access_token=access_token,
@@ -135,8 +149,16 @@ async def main_action(
             case ACTIONS_FROM_ASSISTANT.QUESTION:
                 # [ ответ на вопрос юзера ]
                 if user.allowed_tokens + user.additional_tokens >= QUESTION_COST:
+                    reduce_response: ReduceTokensResponse = await api_client.reduce_tokens(
+                        access_token, amount_tokens=QUESTION_COST
+                    )
+                    if not reduce_response.is_charged:
+                        await message_request.edit_text(
+                            text=MessageText.NOT_ENOUGH_CREATE_TOKENS,
+                            reply_markup=get_tokens_packages_to_buy_keyboard()
+                        )
+                        return
                     await message_request.edit_text(MessageText.ASSISTANT_WAITING)
-                    await api_client.reduce_tokens(access_token, amount_tokens=QUESTION_COST)
 
                     await api_client.question_answer(  # via TaskService
                         access_token=access_token,
@@ -161,16 +183,21 @@ async def main_action(
                 logger.info(
                     f"Юзер {user.telegram_id} ищет раздел {action_response.drug_menu} препарата {drug_existing_response.drug_name}\n")
                 logger.info(
-                    f"Существует ли препарат: {drug_existing_response.is_exist}: {drug_existing_response.drug.id if drug_existing_response.drug else ""}")
+                    f"Существует ли препарат: {drug_existing_response.is_exist}: {drug_existing_response.drug_hit.id if drug_existing_response.drug_hit else ""}")
 
                 if drug_existing_response.is_allowed:
+                    drug: DrugSectionSchema = await cache_service.get_drug_section(
+                        access_token=access_token,
+                        drug_id=drug_existing_response.drug_hit.id,
+                        section=action_response.drug_menu
+                    )
                     await message_request.edit_text(
                         text=DrugMessageFormatter.format_by_type(
                             drug_menu=action_response.drug_menu,
-                            drug=drug_existing_response.drug
+                            drug=drug
                         ),
                         reply_markup=drug_keyboard(
-                            drug=drug_existing_response.drug,
+                            drug=drug,
                             mode=ModeTypes.SEARCH,
                             drug_menu=action_response.drug_menu,
                             user_subscribe_type=user.subscription_type,
@@ -188,7 +215,7 @@ async def main_action(
                         api_client=api_client,
                         access_token=access_token,
                         drug_name=drug_existing_response.drug_name,
-                        drug_id=drug_existing_response.drug.id if drug_existing_response.drug else None,
+                        drug_id=drug_existing_response.drug_hit.id if drug_existing_response.drug_hit else None,
                         danger_classification=drug_existing_response.danger_classification,
                         user=user,
                         drug_menu=action_response.drug_menu
@@ -211,11 +238,16 @@ async def main_action(
                     access_token=access_token
                 )
                 if drug_existing_response.is_allowed:
-                    message_text = DrugMessageFormatter.format_drug_briefly(drug_existing_response.drug)
+                    drug: DrugSectionSchema = await cache_service.get_drug_section(
+                        access_token=access_token,
+                        drug_id=drug_existing_response.drug_hit.id,
+                        section=DrugMenu.BRIEFLY
+                    )
+                    message_text = DrugMessageFormatter.format_drug_briefly(drug)
                     await message_request.edit_text(
                         message_text,
                         reply_markup=drug_keyboard(
-                            drug=drug_existing_response.drug,
+                            drug=drug,
                             drug_menu=DrugMenu.BRIEFLY,
                             user_subscribe_type=user.subscription_type,
                             mode=ModeTypes.SEARCH,
@@ -230,7 +262,7 @@ async def main_action(
                         api_client=api_client,
                         access_token=access_token,
                         drug_name=drug_existing_response.drug_name,
-                        drug_id=drug_existing_response.drug.id if drug_response.drug else None,
+                        drug_id=drug_existing_response.drug_hit.id if drug_existing_response.drug_hit else None,
                         danger_classification=drug_existing_response.danger_classification,
                         user=user
                     )
@@ -12,7 +12,7 @@ from drug_search.bot.lexicon.enums import ModeTypes
 from drug_search.bot.lexicon.keyboard_words import ButtonText
 from drug_search.bot.utils.share import build_drug_share_text, build_telegram_share_url
 from drug_search.core.lexicon import DrugMenu, ARROW_TYPES, SUBSCRIPTION_TYPES
-from drug_search.core.schemas import DrugBrieflySchema, DrugResearchSchema, DrugSchema
+from drug_search.core.schemas import DrugBrieflySchema, DrugResearchSchema, DrugSchema, DrugSectionSchema
 from drug_search.core.utils.funcs import may_update_drug
 
 
@@ -153,7 +153,7 @@ def drug_researches_keyboard(
 
 
 def drug_keyboard(
-        drug: DrugSchema,
+        drug: DrugSchema | DrugSectionSchema,
         drug_menu: DrugMenu,
         user_subscribe_type: SUBSCRIPTION_TYPES | None,
         mode: ModeTypes,
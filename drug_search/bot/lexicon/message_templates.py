@@ -13,6 +13,10 @@ class MessageTemplates:
         "{disclaimer}"
     )
 
+    DRUG_SECTION_PENDING: str = "<i>Раздел еще готовится, зайдите через минуту!</i>"
+    DRUG_SECTION_FAILED: str = "<i>Раздел не удалось создать, он пересоздается. Зайдите позже!</i>"
+    CLINICAL_EFFECTS_PENDING: str = "<i>появятся вместе с механизмом действия</i>"
+
     DRUG_INFO_PATHWAYS: str = (
         "<b>🎯 {drug_name_ru} МЕХАНИЗМ ДЕЙСТВИЯ {sources_section}</b>\n\n"
         "<b>Основное действие: </b>\n{primary_action}\n\n"
@@ -6,8 +6,10 @@ from drug_search.bot.lexicon.consts import SYMBOLS
 from drug_search.bot.lexicon.message_templates import MessageTemplates
 from drug_search.bot.utils.funcs import make_google_sources, get_time_when_refresh_tokens_text, \
     decline_tokens
-from drug_search.core.lexicon.enums import SUBSCRIPTION_TYPES, TOKENS_LIMIT, DANGER_CLASSIFICATION, DrugMenu
-from drug_search.core.schemas import UserSchema, DrugSchema, CombinationType, AllowedDrugsInfoSchema
+from drug_search.core.lexicon.enums import SUBSCRIPTION_TYPES, TOKENS_LIMIT, DANGER_CLASSIFICATION, DrugMenu, \
+    DRUG_SECTION_STATUS
+from drug_search.core.schemas import UserSchema, DrugSchema, CombinationType, AllowedDrugsInfoSchema, \
+    DrugSectionSchema
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +18,7 @@ class DrugMessageFormatter:
     """Форматирование сообщений о препаратах"""
 
     @staticmethod
-    def format_drug_briefly(drug: DrugSchema) -> str:
+    def format_drug_briefly(drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование краткой информации о препарате"""
         disclaimer = ""
         if drug.danger_classification in [DANGER_CLASSIFICATION.PREMIUM_NEED, DANGER_CLASSIFICATION.DANGER]:
@@ -30,13 +32,13 @@ class DrugMessageFormatter:
             latin_name=drug.latin_name,
             classification=drug.classification,
             description=drug.description,
-            clinical_effects=drug.clinical_effects,
+            clinical_effects=drug.clinical_effects or MessageTemplates.CLINICAL_EFFECTS_PENDING,
             fun_fact=drug.fact or "",
             disclaimer=disclaimer
         )
 
     @staticmethod
-    def format_pathways(drug: DrugSchema) -> str:
+    def format_pathways(drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование информации о путях воздействия"""
         pathways_list: str = ""
 
@@ -75,7 +77,7 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_combinations(drug: DrugSchema) -> str:
+    def format_combinations(drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование информации о взаимодействиях"""
         good_combinations: str = ""
         bad_combinations: str = ""
@@ -107,7 +109,7 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_dosages(drug: DrugSchema) -> str:
+    def format_dosages(drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование информации о дозировках"""
         if drug.danger_classification == DANGER_CLASSIFICATION.DANGER:
             return "Для этого препарата нельзя смотреть дозировки."
@@ -156,7 +158,7 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_analogs(drug: DrugSchema) -> str:
+    def format_analogs(drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование аналогов"""
         analogs_section: str = ""
         for i, analog in enumerate(sorted(drug.analogs, key=lambda x: x.percent, reverse=True), start=1):
@@ -175,7 +177,7 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_metabolism(drug: DrugSchema) -> str:
+    def format_metabolism(drug: DrugSchema | DrugSectionSchema) -> str:
         """Фармакокинетика форматирование"""
 
         # [ пути метаболизма ]
@@ -226,7 +228,7 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_researches(drug: DrugSchema, research_number: int) -> str:
+    def format_researches(drug: DrugSchema | DrugSectionSchema, research_number: int) -> str:
         """Форматирование информации об исследованиях"""
         research_text: str | None = None
         if drug.researches:
@@ -268,14 +270,14 @@ class DrugMessageFormatter:
         )
 
     @staticmethod
-    def format_drug_update_info(drug: DrugSchema):
+    def format_drug_update_info(drug: DrugSchema | DrugSectionSchema):
         return MessageTemplates.DRUG_UPDATE_INFO.format(
             drug_name=drug.name_ru,
             drug_last_update=drug.updated_at
         )
 
     @staticmethod
-    def format_by_type(drug_menu: DrugMenu, drug: DrugSchema) -> str:
+    def format_by_type(drug_menu: DrugMenu, drug: DrugSchema | DrugSectionSchema) -> str:
         """Форматирование информации в зависимости от типа описания"""
         format_methods = {
             DrugMenu.BRIEFLY: DrugMessageFormatter.format_drug_briefly,
@@ -288,6 +290,13 @@ class DrugMessageFormatter:
             DrugMenu.UPDATE_INFO: DrugMessageFormatter.format_drug_update_info
         }
 
+        # раздел поэтапного создания еще не записан
+        section_status: DRUG_SECTION_STATUS | None = drug.section_statuses.get(drug_menu)
+        if section_status == DRUG_SECTION_STATUS.PENDING:
+            return MessageTemplates.DRUG_SECTION_PENDING
+        if section_status == DRUG_SECTION_STATUS.FAILED:
+            return MessageTemplates.DRUG_SECTION_FAILED
+
         method = format_methods.get(drug_menu)
         if drug_menu == DrugMenu.RESEARCHES:
             return DrugMessageFormatter.format_researches(
@@ -26,6 +26,46 @@ class Config(BaseSettings):
     # Deepseek API
     DEEPSEEK_API_KEY: ClassVar[str] = environ.get("DEEPSEEK_API_KEY", "")
     MINIMUM_USD_ON_BALANCE: ClassVar[float] = 1
+    DEEPSEEK_BALANCE_REFRESH_INTERVAL: float = float(environ.get("DEEPSEEK_BALANCE_REFRESH_INTERVAL", "60"))
+    DEEPSEEK_FAILURE_THRESHOLD: int = int(environ.get("DEEPSEEK_FAILURE_THRESHOLD", "5"))
+    DEEPSEEK_BREAKER_OPEN_SECONDS: float = float(environ.get("DEEPSEEK_BREAKER_OPEN_SECONDS", "30"))
+    LLM_MAX_CONCURRENCY: int = int(environ.get("LLM_MAX_CONCURRENCY", "8"))
+    LLM_TOKENS_PER_MINUTE: int = int(environ.get("LLM_TOKENS_PER_MINUTE", "0"))  # 0 — без ограничения
+    LLM_DEFAULT_COMPLETION_TOKENS: int = int(environ.get("LLM_DEFAULT_COMPLETION_TOKENS", "2000"))
+    LLM_CACHE_ENABLED: bool = environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_REDIS_TTL: int = int(environ.get("LLM_CACHE_REDIS_TTL", "86400"))
+    LLM_JSON_REPAIR_REASK: bool = environ.get("LLM_JSON_REPAIR_REASK", "true").lower() == "true"
+    # Обработка исследований по частям (map-reduce): статей в одном запросе и лимит ответа на часть
+    LLM_RESEARCH_CHUNK_SIZE: int = int(environ.get("LLM_RESEARCH_CHUNK_SIZE", "15"))
+    LLM_RESEARCH_CHUNK_MAX_TOKENS: int = int(environ.get("LLM_RESEARCH_CHUNK_MAX_TOKENS", "8000"))
+
+    # Локальный классификатор действий перед predict_user_action
+    INTENT_CLASSIFIER_PATH: str = environ.get("INTENT_CLASSIFIER_PATH", "data/intent_classifier.json")
+    INTENT_CLASSIFIER_MIN_CONFIDENCE: float = float(environ.get("INTENT_CLASSIFIER_MIN_CONFIDENCE", "0"))  # 0 — порог из артефакта
+
+    # Поиск препарата: срок жизни отрицательного вердикта нейронки в drug_query_aliases
+    DRUG_ALIAS_NEGATIVE_TTL_DAYS: int = int(environ.get("DRUG_ALIAS_NEGATIVE_TTL_DAYS", "7"))
+
+    # Поэтапное создание препарата: повтор разделов, не созданных нейронкой
+    DRUG_SECTION_RETRY_ATTEMPTS: int = int(environ.get("DRUG_SECTION_RETRY_ATTEMPTS", "3"))
+    DRUG_SECTION_RETRY_DELAY: float = float(environ.get("DRUG_SECTION_RETRY_DELAY", "60"))
+
+    # PubMed (NCBI E-utilities): без ключа NCBI разрешает 3 запроса/сек, с ключом — 10
+    PUBMED_EUTILS_URL: str = environ.get("PUBMED_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+    NCBI_API_KEY: str = environ.get("NCBI_API_KEY", "")
+    NCBI_EMAIL: str = environ.get("NCBI_EMAIL", "")
+    PUBMED_REQUESTS_PER_SECOND: float = float(environ.get("PUBMED_REQUESTS_PER_SECOND", "0"))  # 0 — лимит NCBI
+    PUBMED_EFETCH_BATCH_SIZE: int = int(environ.get("PUBMED_EFETCH_BATCH_SIZE", "100"))
+    PUBMED_TIMEOUT: float = float(environ.get("PUBMED_TIMEOUT", "30"))
+    # бюджет на каждый вариант запроса (дозировки / механизм / метаболизм): статей с DOI из первых N результатов
+    PUBMED_ARTICLES_PER_QUERY: int = int(environ.get("PUBMED_ARTICLES_PER_QUERY", "50"))
+    PUBMED_SEARCH_MAX_RESULTS: int = int(environ.get("PUBMED_SEARCH_MAX_RESULTS", "100"))
+    # Общее хранилище статей (pubmed_articles): старше MAX_AGE — скачиваются заново,
+    # не использованные RETENTION дней — удаляются
+    PUBMED_ARTICLE_MAX_AGE_DAYS: int = int(environ.get("PUBMED_ARTICLE_MAX_AGE_DAYS", "180"))
+    PUBMED_ARTICLE_RETENTION_DAYS: int = int(environ.get("PUBMED_ARTICLE_RETENTION_DAYS", "365"))
+    # Исследования препарата: сколько оставлять после обновления (по interest), 0 — без ограничения
+    DRUG_RESEARCHES_MAX: int = int(environ.get("DRUG_RESEARCHES_MAX", "0"))
 
     # Database
     DATABASE_URL: str = environ.get("DATABASE_URL", "")
@@ -33,6 +73,8 @@ class Config(BaseSettings):
     # Telegram Bot
     TELEGRAM_BOT_TOKEN: ClassVar[str] = environ.get("TELEGRAM_BOT_TOKEN", "")
     TELEGRAM_API_URL: ClassVar[str] = "https://api.telegram.org/bot"
+    # минимальный интервал между правками сообщения при потоковом ответе (лимит Telegram ~1 правка/сек на чат)
+    TELEGRAM_STREAM_EDIT_INTERVAL: float = float(environ.get("TELEGRAM_STREAM_EDIT_INTERVAL", "1.5"))
 
     # FastAPI
     WEBAPP_HOST: str = environ.get("WEBAPP_HOST", "0.0.0.0")
@@ -54,6 +96,42 @@ class Config(BaseSettings):
     # Redis
     REDIS_URL: str = environ.get("REDIS_URL", "redis://redis:6379")
 
+    # Bot in-process cache (первый уровень перед Redis)
+    BOT_LOCAL_CACHE_SIZE: int = int(environ.get("BOT_LOCAL_CACHE_SIZE", "2048"))
+    BOT_LOCAL_CACHE_TTL: int = int(environ.get("BOT_LOCAL_CACHE_TTL", "60"))  # профиль юзера, список препаратов
+    BOT_LOCAL_CACHE_DRUG_TTL: int = int(environ.get("BOT_LOCAL_CACHE_DRUG_TTL", "86400"))  # инвалидация через pub/sub
+
+    # Single-flight: схлопывание одинаковых загрузок, между процессами — через Redis lock
+    SINGLE_FLIGHT_REDIS_LOCK: bool = environ.get("SINGLE_FLIGHT_REDIS_LOCK", "false").lower() == "true"
+
+    # Кэш контекста авторизованного юзера (API)
+    USER_CONTEXT_TTL: int = int(environ.get("USER_CONTEXT_TTL", "300"))
+    USER_CONTEXT_LOCAL_TTL: int = int(environ.get("USER_CONTEXT_LOCAL_TTL", "2"))
+    USER_CONTEXT_LOCAL_SIZE: int = int(environ.get("USER_CONTEXT_LOCAL_SIZE", "4096"))
+
+    # Write-behind учет токенов (TokenLedger)
+    TOKEN_LEDGER_BALANCE_TTL: int = int(environ.get("TOKEN_LEDGER_BALANCE_TTL", "86400"))
+    TOKEN_LEDGER_FLUSH_BATCH: int = int(environ.get("TOKEN_LEDGER_FLUSH_BATCH", "1000"))
+    TOKEN_LEDGER_FLUSH_INTERVAL: int = int(environ.get("TOKEN_LEDGER_FLUSH_INTERVAL", "10"))  # секунды, делитель 60
+
+    # Буферизованная запись user_request_logs (UserLogSink)
+    USER_LOG_BUFFER_SIZE: int = int(environ.get("USER_LOG_BUFFER_SIZE", "10000"))
+    USER_LOG_BATCH_SIZE: int = int(environ.get("USER_LOG_BATCH_SIZE", "500"))
+    USER_LOG_FLUSH_INTERVAL: float = float(environ.get("USER_LOG_FLUSH_INTERVAL", "2"))
+    USER_LOG_PUT_TIMEOUT: float = float(environ.get("USER_LOG_PUT_TIMEOUT", "0.5"))
+    USER_LOG_RETENTION_MONTHS: int = int(environ.get("USER_LOG_RETENTION_MONTHS", "12"))
+    USER_LOG_PARTITIONS_AHEAD: int = int(environ.get("USER_LOG_PARTITIONS_AHEAD", "2"))
+
+    # Учет запросов к нейронке (LLMUsageSink, llm_usage)
+    LLM_USAGE_BUFFER_SIZE: int = int(environ.get("LLM_USAGE_BUFFER_SIZE", "5000"))
+    LLM_USAGE_BATCH_SIZE: int = int(environ.get("LLM_USAGE_BATCH_SIZE", "200"))
+    LLM_USAGE_FLUSH_INTERVAL: float = float(environ.get("LLM_USAGE_FLUSH_INTERVAL", "5"))
+    LLM_USAGE_RETENTION_DAYS: int = int(environ.get("LLM_USAGE_RETENTION_DAYS", "180"))
+    # цены deepseek-chat, $ за 1M токенов
+    LLM_PRICE_INPUT_CACHE_HIT: float = float(environ.get("LLM_PRICE_INPUT_CACHE_HIT", "0.028"))
+    LLM_PRICE_INPUT_CACHE_MISS: float = float(environ.get("LLM_PRICE_INPUT_CACHE_MISS", "0.28"))
+    LLM_PRICE_OUTPUT: float = float(environ.get("LLM_PRICE_OUTPUT", "0.42"))
+
     # ARQ
     ARQ_REDIS_URL: str = environ.get("ARQ_REDIS_URL", "")
     ARQ_REDIS_QUEUE: str = environ.get("ARQ_QUEUE", "arq:queue")
@@ -0,0 +1,11 @@
+from drug_search.core.dependencies.redis_service_dep import redis_client
+from drug_search.core.services.cache_logic.allowed_drugs_index import AllowedDrugsIndex
+
+allowed_drugs_index = AllowedDrugsIndex(
+    redis=redis_client
+)
+
+
+def get_allowed_drugs_index() -> AllowedDrugsIndex:
+    """Возвращает синглтон объект"""
+    return allowed_drugs_index
@@ -0,0 +1,16 @@
+from drug_search.config import config
+from drug_search.core.dependencies.redis_service_dep import redis_client
+from drug_search.core.services.cache_logic.assistant_response_cache import AssistantResponseCache
+from drug_search.infrastructure.database import engine as db_engine
+
+assistant_response_cache = AssistantResponseCache(
+    redis=redis_client,
+    session_maker=lambda: db_engine.async_session_maker(),
+    redis_ttl=config.LLM_CACHE_REDIS_TTL,
+    enabled=config.LLM_CACHE_ENABLED
+)
+
+
+def get_assistant_response_cache() -> AssistantResponseCache:
+    """Возвращает синглтон объект"""
+    return assistant_response_cache
@@ -10,11 +10,13 @@ from drug_search.core.dependencies.telegram_service_dep import get_telegram_serv
 from drug_search.core.services.assistant_service import AssistantService
 from drug_search.core.services.cache_logic.redis_service import RedisService
 from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.core.services.models_service.llm_usage_service import LLMUsageService
 from drug_search.core.services.models_service.user_service import UserService
 from drug_search.core.services.pubmed_service import PubmedService
 from drug_search.core.services.telegram_service import TelegramService
 from drug_search.infrastructure.database.engine import get_async_session
 from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
+from drug_search.infrastructure.database.repository.llm_repo import LLMRepository
 from drug_search.infrastructure.database.repository.user_repo import UserRepository
 
 
@@ -71,6 +73,9 @@ class ServiceContainer:
     async def get_user_repo(self) -> UserRepository:
         return UserRepository(self.session)
 
+    async def get_llm_usage_service(self) -> LLMUsageService:
+        return LLMUsageService(repo=LLMRepository(self.session))
+
 
 @asynccontextmanager
 async def get_session():
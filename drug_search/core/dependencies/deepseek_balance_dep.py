@@ -0,0 +1,15 @@
+from drug_search.config import config
+from drug_search.core.services.deepseek_balance import DeepSeekBalanceGuard
+
+deepseek_balance_guard = DeepSeekBalanceGuard(
+    api_key=config.DEEPSEEK_API_KEY,
+    minimum_balance=config.MINIMUM_USD_ON_BALANCE,
+    refresh_interval=config.DEEPSEEK_BALANCE_REFRESH_INTERVAL,
+    failure_threshold=config.DEEPSEEK_FAILURE_THRESHOLD,
+    open_seconds=config.DEEPSEEK_BREAKER_OPEN_SECONDS
+)
+
+
+def get_deepseek_balance_guard() -> DeepSeekBalanceGuard:
+    """Возвращает синглтон объект"""
+    return deepseek_balance_guard
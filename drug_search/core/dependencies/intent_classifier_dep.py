@@ -0,0 +1,12 @@
+from drug_search.config import config
+from drug_search.core.services.intent_classifier import IntentPreClassifier
+
+intent_pre_classifier = IntentPreClassifier(
+    path=config.INTENT_CLASSIFIER_PATH,
+    min_confidence=config.INTENT_CLASSIFIER_MIN_CONFIDENCE
+)
+
+
+def get_intent_pre_classifier() -> IntentPreClassifier:
+    """Возвращает синглтон объект"""
+    return intent_pre_classifier
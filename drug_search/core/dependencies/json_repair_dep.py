@@ -0,0 +1,8 @@
+from drug_search.core.services.json_repair import JsonRepairer
+
+json_repairer = JsonRepairer()
+
+
+def get_json_repairer() -> JsonRepairer:
+    """Возвращает синглтон объект"""
+    return json_repairer
@@ -0,0 +1,12 @@
+from drug_search.config import config
+from drug_search.core.services.llm_scheduler import LLMScheduler
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=config.LLM_MAX_CONCURRENCY,
+    tokens_per_minute=config.LLM_TOKENS_PER_MINUTE
+)
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Возвращает синглтон объект"""
+    return llm_scheduler
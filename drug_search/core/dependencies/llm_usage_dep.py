@@ -0,0 +1,26 @@
+from typing import Sequence
+
+from drug_search.config import config
+from drug_search.core.schemas import LLMUsageSchema
+from drug_search.core.services.llm_usage import LLMUsageSink
+from drug_search.infrastructure.database import engine as db_engine
+from drug_search.infrastructure.database.repository.llm_repo import LLMRepository
+
+
+async def _write_llm_usage(records: Sequence[LLMUsageSchema]) -> None:
+    # сессия на каждую пачку: sink живет дольше любого запроса
+    async with db_engine.async_session_maker() as session:
+        await LLMRepository(session=session).copy_llm_usage(records)
+
+
+llm_usage_sink = LLMUsageSink(
+    writer=_write_llm_usage,
+    max_size=config.LLM_USAGE_BUFFER_SIZE,
+    batch_size=config.LLM_USAGE_BATCH_SIZE,
+    flush_interval=config.LLM_USAGE_FLUSH_INTERVAL
+)
+
+
+def get_llm_usage_sink() -> LLMUsageSink:
+    """Возвращает синглтон объект"""
+    return llm_usage_sink
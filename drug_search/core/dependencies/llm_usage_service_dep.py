@@ -0,0 +1,10 @@
+from fastapi import Depends
+
+from drug_search.core.services.models_service.llm_usage_service import LLMUsageService
+from drug_search.infrastructure.database.repository.llm_repo import LLMRepository, get_llm_repo
+
+
+async def get_llm_usage_service(
+        repo: LLMRepository = Depends(get_llm_repo)
+) -> LLMUsageService:
+    return LLMUsageService(repo=repo)
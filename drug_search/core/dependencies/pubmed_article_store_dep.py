@@ -0,0 +1,16 @@
+import datetime
+
+from drug_search.config import config
+from drug_search.core.services.pubmed_article_store import PubmedArticleStore
+from drug_search.infrastructure.database import engine as db_engine
+
+pubmed_article_store = PubmedArticleStore(
+    session_maker=lambda: db_engine.async_session_maker(),
+    max_age=datetime.timedelta(days=config.PUBMED_ARTICLE_MAX_AGE_DAYS),
+    retention=datetime.timedelta(days=config.PUBMED_ARTICLE_RETENTION_DAYS)
+)
+
+
+def get_pubmed_article_store() -> PubmedArticleStore:
+    """Возвращает синглтон объект"""
+    return pubmed_article_store
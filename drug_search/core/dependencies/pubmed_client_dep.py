@@ -0,0 +1,16 @@
+from drug_search.config import config
+from drug_search.core.services.pubmed_client import PubmedClient
+
+pubmed_client = PubmedClient(
+    base_url=config.PUBMED_EUTILS_URL,
+    api_key=config.NCBI_API_KEY,
+    email=config.NCBI_EMAIL,
+    requests_per_second=config.PUBMED_REQUESTS_PER_SECOND,
+    batch_size=config.PUBMED_EFETCH_BATCH_SIZE,
+    timeout=config.PUBMED_TIMEOUT
+)
+
+
+def get_pubmed_client() -> PubmedClient:
+    """Возвращает синглтон объект"""
+    return pubmed_client
@@ -0,0 +1,14 @@
+from drug_search.config import config
+from drug_search.core.dependencies.redis_service_dep import redis_client
+from drug_search.core.services.cache_logic.token_ledger import TokenLedger
+
+token_ledger = TokenLedger(
+    redis=redis_client,
+    balance_ttl=config.TOKEN_LEDGER_BALANCE_TTL,
+    flush_batch_size=config.TOKEN_LEDGER_FLUSH_BATCH
+)
+
+
+def get_token_ledger() -> TokenLedger:
+    """Возвращает синглтон объект"""
+    return token_ledger
@@ -0,0 +1,15 @@
+from drug_search.config import config
+from drug_search.core.dependencies.redis_service_dep import redis_client
+from drug_search.core.services.cache_logic.user_context_cache import UserContextCache
+
+user_context_cache = UserContextCache(
+    redis=redis_client,
+    ttl=config.USER_CONTEXT_TTL,
+    local_ttl=config.USER_CONTEXT_LOCAL_TTL,
+    local_size=config.USER_CONTEXT_LOCAL_SIZE
+)
+
+
+def get_user_context_cache() -> UserContextCache:
+    """Возвращает синглтон объект"""
+    return user_context_cache
@@ -0,0 +1,27 @@
+from typing import Sequence
+
+from drug_search.config import config
+from drug_search.core.schemas import UserRequestLogSchema
+from drug_search.core.services.user_log_sink import UserLogSink
+from drug_search.infrastructure.database import engine as db_engine
+from drug_search.infrastructure.database.repository.user_repo import UserRepository
+
+
+async def _write_user_logs(logs: Sequence[UserRequestLogSchema]) -> None:
+    # сессия на каждую пачку: sink живет дольше любого запроса
+    async with db_engine.async_session_maker() as session:
+        await UserRepository(session=session).copy_user_logs(logs)
+
+
+user_log_sink = UserLogSink(
+    writer=_write_user_logs,
+    max_size=config.USER_LOG_BUFFER_SIZE,
+    batch_size=config.USER_LOG_BATCH_SIZE,
+    flush_interval=config.USER_LOG_FLUSH_INTERVAL,
+    put_timeout=config.USER_LOG_PUT_TIMEOUT
+)
+
+
+def get_user_log_sink() -> UserLogSink:
+    """Возвращает синглтон объект"""
+    return user_log_sink
@@ -1,13 +1,23 @@
 from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, status
 from fastapi.params import Depends
 
+from drug_search.core.dependencies.intent_classifier_dep import get_intent_pre_classifier
+from drug_search.core.dependencies.json_repair_dep import get_json_repairer
+from drug_search.core.dependencies.llm_usage_service_dep import get_llm_usage_service
 from drug_search.core.dependencies.task_service_dep import get_task_service
+from drug_search.core.dependencies.user_service_dep import get_user_service
 from drug_search.core.lexicon import ADMINS_TG_ID, MailingStatuses
-from drug_search.core.schemas import MailingRequest, UserSchema
+from drug_search.core.schemas import MailingRequest, UserSchema, TokenLedgerReconcileResponse, \
+    IntentClassifierStatsResponse, JsonRepairStatsResponse, LLMUsageReportRow, SingleFlightStatsResponse
+from drug_search.core.services.assistant_service import assistant_single_flight
+from drug_search.core.services.intent_classifier import IntentPreClassifier
+from drug_search.core.services.json_repair import JsonRepairer
+from drug_search.core.services.models_service.llm_usage_service import LLMUsageService
+from drug_search.core.services.models_service.user_service import UserService
 from drug_search.core.services.tasks_logic.task_service import TaskService
-from drug_search.core.utils.auth import get_auth_user
+from drug_search.core.utils.auth import get_auth_user_cached
 
 admin_router = APIRouter(prefix="/admin")
 
@@ -16,7 +26,7 @@ admin_router = APIRouter(prefix="/admin")
 async def mailing(
         request: MailingRequest,
         task_service: Annotated[TaskService, Depends(get_task_service)],
-        user: Annotated[UserSchema, Depends(get_auth_user)]
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)]
 ):
     if user.telegram_id in ADMINS_TG_ID:
         await task_service.enqueue_mailing(
@@ -29,3 +39,64 @@ async def mailing(
         return {
             "status": MailingStatuses.ONLY_FOR_ADMINS
         }
+
+
+@admin_router.get(path="/token_ledger/reconcile", response_model=TokenLedgerReconcileResponse)
+async def token_ledger_reconcile(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        repair: bool = Query(False, description="сбросить расходящиеся балансы в Redis"),
+):
+    """Сверка балансов токенов в Redis с users + неприменёнными записями stream"""
+    if user.telegram_id not in ADMINS_TG_ID:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only for admins")
+
+    return await user_service.reconcile_token_ledger(repair=repair)
+
+
+@admin_router.get(path="/intent_classifier/stats", response_model=IntentClassifierStatsResponse)
+async def intent_classifier_stats(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        intent_pre_classifier: Annotated[IntentPreClassifier, Depends(get_intent_pre_classifier)],
+):
+    """Доля ответов локального классификатора действий, согласие с нейронкой и задержка"""
+    if user.telegram_id not in ADMINS_TG_ID:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only for admins")
+
+    return intent_pre_classifier.stats()
+
+
+@admin_router.get(path="/json_repair/stats", response_model=JsonRepairStatsResponse)
+async def json_repair_stats(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        json_repairer: Annotated[JsonRepairer, Depends(get_json_repairer)],
+):
+    """Исходы ремонта невалидных JSON-ответов нейронки (в пределах процесса API)"""
+    if user.telegram_id not in ADMINS_TG_ID:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only for admins")
+
+    return json_repairer.stats()
+
+
+@admin_router.get(path="/single_flight/stats", response_model=SingleFlightStatsResponse)
+async def single_flight_stats(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+):
+    """Схлопывание одинаковых запросов к нейронке (в пределах процесса API)"""
+    if user.telegram_id not in ADMINS_TG_ID:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only for admins")
+
+    return assistant_single_flight.stats()
+
+
+@admin_router.get(path="/llm_usage", response_model=list[LLMUsageReportRow])
+async def llm_usage_report(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        llm_usage_service: Annotated[LLMUsageService, Depends(get_llm_usage_service)],
+        days: int = Query(7, ge=1, le=180, description="за сколько последних дней (UTC)"),
+):
+    """Токены, стоимость, попадания в кэш промптов и время запросов к нейронке по функциям и дням"""
+    if user.telegram_id not in ADMINS_TG_ID:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only for admins")
+
+    return await llm_usage_service.get_usage_report(days=days)
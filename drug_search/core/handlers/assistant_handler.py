@@ -4,14 +4,16 @@ from fastapi import APIRouter
 from fastapi.params import Depends
 
 from drug_search.core.dependencies.assistant_service_dep import get_assistant_service
+from drug_search.core.dependencies.intent_classifier_dep import get_intent_pre_classifier
 from drug_search.core.dependencies.task_service_dep import get_task_service
-from drug_search.core.dependencies.user_service_dep import get_user_service
+from drug_search.core.dependencies.user_log_sink_dep import get_user_log_sink
 from drug_search.core.schemas import QueryRequest, SelectActionResponse, QuestionDrugsRequest, QuestionRequest, \
     UserSchema
 from drug_search.core.services.assistant_service import AssistantService
-from drug_search.core.services.models_service.user_service import UserService
+from drug_search.core.services.intent_classifier import IntentPreClassifier
+from drug_search.core.services.user_log_sink import UserLogSink
 from drug_search.core.services.tasks_logic.task_service import TaskService
-from drug_search.core.utils.auth import get_auth_user
+from drug_search.core.utils.auth import get_auth_user_cached
 
 assistant_router = APIRouter(prefix="/assistant")
 
@@ -19,15 +21,28 @@ assistant_router = APIRouter(prefix="/assistant")
 @assistant_router.post(path="/actions/predict_action", response_model=SelectActionResponse)
 async def get_action(
         request: QueryRequest,
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         assistant_service: Annotated[AssistantService, Depends(get_assistant_service)],
-        user_service: Annotated[UserService, Depends(get_user_service)]
+        user_log_sink: Annotated[UserLogSink, Depends(get_user_log_sink)],
+        intent_pre_classifier: Annotated[IntentPreClassifier, Depends(get_intent_pre_classifier)]
 ):
     """
     Возвращает ответ с предугадыванием действия юзера.
+
+    Уверенные ответы локального классификатора — без запроса к нейронке.
     """
-    await user_service.repo.add_user_log_request(user.id, request.query)
-    return await assistant_service.actions.predict_user_action(request.query)
+    predicted_action: str | None = None
+    try:
+        action_response, is_local = await intent_pre_classifier.predict_action(
+            request.query,
+            fallback=lambda: assistant_service.actions.predict_user_action(request.query)
+        )
+        if not is_local:
+            # разметка для обучения классификатора — только ответы нейронки
+            predicted_action = action_response.action.value
+        return action_response
+    finally:
+        await user_log_sink.put(user.id, request.query, predicted_action=predicted_action)
 
 
 @assistant_router.post(path="/actions/drugs_question")
@@ -48,7 +63,7 @@ async def drugs_question_answer(
 async def question_answer(
         request: QuestionRequest,
         task_service: Annotated[TaskService, Depends(get_task_service)],
-        user: Annotated[UserSchema, Depends(get_auth_user)]
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)]
 ):
     """Отвечает на вопрос юзера в красивом формате HTML"""
     await task_service.enqueue_assistant_question(
@@ -2,22 +2,23 @@ import logging
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from fastapi.params import Path
 
 from drug_search.core.dependencies.assistant_service_dep import get_assistant_service
 from drug_search.core.dependencies.drug_service_dep import get_drug_service, get_drug_service_with_deps
 from drug_search.core.dependencies.task_service_dep import get_task_service
 from drug_search.core.dependencies.user_service_dep import get_user_service
-from drug_search.core.lexicon import EXIST_STATUS, UPDATE_DRUG_COST, SUBSCRIPTION_TYPES
+from drug_search.core.lexicon import EXIST_STATUS, UPDATE_DRUG_COST, SUBSCRIPTION_TYPES, DrugMenu
 from drug_search.core.schemas import (UserSchema, DrugExistingResponse,
                                       AssistantResponseDrugValidation, DrugSchema, UpdateDrugResponse,
-                                      UpdateDrugStatuses)
+                                      UpdateDrugStatuses, DrugHit, SearchExpand, DrugSectionSchema,
+                                      DrugQueryAliasSchema)
 from drug_search.core.services.assistant_service import AssistantService
-from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.core.services.models_service.drug_service import DrugService, DRUG_REFRESHABLE_SECTIONS
 from drug_search.core.services.models_service.user_service import UserService
 from drug_search.core.services.tasks_logic.task_service import TaskService
-from drug_search.core.utils.auth import get_auth_user
+from drug_search.core.utils.auth import get_auth_user, get_auth_user_cached
 from drug_search.core.utils.funcs import layout_converter
 
 logger = logging.getLogger(__name__)
@@ -60,53 +61,70 @@ async def new_drug(
     response_model=DrugExistingResponse
 )
 async def search_drug(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         drug_service: Annotated[DrugService, Depends(get_drug_service)],
         assistant_service: Annotated[AssistantService, Depends(get_assistant_service)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
         drug_name_query: str = Path(..., description="Предполагаемое название препарата"),
+        expand: SearchExpand | None = Query(None, description="full — вернуть полный препарат"),
 ):
-    drug: DrugSchema | None = await drug_service.find_drug_by_query(
+    drug_hit: DrugHit | None = await drug_service.find_drug_hit_by_query(
         user_query=drug_name_query
     )
-    is_drug_in_database = bool(drug)
+    is_drug_in_database = bool(drug_hit)
 
     if is_drug_in_database:
         return DrugExistingResponse(
             is_exist=True,
             is_drug_in_database=True,
-            drug=drug,
-            is_allowed=drug.id in user.allowed_drug_ids(),
-            danger_classification=drug.danger_classification,
-            drug_name_ru=drug.name_ru,
-            drug_name=drug.name
+            drug_hit=drug_hit,
+            drug=await drug_service.hydrate(drug_hit) if expand == SearchExpand.FULL else None,
+            is_allowed=await user_service.is_drug_allowed(user.id, drug_hit.id),
+            danger_classification=drug_hit.danger_classification,
+            drug_name_ru=drug_hit.name_ru,
+            drug_name=drug_hit.name
         )
 
     if not is_drug_in_database:
         """Валидирует препарат на существование, дает ему характеристику (danger_class)"""
-        assistant_response: AssistantResponseDrugValidation = await assistant_service.get_user_query_validation(
-            user_query=drug_name_query
+        # вердикт по похожему запросу, проверенному раньше, иначе — нейронка
+        alias: DrugQueryAliasSchema | None = await drug_service.find_query_alias(user_query=drug_name_query)
+        assistant_response: AssistantResponseDrugValidation | DrugQueryAliasSchema = (
+            alias or await assistant_service.get_user_query_validation(user_query=drug_name_query)
         )
 
         if assistant_response.status == EXIST_STATUS.EXIST:
             # Еще раз пытаемся найти по ДВ в Базе
-            drug: DrugSchema | None = await drug_service.find_drug_by_query(
+            drug_hit: DrugHit | None = await drug_service.find_drug_hit_by_query(
                 user_query=assistant_response.drug_name
             )
 
+            if alias is None or (drug_hit and alias.drug_id != drug_hit.id):
+                await drug_service.save_query_alias(
+                    user_query=drug_name_query,
+                    validation=assistant_response,
+                    drug_id=drug_hit.id if drug_hit else None
+                )
+
             return DrugExistingResponse(
                 is_exist=True,
-                is_drug_in_database=bool(drug),  # может быть найден, а может и нет
-                is_allowed=drug.id in user.allowed_drug_ids() if bool(drug) else None,
-                drug=drug,  # Drug | None
+                is_drug_in_database=bool(drug_hit),  # может быть найден, а может и нет
+                is_allowed=await user_service.is_drug_allowed(user.id, drug_hit.id) if drug_hit else None,
+                drug_hit=drug_hit,  # DrugHit | None
+                drug=await drug_service.hydrate(drug_hit) if expand == SearchExpand.FULL else None,
                 danger_classification=assistant_response.danger_classification,
                 drug_name_ru=assistant_response.drug_name_ru,
                 drug_name=assistant_response.drug_name
             )
         else:  # препарат не существует в принципе
+            if alias is None:
+                await drug_service.save_query_alias(user_query=drug_name_query, validation=assistant_response)
+
             return DrugExistingResponse(
                 is_exist=False,
                 is_drug_in_database=False,
                 is_allowed=False,
+                drug_hit=None,
                 drug=None,
                 danger_classification=assistant_response.danger_classification,
                 drug_name_ru=None,
@@ -121,26 +139,29 @@ async def search_drug(
 )
 async def search_drug_only_trigrams(
         drug_service: Annotated[DrugService, Depends(get_drug_service)],
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
         drug_name_query: str = Path(..., description="Строго действующее вещество"),
+        expand: SearchExpand | None = Query(None, description="full — вернуть полный препарат"),
 ):
-    drug: DrugSchema | None = await drug_service.find_drug_by_query(
+    drug_hit: DrugHit | None = await drug_service.find_drug_hit_by_query(
         user_query=drug_name_query
     )
-    if not drug:
+    if not drug_hit:
         # Пробуем найди на английской раскладке
-        drug: DrugSchema | None = await drug_service.find_drug_by_query(
+        drug_hit: DrugHit | None = await drug_service.find_drug_hit_by_query(
             user_query=layout_converter(text=drug_name_query)
         )
 
     return DrugExistingResponse(
-        is_exist=True if drug else None,
-        is_drug_in_database=True if drug else False,
-        is_allowed=drug.id in user.allowed_drug_ids() if drug else None,
-        drug=drug,
-        danger_classification=drug.danger_classification if drug else None,
-        drug_name_ru=drug.name_ru if drug else None,
-        drug_name=drug.name if drug else None
+        is_exist=True if drug_hit else None,
+        is_drug_in_database=True if drug_hit else False,
+        is_allowed=await user_service.is_drug_allowed(user.id, drug_hit.id) if drug_hit else None,
+        drug_hit=drug_hit,
+        drug=await drug_service.hydrate(drug_hit) if expand == SearchExpand.FULL else None,
+        danger_classification=drug_hit.danger_classification if drug_hit else None,
+        drug_name_ru=drug_hit.name_ru if drug_hit else None,
+        drug_name=drug_hit.name if drug_hit else None
     )
 
 
@@ -150,10 +171,12 @@ async def search_drug_only_trigrams(
     response_model=DrugExistingResponse
 )
 async def search_drug_without_trigrams(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         drug_service: Annotated[DrugService, Depends(get_drug_service)],
         assistant_service: Annotated[AssistantService, Depends(get_assistant_service)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
         drug_name_query: str = Path(..., description="Строго действующее вещество"),
+        expand: SearchExpand | None = Query(None, description="full — вернуть полный препарат"),
 ):
     """
     Нужен для случая если из предыдущей ручки найден не тот препарат.
@@ -173,18 +196,20 @@ async def search_drug_without_trigrams(
             is_exist=False,
             is_drug_in_database=False,
             is_allowed=False,
+            drug_hit=None,
             drug=None,
             danger_classification=None,
             drug_name_ru=None,
             drug_name=None
         )
 
-    drug: DrugSchema | None = await drug_service.repo.find_drug_without_trigrams(validation_response.drug_name)
+    drug_hit: DrugHit | None = await drug_service.repo.find_drug_hit_without_trigrams(validation_response.drug_name)
     return DrugExistingResponse(
         is_exist=True,
-        is_drug_in_database=bool(drug),
-        is_allowed=drug.id in user.allowed_drug_ids() if drug else None,
-        drug=drug,
+        is_drug_in_database=bool(drug_hit),
+        is_allowed=await user_service.is_drug_allowed(user.id, drug_hit.id) if drug_hit else None,
+        drug_hit=drug_hit,
+        drug=await drug_service.hydrate(drug_hit) if expand == SearchExpand.FULL else None,
         danger_classification=validation_response.danger_classification,
         drug_name_ru=validation_response.drug_name_ru,
         drug_name=validation_response.drug_name
@@ -196,25 +221,38 @@ async def update_old_drug(
         user: Annotated[UserSchema, Depends(get_auth_user)],
         task_service: Annotated[TaskService, Depends(get_task_service)],
         user_service: Annotated[UserService, Depends(get_user_service)],
-        drug_id: UUID = Path(..., description="ID препарата в формате UUID")
+        drug_id: UUID = Path(..., description="ID препарата в формате UUID"),
+        sections: list[DrugMenu] | None = Query(None, description="обновляемые разделы (по умолчанию — все)"),
 ):
     """
-    Обновляет препарат
+    Обновляет препарат: только разделы sections, остальные не трогаются
     """
+    if sections and (invalid := [section for section in sections if section not in DRUG_REFRESHABLE_SECTIONS]):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Разделы не обновляются: {', '.join(section.value for section in invalid)}"
+        )
 
     # [ проверка на наличие токенов + покупка ]
+    charged_tokens: int = 0
     if user.allowed_tokens > UPDATE_DRUG_COST:
         if not user.subscription_type == SUBSCRIPTION_TYPES.PREMIUM:
-            await user_service.reduce_tokens(
-                user.id,
-                tokens_amount=UPDATE_DRUG_COST
-            )
+            if not await user_service.reduce_tokens(
+                    user.id,
+                    tokens_amount=UPDATE_DRUG_COST,
+                    reason="drug_update"
+            ):
+                return UpdateDrugResponse(status=UpdateDrugStatuses.NOT_ENOUGH_TOKENS)
+            charged_tokens = UPDATE_DRUG_COST
     else:
         return UpdateDrugResponse(status=UpdateDrugStatuses.NOT_ENOUGH_TOKENS)
 
     job_response: dict = await task_service.enqueue_drug_update(
         user.telegram_id,
         drug_id,
+        sections=list(dict.fromkeys(sections)) if sections else None,
+        user_id=user.id,
+        charged_tokens=charged_tokens,
     )
     return job_response
 
@@ -222,16 +260,50 @@ async def update_old_drug(
 @drug_router.get(path="/{drug_id}", response_model=DrugSchema)
 async def get_drug(
         drug_service: Annotated[DrugService, Depends(get_drug_service)],
-        drug_id: UUID = Path(..., description="ID препарата в формате UUID")
+        drug_id: UUID = Path(..., description="ID препарата в формате UUID"),
+        if_none_match: str | None = Header(None),
 ):
-    """Возвращает препарат по его ID"""
-    drug: DrugSchema | None = await drug_service.repo.get_with_all_relationships(drug_id)
-    return drug
+    """Возвращает препарат по его ID (предсобранный документ из drug_documents)"""
+    document: tuple[bytes, str] | None = await drug_service.get_document(drug_id)
+    if not document:
+        return None
+
+    body, etag = document
+    etag = f'"{etag}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match: "*" или список etag через запятую (слабое сравнение — W/ не учитывается)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+@drug_router.get(path="/{drug_id}/sections/{section}", response_model=DrugSectionSchema)
+async def get_drug_section(
+        drug_service: Annotated[DrugService, Depends(get_drug_service)],
+        drug_id: UUID = Path(..., description="ID препарата в формате UUID"),
+        section: DrugMenu = Path(..., description="Раздел меню препарата"),
+):
+    """Возвращает один раздел препарата — без связанных таблиц других разделов"""
+    drug_section: DrugSectionSchema | None = await drug_service.get_section(drug_id, section)
+    if not drug_section:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drug not found")
+    return drug_section
 
 
 @drug_router.post(path="/update_researches/{drug_id}")
 async def update_researches(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         drug_service: Annotated[DrugService, Depends(get_drug_service_with_deps)],
         drug_id: UUID = Path(..., description="ID препарата в формате UUID"),
 ):
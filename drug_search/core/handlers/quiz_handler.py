@@ -32,7 +32,8 @@ async def get_quiz_question(
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-    await user_service.reduce_tokens(user.id, tokens_amount=1)
+    if not await user_service.reduce_tokens(user.id, tokens_amount=1, reason="quiz"):
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Недостаточно токенов")
     return question
 
 
@@ -50,11 +50,8 @@ async def get_free_tokens(
     if user.got_free_tokens:
         return
 
-    await user_service.repo.update(
-        user.id,
-        got_free_tokens=True,
-        additional_tokens=user.additional_tokens+FREE_TOKENS_AMOUNT
-    )
+    await user_service.repo.update(user.id, got_free_tokens=True)
+    await user_service.add_tokens(user.id, FREE_TOKENS_AMOUNT)
     logger.info(f"Юзер {user.telegram_id} получил доп токены")
 
     await cache_service.redis_service.invalidate_user_data(user.telegram_id)
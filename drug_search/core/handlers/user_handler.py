@@ -1,19 +1,21 @@
 import logging
 from typing import Annotated
+from uuid import UUID
 
 from fastapi import APIRouter
-from fastapi.params import Depends
+from fastapi.params import Depends, Path
 
 from drug_search.core.dependencies.bot.cache_service_dep import get_cache_service
 from drug_search.core.dependencies.task_service_dep import get_task_service
 from drug_search.core.dependencies.user_service_dep import get_user_service, get_user_service_with_assistant
 from drug_search.core.lexicon import SUBSCRIPTION_TYPES, DANGER_CLASSIFICATION, NEW_DRUG_COST
 from drug_search.core.schemas import (UserSchema, AddTokensRequest, BuyDrugRequest, BuyDrugResponse,
-                                      BuyDrugStatuses, AllowedDrugsInfoSchema)
+                                      BuyDrugStatuses, AllowedDrugsInfoSchema, AllowedDrugMembershipResponse,
+                                      ReduceTokensResponse, TokenBalanceSchema)
 from drug_search.core.services.cache_logic.cache_service import CacheService
 from drug_search.core.services.models_service.user_service import UserService
 from drug_search.core.services.tasks_logic.task_service import TaskService
-from drug_search.core.utils.auth import get_auth_user
+from drug_search.core.utils.auth import get_auth_user, get_auth_user_cached
 
 user_router = APIRouter(prefix="/user")
 logger = logging.getLogger(__name__)
@@ -25,7 +27,7 @@ logger = logging.getLogger(__name__)
     description="Получить описание юзера"
 )
 async def get_user(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
 ):
     return user
 
@@ -49,12 +51,28 @@ async def simple_mode_toggle(
     response_model=AllowedDrugsInfoSchema
 )
 async def get_drugs(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         user_service: Annotated[UserService, Depends(get_user_service)],
 ):
     return await user_service.get_allowed_drugs_info(user_id=user.id)
 
 
+@user_router.get(
+    path="/allowed/{drug_id}",
+    description="Разрешен ли препарат юзеру",
+    response_model=AllowedDrugMembershipResponse
+)
+async def is_drug_allowed(
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        drug_id: UUID = Path(..., description="ID препарата в формате UUID")
+):
+    return AllowedDrugMembershipResponse(
+        drug_id=drug_id,
+        is_allowed=await user_service.is_drug_allowed(user.id, drug_id)
+    )
+
+
 @user_router.post(path="/tokens/increment", description="Добавление токенов")
 async def add_tokens(
         user: Annotated[UserSchema, Depends(get_auth_user)],
@@ -66,21 +84,33 @@ async def add_tokens(
         user.id,
         amount_search_tokens=request.tokens_amount,
     )
-    await cache_service.redis_service.invalidate_user_data(telegram_id=user.telegram_id)
+    fresh_user: UserSchema = await user_service.with_token_balance(user)
+    await cache_service.redis_service.update_user_tokens(
+        telegram_id=user.telegram_id,
+        balance=TokenBalanceSchema.model_validate(fresh_user, from_attributes=True)
+    )
 
 
-@user_router.post(path="/tokens/reduce", description="Отнять токены")
+@user_router.post(path="/tokens/reduce", description="Отнять токены", response_model=ReduceTokensResponse)
 async def reduce_tokens(
-        user: Annotated[UserSchema, Depends(get_auth_user)],
+        user: Annotated[UserSchema, Depends(get_auth_user_cached)],
         user_service: Annotated[UserService, Depends(get_user_service)],
         cache_service: Annotated[CacheService, Depends(get_cache_service)],
         request: AddTokensRequest
 ):
-    await user_service.reduce_tokens(
+    """Списание через TokenLedger: в users — при flush, в кэше профиля бота обновляется только баланс"""
+    balance: TokenBalanceSchema | None = await user_service.reduce_tokens(
         user.id,
         tokens_amount=request.tokens_amount,
+        reason="reduce"
+    )
+    if balance:
+        await cache_service.redis_service.update_user_tokens(telegram_id=user.telegram_id, balance=balance)
+
+    return ReduceTokensResponse(
+        is_charged=balance is not None,
+        balance=balance
     )
-    await cache_service.redis_service.invalidate_user_data(telegram_id=user.telegram_id)
 
 
 @user_router.post(path="/buy_drug")
@@ -113,10 +143,19 @@ async def buy_drug(
             status=BuyDrugStatuses.DANGER
         )
 
-    await user_service.reduce_tokens(user.id, tokens_amount=NEW_DRUG_COST)
+    balance: TokenBalanceSchema | None = await user_service.reduce_tokens(
+        user.id,
+        tokens_amount=NEW_DRUG_COST,
+        reason="buy_drug"
+    )
+    if not balance:
+        # параллельное списание успело раньше
+        return BuyDrugResponse(
+            status=BuyDrugStatuses.NOT_ENOUGH_TOKENS
+        )
 
     # [ если количество препаратов кратно 5 ]
-    if (len(user.allowed_drugs) + 1) % 5 == 0:
+    if (await user_service.get_allowed_drugs_count(user.id) + 1) % 5 == 0:
         """Обновляем описание юзера"""
         await task_service.enqueue_user_description_update(user_id=user.id, user_telegram_id=user.telegram_id)
 
@@ -7,7 +7,9 @@ __all__ = [
     # [ Enums ]
     'DANGER_CLASSIFICATION',
     'EXIST_STATUS',
+    'DRUG_SECTION_STATUS',
     'ACTIONS_FROM_ASSISTANT',
+    'LLM_PRIORITY',
     'ARROW_TYPES',
     'JobStatuses',
     'MailingStatuses',
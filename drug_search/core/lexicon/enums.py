@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import Optional
 
 
@@ -57,11 +57,26 @@ class ACTIONS_FROM_ASSISTANT(str, Enum):
     OTHER = "other"
 
 
+class LLM_PRIORITY(IntEnum):
+    """Приоритет запросов к нейронке в LLMScheduler (меньше — раньше)"""
+    QUESTION = 0  # вопрос юзера / интерактивные запросы
+    DRUG_CREATE = 1
+    RESEARCH = 2  # исследования PubMed
+    USER_DESCRIPTION = 3
+
+
 class EXIST_STATUS(str, Enum):
     EXIST: str = "exist"
     NOT_EXIST: str = "not exist"
 
 
+class DRUG_SECTION_STATUS(str, Enum):
+    """Статус раздела препарата при поэтапном создании"""
+    PENDING: str = "pending"  # ответ нейронки еще не записан
+    READY: str = "ready"
+    FAILED: str = "failed"  # будет пересоздан отдельно от остальных разделов
+
+
 class DANGER_CLASSIFICATION(str, Enum):
     SAFE: str = "SAFE"
     PREMIUM_NEED: str = "PREMIUM_NEED"
@@ -13,6 +13,12 @@ class MessageTemplates:
         "</blockquote>"
     )
 
+    ASSISTANT_ANSWER_DRAFT = (
+        "<b>{header_with_emoji}</b>\n\n"
+        "{content}"
+        "<i>⏳ ответ дописывается...</i>"
+    )
+
     # [ ARQ ]
     DRUG_CREATED_NOTIFICATION = (
         "<i>{name_ru} теперь в вашей базе!</i>"
@@ -22,4 +28,9 @@ class MessageTemplates:
         "<i>Обновление {name_ru} завершено!</i>"
     )
 
+    DRUG_UPDATE_FAILED_NOTIFICATION = (
+        "<i>Не удалось обновить {name_ru}: {sections}. "
+        "Прежние данные этих разделов сохранены{refund}.</i>"
+    )
+
     USER_DESCRIPTION_UPDATED = "<i>В вашем профиле появилось новое описание!</i>"
@@ -1018,3 +1018,16 @@ class Prompts:
     1. СТРОГО: Объясни очень простым языком чтобы было понятно тому кто не знает медицину
     2. Не используй сложные термины
     """
+
+    REPAIR_JSON: str = """
+    Ты — валидатор JSON. На вход подается JSON-схема, ошибки валидации и невалидный ответ.
+
+    ТЫ ДОЛЖЕН:
+    - Вернуть ИСПРАВЛЕННЫЙ ответ СТРОГО в JSON-формате по схеме
+    - Исправить только то, что указано в ошибках: структуру, типы, допустимые значения enum, недостающие обязательные поля
+    - Сохранить содержание ответа: не переводить, не сокращать и не дополнять текст без необходимости
+    - Если ответ оборван — закончить его коротко и закрыть все скобки
+
+    ЗАПРЕЩЕНО:
+    - Добавлять пояснения, markdown и текст вне JSON
+    """
@@ -26,6 +26,7 @@ class UserRequestLogSchema(BaseModel):
     user_id: uuid.UUID = Field(..., description="User ID")
     user_query: str = Field(..., description="запрос пользователя")
     used_at: datetime = Field(..., description="дата и время запроса")
+    predicted_action: Optional[str] = Field(None, description="действие, предсказанное нейронкой (разметка IntentClassifier)")
 
 
 class QueryRequest(BaseModel):
@@ -1,11 +1,13 @@
 from enum import Enum
 from typing import Optional
+from uuid import UUID
 
 from pydantic import BaseModel, Field
 
 from drug_search.core.lexicon.enums import ACTIONS_FROM_ASSISTANT, DANGER_CLASSIFICATION, JobStatuses, DrugMenu
-from drug_search.core.schemas.drug_schemas import DrugSchema
+from drug_search.core.schemas.drug_schemas import DrugSchema, DrugHit
 from drug_search.core.schemas.telegram_schemas import DrugBrieflySchema
+from drug_search.core.schemas.user_schemas import TokenBalanceSchema, TokenLedgerMismatchSchema
 
 
 # [ Enums, types ]
@@ -16,6 +18,11 @@ class UpdateDrugStatuses(str, Enum):
     NEED_PREMIUM = "need_premium"
 
 
+class SearchExpand(str, Enum):
+    """Что возвращать в поиске помимо DrugHit"""
+    FULL = "full"
+
+
 class BuyDrugStatuses(str, Enum):
     DRUG_CREATED = "created"  # and allowed
     DRUG_ALLOWED = "allowed"
@@ -39,7 +46,8 @@ class DrugExistingResponse(BaseModel):
 
     # if exist in database
     is_drug_in_database: bool | None
-    drug: DrugSchema | None
+    drug_hit: DrugHit | None = Field(None, description="Легкий результат поиска")
+    drug: DrugSchema | None = Field(None, description="Полный препарат, только с ?expand=full")
     is_allowed: bool | None = Field(None)
 
 
@@ -69,3 +77,47 @@ class AllowedDrugsInfoSchema(BaseModel):
     drugs_count: int = Field(..., description="количество препаратов в базе данных")
     allowed_drugs_count: int = Field(..., description="количество разрешенных препаратов")
     allowed_drugs: Optional[list[DrugBrieflySchema]] = Field(None, description="о препарате кратко")
+
+
+class AllowedDrugMembershipResponse(BaseModel):
+    drug_id: UUID = Field(..., description="ID препарата")
+    is_allowed: bool = Field(..., description="разрешен ли препарат юзеру")
+
+
+class ReduceTokensResponse(BaseModel):
+    is_charged: bool = Field(..., description="списаны ли токены (не хватило — ничего не списано)")
+    balance: TokenBalanceSchema | None = Field(None, description="баланс после списания")
+
+
+class TokenLedgerReconcileResponse(BaseModel):
+    checked: int = Field(..., description="проверено балансов в Redis")
+    pending_entries: int = Field(..., description="записей stream, еще не примененных к users")
+    mismatches: list[TokenLedgerMismatchSchema] = Field(default_factory=list)
+    repaired: int = Field(0, description="сброшено расходящихся балансов")
+
+
+class IntentClassifierStatsResponse(BaseModel):
+    loaded: bool = Field(..., description="артефакт загружен")
+    threshold: float = Field(..., description="порог уверенности для локального ответа")
+    local_answers: int = Field(..., description="ответов без нейронки")
+    llm_answers: int = Field(..., description="ответов нейронкой")
+    local_rate: float = Field(..., description="доля локальных ответов")
+    agreement_on_llm_answers: Optional[float] = Field(None, description="совпадение локального прогноза с нейронкой")
+    avg_latency_ms: Optional[float] = Field(None, description="среднее время локального прогноза")
+    offline_metrics: Optional[dict] = Field(None, description="метрики на отложенной выборке при обучении")
+
+
+class JsonRepairStatsResponse(BaseModel):
+    outcomes: dict[str, int] = Field(..., description="исходы проверки ответов: valid / repaired / reask_repaired / failed")
+    fixes: dict[str, int] = Field(..., description="локальные исправления по типам")
+    failed_models: dict[str, int] = Field(..., description="схемы ответов, которые не удалось починить")
+    repair_rate: float = Field(..., description="доля починенных ответов")
+
+
+class SingleFlightStatsResponse(BaseModel):
+    name: str = Field(..., description="имя группы загрузок")
+    in_flight: int = Field(..., description="загрузок выполняется сейчас")
+    calls: int = Field(..., description="загрузок выполнено процессом")
+    collapsed: int = Field(..., description="вызовов, дождавшихся чужой загрузки")
+    collapsed_remote: int = Field(..., description="вызовов, получивших результат другого процесса")
+    leader_cancelled: int = Field(..., description="ожиданий, повторенных после отмены лидера")
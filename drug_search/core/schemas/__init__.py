@@ -6,6 +6,7 @@ from drug_search.core.schemas.telegram_schemas import *
 from drug_search.core.schemas.user_schemas import *
 from drug_search.core.schemas.pubmed_schema import ClearResearchesRequest, PubmedResearchSchema
 from drug_search.core.schemas.payment_schema import *
+from drug_search.core.schemas.llm_schemas import *
 
 __all__ = [
     # [ Assistant ]
@@ -15,6 +16,7 @@ __all__ = [
     'DrugPathwaysAssistantResponse',
     'DrugResearchSchema',
     'DrugResearchesAssistantResponse',
+    'ClearResearchesResult',
     'AssistantResponsePubmedQuery',
     'AssistantResponseUserDescription',
     'DrugDosagesAssistantResponse',
@@ -27,6 +29,11 @@ __all__ = [
     'EliminationInfo',
     'DrugSchema',
     'DrugBrieflySchema',
+    'DrugHit',
+    'DrugQueryAliasSchema',
+    'DrugSectionSchema',
+    'DrugSectionVersionSchema',
+    'DrugDocumentSchema',
     'DrugDosageSchema',
     'DrugPathwaySchema',
     'DrugSynonymSchema',
@@ -43,6 +50,10 @@ __all__ = [
     'UserRequestLogSchema',
     'AllowedDrugSchema',
     'AllowedDrugsInfoSchema',
+    'AllowedDrugMembershipResponse',
+    'TokenBalanceSchema',
+    'TokenLedgerCursorSchema',
+    'TokenLedgerMismatchSchema',
     # [ API Requests ]
     'AddTokensRequest',
     'QueryRequest',
@@ -57,16 +68,26 @@ __all__ = [
     'SelectActionResponse',
     'UpdateDrugResponse',
     'BuyDrugResponse',
+    'ReduceTokensResponse',
+    'TokenLedgerReconcileResponse',
+    'IntentClassifierStatsResponse',
+    'JsonRepairStatsResponse',
+    'SingleFlightStatsResponse',
     'QuestionDrugsAssistantResponse',
     'DrugAnswer',
     # [ Enums ]
     'BuyDrugStatuses',
     'UpdateDrugStatuses',
+    'SearchExpand',
     # [ Types ]
     'DrugPathwaySchema',
     'MechanismSummary',
     'CombinationType',
     # [ Payment ]
     'PaymentRequest',
-    'PaymentSchema'
+    'PaymentSchema',
+    # [ LLM ]
+    'LLMResponseCacheSchema',
+    'LLMUsageSchema',
+    'LLMUsageReportRow',
 ]
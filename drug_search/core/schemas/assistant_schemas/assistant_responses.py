@@ -83,6 +83,14 @@ class DrugResearchesAssistantResponse(BaseModel):
     researches: list[DrugResearchSchema] = Field(...)
 
 
+class ClearResearchesResult(DrugResearchesAssistantResponse):
+    """
+    Результат get_clear_researches: ответы всех частей + DOI статей из необработанных частей
+    (не в схеме ответа нейронки).
+    """
+    failed_dois: list[str] = Field(default_factory=list, description="DOI статей из частей с ошибкой")
+
+
 # [ OTHER ]
 
 class AssistantResponsePubmedQuery(BaseModel):
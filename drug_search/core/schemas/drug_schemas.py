@@ -5,7 +5,7 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
-from drug_search.core.lexicon.enums import DANGER_CLASSIFICATION
+from drug_search.core.lexicon.enums import DANGER_CLASSIFICATION, EXIST_STATUS, DRUG_SECTION_STATUS, DrugMenu
 
 
 class CombinationType(str, Enum):
@@ -166,6 +166,12 @@ class MetabolismPhase(BaseModel):
         from_attributes = True
 
 
+class DrugSectionVersionSchema(BaseModel):
+    """Версия раздела препарата: растет только при изменении данных раздела"""
+    version: int = Field(..., description="номер версии раздела")
+    updated_at: datetime = Field(..., description="время последнего изменения раздела")
+
+
 class DrugSchema(BaseModel):
     """Полная схема препарата"""
     id: UUID = Field(...)
@@ -188,7 +194,7 @@ class DrugSchema(BaseModel):
     pharmacokinetics: list[Pharmacokinetics] = Field(..., description="информация о абсорбции по путям введения")
     elimination: list[EliminationInfo] = Field(..., description="пути выведения")
 
-    metabolism_description: str = Field(...)
+    metabolism_description: Optional[str] = Field(None)
 
     # [ dosages ]
     dosages: list[DrugDosageSchema] = Field(...)
@@ -197,13 +203,13 @@ class DrugSchema(BaseModel):
     # [ pathways ]
     pathways: list[DrugPathwaySchema] = Field(...)
     pathways_sources: list[str] = Field(...)
-    primary_action: str = Field(...)
-    secondary_actions: str = Field(...)
-    clinical_effects: str = Field(...)
+    primary_action: Optional[str] = Field(None)
+    secondary_actions: Optional[str] = Field(None)
+    clinical_effects: Optional[str] = Field(None)
 
     # [ analogs ]
     analogs: list[DrugAnalogSchema] = Field(...)
-    analogs_description: str = Field(...)
+    analogs_description: Optional[str] = Field(None)
 
     # [ combinations ]
     combinations: list[DrugCombinationSchema] = Field(...)
@@ -213,8 +219,108 @@ class DrugSchema(BaseModel):
 
     prices: list[DrugPriceSchema] | None = Field(None)
 
+    section_statuses: dict[DrugMenu, DRUG_SECTION_STATUS] = Field(
+        default_factory=dict,
+        description="статусы разделов при поэтапном создании; раздела нет — готов"
+    )
+    section_versions: dict[DrugMenu, DrugSectionVersionSchema] = Field(
+        default_factory=dict,
+        description="версии разделов; раздела нет — не менялся с создания до их учета"
+    )
+
     created_at: datetime = Field(...)
     updated_at: datetime = Field(...)
 
     class Config:
         from_attributes = True
+
+
+class DrugSectionSchema(BaseModel):
+    """
+    Раздел препарата для одного DrugMenu.
+    Поля строки drugs всегда заполнены, из связанных таблиц — только таблица этого раздела,
+    остальные списки пустые.
+    """
+    section: DrugMenu = Field(..., description="раздел меню, для которого загружены данные")
+    id: UUID = Field(...)
+
+    # [ briefly info ]
+    name: str = Field(...)
+    latin_name: str = Field(...)
+    name_ru: str = Field(...)
+    description: str = Field(...)
+    classification: str = Field(...)
+    fact: str = Field(...)
+    fun_facts: list[str] = Field(...)
+
+    danger_classification: DANGER_CLASSIFICATION = Field(..., description="класс опасности 0/1/2")
+
+    # [ metabolism ]
+    metabolism: list[MetabolismPhase] = Field(..., description="фазы метаболизма")
+    pharmacokinetics: list[Pharmacokinetics] = Field(..., description="информация о абсорбции по путям введения")
+    elimination: list[EliminationInfo] = Field(..., description="пути выведения")
+    metabolism_description: Optional[str] = Field(None)
+
+    # [ sources / descriptions ]
+    dosage_sources: list[str] = Field(...)
+    pathways_sources: list[str] = Field(...)
+    primary_action: Optional[str] = Field(None)
+    secondary_actions: Optional[str] = Field(None)
+    clinical_effects: Optional[str] = Field(None)
+    analogs_description: Optional[str] = Field(None)
+
+    # [ relationships раздела ]
+    dosages: list[DrugDosageSchema] = Field(default_factory=list)
+    pathways: list[DrugPathwaySchema] = Field(default_factory=list)
+    analogs: list[DrugAnalogSchema] = Field(default_factory=list)
+    combinations: list[DrugCombinationSchema] = Field(default_factory=list)
+    researches: list[DrugResearchSchema] = Field(default_factory=list)
+
+    section_statuses: dict[DrugMenu, DRUG_SECTION_STATUS] = Field(default_factory=dict)
+    section_versions: dict[DrugMenu, DrugSectionVersionSchema] = Field(default_factory=dict)
+
+    created_at: datetime = Field(...)
+    updated_at: datetime = Field(...)
+
+    class Config:
+        from_attributes = True
+
+
+class DrugHit(BaseModel):
+    """Легкий результат поиска препарата (без связанных таблиц)"""
+    id: UUID = Field(...)
+    name: str = Field(...)
+    name_ru: Optional[str] = Field(None)
+    danger_classification: DANGER_CLASSIFICATION = Field(..., description="класс опасности")
+    updated_at: datetime = Field(...)
+
+    synonym: Optional[str] = Field(None, description="синоним, по которому найден препарат")
+    score: float = Field(..., description="схожесть с запросом 0.00-1.00")
+
+    class Config:
+        from_attributes = True
+
+
+class DrugQueryAliasSchema(BaseModel):
+    """объект из таблицы drug_query_aliases: запрос юзера, проверенный нейронкой"""
+    query: str = Field(..., description="нормализованный запрос (lower + strip)")
+    status: EXIST_STATUS = Field(..., description="вердикт нейронки")
+    drug_id: Optional[UUID] = Field(None, description="препарат в базе на момент проверки")
+    drug_name: str = Field(..., description="ДВ на англ")
+    drug_name_ru: str = Field(..., description="ДВ на русском")
+    danger_classification: DANGER_CLASSIFICATION = Field(..., description="класс опасности")
+    expires_at: Optional[datetime] = Field(None, description="срок жизни (для NOT_EXIST), None — бессрочно")
+
+    class Config:
+        from_attributes = True
+
+
+class DrugDocumentSchema(BaseModel):
+    """Метаданные предсобранного документа препарата (таблица drug_documents)"""
+    drug_id: UUID = Field(...)
+    etag: str = Field(..., description="хэш сериализованного документа")
+    version: int = Field(..., description="номер пересборки документа")
+    updated_at: datetime = Field(...)
+
+    class Config:
+        from_attributes = True
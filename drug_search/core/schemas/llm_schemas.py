@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class LLMResponseCacheSchema(BaseModel):
+    cache_key: str = Field(..., description="sha256 от модели, текста промпта, запроса и параметров")
+    prompt_name: str = Field(..., description="название промпта в Prompts")
+    prompt_hash: str = Field(..., description="sha256 текста промпта на момент ответа")
+    response: str = Field(..., description="сырой ответ нейронки (JSON)")
+    expires_at: Optional[datetime] = Field(None, description="срок жизни, None — бессрочно")
+
+
+class LLMUsageSchema(BaseModel):
+    feature: str = Field(..., description="функция приложения (LLM_FEATURES): drug_creation, pubmed_query, question...")
+    prompt_name: str = Field(..., description="название промпта в Prompts")
+    prompt_hash: str = Field(..., description="sha256 текста промпта")
+    model: str = Field(..., description="модель нейронки")
+    prompt_tokens: int = Field(0, description="токены запроса")
+    cached_tokens: int = Field(0, description="токены запроса из кэша промптов DeepSeek (prompt_cache_hit_tokens)")
+    completion_tokens: int = Field(0, description="токены ответа")
+    latency_ms: int = Field(..., description="время запроса к нейронке без ожидания очереди LLMScheduler")
+    outcome: str = Field(..., description="исход: valid / repaired / reask_repaired / failed / ok / error")
+    created_at: datetime = Field(..., description="время запроса")
+
+
+class LLMUsageReportRow(BaseModel):
+    day: date = Field(..., description="день (UTC)")
+    feature: str = Field(..., description="функция приложения")
+    calls: int = Field(..., description="запросов к нейронке")
+    errors: int = Field(..., description="запросов с ошибкой API / невалидным ответом")
+    prompt_tokens: int = Field(..., description="токены запросов")
+    cached_tokens: int = Field(..., description="токены запросов из кэша промптов")
+    completion_tokens: int = Field(..., description="токены ответов")
+    cache_hit_rate: float = Field(..., description="доля токенов запросов из кэша промптов")
+    cost_usd: float = Field(..., description="стоимость по ценам LLM_PRICE_*")
+    avg_latency_ms: float = Field(..., description="среднее время запроса")
+    p95_latency_ms: float = Field(..., description="95-й перцентиль времени запроса")
@@ -37,10 +37,6 @@ class UserSchema(BaseModel):
     referrals_count: int = Field(..., description="количество рефералов")
 
     description: Optional[str] = Field(None, description="описание пользователя")
-    allowed_drugs: list[AllowedDrugSchema] = Field(
-        default_factory=list,
-        description="Список разрешенных препаратов"
-    )
 
     subscription_type: SUBSCRIPTION_TYPES = Field(..., description="Тип подписки юзера")
     subscription_end: Optional[datetime] = Field(None, description="когда конец подписки")
@@ -48,9 +44,6 @@ class UserSchema(BaseModel):
     created_at: datetime = Field(..., description="когда создан юзер")
     updated_at: Optional[datetime] = Field(None, description="когда посл обн столбца у юзера")
 
-    def allowed_drug_ids(self):
-        return [allowed_drug.drug_id for allowed_drug in self.allowed_drugs]
-
     @property
     def subscription_days_remaining(self) -> int:
         if self.subscription_end:
@@ -64,3 +57,23 @@ class UserSchema(BaseModel):
 class ReferralSchema(BaseModel):
     referrer_telegram_id: str = Field(..., description="ID приглашенного")
     referral_telegram_id: str = Field(..., description="ID пригласившего")
+
+
+class TokenBalanceSchema(BaseModel):
+    allowed_tokens: int = Field(..., description="токены")
+    additional_tokens: int = Field(..., description="дополнительные токены (не сбрасываются)")
+    used_tokens: int = Field(..., description="использованные токены")
+
+
+class TokenLedgerCursorSchema(BaseModel):
+    name: str = Field(..., description="название ledger")
+    last_entry_id: str = Field(..., description="id последней примененной записи stream")
+
+    class Config:
+        from_attributes = True
+
+
+class TokenLedgerMismatchSchema(BaseModel):
+    user_id: UUID = Field(...)
+    cached: TokenBalanceSchema = Field(..., description="баланс в Redis")
+    expected: TokenBalanceSchema = Field(..., description="users + неприменённые дельты")
@@ -1,11 +1,21 @@
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Union, Type
+import time
+from typing import Union, Type, AsyncIterator, Any, Iterable
 
-import aiohttp
-from openai import AsyncOpenAI, NOT_GIVEN, NotGiven
+from openai import AsyncOpenAI, NOT_GIVEN, NotGiven, APIConnectionError, APITimeoutError, InternalServerError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion
 from pydantic import ValidationError
 
 from drug_search.config import config
+from drug_search.core.dependencies.assistant_response_cache_dep import assistant_response_cache
+from drug_search.core.dependencies.deepseek_balance_dep import deepseek_balance_guard
+from drug_search.core.dependencies.json_repair_dep import json_repairer
+from drug_search.core.dependencies.llm_scheduler_dep import llm_scheduler
+from drug_search.core.dependencies.llm_usage_dep import llm_usage_sink
 from drug_search.core.lexicon import Prompts
 from drug_search.core.schemas import (
     DrugResearchesAssistantResponse, AssistantResponsePubmedQuery,
@@ -13,10 +23,16 @@ from drug_search.core.schemas import (
     DrugPathwaysAssistantResponse, AssistantResponseDrugValidation,
     SelectActionResponse, QuestionDrugsAssistantResponse,
     AssistantResponseUserDescription, DrugDosagesAssistantResponse, DrugAnalogsAssistantResponse,
-    DrugMetabolismAssistantResponse, ClearResearchesRequest, QuestionAssistantResponse
+    DrugMetabolismAssistantResponse, ClearResearchesRequest, QuestionAssistantResponse, PubmedResearchSchema,
+    ClearResearchesResult
 )
+from drug_search.core.services.cache_logic.single_flight import SingleFlight
+from drug_search.core.services.json_repair import OUTCOME_VALID, OUTCOME_REPAIRED, OUTCOME_REASK_REPAIRED, \
+    OUTCOME_FAILED
+from drug_search.core.services.llm_usage import LLM_OUTCOME_OK, LLM_OUTCOME_ERROR
 from drug_search.core.utils import assistant_utils
-from drug_search.core.utils.exceptions import AssistantResponseError, APIError
+from drug_search.core.utils.json_stream import JsonStreamParser, JsonPath, ANY_INDEX
+from drug_search.core.utils.exceptions import AssistantResponseError
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +45,18 @@ AssistantResponseModel = Union[
     None,
 ]
 
+# законченные части QuestionAssistantResponse, которые показываются юзеру по мере генерации
+QUESTION_STREAM_PATHS: tuple[tuple, ...] = (
+    ("header",),
+    ("blocks_content", ANY_INDEX, "blocks_header"),
+    ("blocks_content", ANY_INDEX, "blocks_description"),
+    ("blocks_content", ANY_INDEX, "content", ANY_INDEX),
+)
+
+# одинаковые конкурентные запросы к LLM (в т.ч. от разных юзеров) схлопываются в один;
+# на уровне модуля, т.к. AssistantService создается на каждый запрос
+assistant_single_flight = SingleFlight("assistant")
+
 
 class AssistantService:
     def __init__(self):
@@ -36,37 +64,10 @@ class AssistantService:
         self.actions = self.Actions(self)
         self.drug_creation = self.DrugCreation(self)
         self.pubmed = self.PubMed(self)
-        self._session: aiohttp.ClientSession | None = None
 
     async def check_balance(self):
-        """Асинхронная проверка баланса"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                        "https://api.deepseek.com/user/balance",
-                        headers={
-                            'Accept': 'application/json',
-                            'Authorization': f'Bearer {config.DEEPSEEK_API_KEY}'
-                        }
-                ) as response:
-                    balance_data = await response.json()
-
-                    usd_balance_info = next(
-                        (item for item in balance_data["balance_infos"] if item["currency"] == "USD"),
-                        None
-                    )
-                    balance_now: float = float(usd_balance_info["total_balance"]) if usd_balance_info else 0.0
-
-                    if balance_now > config.MINIMUM_USD_ON_BALANCE:
-                        logger.info(f"Выполняется запрос, на балансе: {balance_now}")
-                        return
-
-                    logger.error(f"На балансе недостаточно денег: {balance_now} < {config.MINIMUM_USD_ON_BALANCE}")
-                    raise APIError("На балансе DeepseekAPI недостаточно денег!")
-
-        except aiohttp.ClientError as e:
-            logger.error(f"Ошибка при проверке баланса: {e}")
-            return
+        """Проверка баланса / circuit breaker: по кэшированному балансу, без запроса к DeepSeek"""
+        deepseek_balance_guard.check()
 
     async def get_response(
             self,
@@ -74,45 +75,286 @@ class AssistantService:
             prompt: str,
             pydantic_model: Type[AssistantResponseModel],
             temperature: float = 0.3,
-            max_tokens: int | NotGiven = NOT_GIVEN
+            max_tokens: int | NotGiven = NOT_GIVEN,
+            use_cache: bool = True
     ):
-        try:
-            await self.check_balance()
+        """
+        :param use_cache: читать ответ из AssistantResponseCache (только промпты из LLM_CACHE_POLICY);
+            False / llm_cache_bypass — запрос в нейронку, свежий ответ перезаписывает кэш
+        """
+        request_key: str = hashlib.sha256(
+            f"{prompt}\x00{input_query}\x00{temperature}\x00{max_tokens}\x00{pydantic_model}".encode()
+        ).hexdigest()
+
+        if assistant_response_cache.prompt_name(prompt) is None:
+            return await assistant_single_flight.do(
+                request_key,
+                lambda: self._get_response(input_query, prompt, pydantic_model, temperature, max_tokens)
+            )
 
-            response = await self.client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": f"{prompt}"},
-                    {"role": "user", "content": f"{input_query}"}
-                ],
-                response_format={"type": "json_object"},
-                temperature=temperature,
-                max_tokens=max_tokens
+        cache_key: str = assistant_response_cache.make_key(
+            "deepseek-chat", prompt, input_query, temperature, max_tokens,
+            pydantic_model.__name__ if pydantic_model else ""
+        )
+        if use_cache and not assistant_response_cache.is_bypassed():
+            if (cached_response := await assistant_response_cache.get(cache_key)) is not None:
+                try:
+                    return pydantic_model.model_validate_json(cached_response) if pydantic_model else cached_response
+                except ValidationError:
+                    # схема ответа поменялась — ответ перезапросится и перезапишется
+                    logger.info(f"AssistantResponseCache: ответ {cache_key} не прошел валидацию")
+
+        async def load_and_cache():
+            response = await self._get_response(input_query, prompt, pydantic_model, temperature, max_tokens)
+            await assistant_response_cache.set(
+                cache_key,
+                prompt,
+                response.model_dump_json() if pydantic_model else response
             )
+            return response
+
+        return await assistant_single_flight.do(request_key, load_and_cache)
+
+    @staticmethod
+    def _estimate_tokens(prompt: str, input_query: str, max_tokens: int | NotGiven) -> int:
+        """Грубая оценка токенов запроса + ответа для бюджета LLMScheduler (~3 символа на токен)"""
+        completion_tokens: int = max_tokens if isinstance(max_tokens, int) else config.LLM_DEFAULT_COMPLETION_TOKENS
+        return (len(prompt) + len(input_query)) // 3 + completion_tokens
 
-            logger.info("статистика по токенам:\n")
-            logger.info(response.usage)
+    async def _complete(
+            self,
+            prompt: str,
+            input_query: str,
+            temperature: float,
+            max_tokens: int | NotGiven
+    ) -> tuple[ChatCompletion, float]:
+        """
+        Один запрос к нейронке в слоте LLMScheduler.
+        :return: (ответ, время запроса в секундах); ошибка API сразу пишется в учет (llm_usage)
+        """
+        async with llm_scheduler.slot(self._estimate_tokens(prompt, input_query, max_tokens)) as ticket:
+            started_at: float = time.perf_counter()
+            try:
+                response: ChatCompletion = await self.client.chat.completions.create(
+                    model="deepseek-chat",
+                    messages=[
+                        {"role": "system", "content": f"{prompt}"},
+                        {"role": "user", "content": f"{input_query}"}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception as ex:
+                llm_usage_sink.record(prompt, None, time.perf_counter() - started_at, LLM_OUTCOME_ERROR)
+                if isinstance(ex, (APIConnectionError, APITimeoutError, InternalServerError)):
+                    # недоступность / 5xx DeepSeek — в circuit breaker; ошибки запроса (4xx) не считаются
+                    deepseek_balance_guard.record_failure()
+                raise
+            latency: float = time.perf_counter() - started_at
+            deepseek_balance_guard.record_success()
+            if response.usage:
+                ticket.used_tokens = response.usage.total_tokens
+
+        logger.info("статистика по токенам:\n")
+        logger.info(response.usage)
+        return response, latency
+
+    async def _get_response(
+            self,
+            input_query: str,
+            prompt: str,
+            pydantic_model: Type[AssistantResponseModel],
+            temperature: float,
+            max_tokens: int | NotGiven
+    ):
+        try:
+            await self.check_balance()
 
-            if not response.choices:
-                raise AssistantResponseError("ERROR: No data from assistant.")
+            response, latency = await self._complete(prompt, input_query, temperature, max_tokens)
 
+            outcome: str = OUTCOME_FAILED
             try:
-                if pydantic_model:
-                    return pydantic_model.model_validate_json(response.choices[0].message.content)
+                if not response.choices:
+                    raise AssistantResponseError("ERROR: No data from assistant.")
 
                 # если нет Pydantic модели —> возвращает строку.
-                return response.choices[0].message.content
-            except ValidationError as e:
-                logger.error(f"Validation error: {e}")
-                logger.error(f"Input Query: {input_query}")
-                logger.error(f"Raw response: {response.choices[0].message.content}\n\n"
-                             f"Model: {pydantic_model}")
-                raise ValueError(f"Invalid assistant response: {e}")
+                if not pydantic_model:
+                    outcome = LLM_OUTCOME_OK
+                    return response.choices[0].message.content
+
+                try:
+                    validated_response = pydantic_model.model_validate_json(response.choices[0].message.content)
+                except ValidationError as e:
+                    validated_response, outcome = await self._repair_response(
+                        response.choices[0].message.content, e, input_query, pydantic_model, max_tokens,
+                        is_truncated=response.choices[0].finish_reason == "length"
+                    )
+                    return validated_response
+                outcome = OUTCOME_VALID
+                json_repairer.record(OUTCOME_VALID)
+                return validated_response
+            finally:
+                llm_usage_sink.record(prompt, response.usage, latency, outcome)
 
         except Exception as ex:
             logger.error(f"Error in get_response: {ex}")
             raise
 
+    async def _repair_response(
+            self,
+            raw_response: str,
+            error: ValidationError,
+            input_query: str,
+            pydantic_model: Type[AssistantResponseModel],
+            max_tokens: int | NotGiven,
+            is_truncated: bool = False
+    ) -> tuple[Any, str]:
+        """
+        Невалидный ответ: локальный ремонт (JsonRepairer), затем один повторный запрос
+        «исправь JSON под схему» только для этого ответа — вместо перезапуска всей задачи ARQ.
+
+        Оборванный ответ локально не чинится: обрезанный до последнего элемента ответ неполный,
+        а результат get_response кэшируется и сохраняется как готовый раздел.
+        Ответ, оборванный по max_tokens (finish_reason == "length"), и не переспрашивается: повторный
+        запрос с тем же max_tokens снова оборвется — сразу ошибка (раздел failed, повтор задачей).
+        :param is_truncated: ответ оборван по max_tokens
+        :return: (провалидированный ответ, исход ремонта)
+        """
+        if (repaired_response := json_repairer.repair(
+                raw_response, pydantic_model, allow_truncated=False
+        )) is not None:
+            json_repairer.record(OUTCOME_REPAIRED)
+            return repaired_response, OUTCOME_REPAIRED
+
+        if is_truncated:
+            logger.warning(
+                f"JsonRepairer: ответ {pydantic_model.__name__} оборван по max_tokens ({max_tokens}), "
+                f"без повторного запроса"
+            )
+        elif config.LLM_JSON_REPAIR_REASK:
+            fixed_response: str | None = await self._reask_json(raw_response, error, pydantic_model, max_tokens)
+            if fixed_response is not None:
+                try:
+                    repaired_response = pydantic_model.model_validate_json(fixed_response)
+                except ValidationError as e:
+                    error = e
+                    repaired_response = json_repairer.repair(fixed_response, pydantic_model, allow_truncated=False)
+                if repaired_response is not None:
+                    logger.info(f"JsonRepairer: ответ {pydantic_model.__name__} починен повторным запросом")
+                    json_repairer.record(OUTCOME_REASK_REPAIRED)
+                    return repaired_response, OUTCOME_REASK_REPAIRED
+
+        json_repairer.record(OUTCOME_FAILED, pydantic_model)
+        logger.error(f"Validation error: {error}")
+        logger.error(f"Input Query: {input_query}")
+        logger.error(f"Raw response: {raw_response}\n\n"
+                     f"Model: {pydantic_model}")
+        raise ValueError(f"Invalid assistant response: {error}")
+
+    async def _reask_json(
+            self,
+            raw_response: str,
+            error: ValidationError,
+            pydantic_model: Type[AssistantResponseModel],
+            max_tokens: int | NotGiven
+    ) -> str | None:
+        """Повторный запрос к нейронке: схема + ошибки валидации + невалидный ответ"""
+        input_query: str = (
+            f"JSON-схема:\n{json.dumps(pydantic_model.model_json_schema(), ensure_ascii=False)}\n\n"
+            f"Ошибки валидации:\n{error}\n\n"
+            f"Невалидный ответ:\n{raw_response}"
+        )
+        response, latency = await self._complete(Prompts.REPAIR_JSON, input_query, 0, max_tokens)
+        llm_usage_sink.record(Prompts.REPAIR_JSON, response.usage, latency, LLM_OUTCOME_OK)
+
+        if not response.choices or not response.choices[0].message.content:
+            return None
+        return response.choices[0].message.content
+
+    async def get_response_stream(
+            self,
+            input_query: str,
+            prompt: str,
+            pydantic_model: Type[AssistantResponseModel],
+            paths: Iterable[tuple],
+            temperature: float = 0.3,
+            max_tokens: int | NotGiven = NOT_GIVEN
+    ) -> AsyncIterator[tuple[JsonPath, Any]]:
+        """
+        Ответ нейронки по мере генерации (stream=True).
+
+        Отдает (путь, значение) для законченных частей JSON из paths (см. JsonStreamParser),
+        последним — ((), pydantic_model) с полным провалидированным ответом.
+        Без single-flight: у каждого потока свой получатель.
+        """
+        await self.check_balance()
+
+        parser = JsonStreamParser([*paths, ()])
+        usage: CompletionUsage | None = None
+        async with llm_scheduler.slot(self._estimate_tokens(prompt, input_query, max_tokens)) as ticket:
+            started_at: float = time.perf_counter()
+            try:
+                stream = await self.client.chat.completions.create(
+                    model="deepseek-chat",
+                    messages=[
+                        {"role": "system", "content": f"{prompt}"},
+                        {"role": "user", "content": f"{input_query}"}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+
+                async for chunk in stream:
+                    if chunk.usage:
+                        logger.info("статистика по токенам:\n")
+                        logger.info(chunk.usage)
+                        usage = chunk.usage
+                        ticket.used_tokens = chunk.usage.total_tokens
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+
+                    for path, value in parser.feed(chunk.choices[0].delta.content):
+                        if path:
+                            yield path, value
+            except BaseException as ex:
+                # в т.ч. отмена / закрытие потока получателем (CancelledError, GeneratorExit): токены уже потрачены
+                llm_usage_sink.record(prompt, usage, time.perf_counter() - started_at, LLM_OUTCOME_ERROR)
+                if isinstance(ex, (APIConnectionError, APITimeoutError, InternalServerError)):
+                    deepseek_balance_guard.record_failure()
+                raise
+            latency: float = time.perf_counter() - started_at
+            deepseek_balance_guard.record_success()
+
+        if not parser.text.strip():
+            llm_usage_sink.record(prompt, usage, latency, OUTCOME_FAILED)
+            raise AssistantResponseError("ERROR: No data from assistant.")
+
+        try:
+            validated_response = pydantic_model.model_validate_json(parser.text)
+        except ValidationError as e:
+            # показанные юзеру части уже не переспросить — только локальный ремонт
+            if (repaired_response := json_repairer.repair(parser.text, pydantic_model)) is not None:
+                json_repairer.record(OUTCOME_REPAIRED)
+                llm_usage_sink.record(prompt, usage, latency, OUTCOME_REPAIRED)
+                yield (), repaired_response
+                return
+
+            json_repairer.record(OUTCOME_FAILED, pydantic_model)
+            llm_usage_sink.record(prompt, usage, latency, OUTCOME_FAILED)
+            logger.error(f"Validation error: {e}")
+            logger.error(f"Input Query: {input_query}")
+            logger.error(f"Raw response: {parser.text}\n\n"
+                         f"Model: {pydantic_model}")
+            raise ValueError(f"Invalid assistant response: {e}")
+
+        json_repairer.record(OUTCOME_VALID)
+        llm_usage_sink.record(prompt, usage, latency, OUTCOME_VALID)
+        yield (), validated_response
+
     class DrugCreation:
         def __init__(self, assistant_service):
             self.assistant_service = assistant_service
@@ -162,18 +404,75 @@ class AssistantService:
     async def get_clear_researches(
             self,
             pubmed_researches_with_drug_name: ClearResearchesRequest
-    ) -> DrugResearchesAssistantResponse:
+    ) -> ClearResearchesResult:
         """
         Возвращает отфильтрованные исследования в лаконичном виде.
+
+        Map-reduce: статьи сжимаются локально (assistant_utils.compact_research) и обрабатываются
+        частями по LLM_RESEARCH_CHUNK_SIZE параллельно (в слотах LLMScheduler), затем общий
+        список ранжируется (assistant_utils.rank_researches). Часть с ошибкой пропускается,
+        DOI ее статей возвращаются в failed_dois; ошибка поднимается, только если не удалась ни одна часть.
         :param pubmed_researches_with_drug_name: Схема с исследованиями и названием ДВ.
-        :return: Схема с лаконичным видом исследований.
+        :return: Схема с лаконичным видом исследований и DOI необработанных статей.
         """
+        drug_name: str = pubmed_researches_with_drug_name.drug_name
+        researches: list[PubmedResearchSchema] = pubmed_researches_with_drug_name.researches
+        if not researches:
+            return ClearResearchesResult(researches=[])
+
+        chunk_size: int = max(config.LLM_RESEARCH_CHUNK_SIZE, 1)
+        chunks: list[list[PubmedResearchSchema]] = [
+            researches[start:start + chunk_size] for start in range(0, len(researches), chunk_size)
+        ]
+        input_queries: list[str] = [
+            assistant_utils.serialize_researches_chunk(drug_name, chunk) for chunk in chunks
+        ]
+        self._log_research_compaction(pubmed_researches_with_drug_name, input_queries)
+
+        responses: list[DrugResearchesAssistantResponse | BaseException] = await asyncio.gather(*(
+            self.get_response(
+                input_query=input_query,
+                prompt=Prompts.GET_DRUG_RESEARCHES,
+                pydantic_model=DrugResearchesAssistantResponse,
+                max_tokens=config.LLM_RESEARCH_CHUNK_MAX_TOKENS,
+            )
+            for input_query in input_queries
+        ), return_exceptions=True)
+
+        errors: list[BaseException] = [response for response in responses if isinstance(response, BaseException)]
+        if len(errors) == len(responses):
+            raise errors[0]
+        for error in errors:
+            logger.warning(f"Исследования {drug_name}: часть не обработана ({error!r})")
+
+        return ClearResearchesResult(
+            researches=assistant_utils.rank_researches(
+                (
+                    research
+                    for response in responses if not isinstance(response, BaseException)
+                    for research in response.researches
+                ),
+                allowed_dois={research.doi for research in researches}
+            ),
+            failed_dois=[
+                research.doi
+                for chunk, response in zip(chunks, responses) if isinstance(response, BaseException)
+                for research in chunk
+            ]
+        )
 
-        input_query = assistant_utils.serialize_researches_request(request=pubmed_researches_with_drug_name)
-        return await self.get_response(
-            input_query=input_query,
-            prompt=Prompts.GET_DRUG_RESEARCHES,
-            pydantic_model=DrugResearchesAssistantResponse,
+    @staticmethod
+    def _log_research_compaction(request: ClearResearchesRequest, input_queries: list[str]) -> None:
+        """Оценка токенов (как _estimate_tokens) по сравнению с одним запросом со всеми исследованиями"""
+        prompt_tokens: int = len(Prompts.GET_DRUG_RESEARCHES) // 3
+        single_shot_tokens: int = prompt_tokens + len(assistant_utils.serialize_researches_request(request)) // 3
+        payload_tokens: int = sum(len(input_query) for input_query in input_queries) // 3
+        chunked_tokens: int = prompt_tokens * len(input_queries) + payload_tokens
+        logger.info(
+            f"Исследования {request.drug_name}: {len(request.researches)} статей, {len(input_queries)} частей, "
+            f"~{chunked_tokens} токенов запроса вместо ~{single_shot_tokens} одним запросом "
+            f"(данные статей ~{payload_tokens} вместо ~{single_shot_tokens - prompt_tokens}, "
+            f"повторы промпта ~{prompt_tokens * (len(input_queries) - 1)} — из кэша промптов DeepSeek)"
         )
 
     async def get_user_description(self, user_name: str, user_logs: str) -> AssistantResponseUserDescription:
@@ -270,6 +569,23 @@ class AssistantService:
                 pydantic_model=QuestionAssistantResponse
             )
 
+        def answer_to_question_stream(
+                self,
+                question: str,
+                simple_mode: bool = False
+        ) -> AsyncIterator[tuple[JsonPath, Any]]:
+            """Ответ на вопрос пользователя по частям: заголовок, блоки контента, затем полный ответ"""
+            prompt = Prompts.ANSWER_TO_QUESTION
+            if simple_mode:
+                prompt += Prompts.ANSWER_TO_QUESTION_SIMPLE_PREFIX
+
+            return self.assistant_service.get_response_stream(
+                input_query=question,
+                prompt=prompt,
+                pydantic_model=QuestionAssistantResponse,
+                paths=QUESTION_STREAM_PATHS
+            )
+
         async def answer_to_drugs_question(self, question: str) -> QuestionDrugsAssistantResponse:
             """Отвечает на вопрос пользователя и дает ему список препаратов для его решения"""
             return await self.assistant_service.get_response(
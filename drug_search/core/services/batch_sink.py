@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BatchSink(Generic[T]):
+    """
+    Буферизованная запись вне пути запроса.
+
+    Записи кладутся в ограниченную очередь, фоновая задача пишет их пачками:
+    по заполнению batch_size или раз в flush_interval секунд.
+    Очередь заполнена — запись ждет до put_timeout (backpressure), затем отбрасывается.
+    stop дописывает все, что осталось в очереди (shutdown приложения / воркера).
+    """
+
+    def __init__(
+            self,
+            name: str,
+            writer: Callable[[Sequence[T]], Awaitable[None]],
+            max_size: int,
+            batch_size: int,
+            flush_interval: float,
+            put_timeout: float,
+    ):
+        self.name = name
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: asyncio.Queue[T] = asyncio.Queue(maxsize=max_size)
+        self._task: asyncio.Task | None = None
+        self._closing: bool = False
+        self._closed = asyncio.Event()  # будит сборщик пачки, ждущий очередь, при stop
+
+        # [ metrics ]
+        self.written: int = 0
+        self.dropped: int = 0
+        self.failed_batches: int = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._closed.clear()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Остановка с записью остатка очереди (текущая пачка дописывается, а не отменяется)"""
+        if self._task is None:
+            return
+
+        self._closing = True
+        self._closed.set()
+        await self._task
+        self._task = None
+
+    async def _put(self, item: T) -> bool:
+        """:return: запись принята (False — очередь заполнена дольше put_timeout)"""
+        self.start()
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            return False
+        return True
+
+    def _put_nowait(self, item: T) -> bool:
+        """Без ожидания: для путей, которые не должны тормозить из-за записи"""
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def _collect(self) -> list[T]:
+        """Пачка: до batch_size записей или все, что пришло за flush_interval"""
+        loop = asyncio.get_running_loop()
+        deadline: float = loop.time() + self.flush_interval
+
+        batch: list[T] = []
+        while len(batch) < self.batch_size:
+            if self._closing:
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout: float = deadline - loop.time()
+            if timeout <= 0:
+                break
+            getter = asyncio.ensure_future(self._queue.get())
+            closed = asyncio.ensure_future(self._closed.wait())
+            done, _ = await asyncio.wait((getter, closed), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            closed.cancel()
+            if getter in done:
+                batch.append(getter.result())
+                continue
+            # отмененный get записей из очереди не забирает
+            getter.cancel()
+            if not self._closing:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            await self._flush(await self._collect())
+
+    async def _flush(self, batch: list[T]) -> None:
+        if not batch:
+            return
+
+        try:
+            await self.writer(batch)
+            self.written += len(batch)
+        except Exception as ex:
+            # записи не критичны — пачка теряется, но запись не останавливается
+            self.failed_batches += 1
+            logger.exception(f"{self.name}: не удалось записать {len(batch)} записей: {ex}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+        }
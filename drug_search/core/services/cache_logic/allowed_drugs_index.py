@@ -0,0 +1,97 @@
+import logging
+from typing import Awaitable, Callable, Iterable
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+AllowedDrugIdsLoader = Callable[[], Awaitable[Iterable[UUID]]]
+
+
+class AllowedDrugsIndex:
+    """
+    Разрешенные юзеру препараты — Redis set на юзера, проверка доступа за O(1).
+
+    user:{user_id}:allowed_drug_ids — id препаратов + служебный элемент LOADED_MARKER.
+    Маркер означает, что set заполнен из allowed_drugs целиком; без него set считается
+    неполным и при следующем чтении дозаполняется из БД (loader).
+
+    Препараты у юзера только добавляются, поэтому записи всегда делают SADD (без маркера),
+    а загрузка из БД объединяется с ними — гонка чтения и записи не теряет препарат.
+    """
+    LOADED_MARKER = "*"
+
+    def __init__(self, redis: Redis, ttl: int = 60 * 60 * 24 * 7):
+        self.redis = redis
+        self.ttl = ttl
+
+    # [ KEYS ]
+    @staticmethod
+    def _get_key(user_id: UUID) -> str:
+        return f"user:{user_id}:allowed_drug_ids"
+
+    async def _load(self, user_id: UUID, loader: AllowedDrugIdsLoader) -> set[str]:
+        """Заполнение set из БД"""
+        drug_ids: set[str] = {str(drug_id) for drug_id in await loader()}
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.sadd(self._get_key(user_id), self.LOADED_MARKER, *drug_ids)
+                pipe.expire(self._get_key(user_id), self.ttl)
+                await pipe.execute()
+        except RedisError as ex:
+            logger.warning(f"AllowedDrugsIndex: не удалось сохранить препараты юзера {user_id}: {ex}")
+
+        return drug_ids
+
+    async def is_allowed(self, user_id: UUID, drug_id: UUID, loader: AllowedDrugIdsLoader) -> bool:
+        """Разрешен ли препарат юзеру"""
+        try:
+            is_member, is_loaded = await self.redis.smismember(
+                self._get_key(user_id),
+                [str(drug_id), self.LOADED_MARKER]
+            )
+        except RedisError as ex:
+            logger.warning(f"AllowedDrugsIndex: Redis недоступен ({ex}), проверка по БД")
+            return str(drug_id) in {str(allowed_id) for allowed_id in await loader()}
+
+        if is_member:
+            return True
+        if is_loaded:
+            return False
+
+        return str(drug_id) in await self._load(user_id, loader)
+
+    async def count(self, user_id: UUID, loader: AllowedDrugIdsLoader) -> int:
+        """Количество разрешенных препаратов"""
+        try:
+            key: str = self._get_key(user_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.scard(key)
+                pipe.sismember(key, self.LOADED_MARKER)
+                size, is_loaded = await pipe.execute()
+        except RedisError as ex:
+            logger.warning(f"AllowedDrugsIndex: Redis недоступен ({ex}), подсчет по БД")
+            return len(set(await loader()))
+
+        if is_loaded:
+            return size - 1
+
+        return len(await self._load(user_id, loader))
+
+    async def add(self, user_id: UUID, *drug_ids: UUID) -> None:
+        """Добавление после записи в allowed_drugs (allow_drug_to_user / give_drug_pack)"""
+        if not drug_ids:
+            return
+
+        try:
+            await self.redis.sadd(self._get_key(user_id), *(str(drug_id) for drug_id in drug_ids))
+        except RedisError as ex:
+            # set без новой записи давал бы отказ в доступе — удаляем, следующее чтение загрузит из БД
+            logger.warning(f"AllowedDrugsIndex: не удалось добавить препараты юзеру {user_id}: {ex}")
+            try:
+                await self.redis.delete(self._get_key(user_id))
+            except RedisError:
+                logger.error(f"AllowedDrugsIndex: set юзера {user_id} может быть неполным")
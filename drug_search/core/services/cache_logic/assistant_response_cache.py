@@ -0,0 +1,172 @@
+import datetime
+import hashlib
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from drug_search.core.lexicon import Prompts
+from drug_search.core.schemas import LLMResponseCacheSchema
+from drug_search.infrastructure.database.repository.llm_repo import LLMRepository
+
+logger = logging.getLogger(__name__)
+
+# [ политика: название промпта -> срок жизни ответа (None — бессрочно) ]
+# кэшируются только промпты отсюда: ответ — функция (промпт, запрос) при фиксированной температуре
+LLM_CACHE_POLICY: dict[str, datetime.timedelta | None] = {
+    # создание препарата
+    "GET_DRUG_BRIEFLY_INFO": datetime.timedelta(days=30),
+    "GET_DRUG_DOSAGES": datetime.timedelta(days=30),
+    "GET_DRUG_ANALOGS": datetime.timedelta(days=30),
+    "GET_DRUG_METABOLISM": datetime.timedelta(days=30),
+    "GET_DRUG_PATHWAYS": datetime.timedelta(days=30),
+    "GET_DRUG_COMBINATIONS": datetime.timedelta(days=30),
+    # запросы в PubMed
+    "GET_PUBMED_QUERY": datetime.timedelta(days=90),
+    "GET_PUBMED_DOSAGES_QUERY": datetime.timedelta(days=90),
+    "GET_PUBMED_MECHANISM_QUERY": datetime.timedelta(days=90),
+    "GET_PUBMED_PHARMACOKINETICS_QUERY": datetime.timedelta(days=90),
+    # поиск / действия юзера
+    "DRUG_SEARCH_VALIDATION": datetime.timedelta(days=30),
+    "PREDICT_USER_ACTION": datetime.timedelta(days=7),
+}
+
+# пропуск чтения из кэша (ответ все равно перезаписывается): платное обновление препарата и т.п.
+_bypass_llm_cache: ContextVar[bool] = ContextVar("bypass_llm_cache", default=False)
+
+
+@contextmanager
+def llm_cache_bypass() -> Iterator[None]:
+    """Запросы к нейронке внутри блока идут мимо кэша ответов, свежие ответы перезаписывают кэш"""
+    token = _bypass_llm_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_llm_cache.reset(token)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class AssistantResponseCache:
+    """
+    Кэш ответов нейронки по содержимому: sha256(модель, текст промпта, запрос, параметры).
+
+    Горячие ответы — в Redis (redis_ttl), все — в Postgres (llm_response_cache) со сроком из LLM_CACHE_POLICY.
+    Правка текста промпта в Prompts меняет ключ: старые ответы больше не читаются
+    и удаляются в purge_stale. Ошибки Redis / БД не ломают запрос — он просто идет в нейронку.
+    """
+    KEY_PREFIX = "llm_cache"
+
+    def __init__(
+            self,
+            redis: Redis,
+            session_maker: Callable[[], AsyncSession],
+            redis_ttl: int,
+            enabled: bool = True,
+    ):
+        self.redis = redis
+        self.session_maker = session_maker
+        self.redis_ttl = redis_ttl
+        self.enabled = enabled
+
+        # [ текст промпта -> название ] для промптов из политики
+        self._prompt_names: dict[str, str] = {
+            getattr(Prompts, name): name for name in LLM_CACHE_POLICY if hasattr(Prompts, name)
+        }
+
+        # [ metrics ]
+        self.hits: int = 0
+        self.db_hits: int = 0
+        self.misses: int = 0
+
+    def prompt_name(self, prompt: str) -> Optional[str]:
+        """Название кэшируемого промпта или None (промпт не кэшируется / кэш выключен / bypass)"""
+        if not self.enabled:
+            return None
+        return self._prompt_names.get(prompt)
+
+    @staticmethod
+    def is_bypassed() -> bool:
+        return _bypass_llm_cache.get()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, input_query: str, *params) -> str:
+        return _sha256("\x00".join([model, prompt, input_query, *map(str, params)]))
+
+    def prompt_hashes(self) -> dict[str, str]:
+        return {name: _sha256(prompt) for prompt, name in self._prompt_names.items()}
+
+    async def get(self, cache_key: str) -> Optional[str]:
+        """Сырой ответ: Redis, затем Postgres (с прогревом Redis)"""
+        redis_key: str = f"{self.KEY_PREFIX}:{cache_key}"
+        try:
+            if (response := await self.redis.get(redis_key)) is not None:
+                self.hits += 1
+                return response
+        except RedisError as ex:
+            logger.warning(f"AssistantResponseCache: Redis недоступен ({ex})")
+
+        try:
+            async with self.session_maker() as session:
+                entry: LLMResponseCacheSchema | None = await LLMRepository(session).get_cached_response(cache_key)
+        except (SQLAlchemyError, OSError) as ex:
+            logger.warning(f"AssistantResponseCache: БД недоступна ({ex})")
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.db_hits += 1
+        await self._set_redis(redis_key, entry.response, entry.expires_at)
+        return entry.response
+
+    async def set(self, cache_key: str, prompt: str, response: str) -> None:
+        prompt_name: str = self._prompt_names[prompt]
+        ttl: datetime.timedelta | None = LLM_CACHE_POLICY[prompt_name]
+        expires_at: datetime.datetime | None = datetime.datetime.now(datetime.UTC) + ttl if ttl else None
+
+        await self._set_redis(f"{self.KEY_PREFIX}:{cache_key}", response, expires_at)
+        try:
+            async with self.session_maker() as session:
+                await LLMRepository(session).save_cached_response(
+                    LLMResponseCacheSchema(
+                        cache_key=cache_key,
+                        prompt_name=prompt_name,
+                        prompt_hash=_sha256(prompt),
+                        response=response,
+                        expires_at=expires_at
+                    )
+                )
+        except (SQLAlchemyError, OSError) as ex:
+            logger.warning(f"AssistantResponseCache: ответ не сохранен в БД ({ex})")
+
+    async def _set_redis(self, redis_key: str, response: str, expires_at: datetime.datetime | None) -> None:
+        ttl: int = self.redis_ttl
+        if expires_at is not None:
+            ttl = min(ttl, int((expires_at - datetime.datetime.now(datetime.UTC)).total_seconds()))
+        if ttl <= 0:
+            return
+        try:
+            await self.redis.set(redis_key, response, ex=ttl)
+        except RedisError as ex:
+            logger.warning(f"AssistantResponseCache: Redis недоступен ({ex})")
+
+    async def purge_stale(self) -> int:
+        """Удаление просроченных ответов и ответов на измененные промпты (из Redis уходят по TTL)"""
+        async with self.session_maker() as session:
+            return await LLMRepository(session).delete_stale_cached_responses(self.prompt_hashes())
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
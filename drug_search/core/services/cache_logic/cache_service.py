@@ -1,26 +1,54 @@
+import asyncio
 import datetime
 import logging
-from typing import Optional
+from typing import Optional, Iterable
 from uuid import UUID
 
+from redis.exceptions import RedisError
+
 from drug_search.bot.api_client.drug_search_api import DrugSearchAPIClient
-from drug_search.core.schemas import UserTelegramDataSchema, DrugSchema, UserSchema, AllowedDrugsInfoSchema
-from drug_search.core.services.cache_logic.redis_service import RedisService
+from drug_search.config import config
+from drug_search.core.lexicon.enums import DrugMenu
+from drug_search.core.schemas import UserTelegramDataSchema, DrugSchema, UserSchema, AllowedDrugsInfoSchema, \
+    DrugSectionSchema
+from drug_search.core.services.cache_logic.local_cache import LocalCache
+from drug_search.core.services.cache_logic.redis_service import RedisService, CacheKeys
+from drug_search.core.services.cache_logic.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
 class CacheService:
-    """Сервис для работы с кэшем"""
+    """
+    Сервис для работы с кэшем.
+
+    Два уровня: in-process LRU (LocalCache) -> Redis -> API.
+    Препараты в локальном кэше живут долго и сбрасываются по pub/sub (listen_invalidations),
+    данные юзера — короткий TTL + тот же pub/sub.
+    Промахи по одному ключу схлопываются в один запрос к API (SingleFlight).
+    """
 
     def __init__(
             self,
             redis_service: RedisService,
-            api_client: DrugSearchAPIClient
+            api_client: DrugSearchAPIClient,
+            local_cache_size: int = config.BOT_LOCAL_CACHE_SIZE,
+            local_cache_ttl: int = config.BOT_LOCAL_CACHE_TTL,
+            local_cache_drug_ttl: int = config.BOT_LOCAL_CACHE_DRUG_TTL,
     ):
         self.redis_service = redis_service
         self.api_client = api_client
 
+        # [ local tier ]
+        self.local_drugs = LocalCache("drugs", max_size=local_cache_size, ttl=local_cache_drug_ttl)
+        self.local_users = LocalCache("users", max_size=local_cache_size, ttl=local_cache_ttl)
+
+        # [ single-flight ]
+        self.single_flight = SingleFlight(
+            "bot_cache",
+            redis=redis_service.redis if config.SINGLE_FLIGHT_REDIS_LOCK else None
+        )
+
     async def get_or_refresh_access_token(
             self,
             telegram_data: UserTelegramDataSchema
@@ -30,16 +58,22 @@ class CacheService:
         if cached_token:
             return cached_token
 
-        access_token = await self.api_client.telegram_auth(
-            telegram_user_data=telegram_data
-        )
+        async def load() -> str:
+            access_token = await self.api_client.telegram_auth(
+                telegram_user_data=telegram_data
+            )
 
-        await self.redis_service.set_access_token(
-            telegram_data.telegram_id,
-            access_token
-        )
+            await self.redis_service.set_access_token(
+                telegram_data.telegram_id,
+                access_token
+            )
+            return access_token
 
-        return access_token
+        return await self.single_flight.do(
+            ("auth", telegram_data.telegram_id),
+            load,
+            recheck=lambda: self.redis_service.get_access_token(telegram_data.telegram_id)
+        )
 
     async def get_allowed_drugs(
             self,
@@ -48,8 +82,13 @@ class CacheService:
             expiry: int = 86400
     ) -> AllowedDrugsInfoSchema:
         """Получение списка разрешенных лекарств с кэшированием"""
+        local_key: tuple = (CacheKeys.ALLOWED_DRUGS, telegram_id)
+        if local_data := self.local_users.get(local_key):
+            return local_data
+
         cached_data: Optional[AllowedDrugsInfoSchema] = await self.redis_service.get_allowed_drugs(telegram_id)
         if cached_data:
+            self.local_users.set(local_key, cached_data)
             return cached_data
 
         fresh_data: AllowedDrugsInfoSchema = await self.api_client.get_allowed_drugs(access_token=access_token)
@@ -59,6 +98,7 @@ class CacheService:
             fresh_data,
             expiry
         )
+        self.local_users.set(local_key, fresh_data)
 
         return fresh_data
 
@@ -66,26 +106,83 @@ class CacheService:
             self,
             access_token: str,
             drug_id: UUID,
-            expiry: int = 15  # временно для дебага
+            expiry: int = 86400
     ) -> DrugSchema:
         """Получение информации о лекарстве с кэшированием"""
+        local_key: tuple = (CacheKeys.DRUG, drug_id)
+        if local_data := self.local_drugs.get(local_key):
+            return local_data
+
         cached_data: Optional[DrugSchema] = await self.redis_service.get_drug(drug_id)
         if cached_data:
             logger.info(f"Cache: drug получен {cached_data.name} — {cached_data.id}")
+            self.local_drugs.set(local_key, cached_data)
             return cached_data
 
-        fresh_data: DrugSchema = await self.api_client.get_drug(
-            drug_id=drug_id,
-            access_token=access_token
-        )
+        async def load() -> DrugSchema:
+            fresh_data: DrugSchema = await self.api_client.get_drug(
+                drug_id=drug_id,
+                access_token=access_token
+            )
 
-        await self.redis_service.set_drug(
-            drug_id,
-            fresh_data,
-            expiry
+            if not fresh_data.researches:
+                # исследования дописываются фоном после создания препарата — неполный препарат не кэшируем
+                return fresh_data
+
+            await self.redis_service.set_drug(
+                drug_id,
+                fresh_data,
+                expiry
+            )
+            self.local_drugs.set(local_key, fresh_data)
+            return fresh_data
+
+        return await self.single_flight.do(
+            local_key,
+            load,
+            recheck=lambda: self.redis_service.get_drug(drug_id)
         )
 
-        return fresh_data
+    async def get_drug_section(
+            self,
+            access_token: str,
+            drug_id: UUID,
+            section: DrugMenu,
+            expiry: int = 86400
+    ) -> DrugSectionSchema:
+        """Получение одного раздела препарата с кэшированием (ключ на каждый раздел)"""
+        local_key: tuple = (CacheKeys.DRUG_SECTION, drug_id, section)
+        if local_data := self.local_drugs.get(local_key):
+            return local_data
+
+        cached_data: Optional[DrugSectionSchema] = await self.redis_service.get_drug_section(drug_id, section)
+        if cached_data:
+            self.local_drugs.set(local_key, cached_data)
+            return cached_data
+
+        async def load() -> DrugSectionSchema:
+            fresh_data: DrugSectionSchema = await self.api_client.get_drug_section(
+                drug_id=drug_id,
+                section=section,
+                access_token=access_token
+            )
+
+            if section == DrugMenu.RESEARCHES and not fresh_data.researches:
+                # исследования дописываются фоном после создания препарата — пустой раздел не кэшируем
+                return fresh_data
+
+            await self.redis_service.set_drug_section(
+                fresh_data,
+                expiry
+            )
+            self.local_drugs.set(local_key, fresh_data)
+            return fresh_data
+
+        return await self.single_flight.do(
+            local_key,
+            load,
+            recheck=lambda: self.redis_service.get_drug_section(drug_id, section)
+        )
 
     async def get_user_profile(
             self,
@@ -94,18 +191,93 @@ class CacheService:
             expiry: int = 86400
     ) -> UserSchema:
         """Получение информации о юзере"""
-        cache_data: Optional[UserSchema] = await self.redis_service.get_user_profile(telegram_id)
+        local_key: tuple = (CacheKeys.USER_PROFILE, telegram_id)
+        cache_data: Optional[UserSchema] = self.local_users.get(local_key) \
+            or await self.redis_service.get_user_profile(telegram_id)
         if cache_data:
             if cache_data.subscription_end and (
                     not cache_data.subscription_end < datetime.datetime.now() and not cache_data.tokens_last_refresh < datetime.datetime.now()):
+                self.local_users.set(local_key, cache_data)
                 return cache_data
 
-        fresh_data: UserSchema = await self.api_client.get_current_user(access_token)
+        async def load() -> UserSchema:
+            fresh_data: UserSchema = await self.api_client.get_current_user(access_token)
 
-        await self.redis_service.set_user_profile(
-            telegram_id,
-            fresh_data,
-            expiry
+            await self.redis_service.set_user_profile(
+                telegram_id,
+                fresh_data,
+                expiry
+            )
+            self.local_users.set(local_key, fresh_data)
+            return fresh_data
+
+        # без recheck: закэшированный профиль мог быть отброшен проверкой подписки выше
+        return await self.single_flight.do(local_key, load)
+
+    # [ LOCAL TIER INVALIDATION ]
+    def invalidate_local_drug(self, drug_id: UUID, sections: Iterable[DrugMenu] | None = None) -> None:
+        """Сброс препарата и его разделов (None — всех) из локального кэша"""
+        self.local_drugs.delete(
+            (CacheKeys.DRUG, drug_id),
+            *((CacheKeys.DRUG_SECTION, drug_id, section) for section in (sections or DrugMenu))
         )
 
-        return fresh_data
+    def invalidate_local_user(self, telegram_id: str) -> None:
+        """Сброс данных юзера из локального кэша"""
+        self.local_users.delete(
+            (CacheKeys.USER_PROFILE, telegram_id),
+            (CacheKeys.ALLOWED_DRUGS, telegram_id)
+        )
+
+    def handle_invalidation(self, message: str) -> None:
+        """
+        Обработка сообщения из канала инвалидации:
+        drug:{drug_id}[:{раздел},{раздел}] | user:{telegram_id} | profile:{telegram_id}
+        """
+        kind, _, value = message.partition(":")
+        match kind:
+            case "drug":
+                drug_id, _, sections = value.partition(":")
+                try:
+                    self.invalidate_local_drug(
+                        UUID(drug_id),
+                        [DrugMenu(section) for section in sections.split(",")] if sections else None
+                    )
+                except ValueError:
+                    logger.warning(f"Cache: некорректное сообщение инвалидации препарата {message}")
+            case "user":
+                self.invalidate_local_user(value)
+            case "profile":
+                self.local_users.delete((CacheKeys.USER_PROFILE, value))
+            case _:
+                logger.warning(f"Cache: неизвестное сообщение инвалидации {message}")
+
+    async def listen_invalidations(self, reconnect_delay: float = 5.0) -> None:
+        """
+        Фоновая задача бота: подписка на канал инвалидации.
+        При переподключении локальный кэш очищается целиком — сообщения за время разрыва потеряны.
+        """
+        while True:
+            try:
+                async with self.redis_service.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CacheKeys.INVALIDATION_CHANNEL)
+                    self.local_drugs.clear()
+                    self.local_users.clear()
+
+                    while True:
+                        message: dict | None = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message:
+                            self.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as ex:
+                logger.warning(f"Cache: подписка на инвалидацию прервана ({ex}), переподключение")
+                await asyncio.sleep(reconnect_delay)
+
+    def local_cache_stats(self) -> list[dict]:
+        """hit/miss счетчики локального кэша"""
+        return [self.local_drugs.stats(), self.local_users.stats()]
+
+    def single_flight_stats(self) -> dict:
+        """Сколько промахов схлопнуто в один запрос к API"""
+        return self.single_flight.stats()
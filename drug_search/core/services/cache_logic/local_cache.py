@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LocalCache:
+    """
+    In-process LRU кэш с TTL — первый уровень перед Redis.
+
+    Живет в памяти одного процесса (бота), поэтому межпроцессная инвалидация
+    идет через Redis pub/sub (см. RedisService.publish_invalidation).
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        # [ metrics ]
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значение по ключу или None (если нет или истек TTL)"""
+        item: tuple[float, Any] | None = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Сохранение значения, самый старый по использованию ключ вытесняется при переполнении"""
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total: int = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,21 +1,25 @@
 import asyncio
 from enum import Enum
-from typing import Optional
+from typing import Optional, Iterable
 from uuid import UUID
 
 from redis.asyncio import Redis
 
 from drug_search.config import config
-from drug_search.core.schemas import DrugSchema, UserSchema, QuestionDrugsAssistantResponse, AllowedDrugsInfoSchema
+from drug_search.core.lexicon.enums import DrugMenu
+from drug_search.core.schemas import DrugSchema, UserSchema, QuestionDrugsAssistantResponse, AllowedDrugsInfoSchema, \
+    DrugSectionSchema, TokenBalanceSchema
 
 
 class CacheKeys(str, Enum):
     ALLOWED_DRUGS = "allowed_drugs_info"
     DRUG = "drug"
+    DRUG_SECTION = "section"
     USER_PROFILE = "user_profile"
     ASSISTANT_DRUGS_ANSWER = "assistant_drugs_answer"
     ASSISTANT_ANSWER = "assistant_answer"
     ASSISTANT_ANSWER_CONTINUE = "assistant_answer_continue"
+    INVALIDATION_CHANNEL = "cache_invalidation"
 
 
 class RedisService:
@@ -35,6 +39,10 @@ class RedisService:
     def _get_drug_key(drug_id: UUID) -> str:
         return f"{CacheKeys.DRUG}:{drug_id}"
 
+    @staticmethod
+    def _get_drug_section_key(drug_id: UUID, section: DrugMenu) -> str:
+        return f"{CacheKeys.DRUG}:{drug_id}:{CacheKeys.DRUG_SECTION}:{section.value}"
+
     @staticmethod
     def _get_user_profile_key(telegram_id: str) -> str:
         return f"user:{telegram_id}:{CacheKeys.USER_PROFILE}"
@@ -103,6 +111,27 @@ class RedisService:
             ex=expire_seconds
         )
 
+    async def get_drug_section(self, drug_id: UUID, section: DrugMenu) -> Optional[DrugSectionSchema]:
+        """Получение раздела препарата из кэша"""
+        cache_key = self._get_drug_section_key(drug_id, section)
+        cached_data = await self.redis.get(cache_key)
+        if cached_data:
+            return DrugSectionSchema.model_validate_json(cached_data)
+        return None
+
+    async def set_drug_section(
+        self,
+        data: DrugSectionSchema,
+        expire_seconds: int = 86400
+    ) -> None:
+        """Сохранение раздела препарата в кэш"""
+        cache_key = self._get_drug_section_key(data.id, data.section)
+        await self.redis.set(
+            cache_key,
+            data.model_dump_json(),
+            ex=expire_seconds
+        )
+
     async def get_user_profile(
             self,
             telegram_id: str
@@ -130,6 +159,19 @@ class RedisService:
             ex=expire_seconds
         )
 
+    async def update_user_tokens(
+            self,
+            telegram_id: str,
+            balance: TokenBalanceSchema
+    ) -> None:
+        """Обновление только баланса в закэшированном профиле (вместо полной инвалидации после списания)"""
+        cache_key: str = self._get_user_profile_key(telegram_id)
+        cache_data: Optional[str] = await self.redis.get(cache_key)
+        if cache_data:
+            profile: UserSchema = UserSchema.model_validate_json(cache_data).model_copy(update=balance.model_dump())
+            await self.redis.set(cache_key, profile.model_dump_json(), keepttl=True, xx=True)
+        await self.publish_invalidation(f"profile:{telegram_id}")
+
     # [ ASSISTANT ]
     async def get_assistant_drugs_answer(
             self,
@@ -157,10 +199,32 @@ class RedisService:
         )
 
     # [ INVALIDATE ]
-    async def invalidate_drug(self, drug_id: UUID) -> None:
-        """Инвалидация кэша информации о конкретном лекарстве"""
-        cache_key = self._get_drug_key(drug_id)
-        await self.redis.delete(cache_key)
+    async def publish_invalidation(self, message: str) -> None:
+        """
+        Оповещение процессов с локальным кэшем (бот) об инвалидации.
+        Формат сообщения: drug:{drug_id}[:{раздел},{раздел}] | user:{telegram_id} | profile:{telegram_id}
+        """
+        await self.redis.publish(CacheKeys.INVALIDATION_CHANNEL, message)
+
+    async def invalidate_drug(self, drug_id: UUID, sections: Iterable[DrugMenu] | None = None) -> None:
+        """
+        Инвалидация кэша информации о конкретном лекарстве: полная схема + разделы sections (None — все).
+        UPDATE_INFO сбрасывается всегда (дата обновления), BRIEFLY — все разделы (поля строки drugs есть в каждом).
+        """
+        sections = set(sections) if sections is not None else set(DrugMenu)
+        if DrugMenu.BRIEFLY in sections:
+            sections = set(DrugMenu)
+        sections.add(DrugMenu.UPDATE_INFO)
+
+        await self.redis.delete(
+            self._get_drug_key(drug_id),
+            *(self._get_drug_section_key(drug_id, section) for section in sections)
+        )
+
+        message: str = f"drug:{drug_id}"
+        if len(sections) < len(DrugMenu):
+            message += ":" + ",".join(sorted(section.value for section in sections))
+        await self.publish_invalidation(message)
 
     async def __invalidate_user_profile(self, telegram_id: str) -> None:
         """Инвалидация кэша профиля пользователя"""
@@ -177,5 +241,6 @@ class RedisService:
         await asyncio.gather(
             self.__invalidate_allowed_drugs(telegram_id),
             self.__invalidate_user_profile(telegram_id),
+            self.publish_invalidation(f"user:{telegram_id}"),
             return_exceptions=True
         )
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import LockError, RedisError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """Загрузка лидера отменена: ожидающие повторяют вызов, а не получают CancelledError"""
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых конкурентных загрузок в один вызов (single-flight).
+
+    Пока загрузка по ключу выполняется, остальные вызовы с тем же ключом ждут ее результат
+    (или ту же ошибку) вместо собственного запроса к API / LLM.
+
+    Между процессами — опционально через Redis lock: лидер держит lock на время загрузки,
+    остальные процессы ждут его освобождения и перечитывают результат через recheck
+    (например, из Redis-кэша, куда лидер его положил).
+    """
+
+    def __init__(
+            self,
+            name: str,
+            redis: Redis | None = None,
+            lock_timeout: float = 30,
+            lock_wait_timeout: float = 10,
+    ):
+        self.name = name
+        self.redis = redis
+        self.lock_timeout = lock_timeout
+        self.lock_wait_timeout = lock_wait_timeout
+
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+        # [ metrics ]
+        self.calls: int = 0  # загрузок выполнено этим процессом
+        self.collapsed: int = 0  # вызовов, дождавшихся чужой загрузки в этом процессе
+        self.collapsed_remote: int = 0  # вызовов, получивших результат загрузки другого процесса
+        self.leader_cancelled: int = 0  # ожиданий, повторенных после отмены лидера
+
+    async def do(
+            self,
+            key: Hashable,
+            loader: Callable[[], Awaitable[T]],
+            recheck: Callable[[], Awaitable[Optional[T]]] | None = None,
+    ) -> T:
+        """
+        :param key: ключ загрузки (одинаковые ключи схлопываются)
+        :param loader: сама загрузка
+        :param recheck: повторная проверка кэша после ожидания Redis lock (только при redis)
+        """
+        while (future := self._in_flight.get(key)) is not None:
+            self.collapsed += 1
+            logger.debug(f"SingleFlight[{self.name}]: вызов {key} схлопнут")
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # лидер отменен (клиент ушел) — ожидающие не отменяются, один из них станет лидером
+                self.collapsed -= 1
+                self.leader_cancelled += 1
+
+        future = asyncio.get_running_loop().create_future()
+        # если никто не ждал — исключение не должно уйти в "Future exception was never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+
+        try:
+            result = await self._load(key, loader, recheck)
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as ex:
+            future.set_exception(ex)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _load(
+            self,
+            key: Hashable,
+            loader: Callable[[], Awaitable[T]],
+            recheck: Callable[[], Awaitable[Optional[T]]] | None,
+    ) -> T:
+        if self.redis is None:
+            self.calls += 1
+            return await loader()
+
+        lock_key: str = ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
+        lock = self.redis.lock(
+            f"single_flight:{self.name}:{lock_key}",
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_wait_timeout
+        )
+        acquired: bool = False
+        try:
+            acquired = await lock.acquire()
+        except RedisError as ex:
+            logger.warning(f"SingleFlight[{self.name}]: Redis lock недоступен ({ex}), загрузка без lock")
+
+        try:
+            if recheck is not None:
+                # пока ждали lock, другой процесс мог уже загрузить значение
+                if (cached := await recheck()) is not None:
+                    self.collapsed_remote += 1
+                    return cached
+
+            self.calls += 1
+            return await loader()
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError:
+                    # lock истек по timeout во время загрузки
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "collapsed_remote": self.collapsed_remote,
+            "leader_cancelled": self.leader_cancelled,
+        }
@@ -0,0 +1,384 @@
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from drug_search.core.schemas import TokenBalanceSchema, TokenLedgerMismatchSchema
+
+logger = logging.getLogger(__name__)
+
+# снимок БД для заполнения баланса: баланс юзера + курсор ledger, прочитанные одним запросом
+BalanceSnapshotLoader = Callable[[], Awaitable[Optional[tuple[TokenBalanceSchema, str]]]]
+# применение дельт к users: (deltas, предыдущий курсор, новый курсор) -> применено ли
+DeltasApplier = Callable[[dict[UUID, tuple[int, int, int]], str, str], Awaitable[bool]]
+
+# [ LUA ]
+# сумма неприменённых дельт юзера из stream после курсора БД (ARGV[1] — user_id)
+_PENDING_SUM = """
+local function pending_sum(stream, cursor, user_id)
+    local allowed, additional, used = 0, 0, 0
+    for _, entry in ipairs(redis.call('XRANGE', stream, '(' .. cursor, '+')) do
+        local fields = {}
+        for i = 1, #entry[2], 2 do
+            fields[entry[2][i]] = entry[2][i + 1]
+        end
+        if fields['user_id'] == user_id then
+            allowed = allowed + tonumber(fields['allowed'])
+            additional = additional + tonumber(fields['additional'])
+            used = used + tonumber(fields['used'])
+        end
+    end
+    return allowed, additional, used
+end
+"""
+
+# KEYS: balance, stream, cursor | ARGV: user_id, allowed, additional, used, db_cursor, ttl
+# -> 1 заполнен (или уже был), 0 курсор сдвинулся после чтения БД (нужно перечитать)
+_SEED_SCRIPT = _PENDING_SUM + """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 1
+end
+if (redis.call('GET', KEYS[3]) or '0-0') ~= ARGV[5] then
+    return 0
+end
+local allowed, additional, used = pending_sum(KEYS[2], ARGV[5], ARGV[1])
+redis.call('HSET', KEYS[1],
+    'allowed', tonumber(ARGV[2]) + allowed,
+    'additional', tonumber(ARGV[3]) + additional,
+    'used', tonumber(ARGV[4]) + used)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return 1
+"""
+
+# KEYS: balance, stream | ARGV: user_id, amount, ttl, reason
+# -> {-1} баланс не загружен, {0, ...} не хватает токенов, {1, allowed, additional, used} списано
+# Порядок как в UserRepository.decrease_tokens: сначала allowed, остаток — из additional.
+_DEBIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1}
+end
+local balance = redis.call('HMGET', KEYS[1], 'allowed', 'additional', 'used')
+local allowed, additional, used = tonumber(balance[1]), tonumber(balance[2]), tonumber(balance[3])
+local amount = tonumber(ARGV[2])
+if allowed + additional < amount then
+    return {0, allowed, additional, used}
+end
+local allowed_delta, additional_delta = -amount, 0
+if allowed < amount then
+    allowed_delta = -allowed
+    additional_delta = allowed - amount
+end
+allowed, additional, used = allowed + allowed_delta, additional + additional_delta, used + 1
+redis.call('HSET', KEYS[1], 'allowed', allowed, 'additional', additional, 'used', used)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('XADD', KEYS[2], '*',
+    'user_id', ARGV[1], 'allowed', allowed_delta, 'additional', additional_delta, 'used', 1, 'reason', ARGV[4])
+return {1, allowed, additional, used}
+"""
+
+# KEYS: balance, stream | ARGV: user_id, amount, reason
+# Незагруженный баланс не трогаем — дельту учтет заполнение из stream.
+_CREDIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HINCRBY', KEYS[1], 'additional', ARGV[2])
+end
+redis.call('XADD', KEYS[2], '*',
+    'user_id', ARGV[1], 'allowed', 0, 'additional', ARGV[2], 'used', 0, 'reason', ARGV[3])
+return 1
+"""
+
+# KEYS: balance, stream | ARGV: user_id, allowed, ttl, reason
+# -> {-1} баланс не загружен, {1, allowed, additional, used} лимит выставлен
+# Абсолютный лимит пишется компенсирующей дельтой (лимит - текущий allowed с учетом неприменённых списаний).
+_SET_ALLOWED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1}
+end
+local balance = redis.call('HMGET', KEYS[1], 'allowed', 'additional', 'used')
+local allowed_delta = tonumber(ARGV[2]) - tonumber(balance[1])
+redis.call('HSET', KEYS[1], 'allowed', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if allowed_delta ~= 0 then
+    redis.call('XADD', KEYS[2], '*',
+        'user_id', ARGV[1], 'allowed', allowed_delta, 'additional', 0, 'used', 0, 'reason', ARGV[4])
+end
+return {1, tonumber(ARGV[2]), tonumber(balance[2]), tonumber(balance[3])}
+"""
+
+# KEYS: balance, stream, cursor | ARGV: user_id, allowed, additional, used, db_cursor
+# -> {-1} нет баланса, {0} курсор сдвинулся, {1, balance..., expected...}
+_CHECK_SCRIPT = _PENDING_SUM + """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1}
+end
+if (redis.call('GET', KEYS[3]) or '0-0') ~= ARGV[5] then
+    return {0}
+end
+local balance = redis.call('HMGET', KEYS[1], 'allowed', 'additional', 'used')
+local allowed, additional, used = pending_sum(KEYS[2], ARGV[5], ARGV[1])
+return {1, tonumber(balance[1]), tonumber(balance[2]), tonumber(balance[3]),
+    tonumber(ARGV[2]) + allowed, tonumber(ARGV[3]) + additional, tonumber(ARGV[4]) + used}
+"""
+
+
+class TokenLedgerError(Exception):
+    """Баланс в Redis сейчас не может быть использован (курсор отстает от БД, зеркало истекло)"""
+
+
+def _stream_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class TokenLedger:
+    """
+    Write-behind учет токенов: списания в Redis, в users — пачками.
+
+    tokens:balance:{user_id} — hash allowed / additional / used, зеркало баланса для проверки и списания (Lua)
+    tokens:ledger — stream дельт (append-only), каждое списание / начисление — одна запись
+    tokens:ledger:cursor — id последней записи, примененной к users (копия курсора из БД)
+
+    Источник правды — users + дельты stream после курсора БД (token_ledger_cursors).
+    flush применяет дельты одним UPDATE вместе со сдвигом курсора в одной транзакции.
+    Токены в users пишутся только дельтами: абсолютная запись поверх неприменённых дельт
+    спишет их повторно при flush. Сброс лимитов — set_allowed (компенсирующая дельта),
+    относительные записи в БД (оплата) вызывают drop — зеркало соберется из БД и неприменённых дельт.
+    """
+    LEDGER_NAME = "token_ledger"
+
+    STREAM_KEY = "tokens:ledger"
+    CURSOR_KEY = "tokens:ledger:cursor"
+
+    def __init__(
+            self,
+            redis: Redis,
+            balance_ttl: int,
+            flush_batch_size: int,
+            seed_retries: int = 3,
+    ):
+        self.redis = redis
+        self.balance_ttl = balance_ttl
+        self.flush_batch_size = flush_batch_size
+        self.seed_retries = seed_retries
+
+        self._seed = redis.register_script(_SEED_SCRIPT)
+        self._debit = redis.register_script(_DEBIT_SCRIPT)
+        self._credit = redis.register_script(_CREDIT_SCRIPT)
+        self._set_allowed = redis.register_script(_SET_ALLOWED_SCRIPT)
+        self._check = redis.register_script(_CHECK_SCRIPT)
+
+    # [ KEYS ]
+    @staticmethod
+    def _get_balance_key(user_id: UUID) -> str:
+        return f"tokens:balance:{user_id}"
+
+    @staticmethod
+    def _to_balance(values: list) -> TokenBalanceSchema:
+        allowed, additional, used = map(int, values)
+        return TokenBalanceSchema(allowed_tokens=allowed, additional_tokens=additional, used_tokens=used)
+
+    async def _ensure_balance(self, user_id: UUID, loader: BalanceSnapshotLoader) -> bool:
+        """Заполнение зеркала баланса из БД (+ неприменённые дельты). False — юзера нет"""
+        for _ in range(self.seed_retries):
+            snapshot = await loader()
+            if snapshot is None:
+                return False
+
+            balance, db_cursor = snapshot
+            seeded: int = await self._seed(
+                keys=[self._get_balance_key(user_id), self.STREAM_KEY, self.CURSOR_KEY],
+                args=[
+                    str(user_id),
+                    balance.allowed_tokens,
+                    balance.additional_tokens,
+                    balance.used_tokens,
+                    db_cursor,
+                    self.balance_ttl
+                ]
+            )
+            if seeded:
+                return True
+
+        # курсор Redis отстает от БД (flush упал между commit и обновлением курсора) — починит следующий flush
+        raise TokenLedgerError(f"TokenLedger: курсор Redis не совпадает с БД, баланс {user_id} не заполнен")
+
+    # [ BALANCE ]
+    async def get_balance(self, user_id: UUID, loader: BalanceSnapshotLoader) -> Optional[TokenBalanceSchema]:
+        """Текущий баланс (с учетом еще не примененных к users списаний)"""
+        values: list = await self.redis.hmget(self._get_balance_key(user_id), "allowed", "additional", "used")
+        if values[0] is not None:
+            return self._to_balance(values)
+
+        if not await self._ensure_balance(user_id, loader):
+            return None
+
+        values = await self.redis.hmget(self._get_balance_key(user_id), "allowed", "additional", "used")
+        return self._to_balance(values) if values[0] is not None else None
+
+    async def debit(
+            self,
+            user_id: UUID,
+            amount: int,
+            loader: BalanceSnapshotLoader,
+            reason: str = "",
+    ) -> tuple[bool, Optional[TokenBalanceSchema]]:
+        """
+        Атомарное списание. Не хватает allowed + additional — ничего не списывается.
+
+        :return: (списано ли, баланс после операции)
+        """
+        for _ in range(2):
+            result: list = await self._debit(
+                keys=[self._get_balance_key(user_id), self.STREAM_KEY],
+                args=[str(user_id), amount, self.balance_ttl, reason]
+            )
+            if result[0] != -1:
+                return bool(result[0]), self._to_balance(result[1:])
+
+            if not await self._ensure_balance(user_id, loader):
+                return False, None
+
+        # зеркало истекло между заполнением и списанием
+        raise TokenLedgerError(f"TokenLedger: баланс {user_id} не загружен")
+
+    async def credit(self, user_id: UUID, amount: int, reason: str = "") -> None:
+        """Начисление дополнительных токенов"""
+        await self._credit(
+            keys=[self._get_balance_key(user_id), self.STREAM_KEY],
+            args=[str(user_id), amount, reason]
+        )
+
+    async def set_allowed(
+            self,
+            user_id: UUID,
+            allowed: int,
+            loader: BalanceSnapshotLoader,
+            reason: str = "refresh",
+    ) -> Optional[TokenBalanceSchema]:
+        """
+        Выставление лимита allowed (сброс лимитов по подписке) дельтой через stream.
+
+        :return: баланс после операции или None, если юзера нет
+        """
+        for _ in range(2):
+            result: list = await self._set_allowed(
+                keys=[self._get_balance_key(user_id), self.STREAM_KEY],
+                args=[str(user_id), allowed, self.balance_ttl, reason]
+            )
+            if result[0] != -1:
+                return self._to_balance(result[1:])
+
+            if not await self._ensure_balance(user_id, loader):
+                return None
+
+        raise TokenLedgerError(f"TokenLedger: баланс {user_id} не загружен")
+
+    async def drop(self, *user_ids: UUID) -> None:
+        """Сброс зеркала после прямой записи токенов в БД"""
+        if not user_ids:
+            return
+
+        try:
+            await self.redis.delete(*(self._get_balance_key(user_id) for user_id in user_ids))
+        except RedisError as ex:
+            # зеркало расходится с БД до истечения TTL — найдет reconcile
+            logger.error(f"TokenLedger: не удалось сбросить баланс {user_ids}: {ex}")
+
+    # [ FLUSH ]
+    async def flush(self, db_cursor: str, apply: DeltasApplier) -> int:
+        """
+        Применение накопленных дельт к users пачками.
+
+        :param db_cursor: курсор из token_ledger_cursors
+        :param apply: запись дельт и нового курсора в одной транзакции
+        :return: количество примененных записей stream
+        """
+        redis_cursor: str = await self.redis.get(self.CURSOR_KEY) or "0-0"
+        if redis_cursor != db_cursor:
+            # прошлый flush закоммитил БД, но не успел сдвинуть курсор Redis
+            if _stream_id(redis_cursor) > _stream_id(db_cursor):
+                logger.error(f"TokenLedger: курсор Redis {redis_cursor} впереди БД {db_cursor}")
+            await self._advance_cursor(db_cursor)
+
+        applied: int = 0
+        while True:
+            entries: list = await self.redis.xrange(
+                self.STREAM_KEY,
+                min=f"({db_cursor}",
+                count=self.flush_batch_size
+            )
+            if not entries:
+                break
+
+            deltas: dict[UUID, list[int]] = defaultdict(lambda: [0, 0, 0])
+            for _, fields in entries:
+                delta: list[int] = deltas[UUID(fields["user_id"])]
+                delta[0] += int(fields["allowed"])
+                delta[1] += int(fields["additional"])
+                delta[2] += int(fields["used"])
+
+            last_entry_id: str = entries[-1][0]
+            if not await apply({user_id: tuple(delta) for user_id, delta in deltas.items()}, db_cursor, last_entry_id):
+                logger.warning("TokenLedger: курсор в БД изменен другим flush, пачка пропущена")
+                break
+
+            await self._advance_cursor(last_entry_id)
+            db_cursor = last_entry_id
+            applied += len(entries)
+
+            if len(entries) < self.flush_batch_size:
+                break
+
+        if applied:
+            logger.info(f"TokenLedger: применено {applied} записей, курсор {db_cursor}")
+        return applied
+
+    async def _advance_cursor(self, entry_id: str) -> None:
+        """Курсор Redis = курсор БД; примененные записи удаляются из stream"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self.CURSOR_KEY, entry_id)
+            pipe.xtrim(self.STREAM_KEY, minid=entry_id)
+            await pipe.execute()
+
+    # [ RECONCILIATION ]
+    async def get_cached_user_ids(self) -> list[UUID]:
+        """Юзеры с зеркалом баланса в Redis"""
+        return [
+            UUID(key.rsplit(":", 1)[1])
+            async for key in self.redis.scan_iter(match=self._get_balance_key("*"), count=1000)
+        ]
+
+    async def pending_entries(self) -> int:
+        """Записи stream, еще не примененные к users"""
+        cursor: str = await self.redis.get(self.CURSOR_KEY) or "0-0"
+        return len(await self.redis.xrange(self.STREAM_KEY, min=f"({cursor}"))
+
+    async def check(
+            self,
+            user_id: UUID,
+            balance: TokenBalanceSchema,
+            db_cursor: str,
+    ) -> Optional[TokenLedgerMismatchSchema]:
+        """
+        Сверка зеркала с users + неприменёнными дельтами (атомарно на стороне Redis).
+
+        :param balance: баланс из users, прочитанный вместе с db_cursor
+        :return: расхождение или None
+        """
+        result: list = await self._check(
+            keys=[self._get_balance_key(user_id), self.STREAM_KEY, self.CURSOR_KEY],
+            args=[str(user_id), balance.allowed_tokens, balance.additional_tokens, balance.used_tokens, db_cursor]
+        )
+        if result[0] == 0:
+            raise TokenLedgerError("TokenLedger: курсор сдвинулся во время сверки")
+        if result[0] == -1:
+            return None
+
+        cached, expected = self._to_balance(result[1:4]), self._to_balance(result[4:7])
+        if cached == expected:
+            return None
+
+        return TokenLedgerMismatchSchema(user_id=user_id, cached=cached, expected=expected)
@@ -0,0 +1,115 @@
+import datetime
+import json
+import logging
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from drug_search.core.lexicon import SUBSCRIPTION_TYPES, TOKENS_LIMIT
+from drug_search.core.schemas import UserSchema
+from drug_search.core.services.cache_logic.local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserContextCache:
+    """
+    Версионированный кэш контекста авторизованного юзера (для get_auth_user_cached).
+
+    Redis:
+        user_ctx:{user_id}:version — счетчик версии (INCR при каждой записи в users/allowed_drugs)
+        user_ctx:{user_id} — {"version": n, "user": UserSchema} с TTL
+
+    Контекст валиден, только если его version совпадает с текущим счетчиком —
+    поэтому значение, прочитанное из БД до записи, после bump уже не отдается.
+    Поверх Redis — короткий in-process уровень.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            ttl: int,
+            local_ttl: float,
+            local_size: int,
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.local = LocalCache("user_context", max_size=local_size, ttl=local_ttl)
+
+    # [ KEYS ]
+    @staticmethod
+    def _get_version_key(user_id: UUID) -> str:
+        return f"user_ctx:{user_id}:version"
+
+    @staticmethod
+    def _get_context_key(user_id: UUID) -> str:
+        return f"user_ctx:{user_id}"
+
+    def _get_ttl(self, user: UserSchema) -> int:
+        """TTL контекста: не дольше, чем до следующего сброса токенов (его делает UserRepository.get_user)"""
+        if user.subscription_type == SUBSCRIPTION_TYPES.DEFAULT:
+            return self.ttl
+
+        refresh_interval_days: int = TOKENS_LIMIT.get_days_interval_to_refresh_tokens(user.subscription_type)
+        next_refresh: datetime.datetime = user.tokens_last_refresh + datetime.timedelta(days=refresh_interval_days)
+        seconds_to_refresh: int = int((next_refresh - datetime.datetime.now()).total_seconds())
+
+        return min(self.ttl, seconds_to_refresh)
+
+    async def get_or_load(
+            self,
+            user_id: UUID,
+            loader: Callable[[], Awaitable[UserSchema | None]]
+    ) -> UserSchema | None:
+        """Контекст из кэша или из loader (БД), с сохранением под текущей версией"""
+        if local_user := self.local.get(str(user_id)):
+            return local_user
+
+        try:
+            version, context = await self.redis.mget(
+                self._get_version_key(user_id),
+                self._get_context_key(user_id)
+            )
+        except RedisError as ex:
+            logger.warning(f"UserContextCache: Redis недоступен ({ex}), контекст из БД")
+            return await loader()
+
+        version: int = int(version or 0)
+        if context:
+            payload: dict = json.loads(context)
+            if payload["version"] == version:
+                user = UserSchema.model_validate(payload["user"])
+                self.local.set(str(user_id), user)
+                return user
+
+        user: UserSchema | None = await loader()
+        if not user:
+            return None
+
+        ttl: int = self._get_ttl(user)
+        if ttl > 0:
+            try:
+                await self.redis.set(
+                    self._get_context_key(user_id),
+                    json.dumps({"version": version, "user": user.model_dump(mode="json")}),
+                    ex=ttl
+                )
+            except RedisError as ex:
+                logger.warning(f"UserContextCache: не удалось сохранить контекст {user_id}: {ex}")
+            self.local.set(str(user_id), user, ttl=min(self.local.ttl, ttl))
+
+        return user
+
+    async def bump(self, *user_ids: UUID) -> None:
+        """
+        Инвалидация после записи: новая версия делает сохраненный контекст невалидным.
+        Ключ версии без TTL — иначе счетчик мог бы сброситься до версии старого контекста.
+        """
+        for user_id in user_ids:
+            self.local.delete(str(user_id))
+            try:
+                await self.redis.incr(self._get_version_key(user_id))
+            except RedisError as ex:
+                logger.warning(f"UserContextCache: не удалось обновить версию {user_id}: {ex}")
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+import aiohttp
+
+from drug_search.core.utils.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+
+class DeepSeekBalanceGuard:
+    """
+    Кэшированная проверка баланса DeepSeek + circuit breaker.
+
+    Баланс обновляет фоновая задача раз в refresh_interval (запускается при первой проверке
+    в текущем event loop), поэтому check перед каждым запросом к LLM — проверка в памяти.
+
+    Breaker открывается, если баланс не выше minimum_balance (до следующего обновления с деньгами)
+    или после failure_threshold ошибок запросов к LLM подряд (на open_seconds, затем один пробный запрос).
+    Пока breaker открыт, check сразу бросает APIError.
+    Ошибка получения баланса breaker не трогает: остается последний известный баланс.
+    """
+    BALANCE_URL = "https://api.deepseek.com/user/balance"
+
+    def __init__(
+            self,
+            api_key: str,
+            minimum_balance: float,
+            refresh_interval: float,
+            failure_threshold: int,
+            open_seconds: float,
+            request_timeout: float = 10,
+    ):
+        self.api_key = api_key
+        self.minimum_balance = minimum_balance
+        self.refresh_interval = refresh_interval
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.request_timeout = request_timeout
+
+        self.balance: float | None = None  # None — баланс еще не получен, запросы не блокируются
+        self.balance_updated_at: float | None = None
+
+        self.balance_errors: int = 0  # ошибок получения баланса подряд
+
+        self._failures: int = 0
+        self._opened_at: float | None = None
+        self._trial_in_progress: bool = False
+
+        self._session: aiohttp.ClientSession | None = None
+        self._refresher: asyncio.Task | None = None
+
+    # [ BALANCE ]
+    async def fetch_balance(self) -> float:
+        """Запрос баланса USD в DeepSeek"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+
+        async with self._session.get(
+                self.BALANCE_URL,
+                headers={
+                    'Accept': 'application/json',
+                    'Authorization': f'Bearer {self.api_key}'
+                }
+        ) as response:
+            response.raise_for_status()
+            balance_data: dict = await response.json()
+
+        usd_balance_info: dict | None = next(
+            (item for item in balance_data["balance_infos"] if item["currency"] == "USD"),
+            None
+        )
+        return float(usd_balance_info["total_balance"]) if usd_balance_info else 0.0
+
+    async def refresh(self) -> None:
+        try:
+            balance: float = await self.fetch_balance()
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError, ValueError) as ex:
+            # /user/balance не влияет на breaker: чат DeepSeek может работать и без него
+            self.balance_errors += 1
+            logger.warning(
+                f"Ошибка при проверке баланса ({self.balance_errors} подряд), "
+                f"остается последний баланс {self.balance}: {ex!r}"
+            )
+            return
+
+        self.balance_errors = 0
+
+        if balance <= self.minimum_balance:
+            logger.error(f"На балансе недостаточно денег: {balance} < {self.minimum_balance}")
+        elif self.balance is not None and self.balance <= self.minimum_balance:
+            logger.info(f"Баланс DeepSeek пополнен: {balance}")
+
+        self.balance = balance
+        self.balance_updated_at = time.monotonic()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def _ensure_refresher(self) -> None:
+        """Фоновое обновление баланса в текущем event loop"""
+        if self._refresher is not None and not self._refresher.done() \
+                and self._refresher.get_loop() is asyncio.get_running_loop():
+            return
+
+        if self._session is not None and not self._session.closed:
+            # сессия привязана к прошлому event loop
+            self._session = None
+        self._refresher = asyncio.create_task(self._refresh_loop(), name="deepseek_balance_refresher")
+
+    async def stop(self) -> None:
+        """Остановка фонового обновления (shutdown приложения)"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # [ CIRCUIT BREAKER ]
+    def check(self) -> None:
+        """Проверка перед запросом к LLM: без сетевых вызовов"""
+        self._ensure_refresher()
+
+        if self.balance is not None and self.balance <= self.minimum_balance:
+            raise APIError("На балансе DeepseekAPI недостаточно денег!")
+
+        if self._opened_at is None:
+            return
+
+        now: float = time.monotonic()
+        if now - self._opened_at < self.open_seconds:
+            raise APIError("DeepseekAPI недоступен, запросы временно остановлены")
+
+        # half-open: пропускаем один пробный запрос, остальные получают APIError, пока нет его результата
+        # (не дольше open_seconds — если результата нет, пропускается следующий пробный)
+        self._opened_at = now
+        self._trial_in_progress = True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("DeepSeek снова отвечает, circuit breaker закрыт")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_progress or self._failures >= self.failure_threshold:
+            if self._opened_at is None or self._trial_in_progress:
+                logger.error(f"DeepSeek: {self._failures} ошибок подряд, circuit breaker открыт на {self.open_seconds}с")
+            self._opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "balance": self.balance,
+            "balance_age": round(time.monotonic() - self.balance_updated_at, 1) if self.balance_updated_at else None,
+            "balance_errors": self.balance_errors,
+            "failures": self._failures,
+            "is_open": self._opened_at is not None,
+        }
@@ -0,0 +1,235 @@
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from drug_search.core.lexicon import ACTIONS_FROM_ASSISTANT
+from drug_search.core.schemas import SelectActionResponse
+
+logger = logging.getLogger(__name__)
+
+# действия, на которые можно ответить без нейронки: drug_search / drug_menu требуют названия препарата
+LOCAL_ACTIONS: frozenset[str] = frozenset({
+    ACTIONS_FROM_ASSISTANT.QUESTION.value,
+    ACTIONS_FROM_ASSISTANT.QUESTION_DRUGS.value,
+    ACTIONS_FROM_ASSISTANT.SPAM.value,
+    ACTIONS_FROM_ASSISTANT.OTHER.value,
+})
+
+NGRAM_SIZES: tuple[int, ...] = (2, 3, 4)
+
+# порог выше любой уверенности: локальные ответы выключены
+DISABLED_THRESHOLD: float = 1.01
+
+
+def char_ngrams(text: str) -> list[str]:
+    """Символьные n-граммы нормализованного текста (с границами слов)"""
+    text = f" {' '.join(text.lower().split())} "
+    return [text[i:i + n] for n in NGRAM_SIZES for i in range(len(text) - n + 1)]
+
+
+class IntentClassifier:
+    """
+    Мультиномиальный наивный Байес по символьным n-граммам (линейная модель в log-пространстве).
+
+    Обучается офлайн на user_request_logs (запрос -> действие от predict_user_action),
+    артефакт — JSON: {классы, log P(класс), n-грамма -> log P(n-грамма | класс), порог уверенности}.
+    """
+
+    def __init__(
+            self,
+            classes: list[str],
+            class_log_prior: list[float],
+            feature_log_prob: dict[str, list[float]],
+            threshold: float = DISABLED_THRESHOLD,
+            meta: dict[str, Any] | None = None,
+    ):
+        self.classes = classes
+        self.class_log_prior = class_log_prior
+        self.feature_log_prob = feature_log_prob
+        self.threshold = threshold
+        self.meta = meta or {}
+
+    @classmethod
+    def train(
+            cls,
+            samples: Sequence[tuple[str, str]],
+            alpha: float = 0.5,
+            min_count: int = 2,
+    ) -> "IntentClassifier":
+        """
+        :param samples: (запрос, действие)
+        :param alpha: сглаживание Лапласа
+        :param min_count: n-граммы реже min_count отбрасываются
+        """
+        class_counts: Counter[str] = Counter(action for _, action in samples)
+        classes: list[str] = sorted(class_counts)
+        index: dict[str, int] = {action: i for i, action in enumerate(classes)}
+
+        feature_counts: dict[str, list[int]] = defaultdict(lambda: [0] * len(classes))
+        for query, action in samples:
+            for ngram in char_ngrams(query):
+                feature_counts[ngram][index[action]] += 1
+
+        feature_counts = {
+            ngram: counts for ngram, counts in feature_counts.items() if sum(counts) >= min_count
+        }
+        totals: list[int] = [sum(counts[i] for counts in feature_counts.values()) for i in range(len(classes))]
+        vocab_size: int = len(feature_counts)
+
+        return cls(
+            classes=classes,
+            class_log_prior=[math.log(class_counts[action] / len(samples)) for action in classes],
+            feature_log_prob={
+                ngram: [
+                    round(math.log((counts[i] + alpha) / (totals[i] + alpha * vocab_size)), 5)
+                    for i in range(len(classes))
+                ]
+                for ngram, counts in feature_counts.items()
+            },
+            meta={"samples": len(samples), "vocab_size": vocab_size, "class_counts": dict(class_counts)}
+        )
+
+    def predict_proba(self, text: str) -> dict[str, float]:
+        scores: list[float] = list(self.class_log_prior)
+        for ngram in char_ngrams(text):
+            if (log_probs := self.feature_log_prob.get(ngram)) is not None:
+                for i, log_prob in enumerate(log_probs):
+                    scores[i] += log_prob
+
+        top: float = max(scores)
+        exp_scores: list[float] = [math.exp(score - top) for score in scores]
+        total: float = sum(exp_scores)
+        return {action: exp_score / total for action, exp_score in zip(self.classes, exp_scores)}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """:return: (действие, уверенность)"""
+        probs: dict[str, float] = self.predict_proba(text)
+        action: str = max(probs, key=probs.get)
+        return action, probs[action]
+
+    def calibrate(self, samples: Sequence[tuple[str, str]], target_precision: float) -> dict[str, float]:
+        """
+        Порог уверенности: минимальный, при котором локальные ответы (LOCAL_ACTIONS)
+        на отложенной выборке совпадают с нейронкой не реже target_precision.
+        """
+        predictions: list[tuple[float, bool]] = []
+        for query, action in samples:
+            predicted, confidence = self.predict(query)
+            if predicted in LOCAL_ACTIONS:
+                predictions.append((confidence, predicted == action))
+        predictions.sort(reverse=True)
+
+        self.threshold, covered, correct = DISABLED_THRESHOLD, 0, 0
+        best_covered: int = 0
+        for confidence, is_correct in predictions:
+            covered += 1
+            correct += is_correct
+            if correct / covered >= target_precision:
+                self.threshold, best_covered = confidence, covered
+
+        best_correct: int = sum(is_correct for _, is_correct in predictions[:best_covered])
+        return {
+            "threshold": self.threshold,
+            "coverage": best_covered / len(samples) if samples else 0.0,
+            "precision": best_correct / best_covered if best_covered else 0.0,
+        }
+
+    # [ ARTIFACT ]
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "classes": self.classes,
+                    "class_log_prior": self.class_log_prior,
+                    "feature_log_prob": self.feature_log_prob,
+                    "threshold": self.threshold,
+                    "meta": self.meta,
+                },
+                file,
+                ensure_ascii=False
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with open(path, encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+
+class IntentPreClassifier:
+    """
+    Локальный классификатор перед predict_user_action.
+
+    Уверенный ответ из LOCAL_ACTIONS возвращается сразу, иначе — запрос к нейронке.
+    На ответах нейронки считается согласие локальной модели (онлайн-точность).
+    """
+
+    def __init__(self, path: str, min_confidence: float = 0):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.model: Optional[IntentClassifier] = None
+
+        # [ metrics ]
+        self.local_answers: int = 0
+        self.llm_answers: int = 0
+        self.agreed: int = 0  # локальный прогноз совпал с нейронкой (на ответах нейронки)
+        self.latency_total: float = 0.0
+
+    def load(self) -> None:
+        """Загрузка артефакта при старте; нет артефакта — все запросы идут в нейронку"""
+        try:
+            self.model = IntentClassifier.load(self.path)
+        except FileNotFoundError:
+            logger.warning(f"IntentClassifier: артефакт {self.path} не найден, классификация только нейронкой")
+            return
+        except (OSError, ValueError, TypeError) as ex:
+            logger.error(f"IntentClassifier: артефакт {self.path} не загружен: {ex}")
+            return
+
+        logger.info(
+            f"IntentClassifier загружен: порог {self.threshold:.3f}, "
+            f"n-грамм {len(self.model.feature_log_prob)}, {self.model.meta.get('metrics', {})}"
+        )
+
+    @property
+    def threshold(self) -> float:
+        return self.min_confidence or (self.model.threshold if self.model else DISABLED_THRESHOLD)
+
+    async def predict_action(
+            self,
+            query: str,
+            fallback: Callable[[], Awaitable[SelectActionResponse]],
+    ) -> tuple[SelectActionResponse, bool]:
+        """:return: (действие, ответ локальный)"""
+        local_action: str | None = None
+        if self.model is not None:
+            started_at: float = time.perf_counter()
+            local_action, confidence = self.model.predict(query)
+            self.latency_total += time.perf_counter() - started_at
+
+            if local_action in LOCAL_ACTIONS and confidence >= self.threshold:
+                self.local_answers += 1
+                return SelectActionResponse(action=ACTIONS_FROM_ASSISTANT(local_action)), True
+
+        response: SelectActionResponse = await fallback()
+        self.llm_answers += 1
+        if local_action == response.action.value:
+            self.agreed += 1
+        return response, False
+
+    def stats(self) -> dict[str, Any]:
+        predictions: int = self.local_answers + self.llm_answers if self.model else 0
+        return {
+            "loaded": self.model is not None,
+            "threshold": self.threshold,
+            "local_answers": self.local_answers,
+            "llm_answers": self.llm_answers,
+            "local_rate": round(self.local_answers / predictions, 4) if predictions else 0.0,
+            "agreement_on_llm_answers": round(self.agreed / self.llm_answers, 4) if self.llm_answers else None,
+            "avg_latency_ms": round(self.latency_total / predictions * 1000, 3) if predictions else None,
+            "offline_metrics": self.model.meta.get("metrics") if self.model else None,
+        }
@@ -0,0 +1,250 @@
+import json
+import logging
+import re
+from collections import Counter
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# [ исходы ремонта ответа нейронки ]
+OUTCOME_VALID = "valid"  # ответ валиден как есть
+OUTCOME_REPAIRED = "repaired"  # починен локально
+OUTCOME_REASK_REPAIRED = "reask_repaired"  # починен повторным запросом к нейронке
+OUTCOME_FAILED = "failed"
+
+_CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?(.*?)\n?\s*```", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_code_fence(text: str) -> str:
+    """```json ... ``` -> содержимое блока"""
+    if match := _CODE_FENCE.match(text):
+        return match.group(1)
+    return text
+
+
+def close_truncated(text: str) -> list[str]:
+    """
+    JSON, оборванный на середине (max_tokens): варианты обрезки с закрытыми объектами / массивами.
+
+    Первый — до последнего законченного значения, дальше — до последнего законченного элемента
+    каждого открытого массива, от вложенного к внешнему (незаконченный элемент отбрасывается целиком,
+    если без него не проходит валидацию). Пусто — обрывать нечего (JSON закрыт).
+    """
+    stack: list[str] = []
+    expects_key: list[bool] = []  # для объектов: следующая строка — ключ
+    in_string: bool = False
+    escape: bool = False
+    last_cut: Optional[tuple[int, str]] = None  # (конец законченного значения, закрывающие скобки)
+    array_cuts: dict[int, tuple[int, str]] = {}  # глубина массива -> последний законченный элемент
+
+    def mark(end: int) -> None:
+        nonlocal last_cut
+        last_cut = end, "".join(_CLOSERS[bracket] for bracket in reversed(stack))
+        if stack[-1] == "[":
+            array_cuts[len(stack)] = last_cut
+
+    i: int = 0
+    while i < len(text):
+        char: str = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+                if stack[-1] == "{" and expects_key[-1]:
+                    expects_key[-1] = False
+                else:
+                    mark(i + 1)
+        elif char == '"':
+            if not stack:
+                return []
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            expects_key.append(char == "{")
+            if len(stack) == 1:
+                mark(i + 1)
+        elif char in "}]":
+            if not stack:
+                return []
+            stack.pop()
+            expects_key.pop()
+            # вложенные массивы закрыты — их точки обрезки больше не нужны
+            array_cuts.pop(len(stack) + 1, None)
+            if not stack:
+                return []  # корень закрыт — JSON не оборван
+            mark(i + 1)
+        elif char == ",":
+            if stack and stack[-1] == "{":
+                expects_key[-1] = True
+        elif char not in " \t\r\n:":
+            # число / true / false / null: законченное, только если за ним есть разделитель
+            end: int = i
+            while end < len(text) and text[end] not in ",}] \t\r\n":
+                end += 1
+            if end == len(text) or not stack:
+                break
+            mark(end)
+            i = end
+            continue
+        i += 1
+
+    if not stack or last_cut is None:
+        return []
+
+    cuts: list[tuple[int, str]] = [last_cut]
+    for depth in sorted(array_cuts, reverse=True):
+        if array_cuts[depth] not in cuts:
+            cuts.append(array_cuts[depth])
+    return [text[:end] + closers for end, closers in cuts]
+
+
+def _json_schema_literals(schema: Any) -> list[str]:
+    """Все строковые значения enum / const из JSON-схемы модели"""
+    values: list[str] = []
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == "enum" and isinstance(value, list):
+                values.extend(item for item in value if isinstance(item, str))
+            elif key == "const" and isinstance(value, str):
+                values.append(value)
+            else:
+                values.extend(_json_schema_literals(value))
+    elif isinstance(schema, list):
+        for item in schema:
+            values.extend(_json_schema_literals(item))
+    return values
+
+
+def fix_enum_case(data: Any, pydantic_model: Type[BaseModel], error: ValidationError) -> bool:
+    """
+    Значения enum / Literal не в том регистре ("High" вместо "HIGH"): замена на значение из схемы,
+    если оно однозначно совпадает без учета регистра и пробелов.
+    :return: хотя бы одно значение исправлено
+    """
+    literals: dict[str, set[str]] = {}
+    for literal in _json_schema_literals(pydantic_model.model_json_schema()):
+        literals.setdefault(literal.strip().casefold(), set()).add(literal)
+
+    is_fixed: bool = False
+    for item in error.errors():
+        if item["type"] not in ("enum", "literal_error") or not isinstance(item["input"], str):
+            continue
+
+        candidates: set[str] = literals.get(item["input"].strip().casefold(), set())
+        if len(candidates) != 1:
+            continue
+
+        # loc — путь в исходных данных; у union-полей в нем есть имена вариантов, их нет в данных
+        container: Any = data
+        *parents, key = item["loc"]
+        try:
+            for part in parents:
+                container = container[part]
+            if container[key] != item["input"]:
+                continue
+        except (KeyError, IndexError, TypeError):
+            continue
+
+        container[key] = next(iter(candidates))
+        is_fixed = True
+    return is_fixed
+
+
+class JsonRepairer:
+    """
+    Ремонт невалидных JSON-ответов нейронки без повторного запроса.
+
+    Детерминированные исправления по порядку: блок кода (```json), текст до / после JSON,
+    оборванный JSON (закрытие скобок), регистр значений enum. Повторный запрос к нейронке
+    («исправь JSON под схему») делает AssistantService, исход записывается сюда же.
+    """
+
+    def __init__(self):
+        # [ metrics ]
+        self.outcomes: Counter[str] = Counter()
+        self.fixes: Counter[str] = Counter()  # какие исправления понадобились
+        self.failed_models: Counter[str] = Counter()
+
+    def repair(
+            self,
+            raw: str,
+            pydantic_model: Type[BaseModel],
+            allow_truncated: bool = True,
+    ) -> Optional[BaseModel]:
+        """
+        Локальный ремонт: провалидированная модель или None
+
+        :param allow_truncated: чинить оборванный JSON обрезкой. Такой ответ неполный —
+            его нельзя кэшировать / сохранять как готовый раздел, лучше переспросить нейронку
+        """
+        fixes: list[str] = []
+        text: str = raw.strip()
+
+        if (unfenced := strip_code_fence(text)) != text:
+            text = unfenced.strip()
+            fixes.append("code_fence")
+
+        start: int = min((index for index in (text.find("{"), text.find("[")) if index >= 0), default=-1)
+        if start < 0:
+            return None
+
+        # [ варианты данных ] (данные, исправления)
+        candidates: list[tuple[Any, list[str]]] = []
+        try:
+            data, end = json.JSONDecoder().raw_decode(text, start)
+            candidates.append((data, fixes + ["surrounding_text"] if start or text[end:].strip() else fixes))
+        except json.JSONDecodeError:
+            if not allow_truncated:
+                return None
+            for closed in close_truncated(text[start:]):
+                try:
+                    candidates.append((json.loads(closed), fixes + ["truncated"]))
+                except json.JSONDecodeError:
+                    continue
+
+        for data, candidate_fixes in candidates:
+            if (response := self._validate(data, pydantic_model, candidate_fixes)) is not None:
+                if not candidate_fixes:
+                    # валиден после json.loads / dumps (напр. дубли ключей)
+                    candidate_fixes.append("reserialized")
+                self.fixes.update(candidate_fixes)
+                logger.info(
+                    f"JsonRepairer: ответ {pydantic_model.__name__} починен локально ({', '.join(candidate_fixes)})"
+                )
+                return response
+        return None
+
+    @staticmethod
+    def _validate(data: Any, pydantic_model: Type[BaseModel], fixes: list[str]) -> Optional[BaseModel]:
+        # несколько проходов по enum: после исправления могут всплыть ошибки во вложенных моделях
+        for _ in range(3):
+            try:
+                return pydantic_model.model_validate_json(json.dumps(data, ensure_ascii=False))
+            except ValidationError as ex:
+                if not fix_enum_case(data, pydantic_model, ex):
+                    return None
+                if "enum_case" not in fixes:
+                    fixes.append("enum_case")
+        return None
+
+    def record(self, outcome: str, pydantic_model: Type[BaseModel] | None = None) -> None:
+        self.outcomes[outcome] += 1
+        if outcome == OUTCOME_FAILED and pydantic_model is not None:
+            self.failed_models[pydantic_model.__name__] += 1
+
+    def stats(self) -> dict[str, Any]:
+        total: int = sum(self.outcomes.values())
+        return {
+            "outcomes": dict(self.outcomes),
+            "fixes": dict(self.fixes),
+            "failed_models": dict(self.failed_models),
+            "repair_rate": round(
+                (self.outcomes[OUTCOME_REPAIRED] + self.outcomes[OUTCOME_REASK_REPAIRED]) / total, 4
+            ) if total else 0.0,
+        }
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+from drug_search.core.lexicon.enums import LLM_PRIORITY
+
+logger = logging.getLogger(__name__)
+
+# приоритет и юзер текущих запросов к нейронке: задаются в задаче ARQ / фоновой задаче,
+# наследуются дочерними задачами asyncio.gather / create_task
+_llm_call_context: ContextVar[tuple[LLM_PRIORITY, str | None]] = ContextVar(
+    "llm_call_context",
+    default=(LLM_PRIORITY.QUESTION, None)
+)
+
+
+@contextmanager
+def llm_call_context(priority: LLM_PRIORITY, user_key: str | None = None) -> Iterator[None]:
+    """Приоритет (и юзер для честной очереди) всех запросов к нейронке внутри блока"""
+    if user_key is None:
+        user_key = _llm_call_context.get()[1]
+    token = _llm_call_context.set((priority, user_key))
+    try:
+        yield
+    finally:
+        _llm_call_context.reset(token)
+
+
+@dataclass(eq=False)
+class LLMTicket:
+    """Разрешение на один запрос к нейронке"""
+    priority: LLM_PRIORITY
+    user_key: str | None
+    estimated_tokens: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    used_tokens: int | None = None  # фактический расход (usage), уточняет бюджет токенов
+
+
+class LLMScheduler:
+    """
+    Планировщик запросов к нейронке в пределах процесса.
+
+    - не больше max_concurrency запросов одновременно;
+    - строгие приоритеты LLM_PRIORITY: вопрос юзера > создание препарата > исследования > описание юзера;
+    - внутри приоритета — по кругу между юзерами (один юзер с пачкой запросов не занимает очередь);
+    - бюджет tokens_per_minute (token bucket, 0 — без ограничения): запрос ждет, пока бюджет
+      не восстановится до его оценки; после ответа оценка заменяется фактическим usage.
+    """
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int = 0):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+
+        # [ приоритет -> юзер -> очередь билетов ]
+        self._queues: dict[LLM_PRIORITY, OrderedDict[str | None, deque[LLMTicket]]] = {
+            priority: OrderedDict() for priority in LLM_PRIORITY
+        }
+        self._in_flight: int = 0
+
+        self._tokens: float = float(tokens_per_minute)
+        self._tokens_updated_at: float = time.monotonic()
+        self._refill_timer: asyncio.TimerHandle | None = None
+
+        # [ metrics ]
+        self.granted: dict[LLM_PRIORITY, int] = {priority: 0 for priority in LLM_PRIORITY}
+        self.wait_total: dict[LLM_PRIORITY, float] = {priority: 0.0 for priority in LLM_PRIORITY}
+        self.wait_max: dict[LLM_PRIORITY, float] = {priority: 0.0 for priority in LLM_PRIORITY}
+        self.budget_waits: int = 0  # сколько раз очередь стояла из-за бюджета токенов
+        self.stats_log_interval: float = 60
+        self._stats_logged_at: float = 0.0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[LLMTicket]:
+        """
+        Ожидание очереди на запрос к нейронке; приоритет и юзер — из llm_call_context.
+
+        :param estimated_tokens: оценка токенов запроса + ответа (для бюджета)
+        """
+        priority, user_key = _llm_call_context.get()
+        ticket = LLMTicket(
+            priority=priority,
+            user_key=user_key,
+            estimated_tokens=estimated_tokens,
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._queues[priority].setdefault(user_key, deque()).append(ticket)
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # слот выдан одновременно с отменой
+                self._release(ticket)
+            else:
+                self._remove(ticket)
+            raise
+
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    # [ QUEUE ]
+    def _remove(self, ticket: LLMTicket) -> None:
+        user_queues = self._queues[ticket.priority]
+        queue: deque[LLMTicket] | None = user_queues.get(ticket.user_key)
+        if queue is None:
+            return
+        try:
+            queue.remove(ticket)
+        except ValueError:
+            pass
+        if not queue:
+            del user_queues[ticket.user_key]
+
+    def _next_ticket(self) -> LLMTicket | None:
+        for priority in LLM_PRIORITY:
+            user_queues = self._queues[priority]
+            if user_queues:
+                return next(iter(user_queues.values()))[0]
+        return None
+
+    def _pop(self, ticket: LLMTicket) -> None:
+        user_queues = self._queues[ticket.priority]
+        queue: deque[LLMTicket] = user_queues.pop(ticket.user_key)
+        queue.popleft()
+        if queue:
+            # юзер уходит в конец круга своего приоритета
+            user_queues[ticket.user_key] = queue
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_concurrency:
+            ticket: LLMTicket | None = self._next_ticket()
+            if ticket is None:
+                return
+
+            if not self._take_tokens(ticket.estimated_tokens):
+                # ждем бюджет для первого в очереди: младшие приоритеты его не обгоняют
+                self.budget_waits += 1
+                self._schedule_refill(ticket.estimated_tokens)
+                return
+
+            self._pop(ticket)
+            self._in_flight += 1
+
+            wait: float = time.monotonic() - ticket.enqueued_at
+            self.granted[ticket.priority] += 1
+            self.wait_total[ticket.priority] += wait
+            self.wait_max[ticket.priority] = max(self.wait_max[ticket.priority], wait)
+            if wait > 10:
+                logger.warning(
+                    f"LLMScheduler: запрос {ticket.priority.name} (юзер {ticket.user_key}) ждал очереди {wait:.1f}с"
+                )
+
+            ticket.future.set_result(None)
+
+        # все слоты заняты — глубина очереди и ожидание в лог (не чаще stats_log_interval)
+        now: float = time.monotonic()
+        if now - self._stats_logged_at >= self.stats_log_interval:
+            self._stats_logged_at = now
+            logger.info(f"LLMScheduler: {self.stats()}")
+
+    def _release(self, ticket: LLMTicket) -> None:
+        self._in_flight -= 1
+        if self.tokens_per_minute and ticket.used_tokens is not None:
+            self._tokens = min(
+                self._tokens + ticket.estimated_tokens - ticket.used_tokens,
+                float(self.tokens_per_minute)
+            )
+        self._dispatch()
+
+    # [ TOKEN BUDGET ]
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        self._tokens = min(
+            self._tokens + (now - self._tokens_updated_at) * self.tokens_per_minute / 60,
+            float(self.tokens_per_minute)
+        )
+        self._tokens_updated_at = now
+
+    def _take_tokens(self, amount: int) -> bool:
+        if not self.tokens_per_minute:
+            return True
+
+        self._refill()
+        # запрос больше всего бюджета пропускается при полном бюджете, иначе ждал бы вечно
+        if self._tokens < min(amount, self.tokens_per_minute):
+            return False
+        self._tokens -= amount
+        return True
+
+    def _schedule_refill(self, amount: int) -> None:
+        if self._refill_timer is not None:
+            self._refill_timer.cancel()
+        deficit: float = min(amount, self.tokens_per_minute) - self._tokens
+        delay: float = max(deficit * 60 / self.tokens_per_minute, 0.05)
+        self._refill_timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "tokens_available": round(self._tokens) if self.tokens_per_minute else None,
+            "budget_waits": self.budget_waits,
+            "priorities": {
+                priority.name: {
+                    "queued": sum(len(queue) for queue in self._queues[priority].values()),
+                    "granted": self.granted[priority],
+                    "avg_wait": round(self.wait_total[priority] / self.granted[priority], 3)
+                    if self.granted[priority] else 0.0,
+                    "max_wait": round(self.wait_max[priority], 3),
+                }
+                for priority in LLM_PRIORITY
+            },
+        }
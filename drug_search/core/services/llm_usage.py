@@ -0,0 +1,111 @@
+import datetime
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from drug_search.core.lexicon import Prompts
+from drug_search.core.schemas import LLMUsageSchema
+from drug_search.core.services.batch_sink import BatchSink
+
+logger = logging.getLogger(__name__)
+
+# [ исходы запроса, кроме исходов валидации JsonRepairer ]
+LLM_OUTCOME_OK = "ok"  # ответ без схемы (строка)
+LLM_OUTCOME_ERROR = "error"  # ошибка API / сети
+
+# [ название промпта -> функция приложения ] для отчета по стоимости
+LLM_FEATURES: dict[str, str] = {
+    "GET_DRUG_BRIEFLY_INFO": "drug_creation",
+    "GET_DRUG_DOSAGES": "drug_creation",
+    "GET_DRUG_ANALOGS": "drug_creation",
+    "GET_DRUG_METABOLISM": "drug_creation",
+    "GET_DRUG_PATHWAYS": "drug_creation",
+    "GET_DRUG_COMBINATIONS": "drug_creation",
+    "GET_DRUG_RESEARCHES": "researches",
+    "GET_PUBMED_QUERY": "pubmed_query",
+    "GET_PUBMED_DOSAGES_QUERY": "pubmed_query",
+    "GET_PUBMED_MECHANISM_QUERY": "pubmed_query",
+    "GET_PUBMED_PHARMACOKINETICS_QUERY": "pubmed_query",
+    "DRUG_SEARCH_VALIDATION": "drug_search",
+    "PREDICT_USER_ACTION": "user_action",
+    "ANSWER_TO_QUESTION": "question",
+    "ANSWER_TO_DRUGS_QUESTION": "question",
+    "GET_USER_DESCRIPTION": "user_description",
+    "REPAIR_JSON": "json_repair",
+}
+UNKNOWN_PROMPT = "unknown"
+
+LLMUsageWriter = Callable[[Sequence[LLMUsageSchema]], Awaitable[None]]
+
+
+class LLMUsageSink(BatchSink[LLMUsageSchema]):
+    """
+    Учет каждого запроса к нейронке в llm_usage (см. BatchSink).
+
+    Запись не ждет места в очереди: учет не должен тормозить запрос, при переполнении запись отбрасывается.
+    Промпт определяется по тексту (Prompts), составной промпт (простой режим вопроса) — по началу.
+    """
+
+    def __init__(
+            self,
+            writer: LLMUsageWriter,
+            max_size: int,
+            batch_size: int,
+            flush_interval: float,
+    ):
+        super().__init__(
+            name="llm_usage_sink",
+            writer=writer,
+            max_size=max_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            put_timeout=0
+        )
+        self._prompt_names: dict[str, str] = {
+            prompt: name for name, prompt in vars(Prompts).items() if name in LLM_FEATURES
+        }
+
+    def prompt_name(self, prompt: str) -> str:
+        if (name := self._prompt_names.get(prompt)) is not None:
+            return name
+
+        matches: list[str] = [text for text in self._prompt_names if prompt.startswith(text)]
+        if not matches:
+            return UNKNOWN_PROMPT
+        return self._prompt_names[max(matches, key=len)]
+
+    def record(
+            self,
+            prompt: str,
+            usage: Optional[Any],
+            latency: float,
+            outcome: str,
+            model: str = "deepseek-chat",
+    ) -> None:
+        """
+        :param usage: usage ответа OpenAI-клиента (None — ответа нет)
+        :param latency: время запроса, секунды
+        """
+        prompt_name: str = self.prompt_name(prompt)
+
+        cached_tokens: int = 0
+        if usage is not None:
+            # DeepSeek отдает попадания в кэш промптов отдельным полем, OpenAI — в prompt_tokens_details
+            cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None) or getattr(
+                getattr(usage, "prompt_tokens_details", None), "cached_tokens", None
+            ) or 0
+
+        record = LLMUsageSchema(
+            feature=LLM_FEATURES.get(prompt_name, UNKNOWN_PROMPT),
+            prompt_name=prompt_name,
+            prompt_hash=hashlib.sha256(prompt.encode()).hexdigest(),
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage is not None else 0,
+            cached_tokens=cached_tokens,
+            completion_tokens=usage.completion_tokens if usage is not None else 0,
+            latency_ms=round(latency * 1000),
+            outcome=outcome,
+            created_at=datetime.datetime.now(datetime.UTC)
+        )
+        if not self._put_nowait(record):
+            logger.warning(f"LLMUsageSink: очередь заполнена, учет запроса {prompt_name} отброшен")
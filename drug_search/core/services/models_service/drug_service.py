@@ -1,16 +1,36 @@
 import asyncio
+import datetime
 import logging
 import uuid
-from typing import Optional
+from typing import Optional, Callable, Awaitable, Iterable
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from drug_search.config import config
+from drug_search.core.dependencies.redis_service_dep import get_redis_service
 from drug_search.core.dependencies.telegram_service_dep import get_telegram_service
-from drug_search.core.schemas import DrugSchema
+from drug_search.core.lexicon import DrugMenu, LLM_PRIORITY, EXIST_STATUS, DRUG_SECTION_STATUS
+from drug_search.core.schemas import (DrugSchema, DrugHit, DrugSectionSchema, DrugQueryAliasSchema,
+                                      AssistantResponseDrugValidation)
 from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.llm_scheduler import llm_call_context
 from drug_search.core.services.pubmed_service import PubmedService
 from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
 
 logger = logging.getLogger(__name__)
 
+# разделы, которые создаются после краткой информации (каждый — отдельный запрос к ассистенту)
+DRUG_CREATION_SECTIONS: tuple[DrugMenu, ...] = (
+    DrugMenu.DOSAGES,
+    DrugMenu.ANALOGS,
+    DrugMenu.METABOLISM,
+    DrugMenu.MECHANISM,
+    DrugMenu.COMBINATIONS,
+)
+
+# разделы, которые можно обновить по отдельности (refresh_drug)
+DRUG_REFRESHABLE_SECTIONS: tuple[DrugMenu, ...] = (DrugMenu.BRIEFLY, *DRUG_CREATION_SECTIONS, DrugMenu.RESEARCHES)
+
 
 class DrugService:
     def __init__(
@@ -31,64 +51,318 @@ class DrugService:
         drug: DrugSchema = await self.repo.find_drug_by_query(user_query=user_query)
         return drug
 
+    async def find_drug_hit_by_query(self, user_query: str) -> Optional[DrugHit]:
+        """
+        Поиск по триграммам в таблице синонимов без загрузки связанных таблиц.
+        :returns: drug_hit | None
+        """
+        return await self.repo.find_drug_hit_by_query(user_query=user_query)
+
+    async def hydrate(self, drug_hit: Optional[DrugHit]) -> Optional[DrugSchema]:
+        """Загружает полную схему препарата по результату поиска."""
+        if not drug_hit:
+            return None
+        return await self.repo.get_with_all_relationships(drug_hit.id)
+
+    async def find_query_alias(self, user_query: str) -> Optional[DrugQueryAliasSchema]:
+        """
+        Вердикт нейронки по похожему запросу из drug_query_aliases (вместо get_user_query_validation).
+        :returns: alias | None
+        """
+        return await self.repo.find_query_alias(user_query=user_query)
+
+    async def save_query_alias(
+            self,
+            user_query: str,
+            validation: AssistantResponseDrugValidation | DrugQueryAliasSchema,
+            drug_id: Optional[uuid.UUID] = None,
+    ) -> None:
+        """Запоминает вердикт нейронки по запросу; NOT_EXIST — на DRUG_ALIAS_NEGATIVE_TTL_DAYS"""
+        query: str = user_query.lower().strip()
+        if not query or len(query) > 255:
+            return
+
+        expires_at: datetime.datetime | None = None
+        if validation.status == EXIST_STATUS.NOT_EXIST:
+            expires_at = datetime.datetime.now(datetime.UTC) + datetime.timedelta(
+                days=config.DRUG_ALIAS_NEGATIVE_TTL_DAYS
+            )
+
+        try:
+            await self.repo.save_query_alias(
+                DrugQueryAliasSchema(
+                    query=query,
+                    status=validation.status,
+                    drug_id=drug_id,
+                    drug_name=validation.drug_name,
+                    drug_name_ru=validation.drug_name_ru,
+                    danger_classification=validation.danger_classification,
+                    expires_at=expires_at
+                )
+            )
+        except SQLAlchemyError as ex:
+            # алиас — только ускорение поиска, ответ юзеру не ломаем
+            await self.repo.session.rollback()
+            logger.warning(f"Алиас запроса {query} не сохранен: {ex}")
+
+    async def get_section(self, drug_id: uuid.UUID, section: DrugMenu) -> Optional[DrugSectionSchema]:
+        """Раздел препарата для одного меню (только связанная таблица этого раздела)"""
+        return await self.repo.get_section(drug_id=drug_id, section=section)
+
+    async def get_document(self, drug_id: uuid.UUID) -> tuple[bytes, str] | None:
+        """
+        Предсобранный JSON препарата и etag.
+        Если документа еще нет (старые препараты) — собирает его из таблиц и сохраняет.
+        """
+        document: tuple[bytes, str] | None = await self.repo.get_document(drug_id)
+        if document:
+            return document
+
+        etag: str | None = await self.repo.DrugCreation.rebuild_document(drug_id)
+        if etag is None:
+            return None
+        await self.repo.session.commit()
+
+        return await self.repo.get_document(drug_id)
+
     async def update_or_create_drug(
             self,
             drug_name: str,
             user_telegram_id: str,
             drug_id: uuid.UUID | None = None,
+            on_briefly_saved: Callable[[DrugSchema], Awaitable[None]] | None = None,
+            on_section_saved: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
     ) -> DrugSchema:
         """
-        Обновляет или создает препарат, кроме исследований.
+        Поэтапно обновляет или создает препарат, кроме исследований.
+
+        Запросы к ассистенту по всем разделам стартуют сразу. Препарат записывается, как только готова
+        краткая информация (on_briefly_saved — карточка юзеру), остальные разделы — по мере готовности.
+        Ошибка раздела не отменяет остальные: раздел помечается failed (см. complete_drug_sections).
 
         Использует ассистента и (PubMed)
         :param drug_name:
         :param drug_id: при обновлении
         """
+        section_tasks: dict[DrugMenu, asyncio.Task] = self._start_section_requests(drug_name, DRUG_CREATION_SECTIONS)
         try:
-            # параллельное выполнение клиента ассистента
-            drug_creation = self.assistant.drug_creation
-
-            (
-                assistant_response_briefly,
-                assistant_response_dosages,
-                assistant_response_analogs,
-                assistant_response_metabolism,
-                assistant_response_pathways,
-                assistant_response_combinations,
-            ) = await asyncio.gather(
-                drug_creation.get_drug_briefly_info(drug_name=drug_name),
-                drug_creation.get_drug_dosages(drug_name=drug_name),
-                drug_creation.get_analogs(drug_name=drug_name),
-                drug_creation.get_metabolism(drug_name=drug_name),
-                drug_creation.get_pathways(drug_name=drug_name),
-                drug_creation.get_combinations(drug_name=drug_name),
+            assistant_response_briefly = await self.assistant.drug_creation.get_drug_briefly_info(
+                drug_name=drug_name
             )
-
-            drug = await self.repo.DrugCreation.update_or_create_drug(
+            drug: DrugSchema = await self.repo.DrugCreation.save_briefly_info(
                 briefly_info=assistant_response_briefly,
-                dosages=assistant_response_dosages,
-                analogs=assistant_response_analogs,
-                metabolism=assistant_response_metabolism,
-                pathways=assistant_response_pathways,
-                combinations=assistant_response_combinations,
                 drug_id=drug_id
             )
+        except Exception:
+            for task in section_tasks.values():
+                task.cancel()
+            logger.error(f"Ошибка при обновлении препарата.")
+            raise
 
-            # [ ФОНОВОЕ ОБНОВЛЕНИЕ ТАБЛИЦЫ ИССЛЕДОВАНИЙ ]
-            if self.pubmed_service:
-                asyncio.create_task(
-                    self._update_drug_researches_background(
-                        drug.id,
-                        drug_name,
-                        user_telegram_id
-                    )
+        try:
+            if on_briefly_saved:
+                await on_briefly_saved(drug)
+
+            drug = await self._save_sections(drug, section_tasks, on_section_saved)
+        finally:
+            # ошибка карточки / отмена задачи — запросы разделов не должны висеть без записи
+            for task in section_tasks.values():
+                task.cancel()
+
+        # [ ФОНОВОЕ ОБНОВЛЕНИЕ ТАБЛИЦЫ ИССЛЕДОВАНИЙ ]
+        if self.pubmed_service:
+            asyncio.create_task(
+                self._update_drug_researches_background(
+                    drug.id,
+                    drug_name,
+                    user_telegram_id
                 )
+            )
+
+        return drug
 
+    async def resume_drug_creation(
+            self,
+            drug_id: uuid.UUID,
+            user_telegram_id: str,
+            on_briefly_saved: Callable[[DrugSchema], Awaitable[None]] | None = None,
+            on_section_saved: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+    ) -> Optional[DrugSchema]:
+        """
+        Продолжение создания при повторе задачи: краткая информация уже записана прошлой попыткой
+        (упала отправка карточки / воркер), досоздаются только неготовые разделы.
+        """
+        drug: DrugSchema | None = await self.repo.get_with_all_relationships(drug_id)
+        if not drug:
+            return None
+
+        if on_briefly_saved:
+            await on_briefly_saved(drug)
+
+        drug = await self.complete_drug_sections(drug_id, on_section_saved)
+
+        if drug and not drug.researches and self.pubmed_service:
+            asyncio.create_task(
+                self._update_drug_researches_background(
+                    drug.id,
+                    drug.name,
+                    user_telegram_id
+                )
+            )
+
+        return drug
+
+    async def refresh_drug(
+            self,
+            drug_id: uuid.UUID,
+            user_telegram_id: str,
+            sections: Iterable[DrugMenu] | None = None,
+            on_section_saved: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+            on_section_failed: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+    ) -> Optional[DrugSchema]:
+        """
+        Обновляет только запрошенные разделы препарата (None — все, включая исследования).
+
+        Старые данные раздела видны до записи новых. Запись diff-based: совпадающие строки не трогаются,
+        on_section_saved вызывается только для разделов, которые действительно изменились.
+        on_section_failed — раздел не обновлен (статус остается READY со старыми данными).
+        """
+        drug: DrugSchema | None = await self.repo.get(drug_id)
+        if not drug:
+            return None
+
+        requested: set[DrugMenu] = set(sections) if sections is not None else set(DRUG_REFRESHABLE_SECTIONS)
+        section_tasks: dict[DrugMenu, asyncio.Task] = self._start_section_requests(
+            drug.name,
+            [section for section in DRUG_CREATION_SECTIONS if section in requested]
+        )
+
+        if DrugMenu.BRIEFLY in requested:
+            try:
+                assistant_response_briefly = await self.assistant.drug_creation.get_drug_briefly_info(
+                    drug_name=drug.name
+                )
+                saved: DrugSchema = await self.repo.DrugCreation.save_briefly_info(
+                    briefly_info=assistant_response_briefly,
+                    drug_id=drug.id,
+                    mark_sections_pending=False
+                )
+            except Exception:
+                for task in section_tasks.values():
+                    task.cancel()
+                logger.error(f"Ошибка при обновлении препарата {drug.name}.")
+                raise
+
+            if on_section_saved and self._is_section_changed(drug, saved, DrugMenu.BRIEFLY):
+                await on_section_saved(saved, DrugMenu.BRIEFLY)
+            drug = saved
+
+        drug = await self._save_sections(drug, section_tasks, on_section_saved, on_section_failed)
+
+        # [ ФОНОВОЕ ОБНОВЛЕНИЕ ТАБЛИЦЫ ИССЛЕДОВАНИЙ ]
+        if DrugMenu.RESEARCHES in requested and self.pubmed_service:
+            asyncio.create_task(
+                self._update_drug_researches_background(
+                    drug.id,
+                    drug.name,
+                    user_telegram_id
+                )
+            )
+
+        return drug
+
+    @staticmethod
+    def _is_section_changed(before: DrugSchema, after: DrugSchema, section: DrugMenu) -> bool:
+        return before.section_versions.get(section) != after.section_versions.get(section)
+
+    async def complete_drug_sections(
+            self,
+            drug_id: uuid.UUID,
+            on_section_saved: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+    ) -> Optional[DrugSchema]:
+        """Пересоздает только неготовые разделы препарата (failed / pending после падения воркера)"""
+        drug: DrugSchema | None = await self.repo.get_with_all_relationships(drug_id)
+        if not drug:
+            return None
+
+        sections: list[DrugMenu] = [
+            section for section, status in drug.section_statuses.items() if status != DRUG_SECTION_STATUS.READY
+        ]
+        if not sections:
             return drug
 
-        except Exception as ex:
-            logger.error(f"Ошибка при обновлении препарата.")
-            raise ex
+        logger.info(f"Пересоздание разделов {[section.value for section in sections]} препарата {drug.name}")
+        return await self._save_sections(
+            drug,
+            self._start_section_requests(drug.name, sections),
+            on_section_saved
+        )
+
+    def _start_section_requests(
+            self,
+            drug_name: str,
+            sections: Iterable[DrugMenu]
+    ) -> dict[DrugMenu, asyncio.Task]:
+        """Параллельные запросы к ассистенту по разделам (задачи наследуют приоритет / bypass кэша)"""
+        drug_creation = self.assistant.drug_creation
+        requests = {
+            DrugMenu.DOSAGES: drug_creation.get_drug_dosages,
+            DrugMenu.ANALOGS: drug_creation.get_analogs,
+            DrugMenu.METABOLISM: drug_creation.get_metabolism,
+            DrugMenu.MECHANISM: drug_creation.get_pathways,
+            DrugMenu.COMBINATIONS: drug_creation.get_combinations,
+        }
+        return {
+            section: asyncio.create_task(requests[section](drug_name=drug_name))
+            for section in sections
+        }
+
+    async def _save_sections(
+            self,
+            drug: DrugSchema,
+            section_tasks: dict[DrugMenu, asyncio.Task],
+            on_section_saved: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+            on_section_failed: Callable[[DrugSchema, DrugMenu], Awaitable[None]] | None = None,
+    ) -> DrugSchema:
+        """Записывает разделы по мере готовности ответов (по одному: сессия БД общая)"""
+        sections: dict[asyncio.Task, DrugMenu] = {task: section for section, task in section_tasks.items()}
+        pending: set[asyncio.Task] = set(sections)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    section: DrugMenu = sections[task]
+                    try:
+                        saved: DrugSchema | None = await self.repo.DrugCreation.save_section(
+                            drug_id=drug.id,
+                            section=section,
+                            assistant_response=task.result()
+                        )
+                    except Exception as ex:
+                        logger.error(f"Раздел {section.value} препарата {drug.name} не создан: {ex}")
+                        if drug.section_statuses.get(section, DRUG_SECTION_STATUS.READY) != DRUG_SECTION_STATUS.READY:
+                            # при обновлении старые данные раздела остаются, failed — только для незаписанных
+                            saved = await self.repo.DrugCreation.set_section_status(
+                                drug.id, section, DRUG_SECTION_STATUS.FAILED
+                            )
+                            if saved:
+                                drug = saved
+                        if on_section_failed:
+                            await on_section_failed(drug, section)
+                        continue
+
+                    if saved is None:  # препарат удален во время создания
+                        return drug
+
+                    is_changed: bool = self._is_section_changed(drug, saved, section)
+                    drug = saved
+                    if on_section_saved and is_changed:
+                        await on_section_saved(drug, section)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return drug
 
     async def _update_drug_researches_background(
             self,
@@ -98,13 +372,42 @@ class DrugService:
     ) -> None:
         """Обновляет таблицу с исследованиями препарата.
 
+        Инкрементально: в PubMed ищутся статьи с даты прошлого поиска (researches_searched_at),
+        в нейронку идут только статьи, которых еще нет в drug_researchs (ни у одного препарата),
+        старые исследования остаются видны все время обновления.
+
         Использует: Pubmed Service
         """
         try:
-            await self.repo.DrugCreation._delete_researches(drug_id)
+            searched_at: datetime.datetime | None = await self.repo.DrugCreation.get_researches_watermark(drug_id)
+            started_at: datetime.datetime = datetime.datetime.now(datetime.UTC)
+
+            with llm_call_context(LLM_PRIORITY.RESEARCH):
+                researches = await self.pubmed_service.get_researches_clearly(
+                    drug_name,
+                    # дата поиска в PubMed — с точностью до дня, день прошлого поиска берется целиком
+                    mindate=searched_at.date() if searched_at else None,
+                    get_known_dois=self.repo.DrugCreation.get_known_research_dois
+                )
+            if researches.failed_dois:
+                # часть статей не обработана — watermark не сдвигается, иначе следующий поиск с mindate
+                # их не найдет; обработанные попадут в known_dois и повторно в нейронку не пойдут
+                logger.warning(
+                    f"Исследования {drug_name}: {len(researches.failed_dois)} статей не обработано, "
+                    f"дата поиска не обновлена"
+                )
+            await self.repo.DrugCreation.upsert_researches(
+                drug_id=drug_id,
+                researches=researches,
+                searched_at=searched_at if researches.failed_dois else started_at,
+                max_researches=config.DRUG_RESEARCHES_MAX or None
+            )
+            # [ invalidate cache ] (+ pub/sub для локального кэша бота)
+            await get_redis_service().invalidate_drug(drug_id, sections=[DrugMenu.RESEARCHES])
 
-            researches = await self.pubmed_service.get_researches_clearly(drug_name)
-            await self.repo.DrugCreation.update_researches(drug_id=drug_id, researches=researches)
+            if not researches.researches:
+                logger.info(f"Новых исследований для препарата {drug_name} нет")
+                return
 
             # [ send notification to user ]
             telegram_service = await get_telegram_service()
@@ -113,6 +416,6 @@ class DrugService:
                 f"Найдены исследования для препарата {drug_name}!"
             )
 
-            logger.info(f"Исследования для препарата {drug_name} успешно обновлены")
+            logger.info(f"Исследования для препарата {drug_name} успешно обновлены (+{len(researches.researches)})")
         except Exception as ex:
             logger.error(f"Ошибка при фоновом обновлении исследований для {drug_name}: {ex}")
@@ -0,0 +1,52 @@
+import datetime
+import logging
+
+from drug_search.config import config
+from drug_search.core.schemas import LLMUsageReportRow
+from drug_search.infrastructure.database.repository.llm_repo import LLMRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageService:
+    def __init__(self, repo: LLMRepository):
+        self.repo = repo
+
+    @staticmethod
+    def cost_usd(prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+        """Стоимость по ценам LLM_PRICE_* ($ за 1M токенов): кэш промптов DeepSeek дешевле промаха"""
+        return (
+            cached_tokens * config.LLM_PRICE_INPUT_CACHE_HIT
+            + (prompt_tokens - cached_tokens) * config.LLM_PRICE_INPUT_CACHE_MISS
+            + completion_tokens * config.LLM_PRICE_OUTPUT
+        ) / 1_000_000
+
+    async def get_usage_report(self, days: int) -> list[LLMUsageReportRow]:
+        """Стоимость и время запросов к нейронке по функциям приложения и дням (UTC)"""
+        since: datetime.datetime = datetime.datetime.combine(
+            datetime.datetime.now(datetime.UTC).date() - datetime.timedelta(days=days - 1),
+            datetime.time.min,
+            tzinfo=datetime.UTC
+        )
+        return [
+            LLMUsageReportRow(
+                day=row.day,
+                feature=row.feature,
+                calls=row.calls,
+                errors=row.errors,
+                prompt_tokens=row.prompt_tokens,
+                cached_tokens=row.cached_tokens,
+                completion_tokens=row.completion_tokens,
+                cache_hit_rate=round(row.cached_tokens / row.prompt_tokens, 4) if row.prompt_tokens else 0.0,
+                cost_usd=round(self.cost_usd(row.prompt_tokens, row.cached_tokens, row.completion_tokens), 4),
+                avg_latency_ms=round(float(row.avg_latency_ms), 1),
+                p95_latency_ms=round(float(row.p95_latency_ms), 1),
+            )
+            for row in await self.repo.get_usage_by_feature_and_day(since)
+        ]
+
+    async def delete_old_usage(self) -> int:
+        """Удаление учета старше LLM_USAGE_RETENTION_DAYS"""
+        return await self.repo.delete_old_usage(
+            datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=config.LLM_USAGE_RETENTION_DAYS)
+        )
@@ -40,8 +40,7 @@ class QuizService:
         return text[: max_len - 3].rstrip() + "..."
 
     async def generate_question(self, user: UserSchema) -> QuizQuestionResponse:
-        allowed_ids = user.allowed_drug_ids()
-        drugs = await self.drug_repo.get_drugs_for_quiz(allowed_ids, limit=30)
+        drugs = await self.drug_repo.get_drugs_for_quiz(user.id, limit=30)
 
         if len(drugs) < 4:
             raise ValueError("Недостаточно препаратов в базе для викторины")
@@ -1,11 +1,21 @@
+import logging
 import uuid
 from collections.abc import Sequence
+from typing import Optional
 from uuid import UUID
 
-from drug_search.core.schemas import UserSchema, AllowedDrugsInfoSchema, AssistantResponseUserDescription
+from redis.exceptions import RedisError
+
+from drug_search.core.dependencies.allowed_drugs_index_dep import allowed_drugs_index
+from drug_search.core.dependencies.token_ledger_dep import token_ledger
+from drug_search.core.schemas import (UserSchema, AllowedDrugsInfoSchema, AssistantResponseUserDescription,
+                                      TokenBalanceSchema, TokenLedgerReconcileResponse, TokenLedgerMismatchSchema)
+from drug_search.core.services.cache_logic.token_ledger import TokenLedgerError
 from drug_search.core.services.assistant_service import AssistantService
 from drug_search.infrastructure.database.repository.user_repo import UserRepository
 
+logger = logging.getLogger(__name__)
+
 
 class UserService:
     def __init__(
@@ -20,6 +30,21 @@ class UserService:
         """Разрешает препарат юзеру."""
         return await self.repo.allow_drug_to_user(user_id=user_id, drug_id=drug_id)
 
+    async def is_drug_allowed(self, user_id: UUID, drug_id: UUID) -> bool:
+        """Разрешен ли препарат юзеру (Redis set, при промахе — загрузка из allowed_drugs)"""
+        return await allowed_drugs_index.is_allowed(
+            user_id,
+            drug_id,
+            loader=lambda: self.repo.get_allowed_drug_ids(user_id)
+        )
+
+    async def get_allowed_drugs_count(self, user_id: UUID) -> int:
+        """Количество разрешенных юзеру препаратов"""
+        return await allowed_drugs_index.count(
+            user_id,
+            loader=lambda: self.repo.get_allowed_drug_ids(user_id)
+        )
+
     async def update_user_description(self, user_id: UUID) -> None:
         """Обновляет информацию описания юзера."""
         user: UserSchema = await self.repo.get(user_id)
@@ -42,19 +67,90 @@ class UserService:
             user_id: uuid.UUID,
             amount_search_tokens: int = 0,
     ) -> None:
-        """Добавляет запросы юзеру"""
-        await self.repo.increment_tokens(
-            user_id=user_id,
-            tokens_amount=amount_search_tokens,
-        )
+        """Добавляет запросы юзеру (через TokenLedger, в users — при flush)"""
+        await self.repo.credit_tokens(user_id, amount_search_tokens, reason="increment")
 
     async def reduce_tokens(
             self,
             user_id: uuid.UUID,
             tokens_amount: int = 0,
-    ) -> None:
-        """Отнимает запросы у юзера"""
-        await self.repo.decrease_tokens(user_id, tokens_amount)
+            reason: str = "",
+    ) -> Optional[TokenBalanceSchema]:
+        """Отнимает запросы у юзера.
+
+        :return: баланс после списания или None, если токенов не хватило
+        """
+        try:
+            is_charged, balance = await token_ledger.debit(
+                user_id,
+                tokens_amount,
+                loader=lambda: self.repo.get_token_balance_snapshot(user_id),
+                reason=reason
+            )
+            return balance if is_charged else None
+        except (RedisError, TokenLedgerError) as ex:
+            logger.warning(f"TokenLedger недоступен ({ex}), списание напрямую в БД")
+            return await self.repo.decrease_tokens(user_id, tokens_amount)
+
+    async def with_token_balance(self, user: UserSchema) -> UserSchema:
+        """Юзер с актуальным балансом: в users списания попадают с задержкой flush"""
+        try:
+            balance: TokenBalanceSchema | None = await token_ledger.get_balance(
+                user.id,
+                loader=lambda: self.repo.get_token_balance_snapshot(user.id)
+            )
+        except (RedisError, TokenLedgerError) as ex:
+            logger.warning(f"TokenLedger: баланс {user.id} из users ({ex})")
+            return user
+
+        if balance is None:
+            return user
+        return user.model_copy(update=balance.model_dump())
+
+    async def flush_token_ledger(self) -> int:
+        """Применение накопленных списаний / начислений к users"""
+        return await token_ledger.flush(
+            db_cursor=await self.repo.get_token_ledger_cursor(),
+            apply=self.repo.apply_token_ledger_deltas
+        )
+
+    async def reconcile_token_ledger(self, repair: bool = False) -> TokenLedgerReconcileResponse:
+        """
+        Сверка балансов в Redis с users + неприменёнными дельтами stream.
+
+        :param repair: сбросить расходящиеся балансы (заново соберутся из БД при следующем обращении)
+        """
+        user_ids: list[UUID] = await token_ledger.get_cached_user_ids()
+        mismatches: list[TokenLedgerMismatchSchema] = []
+
+        batch_size: int = 500
+        for i in range(0, len(user_ids), batch_size):
+            batch: list[UUID] = user_ids[i:i + batch_size]
+            for _ in range(3):
+                balances, db_cursor = await self.repo.get_token_balance_snapshots(batch)
+                try:
+                    batch_mismatches: list[TokenLedgerMismatchSchema] = [
+                        mismatch
+                        for user_id, balance in balances.items()
+                        if (mismatch := await token_ledger.check(user_id, balance, db_cursor))
+                    ]
+                except TokenLedgerError:
+                    # flush сдвинул курсор во время сверки — перечитываем снимок
+                    continue
+                mismatches.extend(batch_mismatches)
+                break
+            else:
+                raise TokenLedgerError("TokenLedger: курсор постоянно сдвигается, сверка не завершена")
+
+        if repair and mismatches:
+            await token_ledger.drop(*(mismatch.user_id for mismatch in mismatches))
+
+        return TokenLedgerReconcileResponse(
+            checked=len(user_ids),
+            pending_entries=await token_ledger.pending_entries(),
+            mismatches=mismatches,
+            repaired=len(mismatches) if repair else 0
+        )
 
     async def get_allowed_drugs_info(self, user_id: uuid.UUID) -> AllowedDrugsInfoSchema:
         """Возвращает количество препаратов в базе, количество разрешенных и краткую информацию о каждом разрешенном."""
@@ -0,0 +1,97 @@
+import datetime
+import logging
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.core.services.cache_logic.local_cache import LocalCache
+from drug_search.infrastructure.database.repository.pubmed_repo import PubmedRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PubmedArticleStore:
+    """
+    Общее хранилище разобранных статей PubMed (pubmed_articles) по PMID.
+
+    Поиск исследований скачивает через efetch только статьи, которых здесь нет или которые старше max_age.
+    Статьи без DOI / обязательных полей в БД не пишутся — их PMID помнятся в памяти процесса (skipped_size).
+    Ошибки БД не ломают поиск — статьи просто скачиваются из PubMed.
+    """
+
+    def __init__(
+            self,
+            session_maker: Callable[[], AsyncSession],
+            max_age: datetime.timedelta,
+            retention: datetime.timedelta,
+            skipped_size: int = 10000,
+    ):
+        self.session_maker = session_maker
+        self.max_age = max_age
+        self.retention = retention
+        self._skipped = LocalCache(
+            name="pubmed_skipped_articles",
+            max_size=skipped_size,
+            ttl=max_age.total_seconds()
+        )
+
+        # [ metrics ]
+        self.hits: int = 0
+        self.misses: int = 0
+
+    async def get_articles(self, pubmed_ids: Sequence[str]) -> dict[str, Optional[PubmedResearchSchema]]:
+        """
+        PMID -> статья для тех PMID, что есть в хранилище и не устарели.
+        None — статья уже скачивалась и непригодна (без DOI и т.п.), скачивать ее снова не нужно.
+        """
+        known: dict[str, Optional[PubmedResearchSchema]] = {
+            pubmed_id: None for pubmed_id in pubmed_ids if self._skipped.get(pubmed_id) is not None
+        }
+        if not (lookup_ids := [pubmed_id for pubmed_id in pubmed_ids if pubmed_id not in known]):
+            return known
+
+        try:
+            async with self.session_maker() as session:
+                articles: list[PubmedResearchSchema] = await PubmedRepository(session).use_articles(
+                    lookup_ids,
+                    fetched_after=datetime.datetime.now(datetime.UTC) - self.max_age
+                )
+        except (SQLAlchemyError, OSError) as ex:
+            logger.warning(f"PubmedArticleStore: БД недоступна ({ex})")
+            articles = []
+
+        self.hits += len(known) + len(articles)
+        self.misses += len(lookup_ids) - len(articles)
+        known.update((article.pubmed_id, article) for article in articles)
+        return known
+
+    async def save_articles(self, pubmed_ids: Sequence[str], articles: Sequence[PubmedResearchSchema]) -> None:
+        """
+        :param pubmed_ids: скачанные PMID — те, для которых нет статьи, запоминаются как непригодные
+        :param articles: разобранные статьи
+        """
+        saved_ids: set[str] = {article.pubmed_id for article in articles}
+        for pubmed_id in pubmed_ids:
+            if pubmed_id not in saved_ids:
+                self._skipped.set(pubmed_id, True)
+
+        try:
+            async with self.session_maker() as session:
+                await PubmedRepository(session).upsert_articles(articles)
+        except (SQLAlchemyError, OSError) as ex:
+            logger.warning(f"PubmedArticleStore: статьи не сохранены в БД ({ex})")
+
+    async def purge_unused(self) -> int:
+        """Удаление статей, не попадавших в поиск дольше retention"""
+        async with self.session_maker() as session:
+            return await PubmedRepository(session).delete_unused_articles(
+                before=datetime.datetime.now(datetime.UTC) - self.retention
+            )
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
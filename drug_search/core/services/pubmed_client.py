@@ -0,0 +1,309 @@
+import asyncio
+import datetime
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Sequence
+from xml.etree.ElementTree import Element, XMLPullParser, ParseError
+
+import aiohttp
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.core.utils.exceptions import PubmedError
+
+logger = logging.getLogger(__name__)
+
+# NCBI: без api_key — 3 запроса в секунду, с api_key — 10
+NCBI_RATE_LIMIT: float = 3
+NCBI_RATE_LIMIT_WITH_KEY: float = 10
+
+_RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+_XML_CHUNK_SIZE: int = 64 * 1024
+
+
+@dataclass
+class PubmedSearchResult:
+    """Результат esearch: PMID по релевантности"""
+    count: int  # всего найдено
+    ids: list[str]
+
+
+def _text(element: Optional[Element]) -> Optional[str]:
+    """Текст элемента вместе с вложенной разметкой (<i>, <sup> в заголовках и абстрактах)"""
+    if element is None:
+        return None
+    text: str = "".join(element.itertext()).strip()
+    return text or None
+
+
+def _section(abstract_texts: list[Element], *categories: str) -> Optional[str]:
+    """Раздел структурированного абстракта по NlmCategory / Label (RESULTS, CONCLUSIONS)"""
+    parts: list[str] = [
+        text for element in abstract_texts
+        if (element.get("NlmCategory") or element.get("Label") or "").upper() in categories
+        and (text := _text(element))
+    ]
+    return "\n".join(parts) or None
+
+
+def _publication_date(pubmed_data: Optional[Element]) -> Optional[datetime.date]:
+    """Дата появления в PubMed (PubStatus="pubmed"), как раньше в pymed"""
+    if pubmed_data is None:
+        return None
+    pub_date: Optional[Element] = pubmed_data.find("History/PubMedPubDate[@PubStatus='pubmed']")
+    if pub_date is None:
+        return None
+    try:
+        return datetime.date(
+            year=int(pub_date.findtext("Year")),
+            month=int(pub_date.findtext("Month") or 1),
+            day=int(pub_date.findtext("Day") or 1)
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_article(element: Element) -> Optional[PubmedResearchSchema]:
+    """
+    <PubmedArticle> -> PubmedResearchSchema; None — у статьи нет DOI, журнала или даты.
+
+    PMID и DOI берутся только у самой статьи (MedlineCitation/PMID, PubmedData/ArticleIdList),
+    а не из списка литературы, как было в pymed.
+    """
+    citation: Optional[Element] = element.find("MedlineCitation")
+    if citation is None:
+        return None
+    article: Optional[Element] = citation.find("Article")
+    pubmed_data: Optional[Element] = element.find("PubmedData")
+    if article is None:
+        return None
+
+    pubmed_id: Optional[str] = _text(citation.find("PMID"))
+    doi: Optional[str] = (
+        _text(pubmed_data.find("ArticleIdList/ArticleId[@IdType='doi']")) if pubmed_data is not None else None
+    ) or _text(article.find("ELocationID[@EIdType='doi']"))
+    title: Optional[str] = _text(article.find("ArticleTitle"))
+    journal: Optional[str] = _text(article.find("Journal/Title"))
+    publication_date: Optional[datetime.date] = _publication_date(pubmed_data)
+    if not (pubmed_id and doi and title and journal and publication_date):
+        return None
+
+    abstract_texts: list[Element] = article.findall("Abstract/AbstractText")
+    authors: list[str] = []
+    for author in article.findall("AuthorList/Author"):
+        if name := _text(author.find("CollectiveName")):
+            authors.append(name)
+        elif last_name := author.findtext("LastName"):
+            authors.append(f"{author.findtext('ForeName') or ''} {last_name}".strip())
+
+    return PubmedResearchSchema(
+        title=title,
+        abstract="\n".join(text for element in abstract_texts if (text := _text(element))) or None,
+        authors=authors,
+        doi=doi,
+        journal=journal,
+        publication_date=publication_date,
+        pubmed_id=pubmed_id,
+        conclusion=_section(abstract_texts, "CONCLUSION", "CONCLUSIONS"),
+        results=_section(abstract_texts, "RESULTS")
+    )
+
+
+class PubmedClient:
+    """
+    Асинхронный клиент NCBI E-utilities (esearch + efetch) вместо блокирующего pymed.
+
+    - одна aiohttp-сессия с пулом соединений на event loop;
+    - лимит NCBI на запросы в секунду на процесс (3 / 10 с api_key), повтор при 429 / 5xx;
+    - esearch отдает PMID, efetch — пачками по batch_size параллельно (PubmedService догружает только новые PMID);
+    - XML efetch разбирается потоково (XMLPullParser по частям ответа), разобранные статьи удаляются из дерева.
+
+    base_url настраивается — клиент можно проверять на локальном сервере с фикстурами.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            api_key: str = "",
+            email: str = "",
+            tool: str = "drugseek",
+            requests_per_second: float = 0,
+            batch_size: int = 100,
+            timeout: float = 30,
+            max_connections: int = 10,
+            max_retries: int = 3,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.email = email
+        self.tool = tool
+        self.requests_per_second = requests_per_second or (NCBI_RATE_LIMIT_WITH_KEY if api_key else NCBI_RATE_LIMIT)
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._rate_lock: asyncio.Lock | None = None
+        self._next_request_at: float = 0.0
+
+        # [ metrics ]
+        self.requests: int = 0
+        self.retries: int = 0
+        self.articles_parsed: int = 0
+        self.articles_skipped: int = 0
+
+    # [ HTTP ]
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # сессия привязана к event loop: в тестах / после перезапуска loop создается заново
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+            self._session_loop = loop
+            self._rate_lock = asyncio.Lock()
+            self._next_request_at = 0.0
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _throttle(self) -> None:
+        """Не чаще requests_per_second запросов: запросы встают в очередь по времени старта"""
+        async with self._rate_lock:
+            now: float = asyncio.get_running_loop().time()
+            if (wait := self._next_request_at - now) > 0:
+                await asyncio.sleep(wait)
+            self._next_request_at = max(now, self._next_request_at) + 1 / self.requests_per_second
+
+    def _params(self, **params) -> dict[str, str]:
+        params.update(tool=self.tool, email=self.email or None, api_key=self.api_key or None)
+        return {key: str(value) for key, value in params.items() if value is not None}
+
+    @asynccontextmanager
+    async def _request(self, endpoint: str, **params) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Запрос к E-utilities с повтором при 429 / 5xx / обрыве соединения.
+        Длинный список id уходит POST-формой (ограничение длины URL).
+        """
+        session: aiohttp.ClientSession = self._get_session()
+        url: str = f"{self.base_url}/{endpoint}"
+        params = self._params(**params)
+        method, query, form = ("POST", None, params) if len(params.get("id", "")) > 1000 else ("GET", params, None)
+
+        response: aiohttp.ClientResponse | None = None
+        for attempt in range(self.max_retries + 1):
+            await self._throttle()
+            self.requests += 1
+            delay: float = 2 ** attempt
+            try:
+                response = await session.request(method, url, params=query, data=form)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as ex:
+                if attempt == self.max_retries:
+                    raise PubmedError(f"PubMed {endpoint} недоступен: {ex}") from ex
+            else:
+                if response.status not in _RETRY_STATUSES:
+                    break
+                response.release()
+                if attempt == self.max_retries:
+                    raise PubmedError(f"PubMed {endpoint}: HTTP {response.status}")
+                if retry_after := response.headers.get("Retry-After", "").strip():
+                    delay = float(retry_after) if retry_after.isdigit() else delay
+
+            self.retries += 1
+            logger.warning(f"PubmedClient: повтор {endpoint} через {delay:.0f}с (попытка {attempt + 1})")
+            await asyncio.sleep(delay)
+
+        try:
+            if response.status >= 400:
+                raise PubmedError(f"PubMed {endpoint}: HTTP {response.status}")
+            yield response
+        finally:
+            response.release()
+
+    # [ E-UTILITIES ]
+    async def esearch(
+            self,
+            query: str,
+            max_results: int,
+            mindate: Optional[datetime.date] = None,
+    ) -> PubmedSearchResult:
+        """
+        PMID статей по запросу (самые релевантные первыми).
+        :param mindate: только статьи, появившиеся в PubMed с этой даты (datetype=edat)
+        """
+        params: dict = {
+            "db": "pubmed",
+            "term": query,
+            "retmax": max_results,
+            "retmode": "json",
+            "sort": "relevance",
+        }
+        if mindate is not None:
+            params.update(
+                datetype="edat",
+                mindate=mindate.strftime("%Y/%m/%d"),
+                maxdate=datetime.date.today().strftime("%Y/%m/%d")
+            )
+
+        async with self._request("esearch.fcgi", **params) as response:
+            data: dict = await response.json(content_type=None)
+
+        result: dict = data.get("esearchresult", {})
+        if error := result.get("ERROR") or data.get("error"):
+            raise PubmedError(f"PubMed esearch: {error}")
+        return PubmedSearchResult(
+            count=int(result.get("count", 0)),
+            ids=list(result.get("idlist", []))
+        )
+
+    async def _fetch_articles(self, **params) -> list[PubmedResearchSchema]:
+        """efetch XML: статьи разбираются по мере прихода ответа, без сборки всего дерева в памяти"""
+        articles: list[PubmedResearchSchema] = []
+        async with self._request("efetch.fcgi", db="pubmed", retmode="xml", **params) as response:
+            parser = XMLPullParser(events=("start", "end"))
+            root: Element | None = None
+            try:
+                async for chunk in response.content.iter_chunked(_XML_CHUNK_SIZE):
+                    parser.feed(chunk)
+                    for event, element in parser.read_events():
+                        if event == "start":
+                            if root is None:
+                                root = element
+                            continue
+                        if element.tag != "PubmedArticle":
+                            continue
+
+                        if (article := parse_article(element)) is None:
+                            self.articles_skipped += 1
+                        else:
+                            self.articles_parsed += 1
+                            articles.append(article)
+                        # разобранная статья больше не нужна — дерево не растет
+                        if element in root:
+                            root.remove(element)
+                parser.close()
+            except ParseError as ex:
+                raise PubmedError(f"PubMed efetch: некорректный XML ({ex})") from ex
+        return articles
+
+    async def efetch_ids(self, ids: Sequence[str]) -> list[PubmedResearchSchema]:
+        """Статьи по PMID, пачками по batch_size (пачки параллельно, лимит NCBI соблюдает _throttle)"""
+        batches: list[list[PubmedResearchSchema]] = await asyncio.gather(*(
+            self._fetch_articles(id=",".join(ids[start:start + self.batch_size]))
+            for start in range(0, len(ids), self.batch_size)
+        ))
+        return [article for batch in batches for article in batch]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "articles_parsed": self.articles_parsed,
+            "articles_skipped": self.articles_skipped,
+        }
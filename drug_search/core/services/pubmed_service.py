@@ -1,12 +1,15 @@
 import asyncio
+import datetime
 import threading
-from typing import Optional
-
-from pymed import PubMed
+from typing import Awaitable, Callable, Collection, Optional
 
+from drug_search.config import config
+from drug_search.core.dependencies.pubmed_article_store_dep import pubmed_article_store
+from drug_search.core.dependencies.pubmed_client_dep import pubmed_client
 from drug_search.core.schemas import (AssistantResponsePubmedQuery, ClearResearchesRequest,
-                                      DrugResearchesAssistantResponse, PubmedResearchSchema)
+                                      ClearResearchesResult, PubmedResearchSchema)
 from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.pubmed_client import PubmedSearchResult
 
 
 class PubmedService:
@@ -23,24 +26,11 @@ class PubmedService:
     def __init__(self, assistant_service: AssistantService):
         with self._lock:
             if not self._initialized:
-                self.pubmed = PubMed()
+                self.pubmed = pubmed_client
+                self.article_store = pubmed_article_store
                 self.assistant_service = assistant_service
                 self._initialized = True
 
-    @staticmethod
-    def __parse_authors(authors: dict) -> list[str]:
-        """
-        Превращает словарь с ФИО в строку. Игнорирует поле affiliation.
-
-        Возвращает массив со строками ФИО.
-        """
-        str_authors = []
-        for author in authors:
-            firstname = author["firstname"]
-            lastname = author["lastname"]
-            str_authors.append(f'{firstname} {lastname}')
-        return str_authors
-
     async def __get_pubmed_query(self, drug_name: str) -> str:
         assistant_response: AssistantResponsePubmedQuery = await self.assistant_service.pubmed.get_pubmed_query(
             drug_name=drug_name)
@@ -61,12 +51,17 @@ class PubmedService:
             drug_name=drug_name)
         return assistant_response.pubmed_query
 
-    async def get_researches_dirty(self, drug_name: str) -> list[Optional[PubmedResearchSchema]]:
+    async def get_researches_dirty(
+            self,
+            drug_name: str,
+            mindate: Optional[datetime.date] = None
+    ) -> list[Optional[PubmedResearchSchema]]:
         """
         Возвращает исследования по препарату с помощью парсера PubMed.
 
         Сам оптимизирует запрос специфично для PubMed с помощью ассистента.
         :param drug_name: Действующее вещество препарата.
+        :param mindate: только статьи, появившиеся в PubMed с этой даты (инкрементальное обновление)
         """
         # Получаем все запросы параллельно
         pubmed_dosages_query, pubmed_mechanism_query, pubmed_metabolism_query = await asyncio.gather(
@@ -75,73 +70,130 @@ class PubmedService:
             self.get_pubmed_query_metabolism(drug_name)
         )
 
-        researches = []
-
         # Сначала пробуем найти исследования по специфичным запросам
-        for query in [pubmed_dosages_query, pubmed_mechanism_query, pubmed_metabolism_query]:
-            self._process_articles_from_query(query, researches, max_articles=50)
+        researches: list[PubmedResearchSchema] = await self.search_researches(
+            [pubmed_dosages_query, pubmed_mechanism_query, pubmed_metabolism_query],
+            mindate=mindate
+        )
 
         # Если специфичных исследований нет, ищем любые исследования
-        if not researches:
+        # (при инкрементальном обновлении новых статей может просто не быть)
+        if not researches and mindate is None:
             pubmed_query = await self.__get_pubmed_query(drug_name)
-            self._process_articles_from_query(pubmed_query, researches, max_articles=50)
+            researches = await self.search_researches([pubmed_query])
 
         return researches
 
-    def _process_articles_from_query(self, query: str, researches: list, max_articles: int) -> None:
-        """Обрабатывает статьи из PubMed запроса и добавляет их в список исследований."""
-        pubmed_articles = self.pubmed.query(query=query, max_results=100)
-        count = 0
-
-        for pubmed_article in pubmed_articles:
-            if count >= max_articles:
-                break
-
-            if not self._is_valid_article(pubmed_article):
-                continue
-
-            if pubmed_article.doi in (research.doi for research in researches):
-                continue
-
-            researches.append(
-                PubmedResearchSchema(
-                    title=pubmed_article.title,
-                    abstract=pubmed_article.abstract,
-                    authors=self.__parse_authors(pubmed_article.authors),
-                    doi=pubmed_article.doi,
-                    journal=pubmed_article.journal,
-                    publication_date=pubmed_article.publication_date,
-                    pubmed_id=pubmed_article.pubmed_id,
-                    conclusion=pubmed_article.conclusions,
-                    results=pubmed_article.results
-                )
-            )
-            count += 1
-
-    def _is_valid_article(self, pubmed_article) -> bool:
-        """Проверяет валидность статьи PubMed."""
-        if not pubmed_article:
-            return False
-
-        if "\n" in str(pubmed_article.doi) or "\n" in str(pubmed_article.pubmed_id):
-            return False
-
-        if not pubmed_article.doi or not pubmed_article.pubmed_id:
-            return False
-
-        return True
-
-    async def get_researches_clearly(self, drug_name: str) -> DrugResearchesAssistantResponse:
-        """Возвращает исследования в красивом виде после обработки ИИ"""
-        researches: list[Optional[PubmedResearchSchema]] = await self.get_researches_dirty(
-            drug_name=drug_name
-        )
+    async def search_researches(
+            self,
+            queries: list[str],
+            max_articles: int = config.PUBMED_ARTICLES_PER_QUERY,
+            max_results: int = config.PUBMED_SEARCH_MAX_RESULTS,
+            mindate: Optional[datetime.date] = None,
+    ) -> list[PubmedResearchSchema]:
+        """
+        Статьи по нескольким вариантам запроса: esearch всех запросов параллельно,
+        затем один efetch уникальных PMID — общие для запросов статьи скачиваются и разбираются один раз.
+        Статьи, уже скачанные ранее (для любого препарата), берутся из PubmedArticleStore.
+
+        До max_articles статей на запрос; порядок — по порядку запросов, внутри запроса по релевантности.
+        """
+        searches: list[PubmedSearchResult] = await asyncio.gather(*(
+            self.pubmed.esearch(query, max_results=max_results, mindate=mindate)
+            for query in queries
+        ))
+
+        # PMID -> статья (None — статья без DOI / обязательных полей)
+        fetched: dict[str, Optional[PubmedResearchSchema]] = {}
+        while True:
+            researches, missing_ids = self._merge_searches(searches, fetched, max_articles)
+            if not missing_ids:
+                return researches
+
+            # докачиваем только то, чего не хватило для бюджета запросов (обычно один раунд):
+            # сначала из общего хранилища статей, в PubMed — только отсутствующие там
+            fetched.update(await self.article_store.get_articles(missing_ids))
+            if fetch_ids := [pubmed_id for pubmed_id in missing_ids if pubmed_id not in fetched]:
+                articles: list[PubmedResearchSchema] = await self.pubmed.efetch_ids(fetch_ids)
+                await self.article_store.save_articles(fetch_ids, articles)
+                for article in articles:
+                    fetched[article.pubmed_id] = article
+            for pubmed_id in missing_ids:
+                fetched.setdefault(pubmed_id, None)
+
+    @staticmethod
+    def _merge_searches(
+            searches: list[PubmedSearchResult],
+            fetched: dict[str, Optional[PubmedResearchSchema]],
+            max_articles: int,
+    ) -> tuple[list[PubmedResearchSchema], list[str]]:
+        """
+        Детерминированное слияние результатов: запросы по порядку, статья достается первому запросу,
+        в котором встретилась (дубли по PMID и DOI пропускаются).
+
+        :return: (статьи, PMID, которые нужно скачать). Пока список PMID не пуст, слияние неокончательно:
+            запрос дошел до нескачанной статьи, а бюджет еще не набран.
+        """
+        researches: list[PubmedResearchSchema] = []
+        seen_ids: set[str] = set()
+        seen_dois: set[str] = set()
+        missing_ids: dict[str, None] = {}  # упорядоченное множество
+
+        for search in searches:
+            selected: int = 0
+            for position, pubmed_id in enumerate(search.ids):
+                if selected >= max_articles:
+                    break
+                if pubmed_id in seen_ids:
+                    continue
+
+                if pubmed_id not in fetched:
+                    # бюджет запроса набирается следующими нескачанными статьями
+                    # (статья, которую уже докачивает предыдущий запрос, достанется ему)
+                    for rest_id in search.ids[position:]:
+                        if selected >= max_articles:
+                            break
+                        if rest_id not in seen_ids and rest_id not in fetched and rest_id not in missing_ids:
+                            missing_ids[rest_id] = None
+                            selected += 1
+                    break
+
+                seen_ids.add(pubmed_id)
+                article: Optional[PubmedResearchSchema] = fetched[pubmed_id]
+                if article is None or article.doi in seen_dois:
+                    continue
+
+                seen_dois.add(article.doi)
+                researches.append(article)
+                selected += 1
+
+        return researches, list(missing_ids)
+
+    async def get_researches_clearly(
+            self,
+            drug_name: str,
+            mindate: Optional[datetime.date] = None,
+            get_known_dois: Optional[Callable[[list[str]], Awaitable[Collection[str]]]] = None,
+    ) -> ClearResearchesResult:
+        """
+        Возвращает исследования в красивом виде после обработки ИИ.
+
+        :param mindate: только статьи, появившиеся в PubMed с этой даты
+        :param get_known_dois: DOI найденных статей -> уже сохраненные (у любого препарата), в нейронку не идут
+        """
+        researches: list[PubmedResearchSchema] = await self.get_researches_dirty(drug_name=drug_name, mindate=mindate)
+        if researches and get_known_dois is not None:
+            known_dois: Collection[str] = await get_known_dois([research.doi for research in researches])
+            researches = [research for research in researches if research.doi not in known_dois]
+        if not researches:
+            return ClearResearchesResult(researches=[])
+
         researches_request_to_assistant = ClearResearchesRequest(
             researches=researches,
             drug_name=drug_name
         )
 
-        clear_researches: DrugResearchesAssistantResponse = await self.assistant_service.get_clear_researches(
+        clear_researches: ClearResearchesResult = await self.assistant_service.get_clear_researches(
             researches_request_to_assistant
         )
         return clear_researches
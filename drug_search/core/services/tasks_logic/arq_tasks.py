@@ -5,13 +5,23 @@ import uuid
 from typing import Sequence, Generator
 
 from drug_search.bot.bot_instance import bot
+from drug_search.config import config
+from drug_search.core.dependencies.assistant_response_cache_dep import assistant_response_cache
 from drug_search.core.dependencies.containers.service_container import get_service_container
-from drug_search.core.lexicon import ADMINS_TG_ID, ARROW_TYPES
-from drug_search.core.schemas import DrugSchema, QuestionDrugsAssistantResponse, UserSchema, QuestionAssistantResponse
+from drug_search.core.dependencies.json_repair_dep import json_repairer
+from drug_search.core.dependencies.pubmed_article_store_dep import pubmed_article_store
+from drug_search.core.dependencies.pubmed_client_dep import pubmed_client
+from drug_search.core.lexicon import ADMINS_TG_ID, ARROW_TYPES, LLM_PRIORITY, DRUG_SECTION_STATUS, DrugMenu
+from drug_search.core.schemas import DrugSchema, DrugHit, QuestionDrugsAssistantResponse, UserSchema, \
+    QuestionAssistantResponse
 from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.cache_logic.assistant_response_cache import llm_cache_bypass
 from drug_search.core.services.cache_logic.redis_service import RedisService
-from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.core.services.llm_scheduler import llm_call_context
+from drug_search.core.services.models_service.drug_service import DrugService, DRUG_REFRESHABLE_SECTIONS
+from drug_search.core.services.models_service.llm_usage_service import LLMUsageService
 from drug_search.core.services.models_service.user_service import UserService
+from drug_search.core.services.tasks_logic.task_service import TaskService
 from drug_search.core.services.telegram_service import TelegramService
 from drug_search.core.utils.writing_imitation import bot_typing_imitation
 from drug_search.infrastructure.database.repository.user_repo import UserRepository
@@ -25,7 +35,7 @@ async def drug_create(
         user_telegram_id: str,
         user_id: uuid.UUID,
 ):
-    """Логика создания препарата"""
+    """Логика создания препарата: карточка юзеру после краткой информации, разделы — по мере готовности"""
     async with get_service_container() as container:
         # [ Dependencies ]
         drug_service: DrugService = await container.get_drug_service()
@@ -33,55 +43,181 @@ async def drug_create(
         user_service: UserService = await container.get_user_service()
         redis_service: RedisService = await container.redis_service
 
-        async with bot_typing_imitation(user_telegram_id, bot=bot):
-            drug: DrugSchema = await drug_service.update_or_create_drug(
-                drug_name,
-                user_telegram_id=user_telegram_id
-            )
-            logger.info(f"Successfully created drug '{drug_name}' with ID: {drug.id}")
+        async def on_briefly_saved(drug: DrugSchema) -> None:
+            # при повторе задачи препарат мог быть уже разрешен прошлой попыткой
+            if not await user_service.is_drug_allowed(user_id=user_id, drug_id=drug.id):
+                await user_service.allow_drug_to_user(user_id=user_id, drug_id=drug.id)
 
-        await telegram_service.send_drug_created_notification(
-            user_telegram_id=user_telegram_id,
-            drug=drug,
-        )
+            # [ invalidate cache ] (+ pub/sub для локального кэша бота)
+            await redis_service.invalidate_drug(drug.id)
+            await redis_service.invalidate_user_data(user_telegram_id)
+
+            await telegram_service.send_drug(user_telegram_id, drug=drug, drug_menu=DrugMenu.BRIEFLY)
 
-        await user_service.allow_drug_to_user(user_id=user_id, drug_id=drug.id)
+        async def on_section_saved(drug: DrugSchema, section: DrugMenu) -> None:
+            await redis_service.invalidate_drug(drug.id, sections=[section])
+
+        # [ retry ] препарат записан прошлой попыткой (упала карточка / воркер) — продолжаем, а не создаем заново
+        existing: DrugHit | None = await drug_service.repo.find_drug_hit_without_trigrams(drug_name)
+
+        with llm_call_context(LLM_PRIORITY.DRUG_CREATE, user_telegram_id):
+            async with bot_typing_imitation(user_telegram_id, bot=bot):
+                if existing is not None:
+                    logger.info(f"Drug '{drug_name}' already saved ({existing.id}), resuming creation")
+                    drug: DrugSchema | None = await drug_service.resume_drug_creation(
+                        existing.id,
+                        user_telegram_id=user_telegram_id,
+                        on_briefly_saved=on_briefly_saved,
+                        on_section_saved=on_section_saved
+                    )
+                else:
+                    drug = await drug_service.update_or_create_drug(
+                        drug_name,
+                        user_telegram_id=user_telegram_id,
+                        on_briefly_saved=on_briefly_saved,
+                        on_section_saved=on_section_saved
+                    )
+            if drug is None:
+                logger.warning(f"Drug '{drug_name}' was deleted while resuming creation")
+                return
+            logger.info(f"Successfully created drug '{drug_name}' with ID: {drug.id}")
 
-        await redis_service.invalidate_user_data(user_telegram_id)
+        await _retry_failed_drug_sections(ctx, drug, user_telegram_id, attempt=1)
 
 
 async def drug_update(
         ctx,  # noqa
         user_telegram_id: str,
         drug_id: uuid.UUID,
+        sections: list[str] | None = None,
+        user_id: uuid.UUID | None = None,
+        charged_tokens: int = 0,
 ):
-    """Логика обновления препарата"""
+    """Логика обновления препарата: только разделы sections (None — все).
+
+    Не обновленные разделы повторяются один раз; если и повтор не удался — юзеру приходит
+    список разделов и возврат charged_tokens (списанных за обновление) вместо оповещения об успехе.
+    """
     ctx['log'] = logger
 
     async with get_service_container() as container:
         # [ Dependencies ]
         drug_service: DrugService = await container.get_drug_service()
         telegram_service: TelegramService = await container.telegram_service
+        user_service: UserService = await container.get_user_service()
         redis_service: RedisService = await container.redis_service
 
-        drug: DrugSchema = await drug_service.repo.get(drug_id)
+        failed: list[DrugMenu] = []
+
+        async def on_section_saved(drug: DrugSchema, section: DrugMenu) -> None:
+            # [ invalidate cache ] (+ pub/sub для локального кэша бота)
+            await redis_service.invalidate_drug(drug.id, sections=[section])
+
+        async def on_section_failed(drug: DrugSchema, section: DrugMenu) -> None:  # noqa
+            failed.append(section)
 
-        async with bot_typing_imitation(user_telegram_id, bot=bot):
-            drug = await drug_service.update_or_create_drug(
-                drug_name=drug.name,
+        async def refresh(refresh_sections: list[DrugMenu] | None) -> DrugSchema | None:
+            try:
+                return await drug_service.refresh_drug(
+                    drug_id,
+                    user_telegram_id=user_telegram_id,
+                    sections=refresh_sections,
+                    on_section_saved=on_section_saved,
+                    on_section_failed=on_section_failed
+                )
+            except Exception as ex:
+                # краткая информация не обновлена — остальные разделы отменены вместе с ней
+                logger.error(f"Препарат {drug_id} не обновлен: {ex}")
+                failed.extend(refresh_sections or DRUG_REFRESHABLE_SECTIONS)
+                return await drug_service.repo.get(drug_id)
+
+        # обновление — всегда свежие ответы нейронки, а не кэш ответов при создании
+        with llm_call_context(LLM_PRIORITY.DRUG_CREATE, user_telegram_id), llm_cache_bypass():
+            async with bot_typing_imitation(user_telegram_id, bot=bot):
+                drug: DrugSchema | None = await refresh(
+                    [DrugMenu(section) for section in sections] if sections else None
+                )
+
+                if drug is not None and failed:
+                    retry_sections: list[DrugMenu] = list(dict.fromkeys(failed))
+                    logger.warning(
+                        f"Разделы {[section.value for section in retry_sections]} препарата {drug_id} не обновлены, повтор"
+                    )
+                    failed.clear()
+                    drug = await refresh(retry_sections)
+
+        if drug is None:
+            logger.warning(f"Препарат {drug_id} не найден для обновления")
+            return
+
+        # [ notification ]
+        if failed:
+            failed_sections: list[DrugMenu] = list(dict.fromkeys(failed))
+            logger.error(
+                f"Препарат {drug_id} обновлен не полностью для пользователя {user_telegram_id}: "
+                f"{[section.value for section in failed_sections]}"
+            )
+            refunded_tokens: int = 0
+            if charged_tokens and user_id:
+                await user_service.add_tokens(user_id, charged_tokens)
+                refunded_tokens = charged_tokens
+            await telegram_service.send_drug_update_failed_notification(
+                user_telegram_id=user_telegram_id,
+                drug=drug,
+                failed_sections=failed_sections,
+                refunded_tokens=refunded_tokens
+            )
+        else:
+            logger.info(f"Препарат {drug_id} обновлен для пользователя {user_telegram_id} (разделы: {sections or 'все'})")
+            await telegram_service.send_drug_updated_notification(
                 user_telegram_id=user_telegram_id,
-                drug_id=drug_id
+                drug=drug
             )
 
-        # [ invalidate cache ]
-        await redis_service.invalidate_drug(drug_id)
+        await _retry_failed_drug_sections(ctx, drug, user_telegram_id, attempt=1)
 
-        # [ notification ]
-        logger.info(f"Препарат {drug_id} обновлен для пользователя {user_telegram_id}")
-        await telegram_service.send_drug_updated_notification(
-            user_telegram_id=user_telegram_id,
-            drug=drug
-        )
+
+async def drug_sections_retry(
+        ctx,  # noqa
+        drug_id: uuid.UUID,
+        user_telegram_id: str,
+        attempt: int,
+):
+    """Повтор разделов препарата, не созданных при поэтапном создании (остальные не трогаются)"""
+    async with get_service_container() as container:
+        drug_service: DrugService = await container.get_drug_service()
+        redis_service: RedisService = await container.redis_service
+
+        async def on_section_saved(drug: DrugSchema, section: DrugMenu) -> None:
+            await redis_service.invalidate_drug(drug.id, sections=[section])
+
+        with llm_call_context(LLM_PRIORITY.DRUG_CREATE, user_telegram_id):
+            drug: DrugSchema | None = await drug_service.complete_drug_sections(
+                drug_id,
+                on_section_saved=on_section_saved
+            )
+
+        if drug:
+            await _retry_failed_drug_sections(ctx, drug, user_telegram_id, attempt=attempt + 1)
+
+
+async def _retry_failed_drug_sections(ctx, drug: DrugSchema, user_telegram_id: str, attempt: int) -> None:
+    failed: list[str] = [
+        section.value for section, status in drug.section_statuses.items() if status != DRUG_SECTION_STATUS.READY
+    ]
+    if not failed:
+        return
+
+    if attempt > config.DRUG_SECTION_RETRY_ATTEMPTS:
+        logger.error(f"Разделы {failed} препарата {drug.name} не созданы за {config.DRUG_SECTION_RETRY_ATTEMPTS} попыток")
+        return
+
+    await TaskService(ctx["redis"]).enqueue_drug_sections_retry(
+        drug_id=drug.id,
+        user_telegram_id=user_telegram_id,
+        attempt=attempt,
+        defer_by=config.DRUG_SECTION_RETRY_DELAY * attempt
+    )
 
 
 async def assistant_question(
@@ -100,20 +236,17 @@ async def assistant_question(
         assistant_service: AssistantService = await container.assistant_service
         telegram_service: TelegramService = await container.telegram_service
 
-        async with bot_typing_imitation(user_telegram_id, bot=bot):
-            question_response: QuestionAssistantResponse = await assistant_service.actions.answer_to_question(
-                question,
-                simple_mode
-            )
-
         try:
-            await telegram_service.edit_message_with_assistant_answer(
-                assistant_response=question_response,
-                user_telegram_id=user_telegram_id,
-                old_message_id=old_message_id,
-            )
+            # сообщение-заглушка правится по мере генерации: первый блок виден до конца ответа
+            with llm_call_context(LLM_PRIORITY.QUESTION, user_telegram_id):
+                async with bot_typing_imitation(user_telegram_id, bot=bot):
+                    await telegram_service.stream_message_with_assistant_answer(
+                        answer_parts=assistant_service.actions.answer_to_question_stream(question, simple_mode),
+                        user_telegram_id=user_telegram_id,
+                        old_message_id=old_message_id,
+                    )
         except ValueError:
-            logger.info(f"Ошибка парсинга сообщения:\n {question_response.model_json_schema()}")
+            logger.info(f"Ошибка парсинга сообщения:\n {QuestionAssistantResponse.model_json_schema()}")
             raise
 
 
@@ -140,9 +273,10 @@ async def assistant_drugs_question(
             question=question
         )
         if not question_response:
-            async with bot_typing_imitation(user_telegram_id, bot=bot):
-                question_response: QuestionDrugsAssistantResponse = await assistant_service.actions.answer_to_drugs_question(
-                    question)
+            with llm_call_context(LLM_PRIORITY.QUESTION, user_telegram_id):
+                async with bot_typing_imitation(user_telegram_id, bot=bot):
+                    question_response: QuestionDrugsAssistantResponse = await assistant_service.actions.answer_to_drugs_question(
+                        question)
 
             await redis_service.set_assistant_drugs_answer(
                 assistant_response=question_response,
@@ -238,7 +372,8 @@ async def user_description_update(
         telegram_service: TelegramService = await container.telegram_service
         redis_service: RedisService = await container.redis_service
 
-        await user_service.update_user_description(user_id)
+        with llm_call_context(LLM_PRIORITY.USER_DESCRIPTION, user_tg_id):
+            await user_service.update_user_description(user_id)
 
         await redis_service.invalidate_user_data(user_tg_id)
 
@@ -275,3 +410,45 @@ async def weekly_drug_marketing(ctx):  # noqa
 
         await telegram_service.send_to_channel(MARKETING_CHANNEL_USERNAME, message)
         logger.info(f"Weekly drug marketing post sent: {drug.name}")
+
+
+async def token_ledger_flush(ctx):  # noqa
+    """Применение списаний / начислений токенов из Redis stream к users (TokenLedger)"""
+    async with get_service_container() as container:
+        user_service: UserService = await container.get_user_service()
+        await user_service.flush_token_ledger()
+
+
+async def user_request_logs_maintenance(ctx):  # noqa
+    """Партиции user_request_logs: создание на месяцы вперед, удаление старше срока хранения"""
+    async with get_service_container() as container:
+        user_service: UserService = await container.get_user_service()
+
+        created: list[str] = await user_service.repo.ensure_user_log_partitions(config.USER_LOG_PARTITIONS_AHEAD)
+        dropped: list[str] = await user_service.repo.drop_user_log_partitions(config.USER_LOG_RETENTION_MONTHS)
+        logger.info(f"user_request_logs: партиции {created}, удалены {dropped}")
+
+
+async def llm_response_cache_maintenance(ctx):  # noqa
+    """Удаление просроченных ответов нейронки, ответов на измененные промпты, вердиктов поиска и старого учета"""
+    deleted: int = await assistant_response_cache.purge_stale()
+    logger.info(f"AssistantResponseCache: удалено {deleted} устаревших ответов")
+
+    async with get_service_container() as container:
+        drug_service: DrugService = await container.get_drug_service()
+        deleted_aliases: int = await drug_service.repo.delete_expired_query_aliases()
+        logger.info(f"drug_query_aliases: удалено {deleted_aliases} просроченных вердиктов")
+
+        llm_usage_service: LLMUsageService = await container.get_llm_usage_service()
+        deleted_usage: int = await llm_usage_service.delete_old_usage()
+        logger.info(f"llm_usage: удалено {deleted_usage} старых записей учета")
+
+    # ответы нейронки для препаратов чинятся в воркере — метрики ремонта за время работы в лог
+    logger.info(f"JsonRepairer (воркер): {json_repairer.stats()}")
+
+
+async def pubmed_articles_maintenance(ctx):  # noqa
+    """Удаление давно не использованных статей из общего хранилища PubMed"""
+    deleted: int = await pubmed_article_store.purge_unused()
+    logger.info(f"pubmed_articles: удалено {deleted} неиспользуемых статей")
+    logger.info(f"PubmedArticleStore (воркер): {pubmed_article_store.stats()}, PubmedClient: {pubmed_client.stats()}")
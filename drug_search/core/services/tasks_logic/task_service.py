@@ -6,7 +6,7 @@ from enum import Enum
 from arq import ArqRedis
 from arq.jobs import Job, JobStatus
 
-from drug_search.core.lexicon import ARROW_TYPES, JobStatuses
+from drug_search.core.lexicon import ARROW_TYPES, JobStatuses, DrugMenu
 from drug_search.core.schemas import UpdateDrugStatuses
 
 logger = logging.getLogger(__name__)
@@ -18,6 +18,7 @@ class ARQ_JOBS(str, Enum):
     """
     DRUG_CREATE = "drug_create"
     DRUG_UPDATE = "drug_update"
+    DRUG_SECTIONS_RETRY = "drug_sections_retry"
     ASSISTANT_DRUGS_QUESTION = "assistant_drugs_question"
     ASSISTANT_QUESTION = "assistant_question"
     MAILING = "mailing"
@@ -68,14 +69,24 @@ class TaskService:
     async def enqueue_drug_update(
             self,
             user_telegram_id: str,
-            drug_id: uuid.UUID
+            drug_id: uuid.UUID,
+            sections: list[DrugMenu] | None = None,
+            user_id: uuid.UUID | None = None,
+            charged_tokens: int = 0,
     ) -> dict:
+        """
+        :param sections: обновляемые разделы, None — все
+        :param charged_tokens: списано за обновление — возвращается, если разделы не обновились
+        """
         job_id: str = self.generate_job_id(str(drug_id))
 
         job: Job = await self.arq_pool.enqueue_job(
             ARQ_JOBS.DRUG_UPDATE.value,
             user_telegram_id,
             drug_id,
+            [section.value for section in sections] if sections else None,
+            user_id,
+            charged_tokens,
             _job_id=job_id,
             _expires=10  # minutes
         )
@@ -92,6 +103,24 @@ class TaskService:
             "drug_id": drug_id,
         }
 
+    async def enqueue_drug_sections_retry(
+            self,
+            drug_id: uuid.UUID,
+            user_telegram_id: str,
+            attempt: int,
+            defer_by: float
+    ) -> None:
+        """Повтор только неготовых разделов препарата (после поэтапного создания)"""
+        await self.arq_pool.enqueue_job(
+            ARQ_JOBS.DRUG_SECTIONS_RETRY.value,
+            drug_id,
+            user_telegram_id,
+            attempt,
+            _job_id=f"{ARQ_JOBS.DRUG_SECTIONS_RETRY.value}:{drug_id}:{attempt}",
+            _defer_by=defer_by
+        )
+        logger.info(f"Повтор разделов препарата {drug_id} (попытка {attempt}) поставлен в очередь!")
+
     async def enqueue_assistant_question(
             self,
             user_telegram_id: str,
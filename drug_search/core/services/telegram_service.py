@@ -1,17 +1,24 @@
+import asyncio
 import json
 import logging
+import time
+from contextlib import suppress
+from typing import AsyncIterator, Any
 
 import aiohttp
 from aiogram.types import ReplyKeyboardMarkup, InlineKeyboardMarkup
+from pydantic import ValidationError
 
 from drug_search.bot.keyboards.drug_keyboards import question_continue_keyboard, drug_keyboard
 from drug_search.bot.lexicon.enums import ModeTypes
+from drug_search.bot.lexicon.keyboard_words import ButtonText
 from drug_search.bot.lexicon.message_text import MessageText
 from drug_search.config import config
 from drug_search.core.lexicon import ARROW_TYPES
 from drug_search.core.lexicon.enums import DrugMenu
 from drug_search.core.lexicon.message_templates import MessageTemplates
 from drug_search.core.schemas import DrugSchema, QuestionDrugsAssistantResponse, QuestionAssistantResponse
+from drug_search.core.schemas.assistant_schemas.assistant_responses import BlocksContent, ContentBlock
 from drug_search.core.utils.formatter import TelegramMessageTemplates
 from drug_search.core.utils.telegram_message_validation import escape_lt_gt_outside_tags_simple
 
@@ -145,6 +152,24 @@ class TelegramService:
         message: str = MessageTemplates.DRUG_UPDATED_NOTIFICATION.format(name_ru=drug.name_ru)
         await self.send_message(user_telegram_id, message=message, reply_markup=None)
 
+    async def send_drug_update_failed_notification(
+            self,
+            user_telegram_id: str,
+            drug: DrugSchema,
+            failed_sections: list[DrugMenu],
+            refunded_tokens: int = 0,
+    ):
+        """Оповещение о неудачном обновлении разделов препарата (+ возврат токенов)"""
+        message: str = MessageTemplates.DRUG_UPDATE_FAILED_NOTIFICATION.format(
+            name_ru=drug.name_ru,
+            sections=", ".join(
+                "краткая информация" if section == DrugMenu.BRIEFLY else getattr(ButtonText, section.name, section.value)
+                for section in failed_sections
+            ),
+            refund=f", токены возвращены (+{refunded_tokens})" if refunded_tokens else ""
+        )
+        await self.send_message(user_telegram_id, message=message, reply_markup=None)
+
     async def send_user_description_updated(
             self,
             user_telegram_id: str
@@ -241,3 +266,98 @@ class TelegramService:
                 is_two_pages=drugs_count > 3
             )
         )
+
+    async def stream_message_with_assistant_answer(
+            self,
+            answer_parts: AsyncIterator[tuple[tuple, Any]],
+            user_telegram_id: str,
+            old_message_id: str,
+    ) -> QuestionAssistantResponse:
+        """
+        Постепенно редактирует сообщение по мере генерации ответа на вопрос.
+
+        answer_parts — поток AssistantService.Actions.answer_to_question_stream.
+        Правки не чаще TELEGRAM_STREAM_EDIT_INTERVAL: части, пришедшие раньше, показываются отложенной правкой.
+        Полный ответ отправляется через edit_message_with_assistant_answer (с разбиением длинных сообщений).
+        """
+        draft = QuestionAssistantResponse.model_construct(header="", blocks_content=[], conclusion=None)
+        last_text: str | None = None
+        last_edit_at: float = 0.0
+        delayed_edit: asyncio.Task | None = None
+
+        async def edit_draft() -> None:
+            nonlocal last_text, last_edit_at
+            message_text: str = escape_lt_gt_outside_tags_simple(
+                TelegramMessageTemplates.format_assistant_answer(draft)
+            )
+            if message_text == last_text or len(message_text) > 4000:
+                return
+
+            last_text, last_edit_at = message_text, time.monotonic()
+            try:
+                await self.edit_message(
+                    user_telegram_id=user_telegram_id,
+                    old_message_id=old_message_id,
+                    message_text=message_text,
+                    reply_markup=None
+                )
+            except ValueError as ex:
+                # промежуточные правки не критичны — полный ответ все равно придет
+                logger.warning(f"Не удалось обновить черновик ответа: {ex}")
+
+        async def edit_draft_later(delay: float) -> None:
+            await asyncio.sleep(delay)
+            await edit_draft()
+
+        try:
+            async for path, value in answer_parts:
+                if path == ():
+                    assistant_response: QuestionAssistantResponse = value
+                    break
+
+                self._apply_answer_part(draft, path, value)
+
+                if delayed_edit is not None and not delayed_edit.done():
+                    continue  # отложенная правка покажет и эту часть
+                wait: float = config.TELEGRAM_STREAM_EDIT_INTERVAL - (time.monotonic() - last_edit_at)
+                if wait <= 0:
+                    await edit_draft()
+                else:
+                    delayed_edit = asyncio.create_task(edit_draft_later(wait))
+            else:
+                raise ValueError("Поток ответа завершился без полного ответа")
+        finally:
+            if delayed_edit is not None:
+                delayed_edit.cancel()
+                # отмененная правка могла уже отправлять запрос — дожидаемся ее,
+                # иначе она перезапишет финальный ответ черновиком
+                with suppress(asyncio.CancelledError):
+                    await delayed_edit
+
+        await self.edit_message_with_assistant_answer(
+            assistant_response=assistant_response,
+            user_telegram_id=user_telegram_id,
+            old_message_id=old_message_id,
+        )
+        return assistant_response
+
+    @staticmethod
+    def _apply_answer_part(draft: QuestionAssistantResponse, path: tuple, value: Any) -> None:
+        """Добавляет законченную часть ответа в черновик"""
+        if path == ("header",):
+            draft.header = value
+            return
+
+        _, i, field, *_ = path  # ("blocks_content", i, field[, j])
+        while len(draft.blocks_content) <= i:
+            draft.blocks_content.append(
+                BlocksContent.model_construct(blocks_header=None, blocks_description=None, content=[])
+            )
+
+        if field != "content":
+            setattr(draft.blocks_content[i], field, value)
+            return
+        try:
+            draft.blocks_content[i].content.append(ContentBlock.model_validate(value))
+        except ValidationError as ex:
+            logger.warning(f"Часть ответа {path} не прошла валидацию: {ex}")
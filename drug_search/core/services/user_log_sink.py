@@ -0,0 +1,45 @@
+import datetime
+import logging
+from typing import Awaitable, Callable, Sequence
+from uuid import UUID
+
+from drug_search.core.schemas import UserRequestLogSchema
+from drug_search.core.services.batch_sink import BatchSink
+
+logger = logging.getLogger(__name__)
+
+UserLogsWriter = Callable[[Sequence[UserRequestLogSchema]], Awaitable[None]]
+
+
+class UserLogSink(BatchSink[UserRequestLogSchema]):
+    """
+    Буферизованная запись user_request_logs вне пути запроса (см. BatchSink).
+    """
+
+    def __init__(
+            self,
+            writer: UserLogsWriter,
+            max_size: int,
+            batch_size: int,
+            flush_interval: float,
+            put_timeout: float,
+    ):
+        super().__init__(
+            name="user_log_sink",
+            writer=writer,
+            max_size=max_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            put_timeout=put_timeout
+        )
+
+    async def put(self, user_id: UUID, user_query: str, predicted_action: str | None = None) -> None:
+        """Запись лога юзера (поиск препаратов / обращение в нейронку)"""
+        log = UserRequestLogSchema(
+            user_id=user_id,
+            user_query=user_query,
+            used_at=datetime.datetime.now(datetime.UTC),
+            predicted_action=predicted_action
+        )
+        if not await self._put(log):
+            logger.warning(f"UserLogSink: очередь заполнена, лог юзера {user_id} отброшен")
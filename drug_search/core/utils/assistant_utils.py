@@ -1,7 +1,25 @@
 import json
+import re
+from typing import Iterable, Optional
 
+from drug_search.core.schemas import DrugResearchSchema, PubmedResearchSchema
 from drug_search.core.schemas.assistant_schemas.assistant_requests import ClearResearchesRequest
 
+# [ сжатие абстрактов ] лимиты символов частей статьи в запросе к нейронке
+ABSTRACT_MAX_CHARS: int = 1200  # неструктурированный абстракт
+ABSTRACT_CONTEXT_MAX_CHARS: int = 400  # введение / методы, если есть results / conclusion
+RESULTS_MAX_CHARS: int = 800
+CONCLUSION_MAX_CHARS: int = 600
+AUTHORS_MAX: int = 2  # промпт берет первых 1-2 авторов
+
+# предложения, которые не нужны для выжимки: копирайт, регистрация испытания, финансирование
+_BOILERPLATE = re.compile(
+    r"©|\bcopyright\b|all rights reserved|\bpublished by\b|trial registration|clinicaltrials\.gov|"
+    r"\bprospero\b|\bfunding\b|conflicts? of interest|\bkeywords?\s*:",
+    re.IGNORECASE
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
 
 def serialize_researches_request(request: ClearResearchesRequest) -> str:
     """Превращение Pydantic схемы исследований в строку"""
@@ -16,3 +34,83 @@ def serialize_researches_request(request: ClearResearchesRequest) -> str:
         ]
     }
     return json.dumps(json_query, indent=4, ensure_ascii=False)
+
+
+def compact_text(text: Optional[str], max_chars: int) -> Optional[str]:
+    """Текст без шаблонных предложений, обрезанный по границе предложения до max_chars"""
+    if not text:
+        return None
+
+    sentences: list[str] = [
+        sentence for sentence in _SENTENCE_END.split(" ".join(text.split()))
+        if sentence and not _BOILERPLATE.search(sentence)
+    ]
+    compacted: str = ""
+    for sentence in sentences:
+        if len(compacted) + len(sentence) + 1 > max_chars:
+            if not compacted:
+                compacted = sentence[:max_chars - 1].rstrip() + "…"
+            break
+        compacted = f"{compacted} {sentence}" if compacted else sentence
+    return compacted or None
+
+
+def compact_research(research: PubmedResearchSchema) -> dict:
+    """
+    Статья для запроса к нейронке без лишнего: results / conclusion целиком (в пределах лимита),
+    из остального абстракта — короткий контекст; разделы абстракта не дублируются.
+    """
+    compacted: dict = {
+        "title": research.title,
+        "doi": research.doi,
+        "journal": research.journal,
+        "publication_date": research.publication_date.isoformat(),
+        "authors": research.authors[:AUTHORS_MAX],
+    }
+
+    results: Optional[str] = compact_text(research.results, RESULTS_MAX_CHARS)
+    conclusion: Optional[str] = compact_text(research.conclusion, CONCLUSION_MAX_CHARS)
+    if results or conclusion:
+        # абстракт собран из разделов построчно — results / conclusion в нем уже есть
+        sections: set[str] = {section for section in (research.results, research.conclusion) if section}
+        context: str = "\n".join(
+            line for line in (research.abstract or "").split("\n")
+            if line and not any(line in section for section in sections)
+        )
+        abstract: Optional[str] = compact_text(context, ABSTRACT_CONTEXT_MAX_CHARS)
+    else:
+        abstract = compact_text(research.abstract, ABSTRACT_MAX_CHARS)
+
+    for key, value in (("abstract", abstract), ("results", results), ("conclusion", conclusion)):
+        if value:
+            compacted[key] = value
+    return compacted
+
+
+def serialize_researches_chunk(drug_name: str, researches: Iterable[PubmedResearchSchema]) -> str:
+    """Часть исследований для map-шага: сжатые статьи, компактный JSON"""
+    json_query = {
+        "drug_name": drug_name,
+        "researches": [compact_research(research) for research in researches]
+    }
+    return json.dumps(json_query, ensure_ascii=False, separators=(",", ":"))
+
+
+def rank_researches(
+        researches: Iterable[DrugResearchSchema],
+        allowed_dois: set[str],
+) -> list[DrugResearchSchema]:
+    """
+    Reduce-шаг: исследования всех частей в один список.
+
+    Только DOI из запроса (нейронка не должна их выдумывать), дубль DOI — с большим interest,
+    порядок — по interest, затем по дате публикации (свежие выше).
+    """
+    best: dict[str, DrugResearchSchema] = {}
+    for research in researches:
+        if research.doi not in allowed_dois:
+            continue
+        if (current := best.get(research.doi)) is None or research.interest > current.interest:
+            best[research.doi] = research
+
+    return sorted(best.values(), key=lambda research: (research.interest, research.publication_date), reverse=True)
@@ -16,8 +16,10 @@ from starlette import status
 from starlette.status import HTTP_403_FORBIDDEN
 
 from drug_search.config import config
+from drug_search.core.dependencies.user_context_cache_dep import get_user_context_cache
 from drug_search.core.dependencies.user_service_dep import get_user_service
 from drug_search.core.schemas import UserSchema
+from drug_search.core.services.cache_logic.user_context_cache import UserContextCache
 from drug_search.core.services.models_service.user_service import UserService
 
 logger = logging.getLogger(__name__)
@@ -82,7 +84,32 @@ async def get_auth_user(
     if not user:
         logger.exception(f"Cannot find user by token: {token}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Wrong user.")
-    return user
+    return await user_service.with_token_balance(user)
+
+
+async def get_auth_user_cached(
+        user_service: Annotated[UserService, Depends(get_user_service)],
+        user_context_cache: Annotated[UserContextCache, Depends(get_user_context_cache)],
+        token: str = Depends(config.OAUTH2_SCHEME)
+) -> UserSchema:
+    """
+    Getting User Schema from token через версионированный кэш контекста.
+    Только для эндпоинтов, которые не меняют юзера (токены, подписку, препараты) —
+    остальные используют get_auth_user.
+
+    :return: User: UserSchema
+    """
+    user_id: UUID = await decode_jwt(token)
+
+    user: UserSchema | None = await user_context_cache.get_or_load(
+        user_id,
+        lambda: user_service.repo.get_user(user_id)
+    )
+    if not user:
+        logger.exception(f"Cannot find user by token: {token}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Wrong user.")
+    # токены — из TokenLedger (списания доходят до users с задержкой flush)
+    return await user_service.with_token_balance(user)
 
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -21,3 +21,8 @@ class DrugNotFound(Exception):
 class AssistantResponseError(Exception):
     "Wrong response data from assistant."
     pass
+
+
+class PubmedError(Exception):
+    "PubMed (NCBI E-utilities) недоступен или вернул ошибку."
+    pass
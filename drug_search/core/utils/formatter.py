@@ -34,7 +34,7 @@ class TelegramMessageTemplates:
     def format_assistant_answer(
             assistant_response: QuestionAssistantResponse,
     ):
-        """Ответ на вопрос от ассистента"""
+        """Ответ на вопрос от ассистента (без conclusion — черновик ответа, который еще генерируется)"""
 
         # [ основной текст ]
         content: str = ""
@@ -61,6 +61,12 @@ class TelegramMessageTemplates:
                     else:
                         content += f"├── {brick_header}\n"
 
+        if assistant_response.conclusion is None:
+            return MessageTemplates.ASSISTANT_ANSWER_DRAFT.format(
+                header_with_emoji=assistant_response.header,
+                content=content
+            )
+
         # [ заключение ]
         conclusion_section: str = (
             f"<b>{assistant_response.conclusion.conclusion_header}</b>: "
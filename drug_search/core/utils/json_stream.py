@@ -0,0 +1,127 @@
+import json
+from typing import Any, Iterable
+
+JsonPath = tuple[str | int, ...]
+
+ANY_INDEX = "*"
+
+
+class JsonStreamParser:
+    """
+    Инкрементальный разбор JSON, приходящего частями (stream ответа нейронки).
+
+    feed принимает очередную порцию текста и возвращает значения, которые в ней закончились,
+    если их путь совпадает с одним из paths. Путь — ключи объектов и индексы массивов
+    от корня: ("blocks_content", 0, "content", 1); ANY_INDEX совпадает с любым индексом.
+    Корень — путь ().
+    """
+
+    def __init__(self, paths: Iterable[tuple]):
+        self.paths: list[tuple] = [tuple(path) for path in paths]
+
+        self._buffer: str = ""
+        self._pos: int = 0
+
+        self._in_string: bool = False
+        self._escape: bool = False
+        self._string_start: int = 0
+
+        # [ (тип контейнера "{" / "[", текущий ключ / индекс, ожидается ключ) ]
+        self._stack: list[list] = []
+        self._value_starts: list[int] = []  # начало незакрытых значений (по одному на уровень)
+        self._primitive_start: int | None = None
+        self._done: bool = False
+
+    def _path(self) -> JsonPath:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _is_subscribed(self, path: JsonPath) -> bool:
+        for pattern in self.paths:
+            if len(pattern) == len(path) and all(
+                    p == k or (p == ANY_INDEX and isinstance(k, int)) for p, k in zip(pattern, path)
+            ):
+                return True
+        return False
+
+    def _expects_key(self) -> bool:
+        return bool(self._stack) and self._stack[-1][0] == "{" and self._stack[-1][2]
+
+    def _emit(self, start: int, end: int, events: list[tuple[JsonPath, Any]]) -> None:
+        path: JsonPath = self._path()
+        if self._is_subscribed(path):
+            events.append((path, json.loads(self._buffer[start:end])))
+        if not self._stack:
+            self._done = True
+
+    def _close_primitive(self, end: int, events: list[tuple[JsonPath, Any]]) -> None:
+        if self._primitive_start is not None:
+            start, self._primitive_start = self._primitive_start, None
+            self._emit(start, end, events)
+
+    def feed(self, chunk: str) -> list[tuple[JsonPath, Any]]:
+        events: list[tuple[JsonPath, Any]] = []
+        self._buffer += chunk
+
+        while self._pos < len(self._buffer) and not self._done:
+            i: int = self._pos
+            char: str = self._buffer[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._expects_key():
+                        self._stack[-1][1] = json.loads(self._buffer[self._string_start:i + 1])
+                        self._stack[-1][2] = False
+                    else:
+                        self._emit(self._string_start, i + 1, events)
+                continue
+
+            if self._primitive_start is not None:
+                if char not in ",}] \t\r\n":
+                    continue
+                self._close_primitive(i, events)
+
+            if char in " \t\r\n:":
+                continue
+
+            if char == ",":
+                frame: list = self._stack[-1]
+                if frame[0] == "{":
+                    frame[2] = True
+                else:
+                    frame[1] += 1
+                continue
+
+            if char in "}]":
+                self._stack.pop()
+                self._emit(self._value_starts.pop(), i + 1, events)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+                continue
+
+            if char == "{":
+                self._value_starts.append(i)
+                self._stack.append(["{", None, True])
+                continue
+
+            if char == "[":
+                self._value_starts.append(i)
+                self._stack.append(["[", 0, False])
+                continue
+
+            # число / true / false / null
+            self._primitive_start = i
+
+        return events
+
+    @property
+    def text(self) -> str:
+        return self._buffer
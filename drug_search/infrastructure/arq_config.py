@@ -4,9 +4,13 @@ from arq.connections import RedisSettings
 from arq.cron import cron
 
 from drug_search.config import config
+from drug_search.core.dependencies.deepseek_balance_dep import deepseek_balance_guard
+from drug_search.core.dependencies.llm_usage_dep import llm_usage_sink
+from drug_search.core.dependencies.pubmed_client_dep import pubmed_client
 from drug_search.core.services.tasks_logic.arq_tasks import (
-    drug_create, drug_update, assistant_drugs_question, mailing, user_description_update,
-    assistant_question, yookassa_update_to_admins, weekly_drug_marketing
+    drug_create, drug_update, drug_sections_retry, assistant_drugs_question, mailing, user_description_update,
+    assistant_question, yookassa_update_to_admins, weekly_drug_marketing, token_ledger_flush,
+    user_request_logs_maintenance, llm_response_cache_maintenance, pubmed_articles_maintenance
 )
 from drug_search.infrastructure.loggerConfig import configure_logging
 
@@ -16,16 +20,30 @@ class WorkerSettings:
     functions = [
         drug_create,
         drug_update,
+        drug_sections_retry,
         assistant_question,
         assistant_drugs_question,
         mailing,
         user_description_update,
         yookassa_update_to_admins,
         weekly_drug_marketing,
+        token_ledger_flush,
+        user_request_logs_maintenance,
+        llm_response_cache_maintenance,
+        pubmed_articles_maintenance,
     ]
 
     cron_jobs = [
         cron(weekly_drug_marketing, weekday=0, hour=10, minute=0, run_at_startup=False),
+        cron(
+            token_ledger_flush,
+            second=set(range(0, 60, config.TOKEN_LEDGER_FLUSH_INTERVAL)),
+            run_at_startup=True
+        ),
+        cron(user_request_logs_maintenance, hour=3, minute=30, run_at_startup=True),
+        # run_at_startup: после деплоя с правкой промптов старые ответы удаляются сразу
+        cron(llm_response_cache_maintenance, hour=4, minute=0, run_at_startup=True),
+        cron(pubmed_articles_maintenance, hour=4, minute=30, run_at_startup=False),
     ]
 
     # Настройки Redis
@@ -44,6 +62,13 @@ class WorkerSettings:
         logger = logging.getLogger(__name__)
         logger.info("ARQ worker started with logging configured")
 
+    async def on_shutdown(self):
+        """Вызывается при остановке worker"""
+        # дописываем буфер учета запросов к нейронке
+        await llm_usage_sink.stop()
+        await deepseek_balance_guard.stop()
+        await pubmed_client.close()
+
     # Retry политика
     retry_jobs = True
     max_tries = 3
@@ -1,14 +1,17 @@
 import uuid
+from datetime import datetime
 from typing import Optional, Type, TypeVar, Generic
 
 from pydantic import BaseModel
-from sqlalchemy import String, Float, ForeignKey, Text, UniqueConstraint, ARRAY, Index, func, JSON, TypeDecorator
+from sqlalchemy import (String, Float, ForeignKey, Text, UniqueConstraint, ARRAY, Index, func, JSON, TypeDecorator,
+                        LargeBinary, Integer, DateTime)
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID  # Важно импортировать UUID для PostgreSQL
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from drug_search.core.schemas import DrugAnalogSchema, DrugCombinationSchema, DrugPathwaySchema, \
     DrugResearchSchema, DrugSynonymSchema, DrugDosageSchema, DrugSchema, Pharmacokinetics, MetabolismPhase, \
-    EliminationInfo
+    EliminationInfo, DrugDocumentSchema, DrugSectionSchema, DrugQueryAliasSchema
+from drug_search.core.lexicon.enums import DrugMenu, DRUG_SECTION_STATUS
 from drug_search.infrastructure.database.models.base import TimestampsMixin, IDMixin
 from drug_search.infrastructure.database.models.types import DangerClassificationEnum
 
@@ -35,6 +38,28 @@ class PydanticTypeList(TypeDecorator, Generic[S]):
         return [self.pydantic_type(**item) for item in value]
 
 
+# связанные таблицы, которые нужны для отрисовки раздела меню (остальное лежит в самой строке drugs)
+DRUG_SECTION_RELATIONSHIPS: dict[DrugMenu, tuple[str, ...]] = {
+    DrugMenu.BRIEFLY: (),
+    DrugMenu.DOSAGES: ("dosages",),
+    DrugMenu.MECHANISM: ("pathways",),
+    DrugMenu.COMBINATIONS: ("combinations",),
+    DrugMenu.RESEARCHES: ("researches",),
+    DrugMenu.ANALOGS: ("analogs",),
+    DrugMenu.METABOLISM: (),
+    DrugMenu.UPDATE_INFO: (),
+}
+
+# [ раздел -> колонка статуса ] разделы, которые пишутся после краткой информации (поэтапное создание)
+DRUG_SECTION_STATUS_COLUMNS: dict[DrugMenu, str] = {
+    DrugMenu.DOSAGES: "dosages_status",
+    DrugMenu.ANALOGS: "analogs_status",
+    DrugMenu.METABOLISM: "metabolism_status",
+    DrugMenu.MECHANISM: "pathways_status",
+    DrugMenu.COMBINATIONS: "combinations_status",
+}
+
+
 class Drug(IDMixin, TimestampsMixin):
     __tablename__ = "drugs"
 
@@ -86,6 +111,36 @@ class Drug(IDMixin, TimestampsMixin):
     pathways_sources: Mapped[Optional[list[str]]] = mapped_column(ARRAY(Text))
     dosage_sources: Mapped[Optional[list[str]]] = mapped_column(ARRAY(Text))
 
+    # [ section statuses ] pending -> ready / failed, см. DRUG_SECTION_STATUS_COLUMNS
+    dosages_status: Mapped[str] = mapped_column(
+        String(16), default=DRUG_SECTION_STATUS.READY.value, server_default=DRUG_SECTION_STATUS.READY.value
+    )
+    analogs_status: Mapped[str] = mapped_column(
+        String(16), default=DRUG_SECTION_STATUS.READY.value, server_default=DRUG_SECTION_STATUS.READY.value
+    )
+    metabolism_status: Mapped[str] = mapped_column(
+        String(16), default=DRUG_SECTION_STATUS.READY.value, server_default=DRUG_SECTION_STATUS.READY.value
+    )
+    pathways_status: Mapped[str] = mapped_column(
+        String(16), default=DRUG_SECTION_STATUS.READY.value, server_default=DRUG_SECTION_STATUS.READY.value
+    )
+    combinations_status: Mapped[str] = mapped_column(
+        String(16), default=DRUG_SECTION_STATUS.READY.value, server_default=DRUG_SECTION_STATUS.READY.value
+    )
+
+    # [ section versions ] {раздел: {"version": n, "updated_at": iso}}, растет только при изменении раздела
+    section_versions: Mapped[Optional[dict]] = mapped_column(
+        JSON,
+        comment="версии разделов (DrugSectionVersionSchema) для инвалидации документа / кэша по разделам"
+    )
+
+    # [ researches watermark ] время последнего поиска в PubMed: следующий ищет только новые статьи (mindate)
+    researches_searched_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="последний поиск исследований в PubMed"
+    )
+
     # [ relationships ]
     dosages: Mapped[list["DrugDosage"]] = relationship(
         back_populates="drug",
@@ -139,6 +194,13 @@ class Drug(IDMixin, TimestampsMixin):
     def schema_class(cls) -> Type[S]:
         return DrugSchema
 
+    @property
+    def section_statuses(self) -> dict[DrugMenu, DRUG_SECTION_STATUS]:
+        return {
+            section: DRUG_SECTION_STATUS(getattr(self, column) or DRUG_SECTION_STATUS.READY.value)
+            for section, column in DRUG_SECTION_STATUS_COLUMNS.items()
+        }
+
     def get_schema(self) -> DrugSchema:
         def _map_schemas(items):
             return [item_schema for item in items if (item_schema := item.get_schema())] if items else []
@@ -178,10 +240,53 @@ class Drug(IDMixin, TimestampsMixin):
             secondary_actions=self.secondary_actions,
             clinical_effects=self.clinical_effects,
 
+            section_statuses=self.section_statuses,
+            section_versions=self.section_versions or {},
+
             created_at=self.created_at,
             updated_at=self.updated_at
         )
 
+    def get_section_schema(self, section: DrugMenu) -> DrugSectionSchema:
+        """Схема раздела: поля строки drugs + только связанные таблицы этого раздела"""
+        relationships: dict[str, list] = {
+            name: [item_schema for item in getattr(self, name) if (item_schema := item.get_schema())]
+            for name in DRUG_SECTION_RELATIONSHIPS[section]
+        }
+
+        return DrugSectionSchema(
+            section=section,
+            id=self.id,
+            name=self.name,
+            latin_name=self.latin_name,
+            name_ru=self.name_ru,
+            description=self.description,
+            classification=self.classification,
+            fact=self.fact,
+            fun_facts=self.fun_facts,
+
+            danger_classification=self.danger_classification,
+
+            pharmacokinetics=self.pharmacokinetics or [],
+            metabolism=self.metabolism or [],
+            elimination=self.elimination or [],
+            metabolism_description=self.metabolism_description,
+
+            pathways_sources=self.pathways_sources if self.pathways_sources else [],
+            dosage_sources=self.dosage_sources if self.dosage_sources else [],
+            primary_action=self.primary_action,
+            secondary_actions=self.secondary_actions,
+            clinical_effects=self.clinical_effects,
+            analogs_description=self.analogs_description,
+
+            section_statuses=self.section_statuses,
+            section_versions=self.section_versions or {},
+
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            **relationships
+        )
+
 
 class DrugAnalog(IDMixin):
     __tablename__ = "drug_analogs"
@@ -224,12 +329,13 @@ class DrugSynonym(IDMixin):
         # B-tree индекс для точного совпадения
         Index("idx_drug_synonyms_lower", func.lower(synonym), postgresql_using="btree"),
 
-        # GIN индекс для нечеткого поиска (триграммы) регистронезависимого поиска (по умолчанию в trgm)
+        # GiST индекс для нечеткого поиска (триграммы) по нормализованному синониму:
+        # поддерживает оператор % и KNN-сортировку <->
         Index(
-            'trgm_drug_synonyms',
-            synonym,
-            postgresql_using='gin',
-            postgresql_ops={'synonym': 'gin_trgm_ops'}
+            'trgm_drug_synonyms_lower',
+            func.lower(synonym).label('synonym_lower'),
+            postgresql_using='gist',
+            postgresql_ops={'synonym_lower': 'gist_trgm_ops'}
         )
     )
 
@@ -238,6 +344,47 @@ class DrugSynonym(IDMixin):
         return DrugSynonymSchema
 
 
+class DrugQueryAlias(IDMixin, TimestampsMixin):
+    """Запрос юзера, проверенный нейронкой (DRUG_SEARCH_VALIDATION).
+
+    Следующий похожий запрос (триграммы, как по синонимам) получает вердикт отсюда без нейронки.
+    NOT_EXIST хранится с expires_at: препарат могут добавить / нейронка могла ошибиться.
+    """
+    __tablename__ = "drug_query_aliases"
+
+    query: Mapped[str] = mapped_column(String(255), unique=True, comment="нормализованный запрос юзера")
+    status: Mapped[str] = mapped_column(String(16), comment="вердикт нейронки: exist / not exist")
+    drug_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("drugs.id", ondelete="SET NULL", name="fk_drug_query_aliases_drug_id"),
+        nullable=True,
+        comment="препарат в базе на момент проверки"
+    )
+    drug_name: Mapped[str] = mapped_column(String(100), comment="ДВ на англ от нейронки")
+    drug_name_ru: Mapped[str] = mapped_column(String(100), comment="ДВ на русском от нейронки")
+    danger_classification: Mapped[DangerClassificationEnum] = mapped_column(DangerClassificationEnum)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="срок жизни отрицательного вердикта, NULL — бессрочно"
+    )
+
+    __table_args__ = (
+        # GiST индекс для нечеткого поиска (триграммы): запрос уже нормализован
+        Index(
+            'trgm_drug_query_aliases',
+            'query',
+            postgresql_using='gist',
+            postgresql_ops={'query': 'gist_trgm_ops'}
+        ),
+    )
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return DrugQueryAliasSchema
+
+
 class DrugCombination(IDMixin):
     __tablename__ = "drug_combinations"
 
@@ -371,3 +518,26 @@ class DrugResearch(IDMixin):
     @property
     def schema_class(cls) -> Type[S]:
         return DrugResearchSchema
+
+
+class DrugDocument(IDMixin, TimestampsMixin):
+    """Предсобранный JSON препарата (DrugSchema) для отдачи /v1/drugs/{id} без гидрации ORM.
+
+    Пишется в той же транзакции, что и изменения препарата.
+    """
+    __tablename__ = "drug_documents"
+
+    drug_id: Mapped[uuid.UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("drugs.id", ondelete="CASCADE", name="fk_drug_documents_drug_id"),
+        nullable=False,
+        unique=True
+    )
+
+    document: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, comment="сериализованный DrugSchema (JSON)")
+    etag: Mapped[str] = mapped_column(String(64), nullable=False, comment="хэш документа")
+    version: Mapped[int] = mapped_column(Integer, server_default="1", default=1, comment="номер пересборки")
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return DrugDocumentSchema
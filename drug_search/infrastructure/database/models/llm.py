@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Optional, Type
+
+from sqlalchemy import String, Text, DateTime, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from drug_search.core.schemas import LLMResponseCacheSchema, LLMUsageSchema
+from drug_search.infrastructure.database.models.base import IDMixin, TimestampsMixin, S
+
+
+class LLMResponseCacheEntry(IDMixin, TimestampsMixin):
+    """Ответ нейронки на детерминированный промпт (AssistantResponseCache).
+
+    Ключ включает текст промпта: после правки промпта старые записи не совпадают
+    и удаляются при обслуживании по prompt_hash.
+    """
+    __tablename__ = "llm_response_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True, comment="sha256 запроса")
+    prompt_name: Mapped[str] = mapped_column(String(100), index=True, comment="название промпта")
+    prompt_hash: Mapped[str] = mapped_column(String(64), comment="sha256 текста промпта")
+    response: Mapped[str] = mapped_column(Text, comment="сырой ответ нейронки")
+    expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="срок жизни, NULL — бессрочно"
+    )
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return LLMResponseCacheSchema
+
+
+class LLMUsage(IDMixin):
+    """Учет запросов к нейронке: токены, кэш промптов DeepSeek, время и исход по функциям приложения.
+
+    Пишется пачками через LLMUsageSink (COPY), старые записи удаляет llm_response_cache_maintenance.
+    """
+    __tablename__ = "llm_usage"
+
+    feature: Mapped[str] = mapped_column(String(32), comment="функция приложения (LLM_FEATURES)")
+    prompt_name: Mapped[str] = mapped_column(String(100), comment="название промпта")
+    prompt_hash: Mapped[str] = mapped_column(String(64), comment="sha256 текста промпта")
+    model: Mapped[str] = mapped_column(String(32), comment="модель нейронки")
+    prompt_tokens: Mapped[int] = mapped_column(Integer, comment="токены запроса")
+    cached_tokens: Mapped[int] = mapped_column(Integer, comment="токены запроса из кэша промптов DeepSeek")
+    completion_tokens: Mapped[int] = mapped_column(Integer, comment="токены ответа")
+    latency_ms: Mapped[int] = mapped_column(Integer, comment="время запроса к нейронке")
+    outcome: Mapped[str] = mapped_column(String(16), comment="исход запроса")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        index=True
+    )
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return LLMUsageSchema
@@ -0,0 +1,42 @@
+import datetime
+from typing import Optional, Type
+
+from sqlalchemy import String, Text, ARRAY, Date, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.infrastructure.database.models.base import IDMixin, S
+
+
+class PubmedArticle(IDMixin):
+    """Статья PubMed, уже скачанная и разобранная (PubmedArticleStore) — общая для всех препаратов.
+
+    Повторный поиск (другой препарат / обновление исследований) берет статью отсюда без efetch.
+    Статьи старше PUBMED_ARTICLE_MAX_AGE_DAYS скачиваются заново, давно не использованные — удаляются.
+    """
+    __tablename__ = "pubmed_articles"
+
+    pubmed_id: Mapped[str] = mapped_column(String(16), unique=True, comment="PMID")
+    doi: Mapped[str] = mapped_column(String(255), index=True)
+    title: Mapped[str] = mapped_column(Text)
+    abstract: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    authors: Mapped[list[str]] = mapped_column(ARRAY(Text))
+    journal: Mapped[str] = mapped_column(Text)
+    publication_date: Mapped[datetime.date] = mapped_column(Date)
+    results: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    conclusion: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    fetched_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        comment="время скачивания из PubMed"
+    )
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        index=True,
+        comment="последнее попадание в поиск (срок хранения)"
+    )
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return PubmedResearchSchema
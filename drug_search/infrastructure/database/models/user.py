@@ -3,11 +3,12 @@ from datetime import datetime
 from typing import Optional, Type, TypeVar, Union
 
 from pydantic import BaseModel
-from sqlalchemy import String, ForeignKey, Text, Index, func, DateTime, Integer, UUID as PG_UUID, Boolean
+from sqlalchemy import String, ForeignKey, Text, Index, func, DateTime, Integer, UUID as PG_UUID, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from drug_search.core.lexicon import SUBSCRIPTION_TYPES, TOKENS_LIMIT
-from drug_search.core.schemas import UserSchema, UserRequestLogSchema, AllowedDrugSchema, ReferralSchema
+from drug_search.core.schemas import UserSchema, UserRequestLogSchema, AllowedDrugSchema, ReferralSchema, \
+    TokenLedgerCursorSchema
 from drug_search.infrastructure.database.models.base import IDMixin, TimestampsMixin
 from drug_search.infrastructure.database.models.payment import Payment
 from drug_search.infrastructure.database.models.types import UserSubscriptionTypes
@@ -81,17 +82,18 @@ class User(IDMixin, TimestampsMixin):
     )
 
     # [ RELATIONSHIPS ]
+    # не грузятся вместе с юзером: доступ к препаратам — через AllowedDrugsIndex
     allowed_drugs: Mapped[list["AllowedDrugs"]] = relationship(
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="select"
     )
 
     payment_logs: Mapped[list["Payment"]] = relationship(
         "Payment",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="select"
     )
 
     def get_schema(self) -> Union[S, list[None]]:
@@ -119,7 +121,6 @@ class User(IDMixin, TimestampsMixin):
 
             description=self.description,
 
-            allowed_drugs=[al for al in self.allowed_drugs],
             created_at=self.created_at,
             updated_at=self.updated_at
         )
@@ -134,12 +135,30 @@ class User(IDMixin, TimestampsMixin):
 
 
 class UserRequestLog(IDMixin):
-    """Логирование израсходованных запросов пользователя"""
+    """Логирование израсходованных запросов пользователя
+
+    Таблица партиционирована по месяцам (used_at): user_request_logs_pYYYYMM + user_request_logs_default.
+    Партиции создает и удаляет по сроку хранения задача user_request_logs_maintenance.
+    """
     __tablename__ = "user_request_logs"
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
     user_query: Mapped[str] = mapped_column(String, comment="запрос пользователя")
-    used_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    predicted_action: Mapped[Optional[str]] = mapped_column(
+        String(32),
+        nullable=True,
+        comment="действие от нейронки (predict_user_action), разметка для IntentClassifier"
+    )
+    used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True  # ключ партиционирования обязан входить в PK
+    )
+
+    __table_args__ = (
+        Index('ix_user_request_logs_user_id_used_at', 'user_id', text('used_at DESC')),
+        {"postgresql_partition_by": "RANGE (used_at)"},
+    )
 
     @property
     def schema_class(cls) -> Type[S]:
@@ -193,3 +212,18 @@ class Referral(IDMixin):
     @property
     def schema_class(cls) -> Type[S]:
         return ReferralSchema
+
+
+class TokenLedgerCursor(IDMixin, TimestampsMixin):
+    """Последняя запись stream токенов, примененная к users (TokenLedger.flush).
+
+    Сдвигается в той же транзакции, что и UPDATE users — повторный flush не применит дельты дважды.
+    """
+    __tablename__ = "token_ledger_cursors"
+
+    name: Mapped[str] = mapped_column(String(50), unique=True, comment="название ledger")
+    last_entry_id: Mapped[str] = mapped_column(String(64), server_default="0-0", comment="id записи Redis stream")
+
+    @property
+    def schema_class(cls) -> Type[S]:
+        return TokenLedgerCursorSchema
@@ -0,0 +1,49 @@
+"""
+Пересборка таблицы drug_documents для существующих препаратов.
+
+Запуск:
+    python -m drug_search.infrastructure.database.rebuild_drug_documents
+"""
+import asyncio
+import logging
+import uuid
+
+from drug_search.infrastructure.database.engine import async_session_maker, engine
+from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
+from drug_search.infrastructure.loggerConfig import configure_logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE: int = 50
+
+
+async def rebuild_drug_documents() -> int:
+    """Пересобирает документы всех препаратов, коммит каждые BATCH_SIZE препаратов."""
+    async with async_session_maker() as session:
+        repo = DrugRepository(session)
+        drug_ids: list[uuid.UUID] = await repo.get_drug_ids()
+
+        for i, drug_id in enumerate(drug_ids, start=1):
+            await repo.DrugCreation.rebuild_document(drug_id)
+
+            if i % BATCH_SIZE == 0:
+                await session.commit()
+                session.expunge_all()
+                logger.info(f"Пересобрано документов: {i}/{len(drug_ids)}")
+
+        await session.commit()
+
+    logger.info(f"Пересборка drug_documents завершена: {len(drug_ids)} препаратов")
+    return len(drug_ids)
+
+
+async def main():
+    try:
+        await rebuild_drug_documents()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
@@ -1,108 +1,261 @@
-import asyncio
+import hashlib
 import logging
 import uuid
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional, Union, AsyncGenerator
+from typing import Optional, Union, AsyncGenerator, TypeVar, Collection
 
 from fastapi import Depends
-from sqlalchemy import select, func, delete, text
+from sqlalchemy import select, func, delete, text, Float, or_, and_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, raiseload
 
 from drug_search.core.schemas import (
-    DrugCombinationsAssistantResponse, DrugSchema, DrugBrieflyAssistantResponse,
+    DrugCombinationsAssistantResponse, DrugSchema, DrugHit, DrugBrieflyAssistantResponse,
     DrugPathwaysAssistantResponse, DrugDosagesAssistantResponse,
     DrugAnalogsAssistantResponse, DrugMetabolismAssistantResponse,
-    DrugResearchesAssistantResponse,
+    DrugResearchesAssistantResponse, DrugSectionSchema, DrugQueryAliasSchema,
 )
 from drug_search.core.schemas.quiz_schemas import QuizDrugSchema
 from drug_search.core.utils.drug_category import category_filter_sql
-from drug_search.core.lexicon import DRUG_CATEGORY
+from drug_search.core.lexicon import DRUG_CATEGORY, EXIST_STATUS, DRUG_SECTION_STATUS, DrugMenu
 from drug_search.infrastructure.database.engine import get_async_session
 from drug_search.infrastructure.database.models.drug import (Drug, DrugSynonym, DrugCombination, DrugPathway,
-                                                             DrugAnalog, DrugDosage, DrugResearch)
+                                                             DrugAnalog, DrugDosage, DrugResearch, DrugDocument,
+                                                             DrugQueryAlias, DRUG_SECTION_RELATIONSHIPS,
+                                                             DRUG_SECTION_STATUS_COLUMNS)
+from drug_search.infrastructure.database.models.base import IDMixin
 from drug_search.infrastructure.database.repository.base_repo import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+TRIGRAM_SIMILARITY_THRESHOLD: float = 0.62
+
+M = TypeVar("M", bound=IDMixin)
+
+
+# колонки, не входящие в содержимое строки связанной таблицы
+_ROW_KEY_EXCLUDED: frozenset[str] = frozenset({"id", "drug_id", "created_at", "updated_at"})
+
+
+def _row_key(item: IDMixin) -> tuple[str, ...]:
+    return tuple(
+        str(getattr(item, column.key))
+        for column in item.__table__.columns
+        if column.key not in _ROW_KEY_EXCLUDED
+    )
+
+
+def _sync_collection(current: list[M], new: list[M]) -> list[M]:
+    """
+    Новое содержимое связанной таблицы с сохранением совпадающих строк:
+    строки с теми же значениями остаются как есть (без DELETE + INSERT),
+    лишние удаляются (delete-orphan), новые вставляются.
+    """
+    existing: dict[tuple[str, ...], list[M]] = defaultdict(list)
+    for item in current:
+        existing[_row_key(item)].append(item)
+
+    return [matches.pop() if (matches := existing.get(_row_key(item))) else item for item in new]
+
 
 class DrugRepository(BaseRepository):
     def __init__(self, session: AsyncSession):
         super().__init__(model=Drug, session=session)
         self.DrugCreation = self.DrugCreation(session)
 
+    async def find_drug_hit_without_trigrams(
+            self,
+            drug_name_query: str
+    ) -> DrugHit | None:
+        """
+        Точный поиск по названию ДВ (без связанных таблиц).
+
+        :param drug_name_query: Название действующего вещества.
+        """
+        stmt = (
+            select(
+                Drug.id,
+                Drug.name,
+                Drug.name_ru,
+                Drug.danger_classification,
+                Drug.updated_at,
+            )
+            .where(
+                func.lower(Drug.name) == func.lower(drug_name_query)
+            )
+        )
+
+        result = await self.session.execute(stmt)
+        row = result.one_or_none()
+
+        if not row:
+            return None
+
+        return DrugHit(
+            id=row.id,
+            name=row.name,
+            name_ru=row.name_ru,
+            danger_classification=row.danger_classification,
+            updated_at=row.updated_at,
+            synonym=None,
+            score=1.0
+        )
+
     async def find_drug_without_trigrams(
             self,
             drug_name_query: str
     ) -> DrugSchema | None:
+        drug_hit: DrugHit | None = await self.find_drug_hit_without_trigrams(drug_name_query)
+        if not drug_hit:
+            return None
+
+        return await self.get_with_all_relationships(drug_hit.id)
+
+    async def find_drug_hit_by_query(
+            self,
+            user_query: str
+    ) -> Optional[DrugHit]:
+        """
+        Поиск препарата по триграммному сходству с синонимами (один запрос, без связанных таблиц).
+        Возвращает DrugHit с максимальной схожестью или None.
+
+        Использует оператор % (порог — pg_trgm.similarity_threshold на транзакцию)
+        и KNN-сортировку <-> по GiST индексу trgm_drug_synonyms_lower.
+
+        :param user_query: Запрос пользователя.
+        """
+        await self._set_similarity_threshold()
+
+        normalized_query: str = user_query.lower().strip()
+        normalized_synonym = func.lower(DrugSynonym.synonym)
+
         stmt = (
-            select(Drug)
+            select(
+                Drug.id,
+                Drug.name,
+                Drug.name_ru,
+                Drug.danger_classification,
+                Drug.updated_at,
+                DrugSynonym.synonym,
+                func.similarity(normalized_synonym, normalized_query).label("score"),
+            )
+            .join(DrugSynonym, DrugSynonym.drug_id == Drug.id)
             .where(
-                func.lower(Drug.name) == func.lower(drug_name_query)
+                normalized_synonym.op("%")(normalized_query)
             )
-            .options(
-                selectinload(Drug.analogs),
-                selectinload(Drug.dosages),
-                selectinload(Drug.pathways),
-                selectinload(Drug.synonyms),
-                selectinload(Drug.combinations),
-                selectinload(Drug.prices),
-                selectinload(Drug.researches)
+            .order_by(
+                normalized_synonym.op("<->", return_type=Float)(normalized_query)
             )
+            .limit(1)
         )
 
         result = await self.session.execute(stmt)
-        drug: Drug = result.scalar_one_or_none()
+        row = result.one_or_none()
 
-        if not drug:
+        if not row:
             return None
 
-        return drug.get_schema()
+        return DrugHit(
+            id=row.id,
+            name=row.name,
+            name_ru=row.name_ru,
+            danger_classification=row.danger_classification,
+            updated_at=row.updated_at,
+            synonym=row.synonym,
+            score=row.score
+        )
 
     async def find_drug_by_query(
             self,
             user_query: str
     ) -> Optional[DrugSchema]:
         """
-        Поиск препарата по триграммному сходству с синонимами (один запрос).
-        Возвращает DrugSchema с максимальной схожестью или None.
+        Поиск препарата по синонимам с гидрацией полной схемы.
+
+        :param user_query: Запрос пользователя.
+        """
+        drug_hit: DrugHit | None = await self.find_drug_hit_by_query(user_query)
+        if not drug_hit:
+            return None
+
+        return await self.get_with_all_relationships(drug_hit.id)
+
+    async def _set_similarity_threshold(self) -> None:
+        """Порог сходства для оператора % в рамках текущей транзакции (SET LOCAL)."""
+        await self.session.execute(
+            select(func.set_config(
+                "pg_trgm.similarity_threshold",
+                str(TRIGRAM_SIMILARITY_THRESHOLD),
+                True
+            ))
+        )
+
+    # [ QUERY ALIASES ]
+    async def find_query_alias(self, user_query: str) -> Optional[DrugQueryAliasSchema]:
+        """
+        Проверенный нейронкой запрос, ближайший к user_query.
+
+        Положительные вердикты ищутся по триграммам (как синонимы, индекс trgm_drug_query_aliases),
+        отрицательные — только точным совпадением и до expires_at: опечатка в существующем
+        препарате не должна получить чужой NOT_EXIST.
 
         :param user_query: Запрос пользователя.
         """
+        await self._set_similarity_threshold()
+
+        normalized_query: str = user_query.lower().strip()
+
         stmt = (
-            select(Drug)
-            .join(Drug.synonyms)
+            select(DrugQueryAlias)
             .where(
-                func.similarity(
-                    func.lower(DrugSynonym.synonym),
-                    func.lower(user_query)
-                ) > 0.62
+                or_(DrugQueryAlias.expires_at.is_(None), DrugQueryAlias.expires_at > func.now()),
+                or_(
+                    DrugQueryAlias.query == normalized_query,
+                    and_(
+                        DrugQueryAlias.status == EXIST_STATUS.EXIST.value,
+                        DrugQueryAlias.query.op("%")(normalized_query)
+                    )
+                )
             )
             .order_by(
-                func.similarity(
-                    func.lower(DrugSynonym.synonym),
-                    func.lower(user_query)
-                ).desc()
+                DrugQueryAlias.query.op("<->", return_type=Float)(normalized_query)
             )
             .limit(1)
-            .options(
-                selectinload(Drug.analogs),
-                selectinload(Drug.dosages),
-                selectinload(Drug.pathways),
-                selectinload(Drug.synonyms),
-                selectinload(Drug.combinations),
-                selectinload(Drug.prices),
-                selectinload(Drug.researches)
-            )
         )
 
-        result = await self.session.execute(stmt)
-        drug: Drug = result.scalar_one_or_none()
-
-        if not drug:
-            return None
+        alias: DrugQueryAlias | None = (await self.session.execute(stmt)).scalar_one_or_none()
+        return alias.get_schema() if alias else None
+
+    async def save_query_alias(self, alias: DrugQueryAliasSchema) -> None:
+        """Запись / перезапись вердикта по нормализованному запросу"""
+        values: dict = {
+            "query": alias.query,
+            "status": alias.status.value,
+            "drug_id": alias.drug_id,
+            "drug_name": alias.drug_name,
+            "drug_name_ru": alias.drug_name_ru,
+            "danger_classification": alias.danger_classification,
+            "expires_at": alias.expires_at,
+        }
+        stmt = insert(DrugQueryAlias).values(**values).on_conflict_do_update(
+            index_elements=[DrugQueryAlias.query],
+            set_={
+                **{key: value for key, value in values.items() if key != "query"},
+                "updated_at": func.now(),
+            }
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
 
-        return drug.get_schema()
+    async def delete_expired_query_aliases(self) -> int:
+        """Удаляет просроченные отрицательные вердикты"""
+        result = await self.session.execute(
+            delete(DrugQueryAlias).where(DrugQueryAlias.expires_at <= func.now())
+        )
+        await self.session.commit()
+        return result.rowcount
 
     async def get_with_all_relationships(
             self,
@@ -143,42 +296,144 @@ class DrugRepository(BaseRepository):
 
         return drug.get_schema()
 
+    async def get_section(self, drug_id: uuid.UUID, section: DrugMenu) -> DrugSectionSchema | None:
+        """
+        Возвращает раздел препарата: строку drugs и только связанную таблицу раздела.
+        Остальные relationships (lazy="selectin" по умолчанию) не загружаются.
+
+        :param drug_id: ID препарата в БД.
+        :param section: раздел меню препарата.
+        """
+        stmt = (
+            select(Drug)
+            .where(Drug.id == drug_id)
+            .options(
+                raiseload("*"),
+                *(selectinload(getattr(Drug, name)) for name in DRUG_SECTION_RELATIONSHIPS[section])
+            )
+        )
+
+        result = await self.session.execute(stmt)
+        drug: Drug | None = result.scalars().one_or_none()
+
+        if not drug:
+            return None
+
+        return drug.get_section_schema(section)
+
+    async def get_document(self, drug_id: uuid.UUID) -> tuple[bytes, str] | None:
+        """
+        Возвращает предсобранный JSON препарата и его etag без гидрации ORM.
+
+        :param drug_id: ID препарата в БД.
+        """
+        stmt = (
+            select(DrugDocument.document, DrugDocument.etag)
+            .where(DrugDocument.drug_id == drug_id)
+        )
+        result = await self.session.execute(stmt)
+        row = result.one_or_none()
+
+        if not row:
+            return None
+
+        return row.document, row.etag
+
+    async def get_drug_ids(self) -> list[uuid.UUID]:
+        """Все ID препаратов (для пересборки документов)"""
+        result = await self.session.execute(select(Drug.id))
+        return list(result.scalars().all())
+
     class DrugCreation:
         def __init__(self, session: AsyncSession):
             self.session = session
 
-        async def update_or_create_drug(
+        @staticmethod
+        def build_document(drug_schema: DrugSchema) -> tuple[bytes, str]:
+            """Сериализует схему препарата и считает etag"""
+            document: bytes = drug_schema.model_dump_json().encode()
+            etag: str = hashlib.sha256(document).hexdigest()[:32]
+            return document, etag
+
+        async def save_document(self, drug_schema: DrugSchema) -> str:
+            """
+            Записывает предсобранный документ препарата (без commit — в транзакции вызывающего).
+            :returns: etag документа
+            """
+            document, etag = self.build_document(drug_schema)
+
+            stmt = insert(DrugDocument).values(
+                drug_id=drug_schema.id,
+                document=document,
+                etag=etag,
+            ).on_conflict_do_update(
+                index_elements=[DrugDocument.drug_id],
+                set_={
+                    "document": document,
+                    "etag": etag,
+                    "version": DrugDocument.version + 1,
+                    "updated_at": func.now(),
+                }
+            )
+            await self.session.execute(stmt)
+            return etag
+
+        async def rebuild_document(self, drug_id: uuid.UUID) -> str | None:
+            """
+            Пересобирает документ препарата из таблиц (без commit).
+            :returns: etag документа | None, если препарата нет
+            """
+            stmt = (
+                select(Drug).where(Drug.id == drug_id)
+                .execution_options(populate_existing=True)
+            )
+            result = await self.session.execute(stmt)
+            drug: Drug | None = result.scalar_one_or_none()
+            if not drug:
+                return None
+
+            return await self.save_document(drug.get_schema())
+
+        # [ раздел -> запись ответа нейронки ] для разделов из DRUG_SECTION_STATUS_COLUMNS
+        SECTION_UPDATERS: dict[DrugMenu, str] = {
+            DrugMenu.DOSAGES: "update_dosages",
+            DrugMenu.ANALOGS: "update_analogs",
+            DrugMenu.METABOLISM: "update_metabolism",
+            DrugMenu.MECHANISM: "update_pathways",
+            DrugMenu.COMBINATIONS: "update_combinations",
+        }
+
+        async def save_briefly_info(
                 self,
                 briefly_info: DrugBrieflyAssistantResponse,
-                dosages: DrugDosagesAssistantResponse,
-                analogs: DrugAnalogsAssistantResponse,
-                metabolism: DrugMetabolismAssistantResponse,
-                pathways: DrugPathwaysAssistantResponse,
-                combinations: DrugCombinationsAssistantResponse,
-                drug_id: uuid.UUID | None = None
+                drug_id: uuid.UUID | None = None,
+                mark_sections_pending: bool = True
         ) -> DrugSchema:
             """
-            Создает или обновляет препарат в базе данных на основе данных от ассистента.
-            Выполняет обновления параллельно для повышения производительности.
+            Первый этап создания / обновления: строка drugs с краткой информацией и синонимами.
+            Остальные разделы помечаются pending и записываются по мере готовности (save_section).
+
+            :param mark_sections_pending: False — обновление только краткой информации, разделы остаются как есть
             """
             try:
+                drug: Drug | None = None
                 if drug_id is not None:
-                    # Обновляем существующий препарат по ID
                     logger.info(f"UPDATING Drug {briefly_info.drug_name} by ID {drug_id}")
-                    drug = await self.session.get(Drug, drug_id)
+                    drug = await self.session.get(Drug, drug_id, populate_existing=True)
                     if not drug:
                         logger.warning(f"Препарат {drug_id} не найден для обновления, создаем новый")
-                        drug = None
-                    else:
-                        # Очищаем связанные данные для обновления
-                        await self._clean_drug_relationships(drug)
                 else:
-                    # Создаем новый препарат
-                    logger.info(f"CREATING Drug {briefly_info.drug_name}")
-                    drug = None
+                    # повтор создания (прошлая попытка уже записала препарат): Drug.name уникален
+                    drug = (await self.session.execute(
+                        select(Drug).where(Drug.name == briefly_info.drug_name)
+                        .execution_options(populate_existing=True)
+                    )).scalar_one_or_none()
+                    if drug is not None:
+                        logger.info(f"Drug {briefly_info.drug_name} already exists, UPDATING by ID {drug.id}")
+                    else:
+                        logger.info(f"CREATING Drug {briefly_info.drug_name}")
 
                 if drug is None:
-                    # Создаем новый препарат
                     drug = Drug(
                         id=uuid.uuid4(),
                         name=briefly_info.drug_name,
@@ -186,43 +441,85 @@ class DrugRepository(BaseRepository):
                     )
                     self.session.add(drug)
 
-                drug.updated_at = datetime.now()
-
-                # Выполняем обновления параллельно
-                results = await asyncio.gather(
-                    self.update_briefly_info(drug, briefly_info),
-                    self.update_dosages(drug, dosages),
-                    self.update_analogs(drug, analogs),
-                    self.update_metabolism(drug, metabolism),
-                    self.update_pathways(drug, pathways),
-                    self.update_combinations(drug, combinations),
-                    return_exceptions=True
-                )
+                await self.update_briefly_info(drug, briefly_info)
+                if mark_sections_pending:
+                    for column in DRUG_SECTION_STATUS_COLUMNS.values():
+                        setattr(drug, column, DRUG_SECTION_STATUS.PENDING.value)
 
-                # [ check exceptions ]
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error in parallel update {i}: {result}")
-                        raise result
+                return await self._commit_drug(drug, sections=(DrugMenu.BRIEFLY,))
 
-                await self.session.commit()
-                await self.session.refresh(drug)
+            except Exception:
+                await self.session.rollback()
+                raise
 
-                logger.info(f"Successfully {'updated' if drug_id else 'created'} drug: {drug.name}")
-                return drug.get_schema()
+        async def save_section(
+                self,
+                drug_id: uuid.UUID,
+                section: DrugMenu,
+                assistant_response: Union[
+                    DrugDosagesAssistantResponse, DrugAnalogsAssistantResponse, DrugMetabolismAssistantResponse,
+                    DrugPathwaysAssistantResponse, DrugCombinationsAssistantResponse
+                ]
+        ) -> DrugSchema | None:
+            """
+            Записывает один раздел от нейронки и помечает его ready (отдельная транзакция).
+            Совпадающие строки связанной таблицы не перезаписываются; версия раздела растет только при изменениях.
+            """
+            try:
+                drug: Drug | None = await self.session.get(Drug, drug_id, populate_existing=True)
+                if not drug:
+                    logger.error(f"Drug {drug_id} not found for updating section {section.value}")
+                    return None
+
+                await getattr(self, self.SECTION_UPDATERS[section])(drug, assistant_response)
+                setattr(drug, DRUG_SECTION_STATUS_COLUMNS[section], DRUG_SECTION_STATUS.READY.value)
+
+                return await self._commit_drug(drug, sections=(section,))
 
             except Exception:
                 await self.session.rollback()
                 raise
 
-        async def _clean_drug_relationships(self, drug: Drug) -> None:
-            """Очищает все связанные данные препарата"""
-            await self.session.execute(delete(DrugSynonym).where(DrugSynonym.drug_id == drug.id))
-            await self.session.execute(delete(DrugDosage).where(DrugDosage.drug_id == drug.id))
-            await self.session.execute(delete(DrugAnalog).where(DrugAnalog.drug_id == drug.id))
-            await self.session.execute(delete(DrugPathway).where(DrugPathway.drug_id == drug.id))
-            await self.session.execute(delete(DrugCombination).where(DrugCombination.drug_id == drug.id))
-            await self.session.execute(delete(DrugResearch).where(DrugResearch.drug_id == drug.id))
+        async def set_section_status(
+                self,
+                drug_id: uuid.UUID,
+                section: DrugMenu,
+                status: DRUG_SECTION_STATUS
+        ) -> DrugSchema | None:
+            drug: Drug | None = await self.session.get(Drug, drug_id, populate_existing=True)
+            if not drug:
+                return None
+
+            setattr(drug, DRUG_SECTION_STATUS_COLUMNS[section], status.value)
+            return await self._commit_drug(drug)
+
+        async def _commit_drug(self, drug: Drug, sections: tuple[DrugMenu, ...] = ()) -> DrugSchema:
+            """
+            Commit строки drugs вместе с документом для /v1/drugs/{id}.
+            Если ответ совпал с записанным — ни строк, ни документа не трогаем; иначе растут версии sections.
+            """
+            if drug not in self.session.new and not self.session.is_modified(drug):
+                await self.session.commit()
+                return drug.get_schema()
+
+            now: datetime = datetime.now()
+            section_versions: dict = dict(drug.section_versions or {})
+            for section in sections:
+                section_versions[section.value] = {
+                    "version": section_versions.get(section.value, {}).get("version", 0) + 1,
+                    "updated_at": now.isoformat(),
+                }
+            drug.section_versions = section_versions
+            drug.updated_at = now
+
+            await self.session.flush()
+            await self.session.refresh(drug)
+            drug_schema: DrugSchema = drug.get_schema()
+
+            await self.save_document(drug_schema)
+            await self.session.commit()
+
+            return drug_schema
 
         @staticmethod
         async def update_briefly_info(
@@ -238,15 +535,16 @@ class DrugRepository(BaseRepository):
                 drug.danger_classification = assistant_response.danger_classification
                 drug.fun_facts = assistant_response.fun_facts
 
-                drug.synonyms = [
-                    DrugSynonym(
-                        drug_id=drug.id,
-                        synonym=synonym
-                    )
-                    for synonym in assistant_response.synonyms
-                ]
-
-                drug.updated_at = datetime.now()
+                drug.synonyms = _sync_collection(
+                    drug.synonyms,
+                    [
+                        DrugSynonym(
+                            drug_id=drug.id,
+                            synonym=synonym
+                        )
+                        for synonym in assistant_response.synonyms
+                    ]
+                )
 
             except Exception as ex:
                 logger.exception(f"Failed to update drug for {assistant_response.name}: {str(ex)}")
@@ -259,17 +557,20 @@ class DrugRepository(BaseRepository):
             try:
                 for line in assistant_response.dosages:
                     print(line.json())
-                drug.dosages = [
-                    DrugDosage(
-                        route=dosage_response.route,
-                        method=dosage_response.method,
-                        per_time=dosage_response.per_time,
-                        max_day=dosage_response.max_day,
-                        per_time_weight_based=dosage_response.per_time_weight_based,
-                        max_day_weight_based=dosage_response.max_day_weight_based,
-                        notes=dosage_response.notes,
-                    ) for dosage_response in assistant_response.dosages
-                ]
+                drug.dosages = _sync_collection(
+                    drug.dosages,
+                    [
+                        DrugDosage(
+                            route=dosage_response.route,
+                            method=dosage_response.method,
+                            per_time=dosage_response.per_time,
+                            max_day=dosage_response.max_day,
+                            per_time_weight_based=dosage_response.per_time_weight_based,
+                            max_day_weight_based=dosage_response.max_day_weight_based,
+                            notes=dosage_response.notes,
+                        ) for dosage_response in assistant_response.dosages
+                    ]
+                )
                 drug.dosage_sources = assistant_response.dosage_sources
 
             except Exception as ex:
@@ -281,14 +582,17 @@ class DrugRepository(BaseRepository):
                 drug: Drug, assistant_response: DrugAnalogsAssistantResponse
         ) -> None:
             try:
-                drug.analogs = [
-                    DrugAnalog(
-                        analog_name=analog_response.analog_name,
-                        percent=analog_response.percent,
-                        difference=analog_response.difference,
-                    )
-                    for analog_response in assistant_response.analogs
-                ]
+                drug.analogs = _sync_collection(
+                    drug.analogs,
+                    [
+                        DrugAnalog(
+                            analog_name=analog_response.analog_name,
+                            percent=analog_response.percent,
+                            difference=analog_response.difference,
+                        )
+                        for analog_response in assistant_response.analogs
+                    ]
+                )
 
                 drug.analogs_description = assistant_response.analogs_description
 
@@ -315,24 +619,27 @@ class DrugRepository(BaseRepository):
                 drug: Drug, assistant_response: DrugPathwaysAssistantResponse
         ) -> None:
             try:
-                drug.pathways = [
-                    DrugPathway(
-                        receptor=pathway_response.receptor,
-                        binding_affinity=pathway_response.binding_affinity,
-                        affinity_description=pathway_response.affinity_description,
-                        activation_type=pathway_response.activation_type,
-                        pathway=pathway_response.pathway,
-                        effect=pathway_response.effect,
-                        note=pathway_response.note,
-                    )
-                    for pathway_response in assistant_response.pathways
-                ]
+                drug.pathways = _sync_collection(
+                    drug.pathways,
+                    [
+                        DrugPathway(
+                            receptor=pathway_response.receptor,
+                            binding_affinity=pathway_response.binding_affinity,
+                            affinity_description=pathway_response.affinity_description,
+                            activation_type=pathway_response.activation_type,
+                            pathway=pathway_response.pathway,
+                            effect=pathway_response.effect,
+                            note=pathway_response.note,
+                        )
+                        for pathway_response in assistant_response.pathways
+                    ]
+                )
 
                 drug.primary_action = assistant_response.mechanism_summary.primary_action
                 drug.secondary_actions = assistant_response.mechanism_summary.secondary_actions
                 drug.clinical_effects = assistant_response.mechanism_summary.clinical_effects
 
-                drug.pathway_sources = assistant_response.pathway_sources
+                drug.pathways_sources = assistant_response.pathway_sources
 
             except Exception as ex:
                 logger.exception(f"Failed to update drug for {drug.name}: {str(ex)}")
@@ -343,81 +650,114 @@ class DrugRepository(BaseRepository):
                 drug: Drug, assistant_response: DrugCombinationsAssistantResponse
         ) -> None:
             try:
-                drug.combinations = [
-                    DrugCombination(
-                        combination_type=combination_response.combination_type,
-                        substance=combination_response.substance,
-                        effect=combination_response.effect,
-                        risks=combination_response.risks,
-                        products=combination_response.products,
-                    )
-                    for combination_response in assistant_response.combinations
-                ]
+                drug.combinations = _sync_collection(
+                    drug.combinations,
+                    [
+                        DrugCombination(
+                            combination_type=combination_response.combination_type,
+                            substance=combination_response.substance,
+                            effect=combination_response.effect,
+                            risks=combination_response.risks,
+                            products=combination_response.products,
+                        )
+                        for combination_response in assistant_response.combinations
+                    ]
+                )
 
             except Exception as ex:
                 logger.exception(f"Failed to update drug for {drug.name}: {str(ex)}")
                 raise
 
-        async def update_researches(
+        async def get_researches_watermark(self, drug_id: uuid.UUID) -> Optional[datetime]:
+            """:return: время последнего поиска исследований препарата"""
+            return await self.session.scalar(select(Drug.researches_searched_at).where(Drug.id == drug_id))
+
+        async def get_known_research_dois(self, dois: Collection[str]) -> set[str]:
+            """
+            DOI из dois, уже сохраненные в drug_researchs — у любого препарата:
+            idx_drug_researches_doi уникален по всей таблице, upsert такие статьи все равно не запишет.
+            """
+            if not dois:
+                return set()
+            return set(await self.session.scalars(select(DrugResearch.doi).where(DrugResearch.doi.in_(dois))))
+
+        async def upsert_researches(
                 self,
                 drug_id: uuid.UUID,
-                researches: DrugResearchesAssistantResponse
+                researches: DrugResearchesAssistantResponse,
+                searched_at: Optional[datetime],
+                max_researches: int | None = None
         ) -> None:
-            """Отдельное обновление таблицы исследований"""
+            """
+            Добавление новых исследований без удаления старых: upsert по idx_drug_researches_doi.
+
+            DOI уникален по всей таблице — исследование другого препарата не перезаписывается.
+            :param searched_at: новый watermark поиска (пишется и без новых исследований; None — полный поиск заново)
+            :param max_researches: оставить столько исследований препарата с наибольшим interest
+            """
             try:
                 drug = await self.session.get(Drug, drug_id)
                 if not drug:
                     logger.error(f"Drug {drug_id} not found for updating researches")
                     return
 
-                drug.researches = [
-                    DrugResearch(
-                        header=research.header,
-                        header_name=research.header_name,
-                        description=research.description,
-                        publication_date=research.publication_date if research.publication_date else None,
-                        url=research.url,
-                        summary=research.summary,
-                        journal=research.journal,
-                        doi=research.doi,
-                        authors=research.authors,
-                        study_type=research.study_type,
-                        interest=research.interest,
-                        research_type=research.research_type
-                    ) for research in researches.researches
-                ]
-                await self.session.commit()
+                changed_rows: int = 0
+                if researches.researches:
+                    stmt = insert(DrugResearch).values([
+                        dict(
+                            drug_id=drug_id,
+                            header=research.header,
+                            header_name=research.header_name,
+                            description=research.description,
+                            publication_date=research.publication_date if research.publication_date else None,
+                            url=research.url,
+                            summary=research.summary,
+                            journal=research.journal,
+                            doi=research.doi,
+                            authors=research.authors,
+                            study_type=research.study_type,
+                            interest=research.interest,
+                            research_type=research.research_type
+                        ) for research in {research.doi: research for research in researches.researches}.values()
+                    ])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[DrugResearch.doi],
+                        set_={
+                            column.key: stmt.excluded[column.key]
+                            for column in DrugResearch.__table__.columns if column.key not in ("id", "drug_id", "doi")
+                        },
+                        where=DrugResearch.drug_id == stmt.excluded.drug_id
+                    )
+                    changed_rows += (await self.session.execute(stmt)).rowcount
+
+                if max_researches:
+                    kept_ids = (
+                        select(DrugResearch.id)
+                        .where(DrugResearch.drug_id == drug_id)
+                        .order_by(DrugResearch.interest.desc(), DrugResearch.publication_date.desc())
+                        .limit(max_researches)
+                    )
+                    changed_rows += (await self.session.execute(
+                        delete(DrugResearch).where(DrugResearch.drug_id == drug_id, DrugResearch.id.not_in(kept_ids))
+                    )).rowcount
+
+                drug.researches_searched_at = searched_at
+                await self._commit_drug(drug, sections=(DrugMenu.RESEARCHES,) if changed_rows else ())
             except Exception as ex:
                 logger.exception(f"Failed to update drug: {str(ex)}")
                 raise
 
-        async def _delete_researches(self, drug_id: uuid.UUID):
-            await self.session.execute(
-                delete(DrugResearch).where(DrugResearch.drug_id == drug_id)
-            )
-            await self.session.commit()
-            logger.info(f"Исследования для {drug_id} удалены.")
-
 
     async def get_random_drug(self) -> DrugSchema | None:
         stmt = (
-            select(Drug)
+            select(Drug.id)
             .where(Drug.description.isnot(None))
             .order_by(func.random())
             .limit(1)
-            .options(
-                selectinload(Drug.analogs),
-                selectinload(Drug.dosages),
-                selectinload(Drug.pathways),
-                selectinload(Drug.synonyms),
-                selectinload(Drug.combinations),
-                selectinload(Drug.prices),
-                selectinload(Drug.researches),
-            )
         )
         result = await self.session.execute(stmt)
-        drug: Drug | None = result.scalar_one_or_none()
-        return drug.get_schema() if drug else None
+        drug_id: uuid.UUID | None = result.scalar_one_or_none()
+        return await self.get_with_all_relationships(drug_id) if drug_id else None
 
     async def get_drug_ids_by_category(self, category: DRUG_CATEGORY | None) -> list[uuid.UUID]:
         where_clause = category_filter_sql(category)
@@ -431,26 +771,29 @@ class DrugRepository(BaseRepository):
 
     async def get_drugs_for_quiz(
             self,
-            allowed_drug_ids: list[uuid.UUID],
+            user_id: uuid.UUID,
             limit: int = 20,
     ) -> list[QuizDrugSchema]:
-        if allowed_drug_ids:
-            ids_sql = ", ".join(f"'{drug_id}'" for drug_id in allowed_drug_ids)
-            stmt = text(f"""
-                SELECT d.id, d.name, d.name_ru, d.description, d.classification,
-                       d.primary_action, d.fact
-                FROM drugs d
-                WHERE d.id IN ({ids_sql})
-                  AND (
-                    d.description IS NOT NULL
-                    OR d.classification IS NOT NULL
-                    OR d.primary_action IS NOT NULL
-                    OR d.fact IS NOT NULL
-                  )
-                ORDER BY RANDOM()
-                LIMIT {limit}
-            """)
-        else:
+        """Препараты юзера для викторины (подзапрос по allowed_drugs), если их нет — безопасные из базы"""
+        stmt = text(f"""
+            SELECT d.id, d.name, d.name_ru, d.description, d.classification,
+                   d.primary_action, d.fact
+            FROM drugs d
+            WHERE d.id IN (
+                SELECT ad.drug_id FROM allowed_drugs ad WHERE ad.user_id = :user_id
+            )
+              AND (
+                d.description IS NOT NULL
+                OR d.classification IS NOT NULL
+                OR d.primary_action IS NOT NULL
+                OR d.fact IS NOT NULL
+              )
+            ORDER BY RANDOM()
+            LIMIT {limit}
+        """).bindparams(user_id=user_id)
+        rows = (await self.session.execute(stmt)).fetchall()
+
+        if not rows:
             stmt = text(f"""
                 SELECT d.id, d.name, d.name_ru, d.description, d.classification,
                        d.primary_action, d.fact
@@ -465,10 +808,10 @@ class DrugRepository(BaseRepository):
                 ORDER BY RANDOM()
                 LIMIT {limit}
             """)
+            rows = (await self.session.execute(stmt)).fetchall()
 
-        result = await self.session.execute(stmt)
         drugs: list[QuizDrugSchema] = []
-        for row in result.fetchall():
+        for row in rows:
             drugs.append(
                 QuizDrugSchema(
                     drug_id=row.id,
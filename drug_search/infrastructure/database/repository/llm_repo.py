@@ -0,0 +1,119 @@
+import datetime
+import logging
+import uuid
+from typing import Optional, AsyncGenerator, Sequence
+
+from fastapi import Depends
+from sqlalchemy import select, func, delete, or_, and_, not_, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from drug_search.core.schemas import LLMResponseCacheSchema, LLMUsageSchema
+from drug_search.core.services.json_repair import OUTCOME_FAILED
+from drug_search.core.services.llm_usage import LLM_OUTCOME_ERROR
+from drug_search.infrastructure.database.engine import get_async_session
+from drug_search.infrastructure.database.models.llm import LLMResponseCacheEntry, LLMUsage
+from drug_search.infrastructure.database.repository.base_repo import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRepository(BaseRepository):
+    def __init__(self, session: AsyncSession):
+        super().__init__(model=LLMResponseCacheEntry, session=session)
+
+    # [ RESPONSE CACHE ]
+    async def get_cached_response(self, cache_key: str) -> Optional[LLMResponseCacheSchema]:
+        """Непросроченный ответ нейронки по ключу"""
+        stmt = select(LLMResponseCacheEntry).where(
+            LLMResponseCacheEntry.cache_key == cache_key,
+            or_(LLMResponseCacheEntry.expires_at.is_(None), LLMResponseCacheEntry.expires_at > func.now())
+        )
+        entry: LLMResponseCacheEntry | None = (await self.session.execute(stmt)).scalar_one_or_none()
+        return entry.get_schema() if entry else None
+
+    async def save_cached_response(self, entry: LLMResponseCacheSchema) -> None:
+        """Запись / перезапись ответа нейронки"""
+        values: dict = entry.model_dump()
+        stmt = insert(LLMResponseCacheEntry).values(**values).on_conflict_do_update(
+            index_elements=[LLMResponseCacheEntry.cache_key],
+            set_={
+                "response": entry.response,
+                "prompt_hash": entry.prompt_hash,
+                "expires_at": entry.expires_at,
+                "updated_at": func.now(),
+            }
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def delete_stale_cached_responses(self, prompt_hashes: dict[str, str]) -> int:
+        """
+        Удаляет просроченные ответы и ответы на старые версии промптов.
+
+        :param prompt_hashes: актуальные {название промпта: sha256 текста}; промпты не из списка удаляются целиком
+        """
+        stmt = delete(LLMResponseCacheEntry).where(
+            or_(
+                LLMResponseCacheEntry.expires_at <= func.now(),
+                not_(or_(*(
+                    and_(
+                        LLMResponseCacheEntry.prompt_name == prompt_name,
+                        LLMResponseCacheEntry.prompt_hash == prompt_hash
+                    )
+                    for prompt_name, prompt_hash in prompt_hashes.items()
+                ), False))
+            )
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
+
+    # [ USAGE ]
+    async def copy_llm_usage(self, records: Sequence[LLMUsageSchema]) -> None:
+        """Пачка записей учета одним COPY (LLMUsageSink)"""
+        columns: list[str] = list(LLMUsageSchema.model_fields)
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            LLMUsage.__tablename__,
+            records=[(uuid.uuid4(), *(getattr(record, column) for column in columns)) for record in records],
+            columns=["id", *columns]
+        )
+        await self.session.commit()
+
+    async def get_usage_by_feature_and_day(self, since: datetime.datetime) -> Sequence:
+        """
+        Агрегаты учета по (день UTC, функция): calls, errors, суммы токенов,
+        avg / p95 latency_ms — с since, свежие дни первыми
+        """
+        day = func.date(func.timezone(literal_column("'UTC'"), LLMUsage.created_at)).label("day")
+        stmt = (
+            select(
+                day,
+                LLMUsage.feature,
+                func.count().label("calls"),
+                func.count().filter(LLMUsage.outcome.in_((LLM_OUTCOME_ERROR, OUTCOME_FAILED))).label("errors"),
+                func.coalesce(func.sum(LLMUsage.prompt_tokens), 0).label("prompt_tokens"),
+                func.coalesce(func.sum(LLMUsage.cached_tokens), 0).label("cached_tokens"),
+                func.coalesce(func.sum(LLMUsage.completion_tokens), 0).label("completion_tokens"),
+                func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+                func.percentile_cont(0.95).within_group(LLMUsage.latency_ms).label("p95_latency_ms"),
+            )
+            .where(LLMUsage.created_at >= since)
+            .group_by(day, LLMUsage.feature)
+            .order_by(day.desc(), LLMUsage.feature)
+        )
+        return (await self.session.execute(stmt)).all()
+
+    async def delete_old_usage(self, before: datetime.datetime) -> int:
+        result = await self.session.execute(delete(LLMUsage).where(LLMUsage.created_at < before))
+        await self.session.commit()
+        return result.rowcount
+
+
+async def get_llm_repo(
+        session_generator: AsyncGenerator[AsyncSession, None] = Depends(get_async_session)
+) -> LLMRepository:
+    async with session_generator as session:
+        return LLMRepository(session=session)
@@ -6,6 +6,9 @@ from fastapi import Depends
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from drug_search.core.dependencies.allowed_drugs_index_dep import allowed_drugs_index
+from drug_search.core.dependencies.token_ledger_dep import token_ledger
+from drug_search.core.dependencies.user_context_cache_dep import user_context_cache
 from drug_search.core.lexicon import SUBSCRIPTION_TYPES, DRUG_CATEGORY
 from drug_search.core.schemas import PaymentSchema
 from drug_search.infrastructure.database.engine import get_async_session
@@ -57,6 +60,7 @@ class PaymentRepository(BaseRepository):
         user_id = row[0]  # user_id
 
         await self.session.commit()
+        await user_context_cache.bump(user_id)
 
         # [ logs ]
         return await self.create_payment_log(
@@ -101,6 +105,8 @@ class PaymentRepository(BaseRepository):
             return None
 
         user_id = row[0]
+        await user_context_cache.bump(user_id)
+        await token_ledger.drop(user_id)
 
         # [ logs ]
         return await self.create_payment_log(
@@ -179,6 +185,8 @@ class PaymentRepository(BaseRepository):
             )
 
         await self.session.commit()
+        await user_context_cache.bump(user_id)
+        await allowed_drugs_index.add(user_id, *drug_ids)
 
         return await self.create_payment_log(
             package_key=package_key,
@@ -0,0 +1,68 @@
+import datetime
+import logging
+from typing import AsyncGenerator, Sequence
+
+from fastapi import Depends
+from sqlalchemy import update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.infrastructure.database.engine import get_async_session
+from drug_search.infrastructure.database.models.pubmed import PubmedArticle
+from drug_search.infrastructure.database.repository.base_repo import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PubmedRepository(BaseRepository):
+    def __init__(self, session: AsyncSession):
+        super().__init__(model=PubmedArticle, session=session)
+
+    async def use_articles(
+            self,
+            pubmed_ids: Sequence[str],
+            fetched_after: datetime.datetime
+    ) -> list[PubmedResearchSchema]:
+        """Статьи по PMID, скачанные не раньше fetched_after; отмечает использование (одним UPDATE ... RETURNING)"""
+        stmt = (
+            update(PubmedArticle)
+            .where(PubmedArticle.pubmed_id.in_(pubmed_ids), PubmedArticle.fetched_at >= fetched_after)
+            .values(last_used_at=func.now())
+            .returning(PubmedArticle)
+        )
+        articles: Sequence[PubmedArticle] = (await self.session.execute(stmt)).scalars().all()
+        await self.session.commit()
+        return [article.get_schema() for article in articles]
+
+    async def upsert_articles(self, articles: Sequence[PubmedResearchSchema]) -> None:
+        """Запись свежескачанных статей (перезапись по PMID)"""
+        if not articles:
+            return
+
+        stmt = insert(PubmedArticle).values([article.model_dump() for article in articles])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PubmedArticle.pubmed_id],
+            set_={
+                **{
+                    column: stmt.excluded[column]
+                    for column in PubmedResearchSchema.model_fields if column != "pubmed_id"
+                },
+                "fetched_at": func.now(),
+                "last_used_at": func.now(),
+            }
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def delete_unused_articles(self, before: datetime.datetime) -> int:
+        result = await self.session.execute(delete(PubmedArticle).where(PubmedArticle.last_used_at < before))
+        await self.session.commit()
+        return result.rowcount
+
+
+async def get_pubmed_repo(
+        session_generator: AsyncGenerator[AsyncSession, None] = Depends(get_async_session)
+) -> PubmedRepository:
+    async with session_generator as session:
+        return PubmedRepository(session=session)
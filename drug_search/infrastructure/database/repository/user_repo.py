@@ -1,23 +1,32 @@
 import datetime
 import logging
 import uuid
-from typing import Sequence
+from typing import Optional, Sequence
 
-from sqlalchemy import select, text, update, case
+from sqlalchemy import select, text, update, case, func
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from drug_search.core.dependencies.allowed_drugs_index_dep import allowed_drugs_index
+from drug_search.core.dependencies.token_ledger_dep import token_ledger
+from drug_search.core.dependencies.user_context_cache_dep import user_context_cache
 from drug_search.core.lexicon import REFERRALS_REWARDS
 from drug_search.core.lexicon import SUBSCRIPTION_TYPES, TOKENS_LIMIT
 from drug_search.core.schemas import (UserTelegramDataSchema, UserSchema, DrugBrieflySchema,
-                                      AllowedDrugsInfoSchema, ReferralSchema)
+                                      AllowedDrugsInfoSchema, ReferralSchema, TokenBalanceSchema, UserRequestLogSchema)
+from drug_search.core.services.cache_logic.token_ledger import TokenLedger, TokenLedgerError
 from drug_search.core.utils.referrals_funcs import get_ref_level
-from drug_search.infrastructure.database.models.user import AllowedDrugs, User, UserRequestLog, Referral
+from drug_search.infrastructure.database.models.user import AllowedDrugs, User, UserRequestLog, Referral, \
+    TokenLedgerCursor
 from drug_search.infrastructure.database.repository.base_repo import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+# столбцы баланса: пишутся только дельтами через TokenLedger
+_TOKEN_COLUMNS = frozenset({"allowed_tokens", "additional_tokens", "used_tokens"})
+
 
 class UserRepository(BaseRepository):
     def __init__(self, session: AsyncSession):
@@ -26,18 +35,43 @@ class UserRepository(BaseRepository):
     async def __refresh_requests(self, user: User):
         """Обновляет дневные лимиты
         При создании юзера столбцы последнего обновления уже есть
-        """
-        user.tokens_last_refresh = datetime.datetime.now()
 
+        allowed_tokens выставляется через TokenLedger компенсирующей дельтой:
+        абсолютный UPDATE поверх неприменённых списаний списал бы их повторно при flush.
+        """
         match user.subscription_type:
-            case SUBSCRIPTION_TYPES.DEFAULT:
-                user.allowed_tokens = TOKENS_LIMIT.DEFAULT_TOKENS_LIMIT
             case SUBSCRIPTION_TYPES.LITE:
-                user.allowed_tokens = TOKENS_LIMIT.LITE_TOKENS_LIMIT
+                tokens_limit: int = TOKENS_LIMIT.LITE_TOKENS_LIMIT
             case SUBSCRIPTION_TYPES.PREMIUM:
-                user.allowed_tokens = TOKENS_LIMIT.PREMIUM_TOKENS_LIMIT
+                tokens_limit: int = TOKENS_LIMIT.PREMIUM_TOKENS_LIMIT
+            case _:
+                tokens_limit: int = TOKENS_LIMIT.DEFAULT_TOKENS_LIMIT
 
+        try:
+            await token_ledger.set_allowed(
+                user.id,
+                tokens_limit,
+                loader=lambda: self.get_token_balance_snapshot(user.id),
+            )
+        except (RedisError, TokenLedgerError) as ex:
+            # неприменённые дельты недоступны — сброс повторится при следующем запросе юзера
+            logger.warning(f"TokenLedger недоступен ({ex}), обновление лимитов {user.id} отложено")
+            return
+
+        user.tokens_last_refresh = datetime.datetime.now()
         await self.session.commit()
+        await user_context_cache.bump(user.id)
+
+    async def update(self, id: uuid.UUID, **values) -> Optional[UserSchema]:
+        """Обновление юзера + инвалидация кэша контекста.
+        Токены здесь не пишутся: только дельтами через TokenLedger (increment / set_allowed).
+        """
+        if token_columns := _TOKEN_COLUMNS.intersection(values):
+            raise ValueError(f"Токены ({', '.join(sorted(token_columns))}) обновляются через TokenLedger")
+
+        user: Optional[UserSchema] = await super().update(id, **values)
+        await user_context_cache.bump(id)
+        return user
 
     async def get_user_from_telegram_id(self, telegram_id: str) -> UserSchema | None:
         """Возвращает схему юзера с телеграм айди"""
@@ -45,9 +79,6 @@ class UserRepository(BaseRepository):
             select(User).where(
                 User.telegram_id == telegram_id
             )
-            .options(
-                selectinload(User.allowed_drugs)
-            )
         )
         result = await self.session.execute(stmt)
         user: User | None = result.scalar_one_or_none()
@@ -63,9 +94,6 @@ class UserRepository(BaseRepository):
             select(User).where(
                 User.id == user_id
             )
-            .options(
-                selectinload(User.allowed_drugs)
-            )
         )
         result = await self.session.execute(stmt)
         user: User | None = result.scalar_one_or_none()
@@ -102,6 +130,7 @@ class UserRepository(BaseRepository):
         result = await self.session.execute(stmt)
         user = result.scalar_one()
         await self.session.commit()
+        await user_context_cache.bump(user.id)
         return UserSchema.model_validate(user.__dict__)
 
     async def allow_drug_to_user(self, drug_id: uuid.UUID, user_id: uuid.UUID) -> None:
@@ -116,11 +145,22 @@ class UserRepository(BaseRepository):
 
             await self.session.execute(stmt)
             await self.session.commit()
+            await user_context_cache.bump(user_id)
+            await allowed_drugs_index.add(user_id, drug_id)
 
         except Exception as ex:
             logger.exception(f"Ошибка при разрешении препарата пользователю: {ex}")
             raise ex
 
+    async def get_allowed_drug_ids(self, user_id: uuid.UUID) -> Sequence[uuid.UUID]:
+        """Id разрешенных юзеру препаратов (без загрузки строк allowed_drugs)"""
+        stmt = (
+            select(AllowedDrugs.drug_id)
+            .where(AllowedDrugs.user_id == user_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
     async def get_allowed_drugs_info(self, user_id: uuid.UUID) -> AllowedDrugsInfoSchema:
         """
         Возвращает информацию о разрешенных препаратах для юзера в формате AllowedDrugsSchema.
@@ -163,6 +203,7 @@ class UserRepository(BaseRepository):
 
         await self.session.execute(stmt)
         await self.session.commit()
+        await user_context_cache.bump(user_id)
 
     async def increment_tokens(
             self,
@@ -181,19 +222,33 @@ class UserRepository(BaseRepository):
             )
         )
         await self.session.commit()
+        await user_context_cache.bump(user_id)
+
+    async def credit_tokens(self, user_id: uuid.UUID, tokens_amount: int, reason: str = "") -> None:
+        """Начисление доп токенов через TokenLedger (напрямую в БД — если Redis недоступен)"""
+        try:
+            await token_ledger.credit(user_id, tokens_amount, reason=reason)
+        except RedisError as ex:
+            logger.warning(f"TokenLedger недоступен ({ex}), начисление напрямую в БД")
+            await self.increment_tokens(user_id=user_id, tokens_amount=tokens_amount)
 
     async def decrease_tokens(
             self,
             user_id: uuid.UUID,
             tokens_amount: int = 0,
-    ) -> None:
-        """Атомарно уменьшает количество токенов.
+    ) -> Optional[TokenBalanceSchema]:
+        """Атомарно уменьшает количество токенов, если их хватает.
+        Прямая запись в users — только когда TokenLedger недоступен.
 
         :var tokens_amount: количество токенов на поиск препаратов
+        :return: баланс после списания или None, если токенов не хватило
         """
-        await self.session.execute(
+        result = await self.session.execute(
             update(User)
-            .where(User.id == user_id)
+            .where(
+                User.id == user_id,
+                User.allowed_tokens + User.additional_tokens >= tokens_amount
+            )
             .values(
                 additional_tokens=case(
                     (User.allowed_tokens >= tokens_amount, User.additional_tokens),
@@ -205,8 +260,104 @@ class UserRepository(BaseRepository):
                 ),
                 used_tokens=User.used_tokens + 1
             )
+            .returning(User.allowed_tokens, User.additional_tokens, User.used_tokens)
+        )
+        row = result.one_or_none()
+        await self.session.commit()
+        await user_context_cache.bump(user_id)
+
+        if row is None:
+            return None
+        return TokenBalanceSchema(allowed_tokens=row[0], additional_tokens=row[1], used_tokens=row[2])
+
+    # [ TOKEN LEDGER ]
+    async def get_token_ledger_cursor(self) -> str:
+        """Последняя запись stream, примененная к users"""
+        result = await self.session.execute(
+            select(TokenLedgerCursor.last_entry_id)
+            .where(TokenLedgerCursor.name == TokenLedger.LEDGER_NAME)
+        )
+        return result.scalar_one()
+
+    async def get_token_balance_snapshots(
+            self,
+            user_ids: Sequence[uuid.UUID]
+    ) -> tuple[dict[uuid.UUID, TokenBalanceSchema], str]:
+        """Балансы юзеров из users и курсор ledger — одним запросом (один снимок)"""
+        stmt = (
+            select(
+                User.id, User.allowed_tokens, User.additional_tokens, User.used_tokens,
+                TokenLedgerCursor.last_entry_id
+            )
+            .join(TokenLedgerCursor, TokenLedgerCursor.name == TokenLedger.LEDGER_NAME)
+            .where(User.id.in_(user_ids))
+        )
+        rows = (await self.session.execute(stmt)).all()
+        cursor: str = rows[0].last_entry_id if rows else await self.get_token_ledger_cursor()
+
+        return {
+            row.id: TokenBalanceSchema(
+                allowed_tokens=row.allowed_tokens,
+                additional_tokens=row.additional_tokens,
+                used_tokens=row.used_tokens
+            )
+            for row in rows
+        }, cursor
+
+    async def get_token_balance_snapshot(self, user_id: uuid.UUID) -> Optional[tuple[TokenBalanceSchema, str]]:
+        """Баланс юзера + курсор ledger для заполнения TokenLedger"""
+        balances, cursor = await self.get_token_balance_snapshots([user_id])
+        if user_id not in balances:
+            return None
+        return balances[user_id], cursor
+
+    async def apply_token_ledger_deltas(
+            self,
+            deltas: dict[uuid.UUID, tuple[int, int, int]],
+            previous_entry_id: str,
+            last_entry_id: str,
+    ) -> bool:
+        """
+        Применение пачки дельт (allowed, additional, used) одним UPDATE + сдвиг курсора в одной транзакции.
+
+        :return: False — курсор уже сдвинут другим flush, ничего не применено
+        """
+        cursor_result = await self.session.execute(
+            update(TokenLedgerCursor)
+            .where(
+                TokenLedgerCursor.name == TokenLedger.LEDGER_NAME,
+                TokenLedgerCursor.last_entry_id == previous_entry_id
+            )
+            .values(last_entry_id=last_entry_id, updated_at=func.now())
         )
+        if cursor_result.rowcount != 1:
+            await self.session.rollback()
+            return False
+
+        if deltas:
+            user_ids: list[uuid.UUID] = list(deltas)
+            stmt = text("""
+                UPDATE users AS u
+                SET allowed_tokens = u.allowed_tokens + d.allowed,
+                    additional_tokens = u.additional_tokens + d.additional,
+                    used_tokens = u.used_tokens + d.used
+                FROM unnest(
+                    CAST(:user_ids AS uuid[]),
+                    CAST(:allowed AS integer[]),
+                    CAST(:additional AS integer[]),
+                    CAST(:used AS integer[])
+                ) AS d(user_id, allowed, additional, used)
+                WHERE u.id = d.user_id
+            """).bindparams(
+                user_ids=user_ids,
+                allowed=[deltas[user_id][0] for user_id in user_ids],
+                additional=[deltas[user_id][1] for user_id in user_ids],
+                used=[deltas[user_id][2] for user_id in user_ids],
+            )
+            await self.session.execute(stmt)
+
         await self.session.commit()
+        return True
 
     # [ LOGS ]
     async def add_user_log_request(self, user_id: uuid.UUID, user_query: str) -> None:
@@ -223,6 +374,28 @@ class UserRepository(BaseRepository):
         )
         await self.session.commit()
 
+    async def copy_user_logs(self, logs: Sequence[UserRequestLogSchema]) -> None:
+        """Пачка логов одним COPY (UserLogSink) вместо INSERT + COMMIT на каждый запрос"""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            UserRequestLog.__tablename__,
+            records=[(uuid.uuid4(), log.user_id, log.user_query, log.predicted_action, log.used_at) for log in logs],
+            columns=["id", "user_id", "user_query", "predicted_action", "used_at"]
+        )
+        await self.session.commit()
+
+    async def get_labeled_user_logs(self, limit: int) -> Sequence[tuple[str, str]]:
+        """Свежие (запрос, действие от нейронки) — обучающая выборка IntentClassifier"""
+        stmt = (
+            select(UserRequestLog.user_query, UserRequestLog.predicted_action)
+            .where(UserRequestLog.predicted_action.is_not(None))
+            .order_by(UserRequestLog.used_at.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return [(row.user_query, row.predicted_action) for row in result.all()]
+
     async def get_user_logs(self, user_id: uuid.UUID) -> Sequence[str]:
         """Возвращает все записи логов юзера"""
         logger.info(f"получение логов юзера {user_id}")
@@ -240,6 +413,111 @@ class UserRepository(BaseRepository):
         logger.info(f"найдено {len(logs)} записей логов для юзера {user_id}")
         return logs
 
+    async def ensure_user_log_partitions(self, months_ahead: int) -> list[str]:
+        """
+        Месячные партиции user_request_logs от текущего месяца на months_ahead вперед.
+
+        Каждая партиция — в своей транзакции: ошибка одного месяца не откатывает остальные.
+        Строки месяца, попавшие в user_request_logs_default (партиция не была создана вовремя),
+        переносятся в новую партицию — иначе PostgreSQL не создаст ее.
+        :return: созданные партиции
+        """
+        month: datetime.date = datetime.date.today().replace(day=1)
+        created: list[str] = []
+
+        for _ in range(months_ahead + 1):
+            next_month: datetime.date = (month + datetime.timedelta(days=32)).replace(day=1)
+            partition: str = f"{UserRequestLog.__tablename__}_p{month:%Y%m}"
+            try:
+                if await self._create_user_log_partition(partition, month, next_month):
+                    created.append(partition)
+            except SQLAlchemyError as ex:
+                await self.session.rollback()
+                logger.warning(f"user_request_logs: партиция {partition} не создана: {ex}")
+            month = next_month
+
+        return created
+
+    async def _create_user_log_partition(
+            self,
+            partition: str,
+            month: datetime.date,
+            next_month: datetime.date
+    ) -> bool:
+        """:return: партиция создана (False — уже была)"""
+        table: str = UserRequestLog.__tablename__
+        default_partition: str = f"{table}_default"
+        if await self.session.scalar(text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=partition)):
+            await self.session.commit()
+            return False
+
+        bounds: dict = dict(
+            month_start=datetime.datetime.combine(month, datetime.time(), datetime.UTC),
+            month_end=datetime.datetime.combine(next_month, datetime.time(), datetime.UTC)
+        )
+        has_default_rows: bool = False
+        if await self.session.scalar(text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=default_partition)):
+            has_default_rows = await self.session.scalar(text(f"""
+                SELECT EXISTS (
+                    SELECT 1 FROM {default_partition} WHERE used_at >= :month_start AND used_at < :month_end
+                )
+            """).bindparams(**bounds))
+
+        if has_default_rows:
+            # строки месяца из default: во временную таблицу, затем в новую партицию (одна транзакция)
+            moved_table: str = f"{partition}_moved"
+            await self.session.execute(text(f"CREATE TEMP TABLE {moved_table} (LIKE {table}) ON COMMIT DROP"))
+            await self.session.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM {default_partition} WHERE used_at >= :month_start AND used_at < :month_end
+                    RETURNING *
+                )
+                INSERT INTO {moved_table} SELECT * FROM moved
+            """).bindparams(**bounds))
+
+        await self.session.execute(text(f"""
+            CREATE TABLE {partition}
+            PARTITION OF {table}
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')
+        """))
+
+        if has_default_rows:
+            moved: int = (await self.session.execute(text(f"INSERT INTO {table} SELECT * FROM {moved_table}"))).rowcount
+            logger.warning(f"user_request_logs: {moved} строк перенесено из {default_partition} в {partition}")
+
+        await self.session.commit()
+        return True
+
+    async def drop_user_log_partitions(self, retention_months: int) -> list[str]:
+        """Удаление партиций user_request_logs старше retention_months (+ старых строк из default)"""
+        cutoff: datetime.date = datetime.date.today().replace(day=1)
+        for _ in range(retention_months):
+            cutoff = (cutoff - datetime.timedelta(days=1)).replace(day=1)
+
+        result = await self.session.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table_name
+        """).bindparams(table_name=UserRequestLog.__tablename__))
+
+        dropped: list[str] = []
+        for partition in result.scalars().all():
+            suffix: str = partition.rsplit("_p", 1)[-1]
+            if not suffix.isdigit() or len(suffix) != 6:
+                continue  # default
+            if datetime.date(int(suffix[:4]), int(suffix[4:]), 1) < cutoff:
+                await self.session.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+                dropped.append(partition)
+
+        await self.session.execute(
+            text(f"DELETE FROM {UserRequestLog.__tablename__}_default WHERE used_at < :cutoff")
+            .bindparams(cutoff=cutoff)
+        )
+        await self.session.commit()
+        return dropped
+
 
     # [ PROFILE SETTINGS ]
     async def simple_mode_toggle(self, user_id: uuid.UUID) -> None:
@@ -255,6 +533,7 @@ class UserRepository(BaseRepository):
             )
         )
         await self.session.commit()
+        await user_context_cache.bump(user_id)
 
     # [ REFERRALS ]
     async def get_referrals(self, referrer_telegram_id: int) -> Sequence[ReferralSchema]:
@@ -302,8 +581,7 @@ class UserRepository(BaseRepository):
 
         ref_level_after: int = get_ref_level(ref_count+1)
         if ref_level_before < ref_level_after:
-            new_tokens_count = REFERRALS_REWARDS[ref_level_after] + referrer_user.additional_tokens
-            await self.update(referrer_user.id, additional_tokens=new_tokens_count)
+            await self.credit_tokens(referrer_user.id, REFERRALS_REWARDS[ref_level_after], reason="referral")
 
         await self.update(referral_user.id, referred_by_telegram_id=referrer_telegram_id)
 
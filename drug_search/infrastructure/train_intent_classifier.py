@@ -0,0 +1,96 @@
+"""
+Обучение локального классификатора действий (IntentClassifier) на user_request_logs.
+
+Разметка — действия, которые вернула нейронка (predict_user_action). Отложенная выборка (по хешу запроса)
+нужна для точности и калибровки порога уверенности.
+
+Запуск:
+    python -m drug_search.infrastructure.train_intent_classifier [--limit 200000] [--target-precision 0.97]
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from collections import Counter
+
+from drug_search.config import config
+from drug_search.core.services.intent_classifier import IntentClassifier
+from drug_search.infrastructure.database.engine import async_session_maker, engine
+from drug_search.infrastructure.database.repository.user_repo import UserRepository
+from drug_search.infrastructure.loggerConfig import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_holdout(query: str, holdout_percent: int) -> bool:
+    """Одинаковые запросы всегда по одну сторону разбиения"""
+    return int(hashlib.md5(query.lower().encode()).hexdigest(), 16) % 100 < holdout_percent
+
+
+async def train_intent_classifier(
+        limit: int,
+        target_precision: float,
+        holdout_percent: int,
+        output: str,
+) -> dict:
+    async with async_session_maker() as session:
+        samples: list[tuple[str, str]] = list(await UserRepository(session).get_labeled_user_logs(limit))
+
+    train: list[tuple[str, str]] = [sample for sample in samples if not is_holdout(sample[0], holdout_percent)]
+    holdout: list[tuple[str, str]] = [sample for sample in samples if is_holdout(sample[0], holdout_percent)]
+    if not train or not holdout:
+        raise ValueError(f"Мало размеченных логов для обучения: {len(samples)}")
+
+    model: IntentClassifier = IntentClassifier.train(train)
+
+    # [ точность / задержка на отложенной выборке ]
+    started_at: float = time.perf_counter()
+    predictions: list[str] = [model.predict(query)[0] for query, _ in holdout]
+    latency_ms: float = (time.perf_counter() - started_at) / len(holdout) * 1000
+
+    correct_by_action: Counter[str] = Counter(
+        action for (_, action), predicted in zip(holdout, predictions) if action == predicted
+    )
+    total_by_action: Counter[str] = Counter(action for _, action in holdout)
+
+    metrics: dict = {
+        "train_samples": len(train),
+        "holdout_samples": len(holdout),
+        "accuracy": round(sum(correct_by_action.values()) / len(holdout), 4),
+        "recall_by_action": {
+            action: round(correct_by_action[action] / total, 4) for action, total in total_by_action.items()
+        },
+        "avg_latency_ms": round(latency_ms, 3),
+        **{key: round(value, 4) for key, value in model.calibrate(holdout, target_precision).items()},
+    }
+    model.meta["metrics"] = metrics
+    model.save(output)
+    return metrics
+
+
+async def main():
+    configure_logging()
+
+    parser = argparse.ArgumentParser(description="Обучение IntentClassifier на user_request_logs")
+    parser.add_argument("--limit", type=int, default=200_000, help="сколько свежих размеченных логов взять")
+    parser.add_argument("--target-precision", type=float, default=0.97,
+                        help="минимальная точность локальных ответов для выбора порога")
+    parser.add_argument("--holdout-percent", type=int, default=20, help="доля отложенной выборки, %%")
+    parser.add_argument("--output", default=config.INTENT_CLASSIFIER_PATH, help="путь артефакта")
+    args = parser.parse_args()
+
+    try:
+        metrics: dict = await train_intent_classifier(
+            limit=args.limit,
+            target_precision=args.target_precision,
+            holdout_percent=args.holdout_percent,
+            output=args.output,
+        )
+        logger.info(f"IntentClassifier сохранен в {args.output}: {metrics}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
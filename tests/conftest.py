@@ -2,8 +2,8 @@ import pytest
 from unittest.mock import AsyncMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from services.models_service.drug_service import DrugService
-from services.models_service.user_service import UserService
+from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.core.services.models_service.user_service import UserService
 from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
 from drug_search.infrastructure.database.repository.user_repo import UserRepository
 
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from drug_search.core.lexicon import DANGER_CLASSIFICATION
+from drug_search.infrastructure.database.models.base import IDMixin
+from drug_search.infrastructure.database.models.drug import Drug
+
+# тесты репозиториев — на настоящем PostgreSQL (on conflict, pg_trgm), таблицы пересоздаются на каждый тест
+TEST_DATABASE_URL: str | None = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+async def db_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL не задан (PostgreSQL с pg_trgm)")
+
+    engine = create_async_engine(TEST_DATABASE_URL)
+    tables = [table for table in IDMixin.metadata.sorted_tables if table.name.startswith("drug")]
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await connection.run_sync(IDMixin.metadata.drop_all, tables=tables)
+        await connection.run_sync(IDMixin.metadata.create_all, tables=tables)
+
+    yield engine
+
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(db_engine):
+    return async_sessionmaker(db_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def make_drug(session_maker):
+    async def make(name: str) -> Drug:
+        async with session_maker() as session:
+            drug = Drug(
+                name=name, name_ru=name, latin_name=name, description="описание", classification="класс",
+                fact="факт", fun_facts=[], danger_classification=DANGER_CLASSIFICATION.SAFE
+            )
+            session.add(drug)
+            await session.commit()
+            return drug
+
+    return make
@@ -0,0 +1,173 @@
+import asyncio
+import datetime
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from drug_search.core.lexicon import Prompts
+from drug_search.core.services import assistant_service as assistant_service_module
+from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.cache_logic.assistant_response_cache import (
+    AssistantResponseCache, LLM_CACHE_POLICY, llm_cache_bypass
+)
+from drug_search.infrastructure.database.models.llm import LLMResponseCacheEntry
+
+
+class ActionResponse(BaseModel):
+    action: str
+
+
+def db_down():
+    raise OSError("БД недоступна")
+
+
+def make_cache(session_maker=db_down, enabled: bool = True) -> AssistantResponseCache:
+    return AssistantResponseCache(
+        redis=FakeAsyncRedis(decode_responses=True), session_maker=session_maker, redis_ttl=3600, enabled=enabled
+    )
+
+
+@pytest.fixture
+async def cache_engine(db_engine):
+    async with db_engine.begin() as connection:
+        await connection.run_sync(LLMResponseCacheEntry.__table__.drop, checkfirst=True)
+        await connection.run_sync(LLMResponseCacheEntry.__table__.create)
+    return db_engine
+
+
+# [ ключ / политика ]
+def make_key(model="deepseek-chat", prompt=Prompts.GET_DRUG_DOSAGES, input_query="aspirin", temperature=0.3,
+             max_tokens=100, pydantic_model="Model") -> str:
+    return AssistantResponseCache.make_key(model, prompt, input_query, temperature, max_tokens, pydantic_model)
+
+
+def test_key_stable():
+    """Ключ — функция только своих частей; меняется любая часть — меняется ключ"""
+    assert make_key() == make_key()
+    assert len({
+        make_key(),
+        make_key(model="deepseek-reasoner"),
+        make_key(prompt=Prompts.GET_DRUG_ANALOGS),
+        make_key(input_query="ibuprofen"),
+        make_key(temperature=0.7),
+        make_key(max_tokens=200),
+        make_key(pydantic_model="Other"),
+    }) == 7
+
+
+def test_key_parts_not_concatenated():
+    """Граница между частями ключа не сдвигается: ("ab", "c") != ("a", "bc")"""
+    assert AssistantResponseCache.make_key("m", "ab", "c") != AssistantResponseCache.make_key("m", "a", "bc")
+
+
+def test_policy_filter():
+    cache = make_cache()
+
+    assert set(cache.prompt_hashes()) == set(LLM_CACHE_POLICY)
+    assert cache.prompt_name(Prompts.GET_DRUG_DOSAGES) == "GET_DRUG_DOSAGES"
+    assert cache.prompt_name(Prompts.ANSWER_TO_QUESTION) is None
+    assert cache.prompt_name(Prompts.GET_DRUG_DOSAGES + " ") is None
+    assert make_cache(enabled=False).prompt_name(Prompts.GET_DRUG_DOSAGES) is None
+
+
+@pytest.mark.asyncio
+async def test_bypass_context():
+    """bypass действует только внутри блока и только в своей задаче"""
+    async def is_bypassed_in_task() -> bool:
+        return AssistantResponseCache.is_bypassed()
+
+    assert not AssistantResponseCache.is_bypassed()
+    with llm_cache_bypass():
+        assert AssistantResponseCache.is_bypassed()
+        other = asyncio.ensure_future(is_bypassed_in_task())  # задача копирует контекст на момент создания
+    assert await other
+    assert not await asyncio.create_task(is_bypassed_in_task())
+
+    with pytest.raises(RuntimeError):
+        with llm_cache_bypass():
+            raise RuntimeError
+    assert not AssistantResponseCache.is_bypassed()
+
+
+@pytest.mark.asyncio
+async def test_assistant_bypass_refreshes_cache(monkeypatch):
+    """AssistantService: ответ из кэша; под llm_cache_bypass — запрос в нейронку, свежий ответ перезаписывает кэш"""
+    cache = make_cache()
+    monkeypatch.setattr(assistant_service_module, "assistant_response_cache", cache)
+    assistant = AssistantService()
+    responses: list[str] = []
+
+    async def get_response(input_query, prompt, pydantic_model, temperature, max_tokens):
+        responses.append(f"ответ {len(responses) + 1}")
+        return pydantic_model(action=responses[-1])
+
+    assistant._get_response = get_response
+
+    async def ask() -> str:
+        return (await assistant.get_response("aspirin", Prompts.PREDICT_USER_ACTION, ActionResponse)).action
+
+    assert await ask() == "ответ 1"
+    assert await ask() == "ответ 1"
+    with llm_cache_bypass():
+        assert await ask() == "ответ 2"
+    assert await ask() == "ответ 2"
+    assert responses == ["ответ 1", "ответ 2"]
+
+
+# [ Redis / Postgres ]
+@pytest.mark.asyncio
+async def test_get_from_db_warms_redis(cache_engine):
+    cache = make_cache(async_sessionmaker(cache_engine, expire_on_commit=False))
+    await cache.set("key", Prompts.GET_DRUG_DOSAGES, '{"dosages": []}')
+    await cache.redis.flushall()
+
+    assert await cache.get("key") == '{"dosages": []}'
+    assert await cache.get("key") == '{"dosages": []}'
+    assert await cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "db_hits": 1, "misses": 1}
+    assert 0 < await cache.redis.ttl(f"{cache.KEY_PREFIX}:key") <= 3600
+
+
+@pytest.mark.asyncio
+async def test_purge_stale(cache_engine):
+    """Удаляются просроченные ответы, ответы на старый текст промпта и на промпты не из политики"""
+    session_maker = async_sessionmaker(cache_engine, expire_on_commit=False)
+    cache = make_cache(session_maker)
+    await cache.set("fresh", Prompts.GET_DRUG_DOSAGES, "1")
+    await cache.set("stale_prompt", Prompts.GET_DRUG_ANALOGS, "2")
+    await cache.set("expired", Prompts.PREDICT_USER_ACTION, "3")
+    await cache.set("removed_prompt", Prompts.GET_DRUG_METABOLISM, "4")
+    async with session_maker() as session:
+        await session.execute(
+            update(LLMResponseCacheEntry).where(LLMResponseCacheEntry.cache_key == "stale_prompt")
+            .values(prompt_hash="старый текст промпта")
+        )
+        await session.execute(
+            update(LLMResponseCacheEntry).where(LLMResponseCacheEntry.cache_key == "expired")
+            .values(expires_at=datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=1))
+        )
+        await session.execute(
+            update(LLMResponseCacheEntry).where(LLMResponseCacheEntry.cache_key == "removed_prompt")
+            .values(prompt_name="GET_DRUG_SIDE_EFFECTS")
+        )
+        await session.commit()
+
+    assert await cache.purge_stale() == 3
+    async with session_maker() as session:
+        assert (await session.scalars(select(LLMResponseCacheEntry.cache_key))).all() == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_storage_errors_not_raised():
+    """Redis и БД недоступны — get возвращает промах, set не падает"""
+    server = FakeServer()
+    server.connected = False
+    cache = make_cache()
+    cache.redis = FakeAsyncRedis(server=server, decode_responses=True)
+
+    await cache.set("key", Prompts.GET_DRUG_DOSAGES, "1")
+    assert await cache.get("key") is None
+    assert cache.stats()["misses"] == 1
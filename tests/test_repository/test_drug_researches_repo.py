@@ -0,0 +1,115 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from drug_search.core.schemas import DrugResearchesAssistantResponse, DrugResearchSchema
+from drug_search.infrastructure.database.models.drug import DrugResearch
+from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
+
+SEARCHED_AT = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+
+def research(doi: str, interest: float = 0.5, header: str | None = None) -> DrugResearchSchema:
+    return DrugResearchSchema(
+        header=header or f"Header {doi}", description="описание", publication_date="2025-01-01",
+        url=f"https://doi.org/{doi}", journal="Journal", doi=doi, interest=interest, research_type="other",
+    )
+
+
+def researches(*items: DrugResearchSchema) -> DrugResearchesAssistantResponse:
+    return DrugResearchesAssistantResponse(researches=list(items))
+
+
+async def stored_researches(session_maker, drug_id) -> dict[str, tuple]:
+    """DOI -> (id, header) исследований препарата"""
+    async with session_maker() as session:
+        rows = await session.execute(
+            select(DrugResearch.doi, DrugResearch.id, DrugResearch.header).where(DrugResearch.drug_id == drug_id)
+        )
+        return {doi: (research_id, header) for doi, research_id, header in rows}
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_rows(session_maker, make_drug):
+    """Обновление только добавляет/обновляет строки: старые исследования не удаляются и не пересоздаются"""
+    drug = await make_drug("aspirin")
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(drug.id, researches(research("a"), research("b")),
+                                                                     searched_at=SEARCHED_AT)
+    before = await stored_researches(session_maker, drug.id)
+
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(
+            drug.id, researches(research("b", header="Новый заголовок"), research("c")),
+            searched_at=SEARCHED_AT + datetime.timedelta(days=1)
+        )
+    after = await stored_researches(session_maker, drug.id)
+
+    assert set(after) == {"a", "b", "c"}
+    assert after["a"] == before["a"]
+    assert after["b"] == (before["b"][0], "Новый заголовок")
+    async with session_maker() as session:
+        assert await DrugRepository(session).DrugCreation.get_researches_watermark(drug.id) == \
+               SEARCHED_AT + datetime.timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_other_drug_doi_conflict(session_maker, make_drug):
+    """DOI уникален по всей таблице: исследование другого препарата не перезаписывается и не переносится"""
+    aspirin = await make_drug("aspirin")
+    ibuprofen = await make_drug("ibuprofen")
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(aspirin.id, researches(research("shared")),
+                                                                     searched_at=SEARCHED_AT)
+    before = await stored_researches(session_maker, aspirin.id)
+
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(
+            ibuprofen.id, researches(research("shared", header="чужой"), research("own")), searched_at=SEARCHED_AT
+        )
+
+    assert await stored_researches(session_maker, aspirin.id) == before
+    assert set(await stored_researches(session_maker, ibuprofen.id)) == {"own"}
+
+
+@pytest.mark.asyncio
+async def test_known_research_dois(session_maker, make_drug):
+    """Уже сохраненные DOI — у любого препарата, а не только у обновляемого"""
+    aspirin = await make_drug("aspirin")
+    ibuprofen = await make_drug("ibuprofen")
+    async with session_maker() as session:
+        creation = DrugRepository(session).DrugCreation
+        await creation.upsert_researches(aspirin.id, researches(research("a")), searched_at=SEARCHED_AT)
+    async with session_maker() as session:
+        creation = DrugRepository(session).DrugCreation
+        await creation.upsert_researches(ibuprofen.id, researches(research("b")), searched_at=SEARCHED_AT)
+
+    async with session_maker() as session:
+        creation = DrugRepository(session).DrugCreation
+        assert await creation.get_known_research_dois(["a", "b", "new"]) == {"a", "b"}
+        assert await creation.get_known_research_dois([]) == set()
+
+
+@pytest.mark.asyncio
+async def test_max_researches_trim(session_maker, make_drug):
+    """max_researches: у препарата остаются исследования с наибольшим interest"""
+    aspirin = await make_drug("aspirin")
+    ibuprofen = await make_drug("ibuprofen")
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(
+            ibuprofen.id, researches(research("other", interest=0.0)), searched_at=SEARCHED_AT
+        )
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(
+            aspirin.id, researches(research("low", 0.1), research("mid", 0.5)), searched_at=SEARCHED_AT
+        )
+
+    async with session_maker() as session:
+        await DrugRepository(session).DrugCreation.upsert_researches(
+            aspirin.id, researches(research("high", 0.9), research("lowest", 0.05)),
+            searched_at=SEARCHED_AT, max_researches=2
+        )
+
+    assert set(await stored_researches(session_maker, aspirin.id)) == {"high", "mid"}
+    assert set(await stored_researches(session_maker, ibuprofen.id)) == {"other"}
@@ -0,0 +1,113 @@
+import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.core.services.pubmed_article_store import PubmedArticleStore
+from drug_search.infrastructure.database.models.pubmed import PubmedArticle
+
+MAX_AGE = datetime.timedelta(days=30)
+
+
+def article(pubmed_id: str) -> PubmedResearchSchema:
+    return PubmedResearchSchema(
+        title=f"Title {pubmed_id}", authors=["John Doe"], doi=f"10.1000/{pubmed_id}", journal="Journal",
+        publication_date=datetime.date(2025, 1, 1), pubmed_id=pubmed_id,
+    )
+
+
+@pytest.fixture
+async def articles_engine(db_engine):
+    async with db_engine.begin() as connection:
+        await connection.run_sync(PubmedArticle.__table__.drop, checkfirst=True)
+        await connection.run_sync(PubmedArticle.__table__.create)
+    return db_engine
+
+
+@pytest.fixture
+def store(articles_engine):
+    return PubmedArticleStore(
+        async_sessionmaker(articles_engine, expire_on_commit=False),
+        max_age=MAX_AGE,
+        retention=datetime.timedelta(days=90)
+    )
+
+
+async def age_article(engine, pubmed_id: str, fetched: datetime.timedelta, used: datetime.timedelta) -> None:
+    """Статья скачана fetched назад, последний раз использована used назад"""
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("""
+                UPDATE pubmed_articles
+                SET fetched_at = now() - CAST(:fetched AS interval), last_used_at = now() - CAST(:used AS interval)
+                WHERE pubmed_id = :pubmed_id
+            """),
+            dict(pubmed_id=pubmed_id, fetched=fetched, used=used)
+        )
+
+
+@pytest.mark.asyncio
+async def test_saved_articles_returned(store):
+    await store.save_articles(["1", "2"], [article("1"), article("2")])
+
+    assert await store.get_articles(["1", "2", "3"]) == {"1": article("1"), "2": article("2")}
+    assert store.stats() == {"hits": 2, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_max_age_cutoff(store, articles_engine):
+    """Статья старше max_age не отдается — ее нужно скачать заново; перезапись обновляет fetched_at"""
+    await store.save_articles(["1", "2"], [article("1"), article("2")])
+    await age_article(articles_engine, "1", fetched=MAX_AGE + datetime.timedelta(hours=1), used=datetime.timedelta())
+
+    assert set(await store.get_articles(["1", "2"])) == {"2"}
+
+    await store.save_articles(["1"], [article("1")])
+    assert set(await store.get_articles(["1", "2"])) == {"1", "2"}
+
+
+@pytest.mark.asyncio
+async def test_skipped_articles_cached_in_memory(store, articles_engine):
+    """Скачанные PMID без статьи (без DOI) — None из памяти процесса, в БД не пишутся"""
+    await store.save_articles(["1", "2"], [article("1")])
+
+    assert await store.get_articles(["1", "2"]) == {"1": article("1"), "2": None}
+    async with articles_engine.connect() as connection:
+        assert await connection.scalar(text("SELECT count(*) FROM pubmed_articles")) == 1
+
+
+@pytest.mark.asyncio
+async def test_skipped_only_no_db_query(store, monkeypatch):
+    """Все PMID известны как непригодные — в БД не ходим"""
+    await store.save_articles(["1"], [])
+
+    def session_maker():
+        raise AssertionError("запрос в БД")
+
+    monkeypatch.setattr(store, "session_maker", session_maker)
+    assert await store.get_articles(["1"]) == {"1": None}
+
+
+@pytest.mark.asyncio
+async def test_purge_unused(store, articles_engine):
+    await store.save_articles(["1", "2"], [article("1"), article("2")])
+    await age_article(articles_engine, "1", fetched=datetime.timedelta(days=100), used=datetime.timedelta(days=91))
+
+    assert await store.purge_unused() == 1
+    assert set(await store.get_articles(["1", "2"])) == {"2"}
+
+
+@pytest.mark.asyncio
+async def test_db_down_falls_back_to_pubmed():
+    """БД недоступна: get_articles — пусто (статьи скачаются из PubMed), save_articles не падает"""
+    engine = create_async_engine("postgresql+asyncpg://postgres@127.0.0.1:1/drugtest")
+    store = PubmedArticleStore(async_sessionmaker(engine), max_age=MAX_AGE, retention=MAX_AGE)
+    try:
+        await store.save_articles(["1", "2"], [article("1")])
+
+        assert await store.get_articles(["1", "2"]) == {"2": None}
+        assert store.stats() == {"hits": 1, "misses": 1}
+    finally:
+        await engine.dispose()
@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from drug_search.config import config
+from drug_search.core.lexicon import DANGER_CLASSIFICATION, EXIST_STATUS
+from drug_search.core.schemas import DrugQueryAliasSchema
+from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.infrastructure.database.models.drug import DrugQueryAlias
+from drug_search.infrastructure.database.repository.drug_repo import DrugRepository
+
+
+def validation(status: EXIST_STATUS, drug_name: str = "aspirin") -> DrugQueryAliasSchema:
+    return DrugQueryAliasSchema(
+        query="", status=status, drug_name=drug_name, drug_name_ru="аспирин",
+        danger_classification=DANGER_CLASSIFICATION.SAFE
+    )
+
+
+async def save(session_maker, user_query: str, status: EXIST_STATUS, drug_name: str = "aspirin") -> None:
+    async with session_maker() as session:
+        await DrugService(DrugRepository(session)).save_query_alias(user_query, validation(status, drug_name))
+
+
+async def find(session_maker, user_query: str) -> DrugQueryAliasSchema | None:
+    async with session_maker() as session:
+        return await DrugRepository(session).find_query_alias(user_query)
+
+
+@pytest.mark.asyncio
+async def test_exist_fuzzy_match(session_maker):
+    """Положительный вердикт находится по похожему запросу (опечатка), запрос нормализуется"""
+    await save(session_maker, "  Acetylsalicylic Acid ", EXIST_STATUS.EXIST)
+
+    alias = await find(session_maker, "acetylsalicylic acd")
+
+    assert alias is not None
+    assert (alias.query, alias.status, alias.expires_at) == ("acetylsalicylic acid", EXIST_STATUS.EXIST, None)
+    assert await find(session_maker, "ibuprofen") is None
+
+
+@pytest.mark.asyncio
+async def test_not_exist_exact_only(session_maker):
+    """Отрицательный вердикт — только точное совпадение: опечатка не получает чужой NOT_EXIST"""
+    await save(session_maker, "acetylsalicylic acid", EXIST_STATUS.NOT_EXIST, drug_name="unknown")
+
+    assert (await find(session_maker, " Acetylsalicylic ACID")).status == EXIST_STATUS.NOT_EXIST
+    assert await find(session_maker, "acetylsalicylic acd") is None
+
+
+@pytest.mark.asyncio
+async def test_closest_alias_wins(session_maker):
+    """Точное совпадение (в том числе NOT_EXIST) ближе похожего EXIST"""
+    await save(session_maker, "acetylsalicylic acid", EXIST_STATUS.EXIST)
+    await save(session_maker, "acetylsalicylic acd", EXIST_STATUS.NOT_EXIST, drug_name="unknown")
+
+    assert (await find(session_maker, "acetylsalicylic acd")).status == EXIST_STATUS.NOT_EXIST
+    assert (await find(session_maker, "acetylsalicylic acid")).status == EXIST_STATUS.EXIST
+
+
+@pytest.mark.asyncio
+async def test_not_exist_expires(session_maker):
+    """NOT_EXIST живет DRUG_ALIAS_NEGATIVE_TTL_DAYS, после expires_at не находится и удаляется"""
+    await save(session_maker, "unknown drug", EXIST_STATUS.NOT_EXIST, drug_name="unknown")
+    alias = await find(session_maker, "unknown drug")
+    expected_expires_at = datetime.datetime.now(datetime.UTC) + datetime.timedelta(
+        days=config.DRUG_ALIAS_NEGATIVE_TTL_DAYS
+    )
+    assert abs(alias.expires_at - expected_expires_at) < datetime.timedelta(minutes=1)
+
+    expired_at = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+    async with session_maker() as session:
+        await session.execute(update(DrugQueryAlias).values(expires_at=expired_at))
+        await session.commit()
+
+    assert await find(session_maker, "unknown drug") is None
+    async with session_maker() as session:
+        assert await DrugRepository(session).delete_expired_query_aliases() == 1
+
+
+@pytest.mark.asyncio
+async def test_overwrite_verdict(session_maker):
+    """Повторная проверка перезаписывает вердикт: EXIST снимает срок жизни"""
+    await save(session_maker, "new drug", EXIST_STATUS.NOT_EXIST, drug_name="unknown")
+    await save(session_maker, "new drug", EXIST_STATUS.EXIST, drug_name="new drug")
+
+    alias = await find(session_maker, "new drug")
+    assert (alias.status, alias.drug_name, alias.expires_at) == (EXIST_STATUS.EXIST, "new drug", None)
+
+
+@pytest.mark.asyncio
+async def test_save_failure_rolled_back(session_maker):
+    """Ошибка записи алиаса не ломает запрос: транзакция откатывается, сессия остается рабочей"""
+    async with session_maker() as session:
+        drug_service = DrugService(DrugRepository(session))
+        await drug_service.save_query_alias("aspirin", validation(EXIST_STATUS.EXIST, drug_name="a" * 101))
+        await drug_service.save_query_alias("ibuprofen", validation(EXIST_STATUS.EXIST, drug_name="ibuprofen"))
+
+    async with session_maker() as session:
+        assert (await session.scalars(select(DrugQueryAlias.query))).all() == ["ibuprofen"]
@@ -0,0 +1,76 @@
+import uuid
+
+from drug_search.infrastructure.database.models.drug import DrugCombination, DrugSynonym
+from drug_search.infrastructure.database.repository.drug_repo import _row_key, _sync_collection
+
+
+def combination(substance: str, effect: str = "эффект", products: list[str] | None = None) -> DrugCombination:
+    return DrugCombination(combination_type="bad", substance=substance, effect=effect, risks=None, products=products)
+
+
+def stored(item: DrugCombination | DrugSynonym, drug_id: uuid.UUID) -> DrugCombination | DrugSynonym:
+    """Строка, загруженная из БД: с id и drug_id"""
+    item.id = uuid.uuid4()
+    item.drug_id = drug_id
+    return item
+
+
+# [ _row_key ]
+def test_row_key_ignores_ids():
+    """id / drug_id / даты не входят в содержимое строки"""
+    drug_id = uuid.uuid4()
+
+    assert _row_key(stored(combination("алкоголь"), drug_id)) == _row_key(combination("алкоголь"))
+    assert _row_key(combination("алкоголь")) != _row_key(combination("алкоголь", effect="другой"))
+    assert _row_key(combination("алкоголь", products=["a"])) != _row_key(combination("алкоголь", products=["b"]))
+
+
+# [ _sync_collection ]
+def test_unchanged_rows_kept():
+    """Совпадающие строки остаются теми же объектами (без DELETE + INSERT)"""
+    drug_id = uuid.uuid4()
+    current = [stored(combination("алкоголь"), drug_id), stored(combination("кофеин"), drug_id)]
+
+    result = _sync_collection(current, [combination("кофеин"), combination("алкоголь")])
+
+    assert [item.substance for item in result] == ["кофеин", "алкоголь"]
+    assert result[0] is current[1]
+    assert result[1] is current[0]
+
+
+def test_changed_rows_replaced():
+    """Измененные и новые строки — новые объекты, лишние в результат не попадают (delete-orphan)"""
+    drug_id = uuid.uuid4()
+    kept = stored(combination("алкоголь"), drug_id)
+    changed = stored(combination("кофеин"), drug_id)
+    removed = stored(combination("никотин"), drug_id)
+    new_changed = combination("кофеин", effect="новый эффект")
+    added = combination("грейпфрут")
+
+    result = _sync_collection([kept, changed, removed], [combination("алкоголь"), new_changed, added])
+
+    assert result[0] is kept
+    assert result[1] is new_changed
+    assert result[2] is added
+    assert changed not in result
+    assert removed not in result
+
+
+def test_duplicate_rows():
+    """Одинаковые строки сопоставляются по одной: лишний дубль — новый объект"""
+    drug_id = uuid.uuid4()
+    current = [stored(DrugSynonym(synonym="аспирин"), drug_id)]
+    first, second = DrugSynonym(synonym="аспирин"), DrugSynonym(synonym="аспирин")
+
+    result = _sync_collection(current, [first, second])
+
+    assert result[0] is current[0]
+    assert result[1] is second
+
+
+def test_empty_collections():
+    drug_id = uuid.uuid4()
+    new = [DrugSynonym(synonym="аспирин")]
+
+    assert _sync_collection([], new) == new
+    assert _sync_collection([stored(DrugSynonym(synonym="аспирин"), drug_id)], []) == []
@@ -0,0 +1,101 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from drug_search.infrastructure.database.repository.user_repo import UserRepository
+
+
+def month_start(months: int = 0) -> datetime.date:
+    """Первое число месяца со сдвигом от текущего"""
+    month: datetime.date = datetime.date.today().replace(day=1)
+    for _ in range(months):
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+    return month
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"user_request_logs_p{month:%Y%m}"
+
+
+@pytest.fixture
+async def logs_engine(db_engine):
+    """user_request_logs как после миграции f5c2a8e1d7b3 (без внешнего ключа на users), только default-партиция"""
+    async with db_engine.begin() as connection:
+        await connection.execute(text("DROP TABLE IF EXISTS user_request_logs CASCADE"))
+        await connection.execute(text("""
+            CREATE TABLE user_request_logs (
+                id UUID NOT NULL,
+                user_id UUID NOT NULL,
+                user_query VARCHAR NOT NULL,
+                predicted_action VARCHAR(32),
+                used_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, used_at)
+            ) PARTITION BY RANGE (used_at)
+        """))
+        await connection.execute(text("CREATE TABLE user_request_logs_default PARTITION OF user_request_logs DEFAULT"))
+    yield db_engine
+    async with db_engine.begin() as connection:
+        await connection.execute(text("DROP TABLE IF EXISTS user_request_logs CASCADE"))
+
+
+async def insert_log(engine, used_at: datetime.datetime) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("""
+                INSERT INTO user_request_logs (id, user_id, user_query, used_at)
+                VALUES (:id, :user_id, 'запрос', :used_at)
+            """),
+            dict(id=uuid.uuid4(), user_id=uuid.uuid4(), used_at=used_at)
+        )
+
+
+async def partition_rows(engine, table: str) -> int:
+    async with engine.connect() as connection:
+        return await connection.scalar(text(f"SELECT count(*) FROM {table}"))
+
+
+@pytest.mark.asyncio
+async def test_create_partitions(logs_engine, session_maker):
+    async with session_maker() as session:
+        created = await UserRepository(session).ensure_user_log_partitions(months_ahead=2)
+    async with session_maker() as session:
+        created_again = await UserRepository(session).ensure_user_log_partitions(months_ahead=2)
+
+    assert created == [partition_name(month_start(months)) for months in range(3)]
+    assert created_again == []
+
+
+@pytest.mark.asyncio
+async def test_rows_moved_from_default(logs_engine, session_maker):
+    """Строки будущего месяца уже в default (воркер не работал) — переносятся, партиция создается"""
+    next_month: datetime.date = month_start(1)
+    used_at = datetime.datetime.combine(next_month, datetime.time(12), datetime.UTC)
+    await insert_log(logs_engine, used_at)
+    await insert_log(logs_engine, used_at + datetime.timedelta(days=3))
+
+    async with session_maker() as session:
+        created = await UserRepository(session).ensure_user_log_partitions(months_ahead=2)
+
+    assert created == [partition_name(month_start(months)) for months in range(3)]
+    assert await partition_rows(logs_engine, partition_name(next_month)) == 2
+    assert await partition_rows(logs_engine, "user_request_logs_default") == 0
+    assert await partition_rows(logs_engine, "user_request_logs") == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_month_does_not_roll_back_others(logs_engine, session_maker):
+    """Месяц, который не создать (пересечение с чужой партицией), пропускается — остальные создаются"""
+    current, next_month, after_next = month_start(0), month_start(1), month_start(2)
+    async with logs_engine.begin() as connection:
+        # партиция с нестандартными границами: пересекается со следующим месяцем
+        await connection.execute(text(f"""
+            CREATE TABLE user_request_logs_manual PARTITION OF user_request_logs
+            FOR VALUES FROM ('{next_month + datetime.timedelta(days=10)}') TO ('{after_next}')
+        """))
+
+    async with session_maker() as session:
+        created = await UserRepository(session).ensure_user_log_partitions(months_ahead=2)
+
+    assert created == [partition_name(current), partition_name(after_next)]
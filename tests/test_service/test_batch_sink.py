@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from typing import Sequence
+
+import pytest
+
+from drug_search.core.schemas import UserRequestLogSchema
+from drug_search.core.services.batch_sink import BatchSink
+from drug_search.core.services.user_log_sink import UserLogSink
+
+
+class Writer:
+    """Записанные пачки; release — пока не выставлен, запись пачки висит"""
+
+    def __init__(self, blocked: bool = False):
+        self.batches: list[list] = []
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def __call__(self, batch: Sequence) -> None:
+        await self.release.wait()
+        self.batches.append(list(batch))
+
+
+def make_sink(writer: Writer, **kwargs) -> BatchSink[int]:
+    params: dict = dict(max_size=100, batch_size=3, flush_interval=10, put_timeout=0.05)
+    params.update(kwargs)
+    return BatchSink(name="test_sink", writer=writer, **params)
+
+
+@pytest.mark.asyncio
+async def test_flush_by_batch_size():
+    """Пачка пишется, как только набрано batch_size, не дожидаясь flush_interval"""
+    writer = Writer()
+    sink = make_sink(writer)
+
+    for item in range(7):
+        assert await sink._put(item)
+    await asyncio.sleep(0.01)
+
+    assert writer.batches == [[0, 1, 2], [3, 4, 5]]
+    # stop не ждет flush_interval ради неполной пачки
+    await asyncio.wait_for(sink.stop(), timeout=1)
+    assert writer.batches[-1] == [6]
+
+
+@pytest.mark.asyncio
+async def test_flush_by_interval():
+    """Неполная пачка пишется через flush_interval"""
+    writer = Writer()
+    sink = make_sink(writer, flush_interval=0.05)
+
+    await sink._put(1)
+    await asyncio.sleep(0.01)
+    assert writer.batches == []
+
+    await asyncio.sleep(0.1)
+    assert writer.batches == [[1]]
+    assert sink.stats()["written"] == 1
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_drop_after_put_timeout():
+    """Очередь заполнена дольше put_timeout — запись отбрасывается"""
+    writer = Writer(blocked=True)
+    sink = make_sink(writer, max_size=2, batch_size=1)
+
+    assert await sink._put(1)  # забрана в пачку, запись висит
+    await asyncio.sleep(0.01)
+    assert await sink._put(2)
+    assert await sink._put(3)
+    assert not await sink._put(4)
+    assert not sink._put_nowait(5)
+
+    assert sink.stats()["dropped"] == 2
+    writer.release.set()
+    await sink.stop()
+    assert writer.batches == [[1], [2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queue():
+    """stop дописывает всю очередь пачками по batch_size, не дожидаясь flush_interval"""
+    writer = Writer(blocked=True)
+    sink = make_sink(writer, flush_interval=60)
+    for item in range(8):
+        sink._put_nowait(item)
+    await asyncio.sleep(0.01)
+
+    writer.release.set()
+    await asyncio.wait_for(sink.stop(), timeout=1)
+
+    assert writer.batches == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert sink.stats() == {"queued": 0, "written": 8, "dropped": 0, "failed_batches": 0}
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_does_not_stop_sink():
+    batches: list[list[int]] = []
+
+    async def writer(batch: Sequence[int]) -> None:
+        if 0 in batch:
+            raise RuntimeError("БД недоступна")
+        batches.append(list(batch))
+
+    sink = BatchSink(name="test_sink", writer=writer, max_size=10, batch_size=2, flush_interval=10, put_timeout=1)
+    for item in range(4):
+        await sink._put(item)
+    await sink.stop()
+
+    assert batches == [[2, 3]]
+    assert sink.stats()["failed_batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_log_sink():
+    writer = Writer()
+    sink = UserLogSink(writer=writer, max_size=10, batch_size=10, flush_interval=10, put_timeout=1)
+    user_id = uuid.uuid4()
+
+    await sink.put(user_id, "парацетамол", predicted_action="drug_search")
+    await sink.stop()
+
+    [[log]] = writer.batches
+    assert isinstance(log, UserRequestLogSchema)
+    assert log.user_id == user_id
+    assert log.user_query == "парацетамол"
+    assert log.predicted_action == "drug_search"
+    assert log.used_at.tzinfo is not None
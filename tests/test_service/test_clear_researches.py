@@ -0,0 +1,122 @@
+import datetime
+import json
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+
+from drug_search.config import config
+from drug_search.core.schemas import (ClearResearchesRequest, ClearResearchesResult, DrugResearchSchema,
+                                      DrugResearchesAssistantResponse,
+                                      PubmedResearchSchema)
+from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.models_service import drug_service as drug_service_module
+from drug_search.core.services.models_service.drug_service import DrugService
+from drug_search.core.utils.exceptions import AssistantResponseError
+
+SEARCHED_AT = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+
+def pubmed_research(doi: str) -> PubmedResearchSchema:
+    return PubmedResearchSchema(
+        title=f"Title {doi}", authors=["John Doe"], doi=doi, journal="Journal",
+        publication_date=datetime.date(2025, 1, 1), pubmed_id=doi,
+    )
+
+
+def clear_research(doi: str, interest: float = 0.5) -> DrugResearchSchema:
+    return DrugResearchSchema(
+        header=f"Header {doi}", description="описание", publication_date="2025-01-01",
+        url=f"https://doi.org/{doi}", journal="Journal", doi=doi, interest=interest, research_type="other",
+    )
+
+
+@pytest.fixture
+def assistant(monkeypatch):
+    """AssistantService, у которого часть с DOI "fail*" падает, остальные — возвращают свои статьи"""
+    monkeypatch.setattr(config, "LLM_RESEARCH_CHUNK_SIZE", 2)
+    service = AssistantService()
+
+    async def get_response(input_query: str, **kwargs):
+        dois: list[str] = [research["doi"] for research in json.loads(input_query)["researches"]]
+        if any(doi.startswith("fail") for doi in dois):
+            raise AssistantResponseError("нейронка не ответила")
+        return DrugResearchesAssistantResponse(
+            researches=[clear_research(doi, interest=0.1 * index) for index, doi in enumerate(dois, 1)]
+        )
+
+    service.get_response = get_response
+    return service
+
+
+# [ get_clear_researches ]
+@pytest.mark.asyncio
+async def test_partial_failure_merge(assistant):
+    """Часть с ошибкой пропускается, DOI ее статей возвращаются в failed_dois"""
+    request = ClearResearchesRequest(
+        drug_name="aspirin",
+        researches=[pubmed_research(doi) for doi in ("a", "b", "fail1", "c", "d", "e")]
+    )
+
+    result = await assistant.get_clear_researches(request)
+
+    assert [research.doi for research in result.researches] == ["b", "e", "a", "d"]
+    assert sorted(result.failed_dois) == ["c", "fail1"]
+
+
+@pytest.mark.asyncio
+async def test_all_chunks_failed(assistant):
+    request = ClearResearchesRequest(drug_name="aspirin", researches=[pubmed_research("fail1")])
+
+    with pytest.raises(AssistantResponseError):
+        await assistant.get_clear_researches(request)
+
+
+@pytest.mark.asyncio
+async def test_no_failures(assistant):
+    request = ClearResearchesRequest(drug_name="aspirin", researches=[pubmed_research("a")])
+
+    result = await assistant.get_clear_researches(request)
+
+    assert [research.doi for research in result.researches] == ["a"]
+    assert result.failed_dois == []
+
+
+# [ DrugService: watermark ]
+@pytest.fixture
+def drug_service(monkeypatch):
+    repo = AsyncMock()
+    repo.DrugCreation.get_researches_watermark = AsyncMock(return_value=SEARCHED_AT)
+    pubmed_service = AsyncMock()
+    monkeypatch.setattr(drug_service_module, "get_redis_service", lambda: AsyncMock())
+    monkeypatch.setattr(drug_service_module, "get_telegram_service", AsyncMock(return_value=AsyncMock()))
+    return DrugService(repo=repo, pubmed_service=pubmed_service)
+
+
+@pytest.mark.asyncio
+async def test_watermark_kept_on_partial_failure(drug_service):
+    """Необработанные статьи — дата поиска не сдвигается (иначе mindate их больше не найдет)"""
+    drug_service.pubmed_service.get_researches_clearly.return_value = ClearResearchesResult(
+        researches=[clear_research("a")], failed_dois=["b"]
+    )
+
+    await drug_service._update_drug_researches_background(uuid.uuid4(), "aspirin", "1")
+
+    upsert = drug_service.repo.DrugCreation.upsert_researches
+    assert upsert.await_args.kwargs["searched_at"] == SEARCHED_AT
+    assert [research.doi for research in upsert.await_args.kwargs["researches"].researches] == ["a"]
+    kwargs = drug_service.pubmed_service.get_researches_clearly.await_args.kwargs
+    assert kwargs["mindate"] == SEARCHED_AT.date()
+    assert kwargs["get_known_dois"] == drug_service.repo.DrugCreation.get_known_research_dois
+
+
+@pytest.mark.asyncio
+async def test_watermark_moved_when_all_processed(drug_service):
+    drug_service.pubmed_service.get_researches_clearly.return_value = ClearResearchesResult(
+        researches=[clear_research("a")]
+    )
+
+    await drug_service._update_drug_researches_background(uuid.uuid4(), "aspirin", "1")
+
+    searched_at = drug_service.repo.DrugCreation.upsert_researches.await_args.kwargs["searched_at"]
+    assert searched_at > SEARCHED_AT
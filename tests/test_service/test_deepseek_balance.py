@@ -0,0 +1,135 @@
+import aiohttp
+import pytest
+
+from drug_search.core.services import deepseek_balance as deepseek_balance_module
+from drug_search.core.services.deepseek_balance import DeepSeekBalanceGuard
+from drug_search.core.utils.exceptions import APIError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(deepseek_balance_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def guard(clock) -> DeepSeekBalanceGuard:
+    guard = DeepSeekBalanceGuard(
+        api_key="x", minimum_balance=1.0, refresh_interval=60, failure_threshold=3, open_seconds=30
+    )
+    guard._ensure_refresher = lambda: None  # баланс обновляется в тестах вручную
+    return guard
+
+
+def open_breaker(guard: DeepSeekBalanceGuard) -> None:
+    for _ in range(guard.failure_threshold):
+        guard.check()
+        guard.record_failure()
+
+
+# [ CIRCUIT BREAKER ]
+def test_closed_until_threshold(guard):
+    guard.record_failure()
+    guard.record_failure()
+    guard.check()
+
+    guard.record_success()
+    guard.record_failure()
+    guard.record_failure()
+    guard.check()
+    assert not guard.stats()["is_open"]
+
+
+def test_opens_after_threshold(guard, clock):
+    open_breaker(guard)
+
+    assert guard.stats()["is_open"]
+    clock.now += 29
+    with pytest.raises(APIError):
+        guard.check()
+
+
+def test_half_open_trial_success_closes(guard, clock):
+    """После open_seconds пропускается один пробный запрос, остальные отклоняются до его результата"""
+    open_breaker(guard)
+    clock.now += 30
+
+    guard.check()  # пробный запрос
+    with pytest.raises(APIError):
+        guard.check()
+
+    guard.record_success()
+    guard.check()
+    assert not guard.stats()["is_open"]
+    assert guard.stats()["failures"] == 0
+
+
+def test_half_open_trial_failure_reopens(guard, clock):
+    open_breaker(guard)
+    clock.now += 30
+
+    guard.check()
+    guard.record_failure()
+
+    assert guard.stats()["is_open"]
+    clock.now += 29
+    with pytest.raises(APIError):
+        guard.check()
+    clock.now += 1
+    guard.check()
+
+
+def test_half_open_without_result(guard, clock):
+    """Пробный запрос без результата — через open_seconds пропускается следующий"""
+    open_breaker(guard)
+    clock.now += 30
+    guard.check()
+
+    clock.now += 30
+    guard.check()
+
+
+# [ BALANCE ]
+@pytest.mark.asyncio
+async def test_low_balance_blocks(guard):
+    async def fetch_balance() -> float:
+        return 0.5
+
+    guard.fetch_balance = fetch_balance
+    await guard.refresh()
+
+    with pytest.raises(APIError):
+        guard.check()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [aiohttp.ClientError("down"), TimeoutError(), KeyError("balance_infos")])
+async def test_balance_errors_do_not_open_breaker(guard, error):
+    """Ошибки /user/balance не открывают breaker, остается последний известный баланс"""
+    balances: list = [10.0]
+
+    async def fetch_balance() -> float:
+        if balances:
+            return balances.pop()
+        raise error
+
+    guard.fetch_balance = fetch_balance
+    await guard.refresh()
+    for _ in range(guard.failure_threshold * 2):
+        await guard.refresh()
+
+    guard.check()
+    stats = guard.stats()
+    assert stats["balance"] == 10.0
+    assert stats["balance_errors"] == guard.failure_threshold * 2
+    assert stats["failures"] == 0
+    assert not stats["is_open"]
@@ -0,0 +1,311 @@
+import asyncio
+import contextlib
+import copy
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import pytest
+
+from drug_search.config import config
+from drug_search.core.lexicon import DrugMenu, DRUG_SECTION_STATUS
+from drug_search.core.services.models_service.drug_service import DrugService, DRUG_CREATION_SECTIONS
+from drug_search.core.services.tasks_logic import arq_tasks
+
+READY, PENDING, FAILED = DRUG_SECTION_STATUS.READY, DRUG_SECTION_STATUS.PENDING, DRUG_SECTION_STATUS.FAILED
+
+
+@dataclass
+class FakeDrug:
+    """Поля DrugSchema, которые читает DrugService при поэтапном создании"""
+    id: uuid.UUID
+    name: str
+    section_statuses: dict[DrugMenu, DRUG_SECTION_STATUS] = field(default_factory=dict)
+    section_versions: dict[DrugMenu, int] = field(default_factory=dict)
+    sections: dict[DrugMenu, str] = field(default_factory=dict)
+    researches: list = field(default_factory=list)
+
+
+class FakeDrugRepo:
+    """Репозиторий в памяти: каждый метод — отдельный commit, наружу отдаются копии (как схемы из БД)"""
+
+    def __init__(self):
+        self.drugs: dict[uuid.UUID, FakeDrug] = {}
+        self.DrugCreation = self
+
+    def _schema(self, drug_id: uuid.UUID) -> FakeDrug | None:
+        return copy.deepcopy(self.drugs.get(drug_id))
+
+    async def get(self, drug_id: uuid.UUID) -> FakeDrug | None:
+        return self._schema(drug_id)
+
+    async def get_with_all_relationships(self, drug_id: uuid.UUID) -> FakeDrug | None:
+        return self._schema(drug_id)
+
+    async def save_briefly_info(self, briefly_info: str, drug_id=None, mark_sections_pending: bool = True) -> FakeDrug:
+        drug = self.drugs.get(drug_id) or FakeDrug(id=drug_id or uuid.uuid4(), name=briefly_info)
+        self.drugs[drug.id] = drug
+        if mark_sections_pending:
+            drug.section_statuses = {section: PENDING for section in DRUG_CREATION_SECTIONS}
+        return self._schema(drug.id)
+
+    async def save_section(self, drug_id: uuid.UUID, section: DrugMenu, assistant_response: str) -> FakeDrug | None:
+        drug: FakeDrug | None = self.drugs.get(drug_id)
+        if drug is None:
+            return None
+        drug.section_statuses[section] = READY
+        if drug.sections.get(section) != assistant_response:
+            drug.sections[section] = assistant_response
+            drug.section_versions[section] = drug.section_versions.get(section, 0) + 1
+        return self._schema(drug_id)
+
+    async def set_section_status(self, drug_id: uuid.UUID, section: DrugMenu, status: DRUG_SECTION_STATUS):
+        drug: FakeDrug | None = self.drugs.get(drug_id)
+        if drug is None:
+            return None
+        drug.section_statuses[section] = status
+        return self._schema(drug_id)
+
+
+class FakeDrugCreationAssistant:
+    """Ответы ассистента по разделам; исключение в responses — раздел не создан"""
+
+    def __init__(self, responses: dict[DrugMenu, object] | None = None):
+        self.responses: dict[DrugMenu, object] = responses or {}
+        self.calls: list[DrugMenu] = []
+
+    async def _respond(self, section: DrugMenu, drug_name: str):
+        self.calls.append(section)
+        await asyncio.sleep(0)
+        response = self.responses.get(section, f"{section.name.lower()} {drug_name}")
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def get_drug_briefly_info(self, drug_name: str):
+        self.calls.append(DrugMenu.BRIEFLY)
+        return drug_name
+
+    async def get_drug_dosages(self, drug_name: str):
+        return await self._respond(DrugMenu.DOSAGES, drug_name)
+
+    async def get_analogs(self, drug_name: str):
+        return await self._respond(DrugMenu.ANALOGS, drug_name)
+
+    async def get_metabolism(self, drug_name: str):
+        return await self._respond(DrugMenu.METABOLISM, drug_name)
+
+    async def get_pathways(self, drug_name: str):
+        return await self._respond(DrugMenu.MECHANISM, drug_name)
+
+    async def get_combinations(self, drug_name: str):
+        return await self._respond(DrugMenu.COMBINATIONS, drug_name)
+
+
+@pytest.fixture
+def repo():
+    return FakeDrugRepo()
+
+
+@pytest.fixture
+def drug_creation():
+    return FakeDrugCreationAssistant()
+
+
+@pytest.fixture
+def drug_service(repo, drug_creation):
+    return DrugService(repo=repo, assistant_service=SimpleNamespace(drug_creation=drug_creation))
+
+
+# [ update_or_create_drug / _save_sections ]
+@pytest.mark.asyncio
+async def test_create_all_sections_ready(drug_service, drug_creation):
+    """PENDING -> READY: карточка после краткой информации, затем каждый раздел"""
+    events: list = []
+
+    async def on_briefly_saved(drug):
+        events.append(("briefly", dict(drug.section_statuses)))
+
+    async def on_section_saved(drug, section):
+        events.append((section, drug.section_statuses[section]))
+
+    drug = await drug_service.update_or_create_drug(
+        "aspirin", user_telegram_id="1", on_briefly_saved=on_briefly_saved, on_section_saved=on_section_saved
+    )
+
+    assert events[0] == ("briefly", {section: PENDING for section in DRUG_CREATION_SECTIONS})
+    assert sorted(events[1:]) == sorted((section, READY) for section in DRUG_CREATION_SECTIONS)
+    assert drug.section_statuses == {section: READY for section in DRUG_CREATION_SECTIONS}
+    assert drug.sections[DrugMenu.DOSAGES] == "dosages aspirin"
+
+
+@pytest.mark.asyncio
+async def test_failed_section_does_not_cancel_others(drug_service, drug_creation, repo):
+    """PENDING -> FAILED: ошибка раздела не отменяет остальные"""
+    drug_creation.responses[DrugMenu.ANALOGS] = RuntimeError("невалидный ответ")
+    saved: list[DrugMenu] = []
+
+    async def on_section_saved(drug, section):
+        saved.append(section)
+
+    drug = await drug_service.update_or_create_drug("aspirin", user_telegram_id="1", on_section_saved=on_section_saved)
+
+    assert drug.section_statuses[DrugMenu.ANALOGS] == FAILED
+    assert repo.drugs[drug.id].section_statuses[DrugMenu.ANALOGS] == FAILED
+    assert set(saved) == set(DRUG_CREATION_SECTIONS) - {DrugMenu.ANALOGS}
+    assert DrugMenu.ANALOGS not in drug.sections
+
+
+@pytest.mark.asyncio
+async def test_briefly_error_cancels_sections(drug_service, drug_creation, repo, monkeypatch):
+    """Краткая информация не получена — запросы разделов отменяются, препарат не записывается"""
+    async def get_drug_briefly_info(drug_name: str):
+        await asyncio.sleep(0)
+        raise RuntimeError("API недоступен")
+
+    monkeypatch.setattr(drug_creation, "get_drug_briefly_info", get_drug_briefly_info)
+
+    with pytest.raises(RuntimeError):
+        await drug_service.update_or_create_drug("aspirin", user_telegram_id="1")
+    await asyncio.sleep(0.01)
+
+    assert repo.drugs == {}
+    assert drug_creation.calls == list(DRUG_CREATION_SECTIONS)  # стартовали, но отменены до записи
+
+
+@pytest.mark.asyncio
+async def test_update_keeps_ready_section_on_error(drug_service, drug_creation, repo):
+    """Обновление: ошибка раздела, уже записанного раньше, не помечает его failed — старые данные видны"""
+    drug = await drug_service.update_or_create_drug("aspirin", user_telegram_id="1")
+    drug_creation.responses[DrugMenu.DOSAGES] = RuntimeError("невалидный ответ")
+    failed: list[DrugMenu] = []
+
+    async def on_section_failed(drug, section):
+        failed.append(section)
+
+    refreshed = await drug_service.refresh_drug(
+        drug.id, user_telegram_id="1", sections=[DrugMenu.DOSAGES], on_section_failed=on_section_failed
+    )
+
+    assert failed == [DrugMenu.DOSAGES]
+    assert refreshed.section_statuses[DrugMenu.DOSAGES] == READY
+    assert refreshed.sections[DrugMenu.DOSAGES] == "dosages aspirin"
+
+
+# [ resume_drug_creation ]
+@pytest.mark.asyncio
+async def test_resume_after_commit(drug_service, drug_creation, repo):
+    """Повтор задачи после commit краткой информации: досоздаются только неготовые разделы"""
+    drug = await repo.save_briefly_info("aspirin")
+    await repo.save_section(drug.id, DrugMenu.DOSAGES, "dosages aspirin")
+    await repo.save_section(drug.id, DrugMenu.ANALOGS, "analogs aspirin")
+    await repo.set_section_status(drug.id, DrugMenu.METABOLISM, FAILED)
+    briefly_saved: list = []
+
+    async def on_briefly_saved(saved):
+        briefly_saved.append(saved.id)
+
+    resumed = await drug_service.resume_drug_creation(drug.id, user_telegram_id="1", on_briefly_saved=on_briefly_saved)
+
+    assert briefly_saved == [drug.id]
+    assert DrugMenu.BRIEFLY not in drug_creation.calls
+    assert sorted(drug_creation.calls) == sorted([DrugMenu.METABOLISM, DrugMenu.MECHANISM, DrugMenu.COMBINATIONS])
+    assert resumed.section_statuses == {section: READY for section in DRUG_CREATION_SECTIONS}
+    assert resumed.section_versions[DrugMenu.DOSAGES] == 1
+
+
+@pytest.mark.asyncio
+async def test_resume_deleted_drug(drug_service, drug_creation):
+    assert await drug_service.resume_drug_creation(uuid.uuid4(), user_telegram_id="1") is None
+    assert drug_creation.calls == []
+
+
+# [ complete_drug_sections ]
+@pytest.mark.asyncio
+async def test_complete_ready_drug_no_requests(drug_service, drug_creation, repo):
+    drug = await drug_service.update_or_create_drug("aspirin", user_telegram_id="1")
+    drug_creation.calls.clear()
+
+    completed = await drug_service.complete_drug_sections(drug.id)
+
+    assert completed.section_statuses == drug.section_statuses
+    assert drug_creation.calls == []
+
+
+@pytest.mark.asyncio
+async def test_complete_section_deleted_drug(drug_service, drug_creation, repo):
+    """Препарат удален во время пересоздания разделов — запись прекращается"""
+    drug = await repo.save_briefly_info("aspirin")
+    del repo.drugs[drug.id]
+
+    assert await drug_service._save_sections(
+        drug, drug_service._start_section_requests(drug.name, [DrugMenu.DOSAGES])
+    ) == drug
+
+
+# [ drug_sections_retry ]
+class FakeArqPool:
+    def __init__(self):
+        self.jobs: list[tuple] = []
+
+    async def enqueue_job(self, function: str, *args, **kwargs):
+        self.jobs.append((function, *args, kwargs["_defer_by"]))
+
+
+@pytest.fixture
+def arq_ctx(drug_service, monkeypatch):
+    invalidated: list = []
+
+    async def invalidate_drug(drug_id, sections):
+        invalidated.extend(sections)
+
+    async def get_redis_service():
+        return SimpleNamespace(invalidate_drug=invalidate_drug)
+
+    class Container:
+        @staticmethod
+        async def get_drug_service():
+            return drug_service
+
+        @property
+        def redis_service(self):
+            return get_redis_service()
+
+    @contextlib.asynccontextmanager
+    async def get_service_container():
+        yield Container()
+
+    monkeypatch.setattr(arq_tasks, "get_service_container", get_service_container)
+    monkeypatch.setattr(config, "DRUG_SECTION_RETRY_ATTEMPTS", 2)
+    monkeypatch.setattr(config, "DRUG_SECTION_RETRY_DELAY", 60)
+    return {"redis": FakeArqPool(), "invalidated": invalidated}
+
+
+@pytest.mark.asyncio
+async def test_sections_retry_completes_pending(drug_service, drug_creation, repo, arq_ctx):
+    """Повтор досоздает failed / pending разделы; все готовы — следующий повтор не ставится"""
+    drug_creation.responses[DrugMenu.ANALOGS] = RuntimeError("невалидный ответ")
+    drug = await drug_service.update_or_create_drug("aspirin", user_telegram_id="1")
+    repo.drugs[drug.id].section_statuses[DrugMenu.COMBINATIONS] = PENDING  # воркер упал до записи раздела
+    del drug_creation.responses[DrugMenu.ANALOGS]
+    drug_creation.calls.clear()
+
+    await arq_tasks.drug_sections_retry(arq_ctx, drug.id, "1", attempt=1)
+
+    assert sorted(drug_creation.calls) == sorted([DrugMenu.ANALOGS, DrugMenu.COMBINATIONS])
+    assert repo.drugs[drug.id].section_statuses == {section: READY for section in DRUG_CREATION_SECTIONS}
+    assert set(arq_ctx["invalidated"]) == {DrugMenu.ANALOGS}  # COMBINATIONS не изменился
+    assert arq_ctx["redis"].jobs == []
+
+
+@pytest.mark.asyncio
+async def test_sections_retry_attempts(drug_service, drug_creation, repo, arq_ctx):
+    """Раздел снова не создан — следующий повтор с растущей задержкой, до DRUG_SECTION_RETRY_ATTEMPTS"""
+    drug_creation.responses[DrugMenu.ANALOGS] = RuntimeError("невалидный ответ")
+    drug = await drug_service.update_or_create_drug("aspirin", user_telegram_id="1")
+
+    await arq_tasks.drug_sections_retry(arq_ctx, drug.id, "1", attempt=1)
+    await arq_tasks.drug_sections_retry(arq_ctx, drug.id, "1", attempt=2)
+
+    assert arq_ctx["redis"].jobs == [("drug_sections_retry", drug.id, "1", 2, 120)]
+    assert repo.drugs[drug.id].section_statuses[DrugMenu.ANALOGS] == FAILED
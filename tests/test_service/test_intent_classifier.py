@@ -0,0 +1,168 @@
+import pytest
+
+from drug_search.core.lexicon import ACTIONS_FROM_ASSISTANT
+from drug_search.core.schemas import SelectActionResponse
+from drug_search.core.services.intent_classifier import (IntentClassifier, IntentPreClassifier, DISABLED_THRESHOLD,
+                                                         char_ngrams)
+
+QUESTION: str = ACTIONS_FROM_ASSISTANT.QUESTION.value
+SPAM: str = ACTIONS_FROM_ASSISTANT.SPAM.value
+DRUG_SEARCH: str = ACTIONS_FROM_ASSISTANT.DRUG_SEARCH.value
+
+TRAIN_SAMPLES: list[tuple[str, str]] = [
+    ("можно ли пить алкоголь после антибиотиков", QUESTION),
+    ("можно ли совмещать кофе и таблетки", QUESTION),
+    ("почему болит голова после кофе", QUESTION),
+    ("почему нельзя пить алкоголь с таблетками", QUESTION),
+    ("что лучше пить при простуде", QUESTION),
+    ("что делать если болит голова", QUESTION),
+    ("ааааааа", SPAM),
+    ("ыыыыыы ыыы", SPAM),
+    ("аааа ааа аааа", SPAM),
+    ("ыыыы ыыыыы", SPAM),
+    ("парацетамол", DRUG_SEARCH),
+    ("ибупрофен", DRUG_SEARCH),
+    ("парацетамол таблетки", DRUG_SEARCH),
+    ("ибупрофен 400", DRUG_SEARCH),
+]
+
+
+@pytest.fixture
+def classifier() -> IntentClassifier:
+    return IntentClassifier.train(TRAIN_SAMPLES, min_count=1)
+
+
+def test_char_ngrams_normalized():
+    """Регистр и лишние пробелы не влияют на признаки, границы слов входят в n-граммы"""
+    assert char_ngrams("  Кофе   ЧАЙ ") == char_ngrams("кофе чай")
+    assert " к" in char_ngrams("кофе")
+
+
+def test_train(classifier):
+    assert classifier.classes == sorted({DRUG_SEARCH, QUESTION, SPAM})
+    assert classifier.meta["samples"] == len(TRAIN_SAMPLES)
+    assert classifier.meta["class_counts"][QUESTION] == 6
+    assert classifier.threshold == DISABLED_THRESHOLD
+
+
+def test_train_min_count():
+    """Редкие n-граммы отбрасываются"""
+    full = IntentClassifier.train(TRAIN_SAMPLES, min_count=1)
+    pruned = IntentClassifier.train(TRAIN_SAMPLES, min_count=3)
+
+    assert pruned.meta["vocab_size"] < full.meta["vocab_size"]
+    assert set(pruned.feature_log_prob) < set(full.feature_log_prob)
+
+
+def test_predict(classifier):
+    assert classifier.predict("можно ли пить кофе с таблетками")[0] == QUESTION
+    assert classifier.predict("ааааа ыыыы")[0] == SPAM
+    assert classifier.predict("парацетамол 500")[0] == DRUG_SEARCH
+
+    probs = classifier.predict_proba("можно ли пить кофе")
+    assert sum(probs.values()) == pytest.approx(1.0)
+    assert max(probs, key=probs.get) == QUESTION
+
+
+def test_predict_unknown_text_uses_prior(classifier):
+    """Без известных n-грамм — распределение по частоте классов"""
+    probs = classifier.predict_proba("zzzz")
+
+    assert max(probs, key=probs.get) == QUESTION
+    assert probs[QUESTION] == pytest.approx(6 / len(TRAIN_SAMPLES))
+
+
+def test_calibrate(classifier):
+    """Порог — минимальная уверенность, при которой локальные ответы не ниже target_precision"""
+    holdout: list[tuple[str, str]] = [
+        ("можно ли пить кофе", QUESTION),
+        ("почему болит голова", QUESTION),
+        ("ааааа", SPAM),
+        ("ыыыыы", SPAM),
+        # локально похоже на спам, нейронка ответила иначе — локальный ответ был бы ошибкой
+        ("ааа почему", QUESTION),
+    ]
+
+    metrics = classifier.calibrate(holdout, target_precision=1.0)
+
+    assert classifier.threshold == metrics["threshold"]
+    assert metrics["precision"] == 1.0
+    assert 0 < metrics["coverage"] <= 4 / len(holdout)
+    # ошибочный локальный ответ — ниже порога
+    predicted, confidence = classifier.predict("ааа почему")
+    assert predicted == SPAM
+    assert confidence < classifier.threshold
+
+
+def test_calibrate_unreachable_precision(classifier):
+    """Точность недостижима — локальные ответы выключены"""
+    metrics = classifier.calibrate([("можно ли пить кофе", SPAM)], target_precision=1.0)
+
+    assert classifier.threshold == DISABLED_THRESHOLD
+    assert metrics["coverage"] == 0.0
+
+
+def test_save_load(classifier, tmp_path):
+    classifier.calibrate(TRAIN_SAMPLES, target_precision=0.9)
+    path: str = str(tmp_path / "models" / "intent_classifier.json")
+
+    classifier.save(path)
+    loaded = IntentClassifier.load(path)
+
+    assert loaded.threshold == classifier.threshold
+    assert loaded.predict("можно ли пить кофе") == classifier.predict("можно ли пить кофе")
+
+
+# [ IntentPreClassifier ]
+@pytest.mark.asyncio
+async def test_pre_classifier_local_answer(classifier, tmp_path):
+    """Уверенный ответ из LOCAL_ACTIONS — без нейронки"""
+    path: str = str(tmp_path / "intent_classifier.json")
+    classifier.save(path)
+    pre_classifier = IntentPreClassifier(path, min_confidence=0.5)
+    pre_classifier.load()
+
+    async def fallback() -> SelectActionResponse:
+        raise AssertionError("нейронка не должна вызываться")
+
+    response, is_local = await pre_classifier.predict_action("можно ли пить кофе с таблетками", fallback)
+
+    assert is_local
+    assert response.action == ACTIONS_FROM_ASSISTANT.QUESTION
+    assert pre_classifier.stats()["local_answers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pre_classifier_fallback(classifier, tmp_path):
+    """Поиск препарата требует названия — всегда нейронка, согласие с ней считается"""
+    path: str = str(tmp_path / "intent_classifier.json")
+    classifier.save(path)
+    pre_classifier = IntentPreClassifier(path, min_confidence=0.5)
+    pre_classifier.load()
+
+    async def fallback() -> SelectActionResponse:
+        return SelectActionResponse(action=ACTIONS_FROM_ASSISTANT.DRUG_SEARCH, drug_name="paracetamol")
+
+    response, is_local = await pre_classifier.predict_action("парацетамол 500", fallback)
+
+    assert not is_local
+    assert response.drug_name == "paracetamol"
+    stats = pre_classifier.stats()
+    assert stats["llm_answers"] == 1
+    assert stats["agreement_on_llm_answers"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_pre_classifier_without_artifact(tmp_path):
+    pre_classifier = IntentPreClassifier(str(tmp_path / "missing.json"))
+    pre_classifier.load()
+
+    async def fallback() -> SelectActionResponse:
+        return SelectActionResponse(action=ACTIONS_FROM_ASSISTANT.OTHER)
+
+    response, is_local = await pre_classifier.predict_action("можно ли пить кофе", fallback)
+
+    assert not is_local
+    assert response.action == ACTIONS_FROM_ASSISTANT.OTHER
+    assert pre_classifier.threshold == DISABLED_THRESHOLD
+    assert pre_classifier.stats()["loaded"] is False
@@ -0,0 +1,136 @@
+import json
+from enum import Enum
+from typing import Literal, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from drug_search.core.services.json_repair import (JsonRepairer, close_truncated, strip_code_fence, OUTCOME_VALID,
+                                                   OUTCOME_REPAIRED, OUTCOME_FAILED)
+
+
+class Danger(str, Enum):
+    LOW = "LOW"
+    HIGH = "HIGH"
+
+
+class Combination(BaseModel):
+    substance: str
+    danger: Danger
+    kind: Literal["good", "bad"] = "good"
+
+
+class CombinationsResponse(BaseModel):
+    combinations: list[Combination]
+    note: Optional[str] = None
+
+
+VALID: dict = {
+    "combinations": [
+        {"substance": "кофеин", "danger": "LOW", "kind": "good"},
+        {"substance": "алкоголь", "danger": "HIGH", "kind": "bad"},
+    ],
+    "note": "ok",
+}
+VALID_TEXT: str = json.dumps(VALID, ensure_ascii=False)
+
+
+@pytest.fixture
+def repairer() -> JsonRepairer:
+    return JsonRepairer()
+
+
+# [ strip_code_fence / close_truncated ]
+def test_strip_code_fence():
+    assert strip_code_fence(f"```json\n{VALID_TEXT}\n```") == VALID_TEXT
+    assert strip_code_fence(VALID_TEXT) == VALID_TEXT
+
+
+def test_close_truncated_not_truncated():
+    """Закрытый JSON — обрезать нечего"""
+    assert close_truncated(VALID_TEXT) == []
+
+
+def test_close_truncated_variants():
+    """Первый вариант — до последнего законченного значения, дальше — до законченных элементов массивов"""
+    text: str = '{"items": [{"a": 1, "b": "x"}, {"a": 2, "b": "y'
+
+    variants: list[str] = close_truncated(text)
+
+    assert [json.loads(variant) for variant in variants] == [
+        {"items": [{"a": 1, "b": "x"}, {"a": 2}]},
+        {"items": [{"a": 1, "b": "x"}]},
+    ]
+
+
+def test_close_truncated_number_without_delimiter():
+    """Число в конце могло оборваться — не считается законченным"""
+    variants: list[str] = close_truncated('{"a": 1, "b": 12')
+
+    assert json.loads(variants[0]) == {"a": 1}
+
+
+# [ repair ]
+def test_repair_code_fence(repairer):
+    response = repairer.repair(f"```json\n{VALID_TEXT}\n```", CombinationsResponse)
+
+    assert response == CombinationsResponse.model_validate(VALID)
+    assert repairer.fixes["code_fence"] == 1
+
+
+def test_repair_surrounding_text(repairer):
+    response = repairer.repair(f"Вот ответ:\n{VALID_TEXT}\nНадеюсь, помог!", CombinationsResponse)
+
+    assert response == CombinationsResponse.model_validate(VALID)
+    assert repairer.fixes["surrounding_text"] == 1
+
+
+def test_repair_enum_case(repairer):
+    """Регистр enum / Literal приводится к значению из схемы"""
+    data: dict = json.loads(VALID_TEXT)
+    data["combinations"][0]["danger"] = "low"
+    data["combinations"][1]["kind"] = " Bad "
+
+    response = repairer.repair(json.dumps(data, ensure_ascii=False), CombinationsResponse)
+
+    assert response == CombinationsResponse.model_validate(VALID)
+    assert repairer.fixes["enum_case"] == 1
+
+
+def test_repair_truncated(repairer):
+    """Оборванный ответ: незаконченный элемент массива отбрасывается целиком"""
+    truncated: str = VALID_TEXT[:VALID_TEXT.index('"HIGH"') + 3]
+
+    response = repairer.repair(truncated, CombinationsResponse)
+
+    assert response == CombinationsResponse(combinations=[Combination(substance="кофеин", danger=Danger.LOW)])
+    assert repairer.fixes["truncated"] == 1
+
+
+def test_repair_truncated_not_allowed(repairer):
+    """allow_truncated=False: неполный ответ не чинится (его переспрашивают, а не кэшируют)"""
+    truncated: str = VALID_TEXT[:VALID_TEXT.index('"HIGH"') + 3]
+
+    assert repairer.repair(truncated, CombinationsResponse, allow_truncated=False) is None
+    assert repairer.repair(f"```json\n{VALID_TEXT}\n```", CombinationsResponse, allow_truncated=False) is not None
+
+
+def test_repair_unrepairable(repairer):
+    assert repairer.repair("Извините, не могу ответить", CombinationsResponse) is None
+    assert repairer.repair('{"combinations": [{"substance": "кофеин", "danger": "MEDIUM"}]}',
+                           CombinationsResponse) is None
+    assert not repairer.fixes
+
+
+# [ metrics ]
+def test_stats(repairer):
+    repairer.record(OUTCOME_VALID)
+    repairer.record(OUTCOME_VALID)
+    repairer.record(OUTCOME_REPAIRED)
+    repairer.record(OUTCOME_FAILED, CombinationsResponse)
+
+    stats = repairer.stats()
+
+    assert stats["outcomes"] == {OUTCOME_VALID: 2, OUTCOME_REPAIRED: 1, OUTCOME_FAILED: 1}
+    assert stats["failed_models"] == {"CombinationsResponse": 1}
+    assert stats["repair_rate"] == 0.25
@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+
+from drug_search.core.lexicon.enums import LLM_PRIORITY
+from drug_search.core.services.llm_scheduler import LLMScheduler, llm_call_context
+
+QUESTION = LLM_PRIORITY.QUESTION
+DRUG_CREATE = LLM_PRIORITY.DRUG_CREATE
+RESEARCH = LLM_PRIORITY.RESEARCH
+
+
+async def request(
+        scheduler: LLMScheduler,
+        granted: list[str],
+        name: str,
+        priority: LLM_PRIORITY = QUESTION,
+        user_key: str | None = None,
+        estimated_tokens: int = 10,
+        used_tokens: int | None = None,
+        release: asyncio.Event | None = None,
+) -> None:
+    """Один запрос к нейронке: порядок выдачи слотов пишется в granted"""
+    with llm_call_context(priority, user_key):
+        async with scheduler.slot(estimated_tokens) as ticket:
+            granted.append(name)
+            if release is not None:
+                await release.wait()
+            ticket.used_tokens = used_tokens
+
+
+async def hold_slot(scheduler: LLMScheduler) -> tuple[asyncio.Task, asyncio.Event]:
+    """Занять единственный слот, пока очередь набирается"""
+    release = asyncio.Event()
+    task = asyncio.create_task(request(scheduler, [], "blocker", release=release))
+    await asyncio.sleep(0)
+    return task, release
+
+
+async def enqueue(scheduler: LLMScheduler, granted: list[str], requests: list[tuple]) -> list[asyncio.Task]:
+    """Запросы (name, priority, user_key) встают в очередь в заданном порядке"""
+    tasks: list[asyncio.Task] = []
+    for name, priority, user_key in requests:
+        tasks.append(asyncio.create_task(request(scheduler, granted, name, priority, user_key)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+# [ context ]
+@pytest.mark.asyncio
+async def test_llm_call_context_inherits_user():
+    """Вложенный контекст без юзера наследует юзера внешнего"""
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    with llm_call_context(DRUG_CREATE, "42"):
+        with llm_call_context(RESEARCH):
+            async with scheduler.slot(1) as ticket:
+                assert (ticket.priority, ticket.user_key) == (RESEARCH, "42")
+
+
+@pytest.mark.asyncio
+async def test_default_context():
+    """Без llm_call_context — интерактивный приоритет"""
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async with scheduler.slot(1) as ticket:
+        assert ticket.priority == QUESTION
+        assert ticket.user_key is None
+
+
+# [ priority / fairness ]
+@pytest.mark.asyncio
+async def test_max_concurrency():
+    scheduler = LLMScheduler(max_concurrency=2)
+    release = asyncio.Event()
+    granted: list[str] = []
+
+    tasks = [asyncio.create_task(request(scheduler, granted, str(i), release=release)) for i in range(3)]
+    await asyncio.sleep(0)
+
+    assert granted == ["0", "1"]
+    assert scheduler.stats()["in_flight"] == 2
+    assert scheduler.stats()["priorities"]["QUESTION"]["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert granted == ["0", "1", "2"]
+    assert scheduler.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_strict_priority():
+    """Вопрос юзера обгоняет создание препарата и исследования, поставленные раньше"""
+    scheduler = LLMScheduler(max_concurrency=1)
+    blocker, release = await hold_slot(scheduler)
+    granted: list[str] = []
+
+    tasks = await enqueue(scheduler, granted, [
+        ("research", RESEARCH, "1"),
+        ("drug_create", DRUG_CREATE, "2"),
+        ("question", QUESTION, "3"),
+    ])
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert granted == ["question", "drug_create", "research"]
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_users():
+    """Внутри приоритета — по кругу между юзерами, а не по порядку постановки"""
+    scheduler = LLMScheduler(max_concurrency=1)
+    blocker, release = await hold_slot(scheduler)
+    granted: list[str] = []
+
+    tasks = await enqueue(scheduler, granted, [
+        ("a1", DRUG_CREATE, "a"),
+        ("a2", DRUG_CREATE, "a"),
+        ("a3", DRUG_CREATE, "a"),
+        ("b1", DRUG_CREATE, "b"),
+        ("c1", DRUG_CREATE, "c"),
+        ("b2", DRUG_CREATE, "b"),
+    ])
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert granted == ["a1", "b1", "c1", "a2", "b2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    """Отмененный в очереди запрос не занимает слот и не блокирует остальных"""
+    scheduler = LLMScheduler(max_concurrency=1)
+    blocker, release = await hold_slot(scheduler)
+    granted: list[str] = []
+
+    cancelled, waiting = await enqueue(scheduler, granted, [
+        ("cancelled", QUESTION, "a"),
+        ("waiting", QUESTION, "b"),
+    ])
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocker, waiting)
+
+    assert cancelled.cancelled()
+    assert granted == ["waiting"]
+    assert scheduler.stats()["in_flight"] == 0
+    assert scheduler.stats()["priorities"]["QUESTION"]["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_granted():
+    scheduler = LLMScheduler(max_concurrency=1)
+    blocker, release = await hold_slot(scheduler)
+
+    tasks = await enqueue(scheduler, [], [("r", RESEARCH, "1"), ("d", DRUG_CREATE, "1")])
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    priorities = scheduler.stats()["priorities"]
+    assert priorities["QUESTION"]["granted"] == 1
+    assert priorities["DRUG_CREATE"]["granted"] == 1
+    assert priorities["RESEARCH"]["granted"] == 1
+    assert priorities["RESEARCH"]["max_wait"] >= priorities["DRUG_CREATE"]["max_wait"]
+
+
+# [ token budget ]
+@pytest.mark.asyncio
+async def test_token_budget_waits():
+    """Запрос сверх остатка бюджета ждет восстановления; младший приоритет его не обгоняет"""
+    scheduler = LLMScheduler(max_concurrency=10, tokens_per_minute=6000)  # 100 токенов в секунду
+    granted: list[str] = []
+
+    await request(scheduler, granted, "first", estimated_tokens=5990)
+    waiting = asyncio.create_task(request(scheduler, granted, "second", QUESTION, estimated_tokens=20))
+    await asyncio.sleep(0)
+    small = asyncio.create_task(request(scheduler, granted, "small", RESEARCH, estimated_tokens=1))
+    await asyncio.sleep(0)
+
+    assert granted == ["first"]
+    assert scheduler.budget_waits >= 1
+
+    await asyncio.wait_for(asyncio.gather(waiting, small), timeout=2)
+    assert granted == ["first", "second", "small"]
+
+
+@pytest.mark.asyncio
+async def test_token_budget_uses_actual_usage():
+    """Фактический расход меньше оценки — разница возвращается в бюджет"""
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=1000)
+
+    await request(scheduler, [], "estimated", estimated_tokens=900, used_tokens=100)
+
+    assert scheduler.stats()["tokens_available"] >= 900
+
+
+@pytest.mark.asyncio
+async def test_request_bigger_than_budget():
+    """Запрос больше всего бюджета пропускается при полном бюджете"""
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=1000)
+    granted: list[str] = []
+
+    await asyncio.wait_for(request(scheduler, granted, "huge", estimated_tokens=5000), timeout=1)
+
+    assert granted == ["huge"]
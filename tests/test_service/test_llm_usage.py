@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+
+from drug_search.config import config
+from drug_search.core.lexicon import Prompts
+from drug_search.core.services.llm_usage import LLMUsageSink, LLM_OUTCOME_OK, LLM_OUTCOME_ERROR, UNKNOWN_PROMPT
+from drug_search.core.services.models_service.llm_usage_service import LLMUsageService
+
+
+@pytest.fixture
+def sink():
+    return LLMUsageSink(writer=None, max_size=10, batch_size=10, flush_interval=10)
+
+
+def records(sink: LLMUsageSink) -> list:
+    return [sink._queue.get_nowait() for _ in range(sink._queue.qsize())]
+
+
+# [ prompt_name ]
+def test_prompt_name_exact(sink):
+    assert sink.prompt_name(Prompts.GET_DRUG_DOSAGES) == "GET_DRUG_DOSAGES"
+    assert sink.prompt_name(Prompts.ANSWER_TO_QUESTION) == "ANSWER_TO_QUESTION"
+
+
+def test_prompt_name_composite(sink):
+    """Простой режим вопроса: ANSWER_TO_QUESTION + ANSWER_TO_QUESTION_SIMPLE_PREFIX — по началу промпта"""
+    prompt: str = Prompts.ANSWER_TO_QUESTION + Prompts.ANSWER_TO_QUESTION_SIMPLE_PREFIX
+
+    assert sink.prompt_name(prompt) == "ANSWER_TO_QUESTION"
+
+
+def test_prompt_name_longest_prefix(sink, monkeypatch):
+    """Из нескольких совпавших начал выбирается самое длинное"""
+    monkeypatch.setattr(sink, "_prompt_names", {"Ответь": "SHORT", "Ответь на вопрос": "LONG"})
+
+    assert sink.prompt_name("Ответь на вопрос подробно") == "LONG"
+
+
+def test_prompt_name_unknown(sink):
+    assert sink.prompt_name("произвольный промпт") == UNKNOWN_PROMPT
+
+
+# [ record ]
+@pytest.mark.asyncio
+async def test_record_deepseek_cache_hit(sink):
+    """DeepSeek: попадания в кэш промптов — prompt_cache_hit_tokens"""
+    usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=200, prompt_cache_hit_tokens=640)
+
+    sink.record(Prompts.ANSWER_TO_QUESTION + Prompts.ANSWER_TO_QUESTION_SIMPLE_PREFIX, usage, 1.2345, LLM_OUTCOME_OK)
+
+    [record] = records(sink)
+    assert (record.prompt_tokens, record.cached_tokens, record.completion_tokens) == (1000, 640, 200)
+    assert (record.prompt_name, record.feature) == ("ANSWER_TO_QUESTION", "question")
+    assert record.latency_ms == 1234
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_record_openai_cached_tokens(sink):
+    """OpenAI-формат: prompt_tokens_details.cached_tokens"""
+    usage = CompletionUsage(
+        prompt_tokens=500, completion_tokens=50, total_tokens=550,
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=128)
+    )
+
+    sink.record(Prompts.GET_DRUG_DOSAGES, usage, 0.5, LLM_OUTCOME_OK)
+
+    [record] = records(sink)
+    assert record.cached_tokens == 128
+    assert record.feature == "drug_creation"
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_record_without_usage(sink):
+    """Ошибка API: ответа нет — токены нулевые, запрос все равно учитывается"""
+    sink.record(Prompts.GET_DRUG_DOSAGES, None, 0.1, LLM_OUTCOME_ERROR)
+    sink.record(Prompts.GET_DRUG_DOSAGES, CompletionUsage(prompt_tokens=5, completion_tokens=1, total_tokens=6),
+                0.1, LLM_OUTCOME_OK)
+
+    first, second = records(sink)
+    assert (first.prompt_tokens, first.cached_tokens, first.completion_tokens) == (0, 0, 0)
+    assert second.cached_tokens == 0
+    await sink.stop()
+
+
+# [ cost_usd ]
+def test_cost_usd(monkeypatch):
+    monkeypatch.setattr(config, "LLM_PRICE_INPUT_CACHE_HIT", 0.1)
+    monkeypatch.setattr(config, "LLM_PRICE_INPUT_CACHE_MISS", 1.0)
+    monkeypatch.setattr(config, "LLM_PRICE_OUTPUT", 2.0)
+
+    # 600k из кэша + 400k промахов + 500k ответа
+    assert LLMUsageService.cost_usd(1_000_000, 600_000, 500_000) == pytest.approx(0.06 + 0.4 + 1.0)
+    assert LLMUsageService.cost_usd(0, 0, 0) == 0
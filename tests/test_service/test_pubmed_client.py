@@ -0,0 +1,253 @@
+import asyncio
+import datetime
+from xml.etree.ElementTree import fromstring
+
+import pytest
+from aiohttp import web
+
+from drug_search.core.services.pubmed_client import PubmedClient, parse_article
+from drug_search.core.utils.exceptions import PubmedError
+
+
+def make_article(pubmed_id: int, doi: bool = True) -> str:
+    """<PubmedArticle> в формате efetch (retmode=xml)"""
+    doi_id: str = f'<ArticleId IdType="doi">10.1000/{pubmed_id}</ArticleId>' if doi else ""
+    return f"""
+    <PubmedArticle>
+        <MedlineCitation>
+            <PMID Version="1">{pubmed_id}</PMID>
+            <Article>
+                <Journal><Title>Journal {pubmed_id}</Title></Journal>
+                <ArticleTitle>Effect of <i>drug</i> {pubmed_id}</ArticleTitle>
+                <Abstract>
+                    <AbstractText Label="BACKGROUND" NlmCategory="BACKGROUND">Background.</AbstractText>
+                    <AbstractText Label="RESULTS" NlmCategory="RESULTS">Results <sup>2</sup>.</AbstractText>
+                    <AbstractText Label="CONCLUSIONS" NlmCategory="CONCLUSIONS">Conclusion.</AbstractText>
+                </Abstract>
+                <AuthorList>
+                    <Author><LastName>Doe</LastName><ForeName>John</ForeName></Author>
+                    <Author><CollectiveName>Study Group</CollectiveName></Author>
+                </AuthorList>
+            </Article>
+        </MedlineCitation>
+        <PubmedData>
+            <History>
+                <PubMedPubDate PubStatus="received"><Year>2019</Year><Month>5</Month><Day>1</Day></PubMedPubDate>
+                <PubMedPubDate PubStatus="pubmed"><Year>2020</Year><Month>1</Month><Day>2</Day></PubMedPubDate>
+            </History>
+            <ArticleIdList>
+                <ArticleId IdType="pubmed">{pubmed_id}</ArticleId>
+                {doi_id}
+            </ArticleIdList>
+            <ReferenceList>
+                <Reference>
+                    <ArticleIdList>
+                        <ArticleId IdType="doi">10.9999/reference</ArticleId>
+                        <ArticleId IdType="pubmed">1</ArticleId>
+                    </ArticleIdList>
+                </Reference>
+            </ReferenceList>
+        </PubmedData>
+    </PubmedArticle>
+    """
+
+
+# [ parse_article ]
+def test_parse_article():
+    """Поля статьи из efetch XML: DOI и PMID самой статьи, а не из списка литературы"""
+    article = parse_article(fromstring(make_article(42)))
+
+    assert article is not None
+    assert article.pubmed_id == "42"
+    assert article.doi == "10.1000/42"
+    assert article.title == "Effect of drug 42"
+    assert article.journal == "Journal 42"
+    assert article.publication_date == datetime.date(2020, 1, 2)
+    assert article.authors == ["John Doe", "Study Group"]
+    assert article.abstract == "Background.\nResults 2.\nConclusion."
+    assert article.results == "Results 2."
+    assert article.conclusion == "Conclusion."
+
+
+def test_parse_article_without_doi():
+    """Статья без DOI пропускается"""
+    assert parse_article(fromstring(make_article(42, doi=False))) is None
+
+
+def test_parse_article_elocation_doi():
+    """DOI из ELocationID, если его нет в ArticleIdList"""
+    element = fromstring(make_article(42, doi=False))
+    element.find("MedlineCitation/Article").append(
+        fromstring('<ELocationID EIdType="doi" ValidYN="Y">10.1000/eloc</ELocationID>')
+    )
+
+    article = parse_article(element)
+
+    assert article is not None
+    assert article.doi == "10.1000/eloc"
+
+
+def test_parse_article_without_pubmed_date():
+    """Без даты появления в PubMed статья не разбирается"""
+    element = fromstring(make_article(42))
+    history = element.find("PubmedData/History")
+    history.remove(history.find("PubMedPubDate[@PubStatus='pubmed']"))
+
+    assert parse_article(element) is None
+
+
+# [ E-utilities на локальном сервере ]
+class PubmedFixtureServer:
+    """Локальный E-utilities: esearch / efetch с фикстурами и ответами 503 на первые fail_first запросов"""
+
+    def __init__(self, ids: list[int], fail_first: int = 0):
+        self.ids = ids
+        self.fail_first = fail_first
+        self.requests: list[tuple[str, float, dict]] = []  # (endpoint, время, параметры)
+
+    async def _fail(self) -> web.Response | None:
+        if self.fail_first:
+            self.fail_first -= 1
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        return None
+
+    async def esearch(self, request: web.Request) -> web.Response:
+        self.requests.append(("esearch", asyncio.get_running_loop().time(), dict(request.query)))
+        if failed := await self._fail():
+            return failed
+        retmax: int = int(request.query["retmax"])
+        return web.json_response({
+            "esearchresult": {"count": str(len(self.ids)), "idlist": [str(i) for i in self.ids[:retmax]]}
+        })
+
+    async def efetch(self, request: web.Request) -> web.Response:
+        params: dict = dict(request.query) if request.method == "GET" else dict(await request.post())
+        self.requests.append(("efetch", asyncio.get_running_loop().time(), params))
+        if failed := await self._fail():
+            return failed
+        ids: list[int] = [int(pubmed_id) for pubmed_id in params["id"].split(",")]
+        body: str = "".join(make_article(pubmed_id, doi=pubmed_id % 3 != 0) for pubmed_id in ids)
+        return web.Response(text=f"<PubmedArticleSet>{body}</PubmedArticleSet>", content_type="text/xml")
+
+
+@pytest.fixture
+async def pubmed_server():
+    """Запуск фикстурного сервера на свободном порту: (сервер, base_url)"""
+    runners: list[web.AppRunner] = []
+
+    async def start(ids: list[int], fail_first: int = 0) -> tuple[PubmedFixtureServer, str]:
+        server = PubmedFixtureServer(ids, fail_first)
+        app = web.Application()
+        app.router.add_route("*", "/esearch.fcgi", server.esearch)
+        app.router.add_route("*", "/efetch.fcgi", server.efetch)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+
+        port: int = runner.addresses[0][1]
+        return server, f"http://127.0.0.1:{port}"
+
+    yield start
+
+    for runner in runners:
+        await runner.cleanup()
+
+
+@pytest.fixture
+async def make_client():
+    clients: list[PubmedClient] = []
+
+    def make(base_url: str, **kwargs) -> PubmedClient:
+        kwargs.setdefault("requests_per_second", 100)
+        client = PubmedClient(base_url=base_url, **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+
+    for client in clients:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_esearch(pubmed_server, make_client):
+    server, base_url = await pubmed_server(list(range(1, 8)))
+    client = make_client(base_url)
+
+    search = await client.esearch("aspirin", max_results=5, mindate=datetime.date(2024, 3, 1))
+
+    assert search.count == 7
+    assert search.ids == ["1", "2", "3", "4", "5"]
+    _, _, params = server.requests[0]
+    assert params["term"] == "aspirin"
+    assert params["datetype"] == "edat"
+    assert params["mindate"] == "2024/03/01"
+    assert "usehistory" not in params
+
+
+@pytest.mark.asyncio
+async def test_efetch_ids_batches(pubmed_server, make_client):
+    """Пачки по batch_size, статьи без DOI пропускаются"""
+    server, base_url = await pubmed_server(list(range(1, 8)))
+    client = make_client(base_url, batch_size=3)
+
+    articles = await client.efetch_ids([str(i) for i in range(1, 8)])
+
+    assert [article.pubmed_id for article in articles] == ["1", "2", "4", "5", "7"]
+    assert len([request for request in server.requests if request[0] == "efetch"]) == 3
+    assert client.stats()["articles_parsed"] == 5
+    assert client.stats()["articles_skipped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_efetch_long_id_list_uses_post(pubmed_server, make_client):
+    """Длинный список id уходит формой POST (ограничение длины URL)"""
+    ids: list[int] = list(range(100_000, 100_300))
+    server, base_url = await pubmed_server(ids)
+    client = make_client(base_url, batch_size=300)
+
+    articles = await client.efetch_ids([str(i) for i in ids])
+
+    assert len(articles) == len([i for i in ids if i % 3 != 0])
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_on_server_error(pubmed_server, make_client):
+    """503 повторяется (Retry-After), счетчик повторов растет"""
+    server, base_url = await pubmed_server([1, 2], fail_first=2)
+    client = make_client(base_url, max_retries=3)
+
+    search = await client.esearch("aspirin", max_results=10)
+
+    assert search.ids == ["1", "2"]
+    assert len(server.requests) == 3
+    assert client.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_exhausted(pubmed_server, make_client):
+    server, base_url = await pubmed_server([1, 2], fail_first=10)
+    client = make_client(base_url, max_retries=2)
+
+    with pytest.raises(PubmedError):
+        await client.esearch("aspirin", max_results=10)
+    assert len(server.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_throttling(pubmed_server, make_client):
+    """Параллельные запросы уходят не чаще requests_per_second"""
+    server, base_url = await pubmed_server(list(range(1, 10)))
+    client = make_client(base_url, requests_per_second=10, batch_size=2)
+
+    await client.efetch_ids([str(i) for i in range(1, 10)])
+
+    started: list[float] = sorted(started_at for _, started_at, _ in server.requests)
+    assert len(started) == 5
+    # 5 запросов при 10 в секунду — не быстрее 0.4 с от первого до последнего
+    assert started[-1] - started[0] >= 0.4 - 0.02
+    assert all(later - earlier >= 0.1 - 0.02 for earlier, later in zip(started, started[1:]))
@@ -0,0 +1,183 @@
+import datetime
+from typing import Optional, Sequence
+
+import pytest
+
+from drug_search.core.schemas import PubmedResearchSchema
+from drug_search.core.services.pubmed_client import PubmedSearchResult
+from drug_search.core.services.pubmed_service import PubmedService
+
+
+def article(pubmed_id: str, doi: Optional[str] = None) -> PubmedResearchSchema:
+    return PubmedResearchSchema(
+        title=f"Title {pubmed_id}", authors=["John Doe"], doi=doi or f"10.1000/{pubmed_id}", journal="Journal",
+        publication_date=datetime.date(2025, 1, 1), pubmed_id=pubmed_id,
+    )
+
+
+def search(*ids: str) -> PubmedSearchResult:
+    return PubmedSearchResult(count=len(ids), ids=list(ids))
+
+
+class FakePubmedClient:
+    """esearch / efetch_ids по фикстурам; PMID из no_doi разбираются в «статью без DOI» (пропускаются)"""
+
+    def __init__(self, searches: dict[str, list[str]], no_doi: Sequence[str] = ()):
+        self.searches = searches
+        self.no_doi = set(no_doi)
+        self.efetch_calls: list[list[str]] = []
+
+    async def esearch(self, query: str, max_results: int, mindate=None) -> PubmedSearchResult:
+        return search(*self.searches[query][:max_results])
+
+    async def efetch_ids(self, pubmed_ids: list[str]) -> list[PubmedResearchSchema]:
+        self.efetch_calls.append(list(pubmed_ids))
+        return [article(pubmed_id) for pubmed_id in pubmed_ids if pubmed_id not in self.no_doi]
+
+
+class FakeArticleStore:
+    def __init__(self, articles: dict[str, Optional[PubmedResearchSchema]] = None):
+        self.articles = articles or {}
+        self.saved: list[tuple[list[str], list[str]]] = []
+
+    async def get_articles(self, pubmed_ids: Sequence[str]) -> dict[str, Optional[PubmedResearchSchema]]:
+        return {pubmed_id: self.articles[pubmed_id] for pubmed_id in pubmed_ids if pubmed_id in self.articles}
+
+    async def save_articles(self, pubmed_ids: Sequence[str], articles: Sequence[PubmedResearchSchema]) -> None:
+        self.saved.append((list(pubmed_ids), [item.pubmed_id for item in articles]))
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(PubmedService, "_instance", None)
+
+    def make(client: FakePubmedClient, store: FakeArticleStore = None) -> PubmedService:
+        service = PubmedService(assistant_service=None)
+        service.pubmed = client
+        service.article_store = store or FakeArticleStore()
+        return service
+
+    return make
+
+
+def pubmed_ids(researches: list[PubmedResearchSchema]) -> list[str]:
+    return [research.pubmed_id for research in researches]
+
+
+# [ _merge_searches ]
+def test_merge_budget_per_query():
+    fetched = {pubmed_id: article(pubmed_id) for pubmed_id in "12345"}
+
+    researches, missing = PubmedService._merge_searches([search("1", "2", "3"), search("4", "5")], fetched, 2)
+
+    assert pubmed_ids(researches) == ["1", "2", "4", "5"]
+    assert missing == []
+
+
+def test_merge_dedup_by_pmid_and_doi():
+    """Статья достается первому запросу; дубль по PMID или DOI не занимает бюджет следующего"""
+    fetched = {
+        "1": article("1"), "2": article("2"), "3": article("3", doi="10.1000/1"), "4": article("4"),
+    }
+
+    researches, missing = PubmedService._merge_searches([search("1", "2"), search("2", "3", "4")], fetched, 2)
+
+    assert pubmed_ids(researches) == ["1", "2", "4"]
+    assert missing == []
+
+
+def test_merge_missing_fill_budget():
+    """Нескачанные PMID — сколько не хватает до бюджета; докачиваемый для другого запроса не считается"""
+    fetched = {"1": article("1"), "2": article("2")}
+
+    researches, missing = PubmedService._merge_searches(
+        [search("1", "3", "4", "5"), search("2", "3", "6", "7")], fetched, 3
+    )
+
+    assert pubmed_ids(researches) == ["1", "2"]
+    assert missing == ["3", "4", "6", "7"]
+
+
+def test_merge_skips_unusable():
+    """None (статья без DOI) пропускается, бюджет добирается следующими"""
+    fetched = {"1": None, "2": article("2"), "3": article("3")}
+
+    researches, missing = PubmedService._merge_searches([search("1", "2", "3")], fetched, 2)
+
+    assert pubmed_ids(researches) == ["2", "3"]
+    assert missing == []
+
+
+def test_merge_deterministic():
+    """Порядок результата — порядок запросов и релевантности, а не порядок скачивания"""
+    searches = [search("3", "1"), search("2", "1", "4")]
+    forward = {pubmed_id: article(pubmed_id) for pubmed_id in "1234"}
+    backward = dict(reversed(list(forward.items())))
+
+    assert pubmed_ids(PubmedService._merge_searches(searches, forward, 5)[0]) == ["3", "1", "2", "4"]
+    assert PubmedService._merge_searches(searches, backward, 5)[0] == PubmedService._merge_searches(
+        searches, forward, 5
+    )[0]
+
+
+# [ search_researches ]
+@pytest.mark.asyncio
+async def test_search_single_fetch_for_shared_articles(make_service):
+    """Общие для запросов статьи скачиваются один раз, одним efetch"""
+    client = FakePubmedClient({"dosages": ["1", "2"], "mechanism": ["2", "3"]})
+    service = make_service(client)
+
+    researches = await service.search_researches(["dosages", "mechanism"], max_articles=2, max_results=10)
+
+    assert pubmed_ids(researches) == ["1", "2", "3"]
+    assert client.efetch_calls == [["1", "2", "3"]]
+    assert service.article_store.saved == [(["1", "2", "3"], ["1", "2", "3"])]
+
+
+@pytest.mark.asyncio
+async def test_search_shared_missing_article_one_round(make_service):
+    """Статья, нужная двум запросам, докачивается для первого — второй добирает бюджет в том же раунде"""
+    client = FakePubmedClient({"dosages": ["1", "3", "4"], "mechanism": ["2", "3", "6", "7"]})
+    service = make_service(client, FakeArticleStore({"1": article("1"), "2": article("2")}))
+
+    researches = await service.search_researches(["dosages", "mechanism"], max_articles=3, max_results=10)
+
+    assert pubmed_ids(researches) == ["1", "3", "4", "2", "6", "7"]
+    assert client.efetch_calls == [["3", "4", "6", "7"]]
+
+
+@pytest.mark.asyncio
+async def test_search_refill_after_no_doi(make_service):
+    """Статьи без DOI: бюджет добирается следующим раундом, только недостающими PMID"""
+    client = FakePubmedClient({"dosages": ["1", "2", "3", "4", "5"]}, no_doi=["1", "2"])
+    service = make_service(client)
+
+    researches = await service.search_researches(["dosages"], max_articles=2, max_results=10)
+
+    assert pubmed_ids(researches) == ["3", "4"]
+    assert client.efetch_calls == [["1", "2"], ["3", "4"]]
+
+
+@pytest.mark.asyncio
+async def test_search_uses_article_store(make_service):
+    """Статьи из хранилища (и известные непригодные) в PubMed не скачиваются"""
+    client = FakePubmedClient({"dosages": ["1", "2", "3"]})
+    store = FakeArticleStore({"1": article("1"), "2": None})
+    service = make_service(client, store)
+
+    researches = await service.search_researches(["dosages"], max_articles=2, max_results=10)
+
+    assert pubmed_ids(researches) == ["1", "3"]
+    assert client.efetch_calls == [["3"]]
+
+
+@pytest.mark.asyncio
+async def test_search_terminates_when_results_run_out(make_service):
+    """Результатов меньше бюджета, все без DOI — цикл заканчивается, ничего не скачивается повторно"""
+    client = FakePubmedClient({"dosages": ["1", "2"], "mechanism": []}, no_doi=["1", "2"])
+    service = make_service(client)
+
+    researches = await service.search_researches(["dosages", "mechanism"], max_articles=5, max_results=10)
+
+    assert researches == []
+    assert client.efetch_calls == [["1", "2"]]
@@ -0,0 +1,129 @@
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from pydantic import BaseModel, ValidationError
+
+from drug_search.config import config
+from drug_search.core.services import assistant_service as assistant_service_module
+from drug_search.core.services.assistant_service import AssistantService
+from drug_search.core.services.json_repair import OUTCOME_REPAIRED, OUTCOME_REASK_REPAIRED, OUTCOME_FAILED
+
+VALID_TEXT: str = '{"pubmed_query": "aspirin[tiab]", "limit": 10}'
+
+
+class QueryResponse(BaseModel):
+    pubmed_query: str
+    limit: int
+
+
+def validation_error(raw_response: str) -> ValidationError:
+    try:
+        QueryResponse.model_validate_json(raw_response)
+    except ValidationError as ex:
+        return ex
+    raise AssertionError("ответ валиден")
+
+
+def completion(content: str, finish_reason: str = "stop") -> ChatCompletion:
+    return ChatCompletion(
+        id="1", created=0, model="deepseek-chat", object="chat.completion",
+        choices=[Choice(
+            index=0, finish_reason=finish_reason, message=ChatCompletionMessage(role="assistant", content=content)
+        )],
+    )
+
+
+@pytest.fixture
+def assistant(monkeypatch):
+    """AssistantService без сети: повторный запрос — из reask_responses, вызовы пишутся в reasks"""
+    monkeypatch.setattr(config, "LLM_JSON_REPAIR_REASK", True)
+    monkeypatch.setattr(assistant_service_module.llm_usage_sink, "record", lambda *args, **kwargs: None)
+    service = AssistantService()
+    service.reask_responses = []
+    service.reasks = []
+
+    async def reask_json(raw_response, error, pydantic_model, max_tokens):
+        service.reasks.append(raw_response)
+        return service.reask_responses.pop(0)
+
+    service._reask_json = reask_json
+    return service
+
+
+async def repair(assistant: AssistantService, raw_response: str, is_truncated: bool = False):
+    return await assistant._repair_response(
+        raw_response, validation_error(raw_response), "aspirin", QueryResponse, 100, is_truncated=is_truncated
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_fix(assistant):
+    """Локальный ремонт — без повторного запроса"""
+    response, outcome = await repair(assistant, f"```json\n{VALID_TEXT}\n```")
+
+    assert response == QueryResponse.model_validate_json(VALID_TEXT)
+    assert outcome == OUTCOME_REPAIRED
+    assert assistant.reasks == []
+
+
+@pytest.mark.asyncio
+async def test_reask_repaired(assistant):
+    assistant.reask_responses = [VALID_TEXT]
+
+    response, outcome = await repair(assistant, '{"pubmed_query": "aspirin[tiab]"}')
+
+    assert response == QueryResponse.model_validate_json(VALID_TEXT)
+    assert outcome == OUTCOME_REASK_REPAIRED
+    assert assistant.reasks == ['{"pubmed_query": "aspirin[tiab]"}']
+
+
+@pytest.mark.asyncio
+async def test_reask_repaired_locally(assistant):
+    """Ответ повторного запроса тоже проходит локальный ремонт"""
+    assistant.reask_responses = [f"Исправленный JSON:\n{VALID_TEXT}"]
+
+    response, outcome = await repair(assistant, '{"pubmed_query": "aspirin[tiab]"}')
+
+    assert response.limit == 10
+    assert outcome == OUTCOME_REASK_REPAIRED
+
+
+@pytest.mark.asyncio
+async def test_reask_failed(assistant):
+    assistant.reask_responses = ['{"pubmed_query": "aspirin[tiab]", "limit": "много"}']
+
+    with pytest.raises(ValueError):
+        await repair(assistant, '{"pubmed_query": "aspirin[tiab]"}')
+    assert len(assistant.reasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_truncated_not_reasked(assistant):
+    """Оборванный по max_tokens ответ локально не закрывается и не переспрашивается"""
+    with pytest.raises(ValueError):
+        await repair(assistant, '{"pubmed_query": "aspirin[tiab]", "limit": 1', is_truncated=True)
+    assert assistant.reasks == []
+
+
+@pytest.mark.asyncio
+async def test_get_response_finish_reason_length(assistant, monkeypatch):
+    """finish_reason == "length" из ответа API доходит до _repair_response"""
+    outcomes: list[str] = []
+    monkeypatch.setattr(
+        assistant_service_module.llm_usage_sink, "record",
+        lambda prompt, usage, latency, outcome, **kwargs: outcomes.append(outcome)
+    )
+
+    async def check_balance():
+        pass
+
+    async def complete(prompt, input_query, temperature, max_tokens):
+        return completion('{"pubmed_query": "aspirin[t', finish_reason="length"), 0.1
+
+    assistant.check_balance = check_balance
+    assistant._complete = complete
+
+    with pytest.raises(ValueError):
+        await assistant._get_response("aspirin", "prompt", QueryResponse, 0.3, 100)
+    assert assistant.reasks == []
+    assert outcomes == [OUTCOME_FAILED]
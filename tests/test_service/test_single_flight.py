@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from drug_search.core.services.cache_logic.single_flight import SingleFlight
+
+
+class Loader:
+    """Загрузка, которая висит до release; calls — сколько раз ее вызвали"""
+
+    def __init__(self, result="результат", error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.calls: int = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return f"{self.result} {self.calls}"
+
+
+async def start(single_flight: SingleFlight, loader: Loader, count: int, key="aspirin") -> list[asyncio.Task]:
+    tasks = [asyncio.create_task(single_flight.do(key, loader)) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_followers_share_result():
+    single_flight = SingleFlight("test")
+    loader = Loader()
+    tasks = await start(single_flight, loader, 5)
+
+    loader.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == ["результат 1"] * 5
+    assert loader.calls == 1
+    assert single_flight.stats() == {
+        "name": "test", "in_flight": 0, "calls": 1, "collapsed": 4, "collapsed_remote": 0, "leader_cancelled": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_different_keys_not_collapsed():
+    single_flight = SingleFlight("test")
+    loader = Loader()
+    tasks = [asyncio.create_task(single_flight.do(key, loader)) for key in ("aspirin", ("drug", "ibuprofen"))]
+    await asyncio.sleep(0)
+
+    loader.release.set()
+    await asyncio.gather(*tasks)
+
+    assert loader.calls == 2
+    assert single_flight.collapsed == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_waiter():
+    single_flight = SingleFlight("test")
+    loader = Loader(error=RuntimeError("API недоступен"))
+    tasks = await start(single_flight, loader, 3)
+
+    loader.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert [str(result) for result in results] == ["API недоступен"] * 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_cancel_does_not_cancel_followers():
+    """Отмена лидера (клиент ушел): ожидающие не отменяются — один из них повторяет загрузку"""
+    single_flight = SingleFlight("test")
+    loader = Loader()
+    leader, *followers = await start(single_flight, loader, 3)
+
+    leader.cancel()
+    await asyncio.sleep(0.01)
+    loader.release.set()
+    results = await asyncio.gather(*followers)
+
+    assert leader.cancelled()
+    assert results == ["результат 2"] * 2
+    assert loader.calls == 2
+    assert single_flight.leader_cancelled == 2
+    assert single_flight.collapsed == 1
+
+
+@pytest.mark.asyncio
+async def test_follower_cancel_does_not_cancel_leader():
+    single_flight = SingleFlight("test")
+    loader = Loader()
+    leader, follower = await start(single_flight, loader, 2)
+
+    follower.cancel()
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await leader == "результат 1"
+    assert follower.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_key_released_after_completion():
+    """После загрузки (успешной или с ошибкой) ключ свободен — следующий вызов грузит заново"""
+    single_flight = SingleFlight("test")
+    loader = Loader(error=RuntimeError("API недоступен"))
+    loader.release.set()
+
+    with pytest.raises(RuntimeError):
+        await single_flight.do("aspirin", loader)
+    assert single_flight.stats()["in_flight"] == 0
+
+    loader.error = None
+    assert await single_flight.do("aspirin", loader) == "результат 2"
+    assert await single_flight.do("aspirin", loader) == "результат 3"
+    assert single_flight.stats()["in_flight"] == 0
+    assert single_flight.collapsed == 0
@@ -0,0 +1,214 @@
+import uuid
+from typing import Optional, Sequence
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from drug_search.core.schemas import TokenBalanceSchema
+from drug_search.core.services.cache_logic.token_ledger import TokenLedger, TokenLedgerError
+from drug_search.core.services.models_service import user_service as user_service_module
+from drug_search.core.services.models_service.user_service import UserService
+
+
+class FakeUsersTable:
+    """users + token_ledger_cursors в памяти: снимки и применение дельт, как в UserRepository"""
+
+    def __init__(self):
+        self.balances: dict[uuid.UUID, TokenBalanceSchema] = {}
+        self.cursor: str = "0-0"
+
+    def add_user(self, allowed: int, additional: int = 0, used: int = 0) -> uuid.UUID:
+        user_id = uuid.uuid4()
+        self.balances[user_id] = TokenBalanceSchema(
+            allowed_tokens=allowed, additional_tokens=additional, used_tokens=used
+        )
+        return user_id
+
+    async def get_token_ledger_cursor(self) -> str:
+        return self.cursor
+
+    async def get_token_balance_snapshots(
+            self,
+            user_ids: Sequence[uuid.UUID]
+    ) -> tuple[dict[uuid.UUID, TokenBalanceSchema], str]:
+        return {user_id: self.balances[user_id] for user_id in user_ids if user_id in self.balances}, self.cursor
+
+    async def get_token_balance_snapshot(self, user_id: uuid.UUID) -> Optional[tuple[TokenBalanceSchema, str]]:
+        if user_id not in self.balances:
+            return None
+        return self.balances[user_id], self.cursor
+
+    async def apply_token_ledger_deltas(
+            self,
+            deltas: dict[uuid.UUID, tuple[int, int, int]],
+            previous_entry_id: str,
+            last_entry_id: str,
+    ) -> bool:
+        if self.cursor != previous_entry_id:
+            return False
+        for user_id, (allowed, additional, used) in deltas.items():
+            balance: TokenBalanceSchema = self.balances[user_id]
+            self.balances[user_id] = TokenBalanceSchema(
+                allowed_tokens=balance.allowed_tokens + allowed,
+                additional_tokens=balance.additional_tokens + additional,
+                used_tokens=balance.used_tokens + used
+            )
+        self.cursor = last_entry_id
+        return True
+
+    def loader(self, user_id: uuid.UUID):
+        return lambda: self.get_token_balance_snapshot(user_id)
+
+
+@pytest.fixture
+async def redis():
+    client = FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+def ledger(redis):
+    return TokenLedger(redis=redis, balance_ttl=600, flush_batch_size=2)
+
+
+@pytest.fixture
+def users():
+    return FakeUsersTable()
+
+
+def balance(allowed: int, additional: int, used: int) -> TokenBalanceSchema:
+    return TokenBalanceSchema(allowed_tokens=allowed, additional_tokens=additional, used_tokens=used)
+
+
+# [ DEBIT / CREDIT ]
+@pytest.mark.asyncio
+async def test_debit_allowed_then_additional(ledger, users):
+    """Списание сначала из allowed, остаток — из additional (как decrease_tokens)"""
+    user_id = users.add_user(allowed=3, additional=5)
+
+    is_charged, after = await ledger.debit(user_id, 2, users.loader(user_id))
+    assert is_charged
+    assert after == balance(1, 5, 1)
+
+    is_charged, after = await ledger.debit(user_id, 3, users.loader(user_id))
+    assert is_charged
+    assert after == balance(0, 3, 2)
+    assert await ledger.pending_entries() == 2
+
+
+@pytest.mark.asyncio
+async def test_debit_not_enough_tokens(ledger, users):
+    """Не хватает allowed + additional — ничего не списывается и не пишется в stream"""
+    user_id = users.add_user(allowed=1, additional=1)
+
+    is_charged, after = await ledger.debit(user_id, 3, users.loader(user_id))
+
+    assert not is_charged
+    assert after == balance(1, 1, 0)
+    assert await ledger.pending_entries() == 0
+
+
+@pytest.mark.asyncio
+async def test_debit_unknown_user(ledger, users):
+    is_charged, after = await ledger.debit(uuid.uuid4(), 1, users.loader(uuid.uuid4()))
+
+    assert not is_charged
+    assert after is None
+
+
+@pytest.mark.asyncio
+async def test_credit_before_seed(ledger, users):
+    """Начисление без зеркала — только запись stream, заполнение из БД ее учитывает"""
+    user_id = users.add_user(allowed=0, additional=1)
+
+    await ledger.credit(user_id, 10)
+
+    assert await ledger.get_balance(user_id, users.loader(user_id)) == balance(0, 11, 0)
+
+
+@pytest.mark.asyncio
+async def test_seed_with_stale_cursor(ledger, users):
+    """Курсор Redis не совпадает с БД — баланс не заполняется"""
+    user_id = users.add_user(allowed=5)
+    users.cursor = "1-0"
+
+    with pytest.raises(TokenLedgerError):
+        await ledger.get_balance(user_id, users.loader(user_id))
+
+
+# [ FLUSH ]
+@pytest.mark.asyncio
+async def test_flush_applies_deltas(ledger, users, redis):
+    """Дельты пачками попадают в users, курсор сдвигается, примененные записи удаляются"""
+    first = users.add_user(allowed=10)
+    second = users.add_user(allowed=0, additional=4)
+    await ledger.debit(first, 3, users.loader(first))
+    await ledger.debit(first, 2, users.loader(first))
+    await ledger.debit(second, 1, users.loader(second))
+    await ledger.credit(second, 5)
+
+    applied: int = await ledger.flush(users.cursor, users.apply_token_ledger_deltas)
+
+    assert applied == 4
+    assert users.balances[first] == balance(5, 0, 2)
+    assert users.balances[second] == balance(0, 8, 1)
+    assert await redis.get(TokenLedger.CURSOR_KEY) == users.cursor
+    assert await ledger.pending_entries() == 0
+
+    # зеркало, собранное заново после flush, совпадает с БД
+    await ledger.drop(first)
+    assert await ledger.get_balance(first, users.loader(first)) == users.balances[first]
+
+
+@pytest.mark.asyncio
+async def test_flush_cursor_moved(ledger, users):
+    """Курсор БД сдвинут другим flush — пачка не применяется повторно"""
+    user_id = users.add_user(allowed=10)
+    await ledger.debit(user_id, 1, users.loader(user_id))
+
+    async def concurrent_apply(deltas, previous_entry_id, last_entry_id):
+        return False
+
+    assert await ledger.flush(users.cursor, concurrent_apply) == 0
+    assert users.balances[user_id] == balance(10, 0, 0)
+    assert await ledger.pending_entries() == 1
+
+
+@pytest.mark.asyncio
+async def test_set_allowed_keeps_pending_debits(ledger, users):
+    """Сброс лимита — компенсирующая дельта: неприменённое списание не списывается повторно"""
+    user_id = users.add_user(allowed=10, additional=2)
+    await ledger.debit(user_id, 7, users.loader(user_id))
+
+    after = await ledger.set_allowed(user_id, 50, users.loader(user_id))
+    assert after == balance(50, 2, 1)
+
+    await ledger.flush(users.cursor, users.apply_token_ledger_deltas)
+    assert users.balances[user_id] == balance(50, 2, 1)
+
+
+# [ RECONCILIATION ]
+@pytest.mark.asyncio
+async def test_reconcile(ledger, users, redis, monkeypatch):
+    """Сверка находит зеркало, разошедшееся с users + неприменёнными дельтами; repair его сбрасывает"""
+    monkeypatch.setattr(user_service_module, "token_ledger", ledger)
+    service = UserService(repo=users)
+
+    consistent = users.add_user(allowed=10)
+    broken = users.add_user(allowed=10)
+    await ledger.debit(consistent, 1, users.loader(consistent))
+    await ledger.debit(broken, 1, users.loader(broken))
+    await redis.hset(f"tokens:balance:{broken}", "allowed", 100)
+
+    report = await service.reconcile_token_ledger()
+    assert report.checked == 2
+    assert report.pending_entries == 2
+    assert [mismatch.user_id for mismatch in report.mismatches] == [broken]
+    assert report.mismatches[0].cached == balance(100, 0, 1)
+    assert report.mismatches[0].expected == balance(9, 0, 1)
+
+    report = await service.reconcile_token_ledger(repair=True)
+    assert report.repaired == 1
+    assert await ledger.get_balance(broken, users.loader(broken)) == balance(9, 0, 1)
+    assert not (await service.reconcile_token_ledger()).mismatches
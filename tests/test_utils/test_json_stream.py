@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from drug_search.core.utils.json_stream import JsonStreamParser, ANY_INDEX
+
+ANSWER: dict = {
+    "header": "Кофе и \"таблетки\"",
+    "blocks_content": [
+        {"blocks_header": "Первый {блок}", "content": ["a, b", "c\\d"], "weight": 1.5},
+        {"blocks_header": "Второй [блок]", "content": [], "is_final": True, "note": None},
+    ],
+    "conclusion": "Итог — ok",
+}
+ANSWER_TEXT: str = json.dumps(ANSWER, ensure_ascii=False, indent=2)
+
+PATHS: list[tuple] = [
+    ("header",),
+    ("blocks_content", ANY_INDEX, "blocks_header"),
+    ("blocks_content", ANY_INDEX, "content", ANY_INDEX),
+    ("blocks_content", ANY_INDEX, "weight"),
+    ("blocks_content", ANY_INDEX, "is_final"),
+    ("blocks_content", ANY_INDEX, "note"),
+    (),
+]
+
+EXPECTED_EVENTS: list[tuple] = [
+    (("header",), "Кофе и \"таблетки\""),
+    (("blocks_content", 0, "blocks_header"), "Первый {блок}"),
+    (("blocks_content", 0, "content", 0), "a, b"),
+    (("blocks_content", 0, "content", 1), "c\\d"),
+    (("blocks_content", 0, "weight"), 1.5),
+    (("blocks_content", 1, "blocks_header"), "Второй [блок]"),
+    (("blocks_content", 1, "is_final"), True),
+    (("blocks_content", 1, "note"), None),
+    ((), ANSWER),
+]
+
+
+def feed_chunks(parser: JsonStreamParser, chunks: list[str]) -> list[tuple]:
+    return [event for chunk in chunks for event in parser.feed(chunk)]
+
+
+def test_whole_text():
+    parser = JsonStreamParser(PATHS)
+
+    assert parser.feed(ANSWER_TEXT) == EXPECTED_EVENTS
+    assert parser.text == ANSWER_TEXT
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16])
+def test_chunked(chunk_size):
+    """Разбиение на части (в т.ч. внутри строк, escape-последовательностей и чисел) не меняет результат"""
+    chunks: list[str] = [ANSWER_TEXT[i:i + chunk_size] for i in range(0, len(ANSWER_TEXT), chunk_size)]
+
+    assert feed_chunks(JsonStreamParser(PATHS), chunks) == EXPECTED_EVENTS
+
+
+def test_every_split_point():
+    for split in range(1, len(ANSWER_TEXT)):
+        parser = JsonStreamParser(PATHS)
+        assert feed_chunks(parser, [ANSWER_TEXT[:split], ANSWER_TEXT[split:]]) == EXPECTED_EVENTS, split
+
+
+def test_value_emitted_when_finished():
+    """Значение отдается, как только закончилось, а не в конце ответа"""
+    parser = JsonStreamParser([("header",), ("items", ANY_INDEX)])
+
+    assert parser.feed('{"header": "Загол') == []
+    assert parser.feed('овок", "items": [1') == [(("header",), "Заголовок")]
+    assert parser.feed(", 2") == [(("items", 0), 1)]
+    assert parser.feed("]") == [(("items", 1), 2)]
+
+
+def test_nested_containers():
+    """Подписка на объект / массив целиком"""
+    parser = JsonStreamParser([("blocks_content", ANY_INDEX), ("blocks_content", 1, "content")])
+
+    events = parser.feed(ANSWER_TEXT)
+
+    assert events == [
+        (("blocks_content", 0), ANSWER["blocks_content"][0]),
+        (("blocks_content", 1, "content"), []),
+        (("blocks_content", 1), ANSWER["blocks_content"][1]),
+    ]
+
+
+def test_exact_index():
+    parser = JsonStreamParser([("blocks_content", 1, "blocks_header")])
+
+    assert parser.feed(ANSWER_TEXT) == [(("blocks_content", 1, "blocks_header"), "Второй [блок]")]
+
+
+def test_keys_are_not_values():
+    """Ключи объектов не отдаются как значения"""
+    parser = JsonStreamParser([("header",), ("conclusion",)])
+
+    assert parser.feed('{"header": "conclusion", "conclusion": "header"}') == [
+        (("header",), "conclusion"),
+        (("conclusion",), "header"),
+    ]
+
+
+def test_text_after_root_ignored():
+    """После закрытия корня разбор останавливается"""
+    parser = JsonStreamParser([(), ("a",)])
+
+    assert parser.feed('{"a": 1} {"a": 2}') == [(("a",), 1), ((), {"a": 1})]
+    assert parser.feed(' {"a": 3}') == []